@@ -2,6 +2,8 @@ from django.contrib import admin
 from .models.appointment import Appointment
 from .models.appointment_status import AppointmentStatus
 from .models.ticket import Ticket
+from .models.payment_entry import PaymentEntry
+from .services.payment_ledger_service import payment_ledger
 
 
 @admin.register(AppointmentStatus)
@@ -139,13 +141,19 @@ class TicketAdmin(admin.ModelAdmin):
 
     def mark_as_paid(self, request, queryset):
         """Acción para marcar tickets como pagados"""
+        ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(status='paid')
+        # update() no dispara señales: el libro de pagos se ajusta aquí
+        payment_ledger.tickets_changed(ids)
         self.message_user(request, f'{updated} tickets marcados como pagados.')
     mark_as_paid.short_description = "Marcar como pagado"
 
     def mark_as_cancelled(self, request, queryset):
         """Acción para marcar tickets como cancelados"""
+        ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(status='cancelled')
+        # update() no dispara señales: el libro de pagos se ajusta aquí
+        payment_ledger.tickets_changed(ids)
         self.message_user(request, f'{updated} tickets marcados como cancelados.')
     mark_as_cancelled.short_description = "Marcar como cancelado"
 
@@ -163,3 +171,23 @@ class TicketAdmin(admin.ModelAdmin):
         if aid:
             initial["appointment"] = aid
         return initial
+
+
+@admin.register(PaymentEntry)
+class PaymentEntryAdmin(admin.ModelAdmin):
+    """
+    Libro de pagos en solo lectura: las correcciones se registran como filas nuevas.
+    """
+    list_display = ['id', 'local_date', 'payment_type', 'method', 'kind', 'source', 'source_id', 'amount', 'payments', 'created_at']
+    list_filter = ['source', 'kind', 'payment_type', 'method', 'local_date']
+    search_fields = ['source_id']
+    date_hierarchy = 'local_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from appointments_status.models import Appointment, Ticket
+from company_reports.services.rollup_services import day_range_bounds
+
+
+class Command(BaseCommand):
+    help = (
+        "Completa appointments.appointment_local_date y tickets.payment_local_date (día local según "
+        "TIME_ZONE) con un UPDATE por rango de fechas y día. Con --all recalcula también las filas ya "
+        "completadas, necesario tras cambiar TIME_ZONE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true",
+                            help="Recalcula todas las filas, no solo las que no tienen día")
+        parser.add_argument("--chunk-days", type=int, default=31,
+                            help="Días actualizados por transacción")
+
+    def handle(self, *args, **opt):
+        chunk_days = max(1, opt["chunk_days"])
+        targets = (
+            (Appointment, "appointment_date", "appointment_local_date", "citas"),
+            (Ticket, "payment_date", "payment_local_date", "tickets"),
+        )
+        for model, source, target, label in targets:
+            queryset = model.objects.all()
+            if not opt["all"]:
+                queryset = queryset.filter(**{f"{target}__isnull": True})
+            updated = self._backfill(queryset, source, target, chunk_days)
+            self.stdout.write(self.style.SUCCESS(f"{label}: {updated} filas actualizadas ✔"))
+
+        if opt["all"]:
+            self.stdout.write(
+                "Si cambió TIME_ZONE ejecute también backfill_slot_reservations --all --rebuild "
+                "y rebuild_daily_rollup."
+            )
+
+    def _backfill(self, queryset, source, target, chunk_days):
+        bounds = queryset.aggregate(first=Min(source), last=Max(source))
+        if bounds["first"] is None:
+            return 0
+        day = timezone.localtime(bounds["first"]).date()
+        last = timezone.localtime(bounds["last"]).date()
+
+        updated = 0
+        while day <= last:
+            chunk_end = min(day + timedelta(days=chunk_days - 1), last)
+            with transaction.atomic():
+                while day <= chunk_end:
+                    desde, hasta = day_range_bounds(day, day)
+                    updated += queryset.filter(
+                        **{f"{source}__gte": desde, f"{source}__lt": hasta}
+                    ).update(**{target: day})
+                    day += timedelta(days=1)
+        return updated
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from appointments_status.services.slot_reservation_service import SlotReservationService
+
+
+class Command(BaseCommand):
+    help = (
+        "Reserva los bloques de agenda (slot_reservations) de las citas existentes. "
+        "Por defecto solo desde hoy; las citas que ya se solapaban se listan y quedan sin reservar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start_date",
+                            help="Fecha inicial YYYY-MM-DD (por defecto, hoy)")
+        parser.add_argument("--all", action="store_true",
+                            help="Incluye todo el historial de citas")
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Borra las reservas del rango antes de volver a generarlas")
+
+    def handle(self, *args, **opt):
+        start_date = None
+        if not opt["all"]:
+            try:
+                start_date = (
+                    datetime.strptime(opt["start_date"], "%Y-%m-%d").date()
+                    if opt["start_date"] else timezone.localdate()
+                )
+            except ValueError:
+                raise CommandError("--from debe tener el formato YYYY-MM-DD")
+
+        reserved, conflicts = SlotReservationService().backfill(start_date=start_date, rebuild=opt["rebuild"])
+        desde = "todo el historial" if start_date is None else f"desde {start_date}"
+        self.stdout.write(f"Citas con bloques reservados ({desde}): {reserved}")
+
+        for appointment_id, holders in conflicts:
+            self.stdout.write(self.style.WARNING(
+                f"Cita {appointment_id} se solapa con {', '.join(map(str, holders))}: quedó sin reservar"
+            ))
+        if conflicts:
+            self.stdout.write(self.style.WARNING(
+                f"{len(conflicts)} citas solapadas para revisar; al reprogramar una a un horario libre se reservan sus bloques"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("Sin solapamientos ✔"))
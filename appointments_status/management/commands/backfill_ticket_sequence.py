@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from appointments_status.models import TicketSequence
+from appointments_status.services.ticket_number_allocator import (
+    TicketNumberAllocator,
+    format_ticket_number,
+    max_issued_ticket_number,
+)
+
+
+class Command(BaseCommand):
+    help = "Siembra la secuencia de tickets con el mayor número TKT-n ya emitido."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true",
+                            help="Fija el contador al mayor TKT-n aunque el valor actual sea mayor")
+
+    def handle(self, *args, **opt):
+        highest = max_issued_ticket_number()
+        self.stdout.write(f"Mayor ticket emitido: {format_ticket_number(highest) if highest else 'ninguno'}")
+
+        with transaction.atomic():
+            sequence, created = TicketSequence.objects.select_for_update().get_or_create(
+                name=TicketNumberAllocator.SEQUENCE_NAME,
+                defaults={"last_value": highest},
+            )
+            previous = sequence.last_value
+            if not created:
+                sequence.last_value = highest if opt["force"] else max(previous, highest)
+                sequence.save(update_fields=["last_value", "updated_at"])
+
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Secuencia creada en {sequence.last_value} ✔"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Secuencia actualizada: {previous} → {sequence.last_value} ✔"
+            ))
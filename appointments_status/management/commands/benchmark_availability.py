@@ -0,0 +1,161 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointments_status.models import Appointment
+from appointments_status.services.availability_service import AvailabilityService
+from histories_configurations.models import DocumentType
+from patients_diagnoses.models import Patient
+from therapists.models import Therapist
+from ubi_geo.models import Country, District, Province, Region
+
+
+def legacy_check(date, hour, duration=60):
+    """Verificación anterior de AppointmentService.check_availability (toda la clínica, exists + count)."""
+    start_datetime = datetime.combine(date, hour)
+    end_datetime = start_datetime + timedelta(minutes=duration)
+    conflicting = Appointment.objects.filter(
+        appointment_date=date,
+        deleted_at__isnull=True
+    ).exclude(
+        hour__gte=end_datetime.time()
+    ).exclude(
+        hour__lte=start_datetime.time()
+    )
+    is_available = not conflicting.exists()
+    return is_available, conflicting.count() if not is_available else 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la verificación de disponibilidad y la búsqueda de horarios libres sobre una semana "
+        "completamente reservada. Siembra las citas dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--therapists", type=int, default=10,
+                            help="Terapeutas (cada uno con su consultorio) con la semana llena")
+
+    def handle(self, *args, **opt):
+        if opt["therapists"] < 1:
+            raise CommandError("--therapists debe ser mayor que cero")
+
+        service = AvailabilityService()
+        # Semana siguiente completa, para que ningún horario quede en el pasado
+        today = timezone.localdate()
+        week_start = today + timedelta(days=7 - today.weekday())
+        week_end = week_start + timedelta(days=6)
+        slot_starts = list(range(service.day_start, service.day_end, service.slot_minutes))
+
+        with transaction.atomic():
+            therapists = self._seed(opt["therapists"], week_start, service)
+            self.stdout.write(
+                f"Semana {week_start} a {week_end}: {Appointment.objects.filter(therapist__in=therapists).count()} "
+                f"citas, {len(therapists)} terapeutas, {len(slot_starts)} horarios por día"
+            )
+            checks = [
+                (therapist.pk, index + 1, week_start + timedelta(days=day), minute)
+                for index, therapist in enumerate(therapists)
+                for day in range(7)
+                for minute in slot_starts
+            ]
+
+            self.stdout.write(f"{'operación':<44} {'llamadas':>8} {'consultas':>9} {'total':>9} {'por llamada':>12}")
+
+            def measure(label, calls, fn):
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    result = fn()
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label:<44} {calls:>8} {len(ctx.captured_queries):>9} {elapsed * 1000:>7.0f}ms "
+                    f"{elapsed * 1000 / max(calls, 1):>10.2f}ms"
+                )
+                return result
+
+            to_time = lambda minute: datetime.min.replace(hour=minute // 60, minute=minute % 60).time()
+
+            legacy = measure("anterior: check por horario (clínica)", len(checks), lambda: [
+                legacy_check(day, to_time(minute))[0] for _t, _r, day, minute in checks
+            ])
+            free = measure("motor: check por horario (terapeuta+consult.)", len(checks), lambda: [
+                service.check(day, to_time(minute), therapist_id=therapist, room=room)["is_available"]
+                for therapist, room, day, minute in checks
+            ])
+
+            def shared_index():
+                index = service.load(week_start, week_end)
+                return [
+                    index.is_free(day, minute, service.appointment_minutes, therapist, room)
+                    for therapist, room, day, minute in checks
+                ]
+            free_shared = measure("motor: semana cargada una vez + checks", len(checks), shared_index)
+
+            slots = measure("motor: próximos 10 libres por terapeuta", len(therapists), lambda: [
+                service.next_free_slots(therapist.pk, week_start, week_end, limit=10, room=index + 1)
+                for index, therapist in enumerate(therapists)
+            ])
+
+            # La consulta anterior compara appointment_date (fecha y hora) con la fecha a
+            # medianoche, así que no ve las citas con hora y da la semana por libre
+            self.stdout.write(f"La verificación anterior marcó libres {sum(legacy)} de {len(legacy)} horarios reservados")
+            if any(free) or any(free_shared) or any(slots):
+                raise CommandError("La semana debería estar completa y el motor encontró horarios libres")
+
+            # Liberar una cita por terapeuta: el motor debe encontrar exactamente ese hueco
+            freed = []
+            for therapist in therapists:
+                appointment = Appointment.objects.filter(therapist=therapist).order_by("-appointment_date", "hour").first()
+                Appointment.objects.filter(pk=appointment.pk).update(deleted_at=timezone.now())
+                freed.append(appointment)
+            slots = measure("motor: próximos 10 libres con un hueco", len(therapists), lambda: [
+                service.next_free_slots(therapist.pk, week_start, week_end, limit=10, room=index + 1)
+                for index, therapist in enumerate(therapists)
+            ])
+            found = sum(1 for therapist_slots in slots if therapist_slots)
+            self.stdout.write(self.style.SUCCESS(
+                f"Semana llena sin horarios libres ✔; huecos encontrados tras liberar: {found}/{len(freed)}"
+            ))
+
+            transaction.set_rollback(True)
+
+    def _seed(self, total, week_start, service):
+        country = Country.objects.create(name="Benchmark")
+        region = Region.objects.create(name="Benchmark", country=country)
+        province = Province.objects.create(name="Benchmark", region=region)
+        district = District.objects.create(name="Benchmark", province=province)
+        document_type = DocumentType.objects.create(name=f"BENCH-AV-{timezone.now().timestamp():.0f}")
+        geo = {"region": region, "province": province, "district": district, "document_type": document_type}
+        patient = Patient.objects.create(
+            document_number=f"7{timezone.now().timestamp():.0f}"[:20], name="Paciente",
+            paternal_lastname="Benchmark", maternal_lastname="Benchmark",
+            email="benchmark@example.com", ocupation="-", health_condition="-", **geo,
+        )
+        therapists = [
+            Therapist.objects.create(
+                document_number=f"6{timezone.now().timestamp():.0f}{i}"[:20], first_name=f"Terapeuta{i}",
+                last_name_paternal="Benchmark", last_name_maternal="Benchmark",
+                email=f"benchmark-t{i}@example.com", **geo,
+            )
+            for i in range(total)
+        ]
+
+        # Una cita por hora de jornada, cada terapeuta en su consultorio.
+        # bulk_create no dispara post_save (no genera tickets), que aquí no hacen falta.
+        step = service.appointment_minutes
+        appointments = []
+        for index, therapist in enumerate(therapists):
+            for day in range(7):
+                date = week_start + timedelta(days=day)
+                for minute in range(service.day_start, service.day_end, step):
+                    start = timezone.make_aware(datetime.combine(date, datetime.min.time()) + timedelta(minutes=minute))
+                    appointments.append(Appointment(
+                        patient=patient, therapist=therapist, room=index + 1,
+                        appointment_date=start, appointment_local_date=date, hour=start.time(),
+                    ))
+        Appointment.objects.bulk_create(appointments, batch_size=1000)
+        return therapists
@@ -0,0 +1,122 @@
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointments_status.models import Appointment, SlotReservation, Ticket
+from appointments_status.services import AppointmentService
+from histories_configurations.models import DocumentType
+from patients_diagnoses.models import Patient
+from therapists.models import Therapist
+from ubi_geo.models import Country, District, Province, Region
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara reservar un plan de tratamiento con N altas sucesivas (AppointmentService.create) "
+        "contra una sola llamada a book_plan: tiempo y consultas SQL, incluidas las del asignador de "
+        "tickets. Siembra dentro de una transacción que se revierte, números de ticket incluidos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, nargs="+", default=[10, 20],
+                            help="Tamaños de plan a medir")
+
+    def handle(self, *args, **opt):
+        if min(opt["sessions"]) < 1 or max(opt["sessions"]) > 60:
+            raise CommandError("--sessions debe estar entre 1 y 60")
+
+        service = AppointmentService()
+        # Lunes de la semana siguiente: todas las sesiones quedan en el futuro
+        today = timezone.localdate()
+        start = today + timedelta(days=7 - today.weekday())
+        hour = datetime.strptime("10:00", "%H:%M").time()
+
+        with transaction.atomic():
+            patient, therapists = self._seed(2 * len(opt["sessions"]))
+            self.stdout.write(f"{'sesiones':>8} {'modo':<12} {'consultas':>9} {'tiempo':>9}")
+            for size, (sequential_therapist, plan_therapist) in zip(
+                opt["sessions"], zip(therapists[::2], therapists[1::2])
+            ):
+                dates = [start + timedelta(weeks=week, days=day) for week in range(30) for day in (0, 3)][:size]
+
+                def sequential():
+                    for day in dates:
+                        response = service.create({
+                            "patient": patient,
+                            "therapist": sequential_therapist,
+                            "appointment_date": timezone.make_aware(datetime.combine(day, hour)),
+                            "hour": hour,
+                            "payment": Decimal("80.00"),
+                        })
+                        if response.status_code != 201:
+                            raise CommandError(f"Alta individual rechazada: {response.data}")
+
+                def plan():
+                    response = service.book_plan({
+                        "patient": patient.pk,
+                        "therapist": plan_therapist.pk,
+                        "start_date": start.isoformat(),
+                        "hour": "10:00",
+                        "payment": Decimal("80.00"),
+                        "recurrence": {"frequency": "weekly", "weekdays": ["MO", "TH"], "count": size},
+                    })
+                    if response.status_code != 201:
+                        raise CommandError(f"Plan rechazado: {response.data}")
+
+                results = {}
+                for label, fn in (("sucesivas", sequential), ("book_plan", plan)):
+                    results[label] = self._measure(fn)
+                    queries, elapsed = results[label]
+                    self.stdout.write(f"{size:>8} {label:<12} {queries:>9} {elapsed * 1000:>7.0f}ms")
+
+                for therapist in (sequential_therapist, plan_therapist):
+                    appointments = Appointment.objects.filter(therapist=therapist)
+                    tickets = Ticket.objects.filter(appointment__therapist=therapist).count()
+                    reservations = SlotReservation.objects.filter(therapist=therapist).count()
+                    if appointments.count() != size or tickets != size or not reservations:
+                        raise CommandError(
+                            f"Resultado incompleto para el terapeuta {therapist.pk}: "
+                            f"{appointments.count()} citas, {tickets} tickets, {reservations} bloques"
+                        )
+                (seq_queries, seq_time), (plan_queries, plan_time) = results.values()
+                self.stdout.write(self.style.SUCCESS(
+                    f"{size} sesiones: {seq_queries} → {plan_queries} consultas, "
+                    f"{seq_time / max(plan_time, 1e-9):.1f}x más rápido ✔"
+                ))
+
+            transaction.set_rollback(True)
+
+    def _measure(self, fn):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+        return len(ctx.captured_queries), elapsed
+
+    def _seed(self, total):
+        tag = f"{timezone.now().timestamp():.0f}"
+        country = Country.objects.create(name="Benchmark")
+        region = Region.objects.create(name="Benchmark", country=country)
+        province = Province.objects.create(name="Benchmark", region=region)
+        district = District.objects.create(name="Benchmark", province=province)
+        document_type = DocumentType.objects.create(name=f"BENCH-PLAN-{tag}")
+        geo = {"region": region, "province": province, "district": district, "document_type": document_type}
+        patient = Patient.objects.create(
+            document_number=f"3{tag}"[:20], name="Paciente",
+            paternal_lastname="Benchmark", maternal_lastname="Benchmark",
+            email="benchmark@example.com", ocupation="-", health_condition="-", **geo,
+        )
+        therapists = [
+            Therapist.objects.create(
+                document_number=f"2{tag}{i}"[:20], first_name=f"Terapeuta{i}",
+                last_name_paternal="Benchmark", last_name_maternal="Benchmark",
+                email=f"benchmark-p{i}@example.com", **geo,
+            )
+            for i in range(total)
+        ]
+        return patient, therapists
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from appointments_status.models import Appointment, PaymentEntry, Ticket
+from appointments_status.services.payment_ledger_service import PaymentLedgerService
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera el libro de pagos (payment_entries) desde el estado actual de citas y tickets: "
+        "borra las filas y registra un pago por cada cita o ticket que aporta a la caja, en una "
+        "transacción. Con --check solo cuenta las citas y tickets cuyo saldo en el libro no coincide."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="No modifica nada: informa cuántos saldos difieren")
+        parser.add_argument("--chunk-size", type=int, default=2000,
+                            help="Citas o tickets procesados por consulta")
+
+    def handle(self, *args, **opt):
+        chunk_size = max(1, opt["chunk_size"])
+        service = PaymentLedgerService()
+        targets = (
+            (PaymentEntry.SOURCE_APPOINTMENT, Appointment, "citas"),
+            (PaymentEntry.SOURCE_TICKET, Ticket, "tickets"),
+        )
+
+        if opt["check"]:
+            differing = 0
+            for source, model, label in targets:
+                count = len(service.differing(source, model, chunk_size))
+                differing += count
+                style = self.style.SUCCESS if not count else self.style.ERROR
+                self.stdout.write(style(f"{label}: {count} saldos distintos del estado actual"))
+            if differing:
+                self.stdout.write("Ejecute rebuild_payment_ledger sin --check para regenerarlo.")
+            return
+
+        with transaction.atomic():
+            deleted, _ = PaymentEntry.objects.all().delete()
+            self.stdout.write(f"{deleted} filas anteriores eliminadas")
+            for source, model, label in targets:
+                created = sum(
+                    service.sync(source, ids)
+                    for ids in self._chunks(model.objects.order_by("id").values_list("id", flat=True), chunk_size)
+                )
+                self.stdout.write(self.style.SUCCESS(f"{label}: {created} pagos registrados ✔"))
+
+    @staticmethod
+    def _chunks(ids, size):
+        chunk = []
+        for pk in ids:
+            chunk.append(pk)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
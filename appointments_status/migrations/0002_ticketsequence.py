@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_ticket_sequence(apps, schema_editor):
+    """Siembra la secuencia 'ticket' con el mayor TKT-n ya emitido."""
+    Ticket = apps.get_model('appointments_status', 'Ticket')
+    TicketSequence = apps.get_model('appointments_status', 'TicketSequence')
+    pattern = re.compile(r'^TKT-(\d+)$')
+    highest = 0
+    numbers = (
+        Ticket.objects
+        .filter(ticket_number__startswith='TKT-')
+        .values_list('ticket_number', flat=True)
+        .iterator(chunk_size=2000)
+    )
+    for ticket_number in numbers:
+        match = pattern.match(ticket_number or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+    TicketSequence.objects.get_or_create(name='ticket', defaults={'last_value': highest})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments_status', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Nombre de la secuencia')),
+                ('last_value', models.PositiveBigIntegerField(default=0, verbose_name='Último valor reservado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de tickets',
+                'verbose_name_plural': 'Secuencias de tickets',
+                'db_table': 'ticket_sequences',
+            },
+        ),
+        migrations.RunPython(seed_ticket_sequence, migrations.RunPython.noop),
+    ]
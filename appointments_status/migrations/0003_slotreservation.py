@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments_status', '0002_ticketsequence'),
+        ('therapists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('slot_index', models.PositiveSmallIntegerField(verbose_name='Bloque del día')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_reservations', to='appointments_status.appointment', verbose_name='Cita')),
+                ('therapist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_reservations', to='therapists.therapist', verbose_name='Terapeuta')),
+            ],
+            options={
+                'verbose_name': 'Reserva de horario',
+                'verbose_name_plural': 'Reservas de horario',
+                'db_table': 'slot_reservations',
+                'constraints': [models.UniqueConstraint(fields=('therapist', 'date', 'slot_index'), name='uniq_slot_reservation')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments_status', '0003_slotreservation'),
+        ('therapists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='appointment_local_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Día de la cita'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='payment_local_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Día de pago'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['appointment_local_date', 'therapist'], name='appointments_local_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['payment_local_date'], name='tickets_payment_local_date_idx'),
+        ),
+    ]
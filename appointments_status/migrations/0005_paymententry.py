@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments_status', '0004_local_dates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('appointment', 'Cita'), ('ticket', 'Ticket')], max_length=20, verbose_name='Origen')),
+                ('source_id', models.PositiveBigIntegerField(verbose_name='Id de la cita o ticket')),
+                ('kind', models.CharField(choices=[('payment', 'Pago'), ('adjustment', 'Ajuste'), ('refund', 'Reembolso'), ('cancellation', 'Cancelación')], max_length=20, verbose_name='Movimiento')),
+                ('local_date', models.DateField(verbose_name='Día de caja')),
+                ('method', models.CharField(max_length=50, verbose_name='Método de pago')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Monto')),
+                ('payments', models.SmallIntegerField(default=0, verbose_name='Pagos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de registro')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de pago',
+                'verbose_name_plural': 'Movimientos de pago',
+                'db_table': 'payment_entries',
+                'ordering': ['id'],
+                'indexes': [
+                    models.Index(fields=['local_date', 'method'], name='payment_entries_day_method_idx'),
+                    models.Index(fields=['source', 'source_id'], name='payment_entries_source_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def method_names_to_payment_types(apps, schema_editor):
+    """Las filas de citas guardaban el nombre del tipo de pago: pasan a su id."""
+    PaymentEntry = apps.get_model('appointments_status', 'PaymentEntry')
+    PaymentType = apps.get_model('histories_configurations', 'PaymentType')
+    entries = PaymentEntry.objects.filter(source='appointment')
+    entries.filter(method='No especificado').update(method='')
+    for payment_type_id, name in PaymentType.objects.values_list('id', 'name'):
+        entries.filter(method=name).update(payment_type_id=payment_type_id, method='')
+
+
+def payment_types_to_method_names(apps, schema_editor):
+    PaymentEntry = apps.get_model('appointments_status', 'PaymentEntry')
+    PaymentType = apps.get_model('histories_configurations', 'PaymentType')
+    entries = PaymentEntry.objects.filter(source='appointment', method='')
+    for payment_type_id, name in PaymentType.objects.values_list('id', 'name'):
+        entries.filter(payment_type_id=payment_type_id).update(method=name)
+    entries.update(method='No especificado')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments_status', '0005_paymententry'),
+        ('histories_configurations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymententry',
+            name='payment_type',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='histories_configurations.paymenttype', verbose_name='Tipo de pago'),
+        ),
+        migrations.AlterField(
+            model_name='paymententry',
+            name='method',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Método de pago'),
+        ),
+        migrations.RunPython(method_names_to_payment_types, payment_types_to_method_names),
+    ]
@@ -1,5 +1,8 @@
 from .appointment import Appointment
 from .appointment_status import AppointmentStatus
 from .ticket import Ticket
+from .ticket_sequence import TicketSequence
+from .slot_reservation import SlotReservation
+from .payment_entry import PaymentEntry
 
-__all__ = ['Appointment', 'AppointmentStatus', 'Ticket']
+__all__ = ['Appointment', 'AppointmentStatus', 'Ticket', 'TicketSequence', 'SlotReservation', 'PaymentEntry']
@@ -1,8 +1,17 @@
+from datetime import datetime
 from django.db import models
 from django.utils import timezone
+from architect.models.tracking import DirtyFieldsMixin
 
 
-class Appointment(models.Model):
+def local_date(value):
+    """Día local (TIME_ZONE) de una fecha/hora; las fechas sin hora se devuelven tal cual."""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+class Appointment(DirtyFieldsMixin, models.Model):
     """
     Modelo para gestionar las citas médicas.
     Basado en la estructura de la tabla appointments de la BD.
@@ -16,6 +25,9 @@ class Appointment(models.Model):
     # Campos principales de la cita
     appointment_date = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de la cita")
     hour = models.TimeField(blank=True, null=True, verbose_name="Hora de la cita")
+    # Día local de appointment_date, guardado para filtrar por día con índice
+    # (TruncDate / __date no pueden usarlo y dependen de la zona de la base)
+    appointment_local_date = models.DateField(blank=True, null=True, editable=False, verbose_name="Día de la cita")
     
     # Información médica
     ailments = models.CharField(max_length=1000, blank=True, null=True, verbose_name="Padecimientos")
@@ -44,10 +56,12 @@ class Appointment(models.Model):
     payment_status = models.ForeignKey('histories_configurations.PaymentStatus', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Estado de pago")
     
     # Estado de la cita (enum en SQL)
+    STATUS_CANCELLED = 'CANCELADO'
     APPOINTMENT_STATUS_CHOICES = [
         ('COMPLETADO', 'Completado'),
         ('PENDIENTE', 'Pendiente'),
         ('ACTIVO', 'Activo'),
+        (STATUS_CANCELLED, 'Cancelado'),
     ]
     appointment_status = models.CharField(
         max_length=20,
@@ -69,21 +83,40 @@ class Appointment(models.Model):
         indexes = [
             models.Index(fields=['appointment_date', 'hour']),
             models.Index(fields=['appointment_status']),
+            models.Index(fields=['appointment_local_date', 'therapist'], name='appointments_local_date_idx'),
         ]
     
     def __str__(self):
         return f"Cita {self.id} - {self.appointment_date} {self.hour}"
+
+    def save(self, *args, **kwargs):
+        """Mantiene appointment_local_date al día con appointment_date."""
+        self.appointment_local_date = local_date(self.appointment_date)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'appointment_date' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'appointment_local_date'}
+        super().save(*args, **kwargs)
+
+    def soft_delete(self):
+        """Eliminación suave de la cita"""
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at', 'updated_at'])
+
+    def restore(self):
+        """Restaura una cita eliminada"""
+        self.deleted_at = None
+        self.save(update_fields=['deleted_at', 'updated_at'])
     
     @property
     def is_completed(self):
         """Verifica si la cita está completada basándose en la fecha"""
         if self.appointment_date is None:
             return False
-        return self.appointment_date.date() < timezone.now().date()
+        return local_date(self.appointment_date) < timezone.localdate()
 
     @property
     def is_pending(self):
         """Verifica si la cita está pendiente"""
         if self.appointment_date is None:
             return False
-        return self.appointment_date.date() >= timezone.now().date()
+        return local_date(self.appointment_date) >= timezone.localdate()
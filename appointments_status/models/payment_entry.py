@@ -0,0 +1,73 @@
+from django.db import models
+
+
+class PaymentEntry(models.Model):
+    """
+    Libro de pagos: solo se agregan filas, nunca se editan ni se borran.
+
+    Cada cita con pago (payment > 0, no eliminada) y cada ticket pagado, activo y con
+    monto (amount > 0) aporta su monto al día local y al método con que cuenta en la caja.
+    Un cambio posterior (monto, método, día, cancelación, reembolso o eliminación) se
+    registra como filas nuevas que corrigen el saldo, así que sumar amount y payments por
+    (día, método) da siempre la caja vigente. source_id no es una clave foránea para que
+    las filas sobrevivan al borrado de la cita o del ticket.
+    El método de una cita es su tipo de pago (payment_type, por id: renombrarlo no mueve
+    la caja) y el de un ticket su payment_method (method, en texto).
+    Lo mantiene PaymentLedgerService; rebuild_payment_ledger lo regenera desde el estado actual.
+    """
+
+    SOURCE_APPOINTMENT = 'appointment'
+    SOURCE_TICKET = 'ticket'
+
+    KIND_PAYMENT = 'payment'
+    KIND_ADJUSTMENT = 'adjustment'
+    KIND_REFUND = 'refund'
+    KIND_CANCELLATION = 'cancellation'
+
+    NO_METHOD = "No especificado"
+
+    source = models.CharField(
+        max_length=20,
+        choices=[
+            (SOURCE_APPOINTMENT, 'Cita'),
+            (SOURCE_TICKET, 'Ticket'),
+        ],
+        verbose_name="Origen",
+    )
+    source_id = models.PositiveBigIntegerField(verbose_name="Id de la cita o ticket")
+    kind = models.CharField(
+        max_length=20,
+        choices=[
+            (KIND_PAYMENT, 'Pago'),
+            (KIND_ADJUSTMENT, 'Ajuste'),
+            (KIND_REFUND, 'Reembolso'),
+            (KIND_CANCELLATION, 'Cancelación'),
+        ],
+        verbose_name="Movimiento",
+    )
+    local_date = models.DateField(verbose_name="Día de caja")
+    # Sin restricción en la base, igual que source_id: la fila sobrevive al borrado del tipo
+    payment_type = models.ForeignKey(
+        'histories_configurations.PaymentType', on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='+', verbose_name="Tipo de pago",
+    )
+    # Vacío en las filas de citas
+    method = models.CharField(max_length=50, blank=True, verbose_name="Método de pago")
+    # Con signo: las correcciones restan
+    amount = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Monto")
+    # +1 al registrar un pago, -1 al revertirlo, 0 si solo cambia el monto
+    payments = models.SmallIntegerField(default=0, verbose_name="Pagos")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de registro")
+
+    class Meta:
+        db_table = 'payment_entries'
+        verbose_name = "Movimiento de pago"
+        verbose_name_plural = "Movimientos de pago"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['local_date', 'method'], name='payment_entries_day_method_idx'),
+            models.Index(fields=['source', 'source_id'], name='payment_entries_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.source} #{self.source_id}: {self.amount} ({self.method or self.payment_type_id}, {self.local_date})"
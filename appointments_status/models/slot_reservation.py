@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class SlotReservation(models.Model):
+    """
+    Bloque de agenda ocupado por una cita: (terapeuta, día, bloque) es único, así que
+    dos citas del mismo terapeuta no pueden solaparse aunque se reserven a la vez.
+    slot_index es el número de bloque de APPOINTMENT_SLOT_MINUTES desde medianoche.
+    Lo mantiene SlotReservationService al crear, reprogramar, cancelar o eliminar citas.
+    """
+
+    therapist = models.ForeignKey(
+        'therapists.Therapist',
+        on_delete=models.CASCADE,
+        related_name='slot_reservations',
+        verbose_name="Terapeuta",
+    )
+    date = models.DateField(verbose_name="Fecha")
+    slot_index = models.PositiveSmallIntegerField(verbose_name="Bloque del día")
+    appointment = models.ForeignKey(
+        'appointments_status.Appointment',
+        on_delete=models.CASCADE,
+        related_name='slot_reservations',
+        verbose_name="Cita",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+
+    class Meta:
+        db_table = 'slot_reservations'
+        verbose_name = "Reserva de horario"
+        verbose_name_plural = "Reservas de horario"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['therapist', 'date', 'slot_index'],
+                name='uniq_slot_reservation',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.therapist_id} {self.date} #{self.slot_index} -> cita {self.appointment_id}"
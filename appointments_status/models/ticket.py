@@ -1,8 +1,11 @@
 from django.db import models
+from django.utils import timezone
 from decimal import Decimal
+from architect.models.tracking import DirtyFieldsMixin
+from .appointment import local_date
 
 
-class Ticket(models.Model):
+class Ticket(DirtyFieldsMixin, models.Model):
     """
     Modelo para gestionar los tickets de las citas médicas.
     Basado en la estructura del módulo Laravel 05_appointments_status.
@@ -20,6 +23,13 @@ class Ticket(models.Model):
         auto_now_add=True, 
         verbose_name="Fecha de pago"
     )
+    # Día local de payment_date, para los reportes de caja por día
+    payment_local_date = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Día de pago"
+    )
     amount = models.DecimalField(
         max_digits=10, 
         decimal_places=2, 
@@ -68,10 +78,26 @@ class Ticket(models.Model):
             models.Index(fields=['payment_date']),
             models.Index(fields=['status']),
             models.Index(fields=['appointment']),  # Índice para la foreign key
+            models.Index(fields=['payment_local_date'], name='tickets_payment_local_date_idx'),
         ]
     
     def __str__(self):
         return f"Ticket {self.ticket_number} - ${self.amount}"
+
+    def save(self, *args, **kwargs):
+        """Mantiene payment_local_date al día con payment_date."""
+        adding = self._state.adding
+        # payment_date (auto_now_add) recién se asigna al insertar: se toma la fecha de hoy
+        # y, si el INSERT cayó justo pasada la medianoche, se corrige abajo
+        self.payment_local_date = local_date(self.payment_date) if self.payment_date else timezone.localdate()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'payment_date' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'payment_local_date'}
+        super().save(*args, **kwargs)
+        if adding and self.payment_local_date != local_date(self.payment_date):
+            self.payment_local_date = local_date(self.payment_date)
+            Ticket.objects.filter(pk=self.pk).update(payment_local_date=self.payment_local_date)
+            self._remember_values(['payment_local_date'])
     
     @property
     def is_paid(self):
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class TicketSequence(models.Model):
+    """
+    Contador de numeración de tickets (TKT-001, TKT-002, ...).
+    Una fila por secuencia; last_value es el último número ya reservado.
+    """
+
+    name = models.CharField(max_length=50, unique=True, verbose_name="Nombre de la secuencia")
+    last_value = models.PositiveBigIntegerField(default=0, verbose_name="Último valor reservado")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
+
+    class Meta:
+        db_table = 'ticket_sequences'
+        verbose_name = "Secuencia de tickets"
+        verbose_name_plural = "Secuencias de tickets"
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
@@ -70,11 +70,20 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'deleted_at',
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'deleted_at']
+
+    # Relaciones que leen los campos *_name; cargarlas en la misma consulta evita
+    # cuatro consultas extra por cita al serializar listados
+    related_fields = ('patient', 'therapist', 'payment_type', 'payment_status')
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Aplica al queryset el plan de carga que necesita este serializer."""
+        return queryset.select_related(*cls.related_fields)
         
     def validate_appointment_date(self, value):
         """Validación personalizada para la fecha de la cita"""
         from django.utils import timezone
-        today = timezone.now().date()
+        today = timezone.localdate()
         
         if value and value.date() < today:
             raise serializers.ValidationError(
@@ -88,8 +97,8 @@ class AppointmentSerializer(serializers.ModelSerializer):
         hour = data.get('hour')
         
         if appointment_date and hour:
-            # Aquí se podría agregar validación para evitar solapamientos
-            # cuando estén disponibles los modelos Patient y Therapist
+            # Los solapamientos del terapeuta los rechaza la tabla slot_reservations
+            # al guardar (SlotConflictError), también entre solicitudes concurrentes
             pass
         
         return data
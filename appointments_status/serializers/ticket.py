@@ -37,6 +37,14 @@ class TicketSerializer(serializers.ModelSerializer):
             'deleted_at',
         ]
         read_only_fields = ['id', 'payment_date', 'created_at', 'updated_at', 'deleted_at']
+
+    # appointment_details lee la cita de cada ticket
+    related_fields = ('appointment',)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Aplica al queryset el plan de carga que necesita este serializer."""
+        return queryset.select_related(*cls.related_fields)
         
     def validate_ticket_number(self, value):
         """Validación personalizada para el número de ticket"""
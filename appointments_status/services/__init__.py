@@ -1,5 +1,28 @@
 from .appointment_service import AppointmentService
 from .appointment_status_service import AppointmentStatusService
 from .ticket_service import TicketService
+from .availability_service import AvailabilityService
+from .slot_reservation_service import SlotConflictError, SlotReservationService
+from .treatment_plan_service import PlanConflictError, PlanValidationError, TreatmentPlanService
+from .ticket_number_allocator import TicketNumberAllocator, ticket_number_allocator
+from .ticket_sync_coordinator import TicketSyncCoordinator, ticket_sync
+from .payment_ledger_service import PaymentLedgerCoordinator, PaymentLedgerService, payment_ledger
 
-__all__ = ['AppointmentService', 'AppointmentStatusService', 'TicketService']
+__all__ = [
+    'AppointmentService',
+    'AppointmentStatusService',
+    'TicketService',
+    'AvailabilityService',
+    'SlotConflictError',
+    'SlotReservationService',
+    'TreatmentPlanService',
+    'PlanConflictError',
+    'PlanValidationError',
+    'TicketNumberAllocator',
+    'ticket_number_allocator',
+    'TicketSyncCoordinator',
+    'ticket_sync',
+    'PaymentLedgerService',
+    'PaymentLedgerCoordinator',
+    'payment_ledger',
+]
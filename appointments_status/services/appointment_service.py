@@ -1,9 +1,15 @@
 from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import status
 from rest_framework.response import Response
+from architect.pagination import InvalidCursor, KeysetPaginator
+from company_reports.services.rollup_services import day_range_bounds
 from ..models import Appointment, Ticket
 from ..serializers import AppointmentSerializer
+from .availability_service import AvailabilityService
+from .slot_reservation_service import SlotConflictError
+from .treatment_plan_service import PlanConflictError, PlanValidationError, TreatmentPlanService
 from decimal import Decimal
 
 
@@ -12,6 +18,10 @@ class AppointmentService:
     Servicio para gestionar las operaciones de citas médicas.
     Basado en la estructura actualizada del modelo.
     """
+
+    def __init__(self):
+        self.availability = AvailabilityService()
+        self.treatment_plans = TreatmentPlanService()
     
     @transaction.atomic
     def create(self, data):
@@ -34,11 +44,18 @@ class AppointmentService:
                         status=status.HTTP_400_BAD_REQUEST
                     )
             
-            # Crear la cita
-            appointment = Appointment.objects.create(**data)
+            # Crear la cita. El signal reserva los bloques del terapeuta antes de
+            # generar el ticket; si el horario está tomado se revierte solo este bloque
+            try:
+                with transaction.atomic():
+                    appointment = Appointment.objects.create(**data)
+            except SlotConflictError as e:
+                return Response(
+                    {'error': str(e), 'conflicting_ids': e.conflicting_ids},
+                    status=status.HTTP_409_CONFLICT
+                )
             
-            # El ticket se crea automáticamente mediante el signal
-            # Verificar que se creó correctamente
+            # El signal crea el ticket en esta misma transacción. Verificar que se creó correctamente
             try:
                 ticket = Ticket.objects.get(appointment=appointment)
                 serializer = AppointmentSerializer(appointment)
@@ -59,6 +76,50 @@ class AppointmentService:
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def book_plan(self, data):
+        """
+        Reserva todas las sesiones de un plan de tratamiento en una sola operación.
+        
+        Args:
+            data (dict): patient, therapist, start_date, hour, recurrence y los
+                campos comunes de la cita (room, payment, payment_type, ...)
+            
+        Returns:
+            Response: Respuesta con las citas creadas o error (409 si alguna
+            sesión choca con otra cita; en ese caso no se crea ninguna)
+        """
+        try:
+            appointments = self.treatment_plans.book(data)
+            return Response({
+                'message': f'Plan de tratamiento reservado: {len(appointments)} citas con ticket automático',
+                'count': len(appointments),
+                'initial_date': appointments[0].initial_date.isoformat(),
+                'final_date': appointments[0].final_date.isoformat(),
+                'appointments': [
+                    {
+                        'id': appointment.pk,
+                        'appointment_date': appointment.appointment_date.isoformat(),
+                        'hour': appointment.hour.strftime('%H:%M'),
+                        'ticket_number': appointment.ticket_number,
+                    }
+                    for appointment in appointments
+                ],
+            }, status=status.HTTP_201_CREATED)
+        except PlanValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PlanConflictError as e:
+            return Response({'error': str(e), 'conflicts': e.conflicts}, status=status.HTTP_409_CONFLICT)
+        except SlotConflictError as e:
+            return Response(
+                {'error': str(e), 'conflicting_ids': e.conflicting_ids},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Error al reservar el plan de tratamiento: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
     def get_by_id(self, appointment_id):
         """
         Obtiene una cita por su ID.
@@ -97,14 +158,18 @@ class AppointmentService:
             Response: Respuesta con la cita actualizada o error
         """
         try:
-            appointment = Appointment.objects.get(id=appointment_id, deleted_at__isnull=True)
-            
-            # Actualizar campos
-            for field, value in data.items():
-                if hasattr(appointment, field):
-                    setattr(appointment, field, value)
-            
-            appointment.save()
+            appointment = self._list_queryset().get(id=appointment_id)
+            
+            # Solo se escriben los campos que cambian; sin cambios no hay escritura
+            if appointment.apply_changes(data):
+                try:
+                    with transaction.atomic():
+                        appointment.save_changes()
+                except SlotConflictError as e:
+                    return Response(
+                        {'error': str(e), 'conflicting_ids': e.conflicting_ids},
+                        status=status.HTTP_409_CONFLICT
+                    )
             
             # El ticket se actualiza automáticamente mediante el signal
             serializer = AppointmentSerializer(appointment)
@@ -160,24 +225,32 @@ class AppointmentService:
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def _list_queryset(self, **lookups):
+        """Citas no eliminadas con las relaciones que usa AppointmentSerializer."""
+        return AppointmentSerializer.setup_eager_loading(
+            Appointment.objects.filter(deleted_at__isnull=True, **lookups)
+        )
+
     def list_all(self, filters=None, pagination=None):
         """
         Lista todas las citas con filtros opcionales.
         
         Args:
             filters (dict): Filtros a aplicar
-            pagination (dict): Configuración de paginación
+            pagination (dict): Configuración de paginación. Con 'cursor' ('' para
+                la primera página) usa paginación keyset y acepta 'include_count';
+                si no, 'page' y 'page_size' por offset.
             
         Returns:
             Response: Respuesta con la lista de citas
         """
         try:
-            queryset = Appointment.objects.filter(deleted_at__isnull=True)
+            queryset = self._list_queryset()
             
             # Aplicar filtros
             if filters:
                 if 'appointment_date' in filters:
-                    queryset = queryset.filter(appointment_date=filters['appointment_date'])
+                    queryset = queryset.filter(appointment_local_date=filters['appointment_date'])
                 if 'appointment_status' in filters:
                     queryset = queryset.filter(appointment_status=filters['appointment_status'])
                 if 'patient' in filters:
@@ -185,6 +258,18 @@ class AppointmentService:
                 if 'therapist' in filters:
                     queryset = queryset.filter(therapist=filters['therapist'])
             
+            # Paginación por cursor (keyset): sin OFFSET y con COUNT(*) opcional
+            if pagination and pagination.get('cursor') is not None:
+                paginator = KeysetPaginator(
+                    queryset, ("-appointment_date", "-hour", "-id"), pagination.get('page_size', 10)
+                )
+                try:
+                    page = paginator.page(pagination['cursor'], pagination.get('include_count', True))
+                except InvalidCursor as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                page['results'] = AppointmentSerializer(page['results'], many=True).data
+                return Response(page, status=status.HTTP_200_OK)
+
             # Aplicar paginación básica
             if pagination:
                 page = pagination.get('page', 1)
@@ -194,9 +279,11 @@ class AppointmentService:
                 queryset = queryset[start:end]
             
             serializer = AppointmentSerializer(queryset, many=True)
+            results = serializer.data
             return Response({
-                'count': queryset.count(),
-                'results': serializer.data
+                # Mismo valor que antes (filas de la página) sin otra consulta COUNT
+                'count': len(results),
+                'results': results
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -218,10 +305,15 @@ class AppointmentService:
             Response: Respuesta con las citas en el rango
         """
         try:
-            queryset = Appointment.objects.filter(
-                appointment_date__range=[start_date, end_date],
-                deleted_at__isnull=True
-            )
+            start_date, end_date = parse_date(str(start_date)), parse_date(str(end_date))
+            if start_date is None or end_date is None:
+                return Response(
+                    {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # Días completos: [inicio de start_date, inicio del día siguiente a end_date)
+            desde, hasta = day_range_bounds(start_date, end_date)
+            queryset = self._list_queryset(appointment_date__gte=desde, appointment_date__lt=hasta)
             
             # Aplicar filtros adicionales
             if filters:
@@ -233,9 +325,10 @@ class AppointmentService:
                     queryset = queryset.filter(therapist=filters['therapist'])
             
             serializer = AppointmentSerializer(queryset, many=True)
+            results = serializer.data
             return Response({
-                'count': queryset.count(),
-                'results': serializer.data
+                'count': len(results),
+                'results': results
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -255,11 +348,8 @@ class AppointmentService:
             Response: Respuesta con las citas completadas
         """
         try:
-            today = timezone.now().date()
-            queryset = Appointment.objects.filter(
-                appointment_date__lt=today,
-                deleted_at__isnull=True
-            )
+            start_of_today = day_range_bounds(timezone.localdate(), timezone.localdate())[0]
+            queryset = self._list_queryset(appointment_date__lt=start_of_today)
             
             # Aplicar filtros adicionales
             if filters:
@@ -271,9 +361,10 @@ class AppointmentService:
                     queryset = queryset.filter(therapist=filters['therapist'])
             
             serializer = AppointmentSerializer(queryset, many=True)
+            results = serializer.data
             return Response({
-                'count': queryset.count(),
-                'results': serializer.data
+                'count': len(results),
+                'results': results
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -293,11 +384,8 @@ class AppointmentService:
             Response: Respuesta con las citas pendientes
         """
         try:
-            today = timezone.now().date()
-            queryset = Appointment.objects.filter(
-                appointment_date__gte=today,
-                deleted_at__isnull=True
-            )
+            start_of_today = day_range_bounds(timezone.localdate(), timezone.localdate())[0]
+            queryset = self._list_queryset(appointment_date__gte=start_of_today)
             
             # Aplicar filtros adicionales
             if filters:
@@ -309,9 +397,10 @@ class AppointmentService:
                     queryset = queryset.filter(therapist=filters['therapist'])
             
             serializer = AppointmentSerializer(queryset, many=True)
+            results = serializer.data
             return Response({
-                'count': queryset.count(),
-                'results': serializer.data
+                'count': len(results),
+                'results': results
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -320,43 +409,60 @@ class AppointmentService:
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def check_availability(self, date, hour, duration=60):
+    def check_availability(self, date, hour, duration=60, therapist=None, room=None, exclude=None):
         """
-        Verifica la disponibilidad para una cita.
+        Verifica la disponibilidad para una cita. Sin terapeuta ni consultorio,
+        cualquier cita de la clínica a esa hora bloquea.
         
         Args:
             date (date): Fecha de la cita
             hour (time): Hora de la cita
             duration (int): Duración en minutos
+            therapist (int): Terapeuta a verificar (opcional)
+            room (int): Consultorio a verificar (opcional)
+            exclude (int): Cita a ignorar, p. ej. la que se reprograma (opcional)
             
         Returns:
             Response: Respuesta con la disponibilidad
         """
         try:
-            # Convertir la hora de inicio a datetime
-            from datetime import datetime, timedelta
-            start_datetime = datetime.combine(date, hour)
-            end_datetime = start_datetime + timedelta(minutes=duration)
-            
-            # Buscar citas que se solapen
-            conflicting_appointments = Appointment.objects.filter(
-                appointment_date=date,
-                deleted_at__isnull=True
-            ).exclude(
-                hour__gte=end_datetime.time()
-            ).exclude(
-                hour__lte=start_datetime.time()
+            availability = self.availability.check(
+                date, hour, duration, therapist_id=therapist, room=room, exclude_id=exclude
             )
+            return Response(availability, status=status.HTTP_200_OK)
             
-            is_available = not conflicting_appointments.exists()
+        except Exception as e:
+            return Response(
+                {'error': f'Error al verificar disponibilidad: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    def get_free_slots(self, therapist, start_date, end_date, duration=None, limit=10, room=None):
+        """
+        Próximos horarios libres de un terapeuta (y consultorio, si se indica).
+        
+        Args:
+            therapist (int): Terapeuta
+            start_date (date): Primer día a revisar
+            end_date (date): Último día a revisar
+            duration (int): Duración en minutos (por defecto APPOINTMENT_DURATION_MINUTES)
+            limit (int): Cantidad máxima de horarios
+            room (int): Consultorio (opcional)
             
+        Returns:
+            Response: Respuesta con los horarios libres
+        """
+        try:
+            slots = self.availability.next_free_slots(
+                therapist, start_date, end_date, duration=duration, limit=limit, room=room
+            )
             return Response({
-                'is_available': is_available,
-                'conflicting_appointments': conflicting_appointments.count() if not is_available else 0
+                'count': len(slots),
+                'results': slots
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
             return Response(
-                {'error': f'Error al verificar disponibilidad: {str(e)}'},
+                {'error': f'Error al buscar horarios libres: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
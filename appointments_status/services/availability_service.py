@@ -0,0 +1,247 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from company_reports.services.rollup_services import day_range_bounds
+from ..models import Appointment
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def appointment_start(appointment_date, hour):
+    """
+    (día local, minuto del día) en que empieza una cita, o None si no tiene fecha.
+    La hora sale de `hour`; si falta, de la propia appointment_date.
+    """
+    if appointment_date is None:
+        return None
+    if isinstance(appointment_date, datetime):
+        if timezone.is_aware(appointment_date):
+            appointment_date = timezone.localtime(appointment_date)
+        return appointment_date.date(), _minutes(hour or appointment_date.time())
+    return appointment_date, _minutes(hour or time.min)
+
+
+def _parse_hhmm(value):
+    hour, minute = str(value).split(":")
+    return int(hour) * 60 + int(minute)
+
+
+class DayIntervals:
+    """
+    Citas de un recurso (terapeuta, consultorio o toda la clínica) en un día,
+    como intervalos [inicio, fin) en minutos ordenados por inicio.
+    """
+
+    __slots__ = ("starts", "ends", "ids", "longest")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.longest = 0
+
+    def add(self, start, end, appointment_id):
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, appointment_id)
+        self.longest = max(self.longest, end - start)
+
+    def _positions(self, start, end):
+        # Solo pueden solaparse las que empiezan en (start - longest, end)
+        lo = bisect_right(self.starts, start - self.longest)
+        hi = bisect_left(self.starts, end)
+        return [i for i in range(lo, hi) if self.ends[i] > start]
+
+    def overlapping(self, start, end):
+        """Ids de las citas que se solapan con [start, end)."""
+        return [self.ids[i] for i in self._positions(start, end)]
+
+    def first_free(self, start, end, duration):
+        """
+        Primer minuto >= start en que cabe una cita de `duration` antes de `end`,
+        o None. Salta directamente al final de cada cita que estorba.
+        """
+        while start + duration <= end:
+            positions = self._positions(start, start + duration)
+            if not positions:
+                return start
+            start = max(self.ends[i] for i in positions)
+        return None
+
+
+class AvailabilityIndex:
+    """
+    Agenda cargada en memoria: intervalos por terapeuta, por consultorio y de toda
+    la clínica para cada día. Se arma con una sola consulta (AvailabilityService.load)
+    y responde todas las preguntas de disponibilidad de ese rango sin volver a la base.
+    """
+
+    CLINIC = ("clinic", None)
+
+    def __init__(self, start_date, end_date, appointment_minutes):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.appointment_minutes = appointment_minutes
+        self._days = {}
+
+    def add(self, appointment_id, day, start, therapist_id=None, room=None):
+        end = start + self.appointment_minutes
+        resources = [self.CLINIC]
+        if therapist_id is not None:
+            resources.append(("therapist", therapist_id))
+        if room is not None:
+            resources.append(("room", room))
+        for resource in resources:
+            self._days.setdefault((resource, day), DayIntervals()).add(start, end, appointment_id)
+
+    def _resources(self, therapist_id=None, room=None):
+        """Recursos a revisar; sin terapeuta ni consultorio, cualquier cita de la clínica bloquea."""
+        resources = []
+        if therapist_id is not None:
+            resources.append(("therapist", int(therapist_id)))
+        if room is not None:
+            resources.append(("room", int(room)))
+        return resources or [self.CLINIC]
+
+    def covers(self, day):
+        return self.start_date <= day <= self.end_date
+
+    def conflicts(self, day, start, duration, therapist_id=None, room=None, exclude_id=None):
+        """Ids de las citas que impiden reservar `duration` minutos desde `start` ese día."""
+        found = set()
+        for resource in self._resources(therapist_id, room):
+            intervals = self._days.get((resource, day))
+            if intervals is not None:
+                found.update(intervals.overlapping(start, start + duration))
+        found.discard(exclude_id)
+        return sorted(found)
+
+    def is_free(self, day, start, duration, therapist_id=None, room=None, exclude_id=None):
+        return not self.conflicts(day, start, duration, therapist_id, room, exclude_id)
+
+    def free_slots(self, duration, limit, day_start, day_end, step, therapist_id=None, room=None,
+                   not_before=None):
+        """
+        Próximos `limit` horarios libres (día, minuto) entre start_date y end_date,
+        dentro de la jornada [day_start, day_end) y alineados a `step` minutos.
+        `not_before` (datetime local) descarta los horarios ya pasados.
+        """
+        resources = self._resources(therapist_id, room)
+        slots = []
+        day = self.start_date
+        while day <= self.end_date and len(slots) < limit:
+            start = day_start
+            if not_before is not None and day == not_before.date():
+                start = max(start, _minutes(not_before.time()) + 1)
+            elif not_before is not None and day < not_before.date():
+                start = day_end
+            days = [self._days.get((resource, day)) or DayIntervals() for resource in resources]
+            while len(slots) < limit:
+                start = self._align(start, day_start, step)
+                candidate = self._first_free_all(days, start, day_end, duration, day_start, step)
+                if candidate is None:
+                    break
+                slots.append((day, candidate))
+                start = candidate + step
+            day += timedelta(days=1)
+        return slots
+
+    @staticmethod
+    def _align(minute, origin, step):
+        offset = (minute - origin) % step
+        return minute if offset == 0 else minute + step - offset
+
+    def _first_free_all(self, days, start, end, duration, origin, step):
+        # Avanza hasta un horario libre en todos los recursos a la vez
+        while True:
+            candidate = start
+            for intervals in days:
+                free = intervals.first_free(candidate, end, duration)
+                if free is None:
+                    return None
+                candidate = free
+            candidate = self._align(candidate, origin, step)
+            if candidate + duration > end:
+                return None
+            if all(not intervals.overlapping(candidate, candidate + duration) for intervals in days):
+                return candidate
+            start = candidate + 1
+
+
+class AvailabilityService:
+    """
+    Disponibilidad de terapeutas y consultorios.
+
+    Las citas no guardan duración: cada una ocupa APPOINTMENT_DURATION_MINUTES
+    desde su hora. Las citas eliminadas o canceladas no bloquean.
+    """
+
+    CANCELLED_STATUSES = (Appointment.STATUS_CANCELLED,)
+
+    def __init__(self):
+        self.appointment_minutes = getattr(settings, 'APPOINTMENT_DURATION_MINUTES', 60)
+        self.slot_minutes = getattr(settings, 'APPOINTMENT_SLOT_MINUTES', 30)
+        self.day_start = _parse_hhmm(getattr(settings, 'APPOINTMENT_DAY_START', '08:00'))
+        self.day_end = _parse_hhmm(getattr(settings, 'APPOINTMENT_DAY_END', '20:00'))
+
+    def load(self, start_date, end_date, therapist_id=None, room=None):
+        """
+        Carga en un AvailabilityIndex las citas activas del rango (una consulta).
+        Con terapeuta o consultorio solo se leen las citas de esos recursos.
+        """
+        desde, hasta = day_range_bounds(start_date, end_date)
+        queryset = (
+            Appointment.objects
+            .filter(appointment_date__gte=desde, appointment_date__lt=hasta, deleted_at__isnull=True)
+            .exclude(appointment_status__in=self.CANCELLED_STATUSES)
+        )
+        resource_filter = Q()
+        if therapist_id is not None:
+            resource_filter |= Q(therapist_id=therapist_id)
+        if room is not None:
+            resource_filter |= Q(room=room)
+        if resource_filter:
+            queryset = queryset.filter(resource_filter)
+
+        index = AvailabilityIndex(start_date, end_date, self.appointment_minutes)
+        rows = queryset.values_list('id', 'appointment_date', 'hour', 'therapist_id', 'room')
+        for appointment_id, appointment_date, hour, row_therapist, row_room in rows.iterator(chunk_size=2000):
+            day, start = appointment_start(appointment_date, hour)
+            index.add(appointment_id, day, start, row_therapist, row_room)
+        return index
+
+    def check(self, date, hour, duration=None, therapist_id=None, room=None, exclude_id=None, index=None):
+        """{'is_available', 'conflicting_appointments', 'conflicting_ids'} para una fecha y hora."""
+        duration = duration or self.appointment_minutes
+        if index is None or not index.covers(date):
+            index = self.load(date, date, therapist_id, room)
+        conflicts = index.conflicts(date, _minutes(hour), duration, therapist_id, room, exclude_id)
+        return {
+            'is_available': not conflicts,
+            'conflicting_appointments': len(conflicts),
+            'conflicting_ids': conflicts,
+        }
+
+    def next_free_slots(self, therapist_id, start_date, end_date, duration=None, limit=10, room=None):
+        """Próximos horarios libres del terapeuta (y consultorio, si se indica) en el rango."""
+        duration = duration or self.appointment_minutes
+        index = self.load(start_date, end_date, therapist_id, room)
+        slots = index.free_slots(
+            duration, limit, self.day_start, self.day_end, self.slot_minutes,
+            therapist_id=therapist_id, room=room, not_before=timezone.localtime(),
+        )
+        return [
+            {
+                'date': day.isoformat(),
+                'hour': time(minute // 60, minute % 60).strftime('%H:%M'),
+                'end_hour': time((minute + duration) // 60 % 24, (minute + duration) % 60).strftime('%H:%M'),
+            }
+            for day, minute in slots
+        ]
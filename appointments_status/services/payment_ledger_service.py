@@ -0,0 +1,191 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Sum
+
+from ..models import Appointment, PaymentEntry, Ticket
+
+
+# Campos que cambian lo que una cita o un ticket aporta a la caja
+APPOINTMENT_LEDGER_FIELDS = ('payment', 'payment_type', 'appointment_date', 'deleted_at')
+TICKET_LEDGER_FIELDS = ('status', 'amount', 'payment_method', 'is_active', 'payment_date')
+
+
+class PaymentLedgerService:
+    """
+    Mantiene el libro de pagos (PaymentEntry). sync() compara lo que cada cita o ticket
+    aporta hoy a la caja con su saldo en el libro y agrega solo las filas que faltan
+    para igualarlos; es idempotente, así que sirve para cualquier transición.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def contributions(self, source, ids, lock=False):
+        """
+        {id: (día, tipo de pago, método, monto)} de lo que aporta hoy cada cita/ticket con
+        pago (las citas por id de tipo de pago, los tickets por método en texto), y
+        {id: movimiento} con el motivo por el que los demás no aportan nada.
+        Con lock las filas de origen se leen con select_for_update, en orden de id.
+        """
+        current, reasons = {}, {}
+        model = Appointment if source == PaymentEntry.SOURCE_APPOINTMENT else Ticket
+        queryset = model.objects.using(self.using).filter(pk__in=ids).order_by('pk')
+        if lock:
+            queryset = queryset.select_for_update()
+        if source == PaymentEntry.SOURCE_APPOINTMENT:
+            rows = list(
+                queryset.values_list('id', 'appointment_local_date', 'payment', 'payment_type_id', 'deleted_at')
+            )
+            for pk, day, payment, payment_type_id, deleted_at in rows:
+                if deleted_at is not None:
+                    reasons[pk] = PaymentEntry.KIND_CANCELLATION
+                elif payment and payment > 0 and day is not None:
+                    current[pk] = (day, payment_type_id, '', payment)
+        else:
+            rows = list(
+                queryset.values_list('id', 'payment_local_date', 'amount', 'payment_method', 'status', 'is_active')
+            )
+            for pk, day, amount, method, status, is_active in rows:
+                if not is_active or status == 'cancelled':
+                    reasons[pk] = PaymentEntry.KIND_CANCELLATION
+                elif status == 'refunded':
+                    reasons[pk] = PaymentEntry.KIND_REFUND
+                elif status == 'paid' and amount and amount > 0 and day is not None:
+                    current[pk] = (day, None, method or PaymentEntry.NO_METHOD, amount)
+        # Lo que ya no existe se revierte como cancelación
+        for pk in set(ids) - {row[0] for row in rows}:
+            reasons[pk] = PaymentEntry.KIND_CANCELLATION
+        return current, reasons
+
+    def balances(self, source, ids):
+        """{id: {(día, tipo de pago, método): (monto, pagos)}} con el saldo vigente en el libro."""
+        rows = (
+            PaymentEntry.objects.using(self.using)
+            .filter(source=source, source_id__in=ids)
+            .values('source_id', 'local_date', 'payment_type_id', 'method')
+            .annotate(total=Sum('amount'), count=Sum('payments'))
+            .values_list('source_id', 'local_date', 'payment_type_id', 'method', 'total', 'count')
+            .order_by()
+        )
+        balances = {}
+        for pk, day, payment_type_id, method, total, count in rows:
+            if total or count:
+                balances.setdefault(pk, {})[(day, payment_type_id, method)] = (total, count)
+        return balances
+
+    def pending_entries(self, source, ids, lock=False):
+        """Filas que hay que agregar para que el libro refleje el estado actual."""
+        ids = list(ids)
+        current, reasons = self.contributions(source, ids, lock=lock)
+        balances = self.balances(source, ids)
+
+        entries = []
+        for pk in ids:
+            want = current.get(pk)
+            for key, (total, count) in balances.get(pk, {}).items():
+                day, payment_type_id, method = key
+                if want is not None and key == want[:3]:
+                    # Mismo día y método: solo se corrige la diferencia
+                    if want[3] != total or count != 1:
+                        entries.append(PaymentEntry(
+                            source=source, source_id=pk, kind=PaymentEntry.KIND_ADJUSTMENT,
+                            local_date=day, payment_type_id=payment_type_id, method=method,
+                            amount=want[3] - total, payments=1 - count,
+                        ))
+                    want = None
+                    continue
+                # El pago dejó de contar aquí: se revierte por completo
+                entries.append(PaymentEntry(
+                    source=source, source_id=pk, kind=reasons.get(pk, PaymentEntry.KIND_ADJUSTMENT),
+                    local_date=day, payment_type_id=payment_type_id, method=method,
+                    amount=-total, payments=-count,
+                ))
+            if want is not None:
+                day, payment_type_id, method, amount = want
+                entries.append(PaymentEntry(
+                    source=source, source_id=pk, kind=PaymentEntry.KIND_PAYMENT,
+                    local_date=day, payment_type_id=payment_type_id, method=method, amount=amount, payments=1,
+                ))
+        return entries
+
+    def sync(self, source, ids):
+        """
+        Agrega las filas pendientes de esas citas/tickets. Devuelve cuántas agregó.
+
+        Las citas/tickets se bloquean (select_for_update) antes de leer su saldo: dos
+        sync simultáneos del mismo origen se ejecutan uno detrás del otro y el segundo,
+        con READ COMMITTED, ya ve las filas que agregó el primero.
+        """
+        if not ids:
+            return 0
+        with transaction.atomic(using=self.using, savepoint=False):
+            entries = self.pending_entries(source, ids, lock=True)
+            if entries:
+                PaymentEntry.objects.using(self.using).bulk_create(entries, batch_size=1000)
+        return len(entries)
+
+    def reconcile(self, since=None, chunk_size=2000):
+        """
+        Sincroniza las citas y tickets cuyo saldo en el libro difiere del estado actual
+        (cambios hechos con update() u otros caminos que no pasan por las señales).
+        Con `since` (fecha) solo revisa lo que cae en la ventana (ver candidates()).
+        Devuelve {origen: filas agregadas}.
+        """
+        added = {}
+        for source, model in ((PaymentEntry.SOURCE_APPOINTMENT, Appointment), (PaymentEntry.SOURCE_TICKET, Ticket)):
+            ids = sorted(self.differing(source, model, chunk_size, since=since))
+            added[source] = sum(
+                self.sync(source, ids[offset:offset + chunk_size]) for offset in range(0, len(ids), chunk_size)
+            )
+        return added
+
+    def candidates(self, source, model, since=None):
+        """
+        Ids de ese origen a comparar con el libro, incluidos los que solo quedan en el
+        libro (cita o ticket borrado). Sin `since` son todos; con `since` solo las citas
+        o tickets con día de caja desde esa fecha y los que tienen filas del libro en esos
+        días (así se revisa también lo que se movió a un día anterior). Ambos filtros usan
+        los índices por día.
+        """
+        rows = model.objects.using(self.using)
+        entries = PaymentEntry.objects.using(self.using).filter(source=source)
+        if since is not None:
+            day_field = 'appointment_local_date' if model is Appointment else 'payment_local_date'
+            rows = rows.filter(**{f'{day_field}__gte': since})
+            entries = entries.filter(local_date__gte=since)
+        ids = set(rows.values_list('id', flat=True))
+        ids.update(entries.values_list('source_id', flat=True).distinct())
+        return sorted(ids)
+
+    def differing(self, source, model, chunk_size=2000, since=None):
+        """Ids de ese origen cuyo saldo en el libro no coincide con lo que aportan hoy."""
+        ids = self.candidates(source, model, since=since)
+        differing = set()
+        for offset in range(0, len(ids), chunk_size):
+            differing.update(entry.source_id for entry in self.pending_entries(source, ids[offset:offset + chunk_size]))
+        return differing
+
+
+class PaymentLedgerCoordinator:
+    """
+    Punto de entrada de las señales y de las operaciones masivas: sincroniza el libro
+    de las citas y tickets cuyo pago cambió en el acto, dentro de la transacción que
+    los guarda. Un error al escribir el libro revierte también el cambio, así que una
+    cita confirmada nunca queda con su pago fuera de la caja.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def appointments_changed(self, ids):
+        self._sync(PaymentEntry.SOURCE_APPOINTMENT, ids)
+
+    def tickets_changed(self, ids):
+        self._sync(PaymentEntry.SOURCE_TICKET, ids)
+
+    def _sync(self, source, ids):
+        ids = sorted({pk for pk in ids if pk is not None})
+        if ids:
+            PaymentLedgerService(self.using).sync(source, ids)
+
+
+payment_ledger = PaymentLedgerCoordinator()
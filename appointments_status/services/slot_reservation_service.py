@@ -0,0 +1,165 @@
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from company_reports.services.rollup_services import day_range_bounds
+from ..models import Appointment, SlotReservation
+from .availability_service import AvailabilityService, appointment_start
+
+
+# Campos de la cita que cambian los bloques que ocupa
+SCHEDULE_FIELDS = ('appointment_date', 'hour', 'therapist', 'therapist_id', 'appointment_status', 'deleted_at')
+
+
+class SlotConflictError(Exception):
+    """El terapeuta ya tiene otra cita en alguno de los bloques pedidos."""
+
+    def __init__(self, conflicting_ids):
+        self.conflicting_ids = sorted(conflicting_ids)
+        super().__init__("El terapeuta ya tiene una cita en ese horario")
+
+
+class SlotReservationService:
+    """
+    Reservas de agenda por bloques de APPOINTMENT_SLOT_MINUTES.
+
+    Cada cita activa con terapeuta ocupa los bloques que cubre
+    [hora, hora + APPOINTMENT_DURATION_MINUTES). La restricción única
+    (terapeuta, día, bloque) hace que la base rechace la segunda reserva de un
+    bloque aunque dos recepcionistas confirmen a la vez: no hay ventana entre
+    "consultar" y "guardar".
+
+    Si se cambia APPOINTMENT_SLOT_MINUTES hay que volver a ejecutar
+    backfill_slot_reservations --rebuild.
+    """
+
+    def __init__(self):
+        self.slot_minutes = getattr(settings, 'APPOINTMENT_SLOT_MINUTES', 30)
+        self.appointment_minutes = getattr(settings, 'APPOINTMENT_DURATION_MINUTES', 60)
+        self.slots_per_day = 24 * 60 // self.slot_minutes
+
+    def slots_for(self, appointment):
+        """{(terapeuta, día, bloque)} que debe ocupar la cita (vacío si no bloquea agenda)."""
+        if (
+            appointment.deleted_at is not None
+            or appointment.therapist_id is None
+            or appointment.appointment_status in AvailabilityService.CANCELLED_STATUSES
+        ):
+            return set()
+        start = appointment_start(appointment.appointment_date, appointment.hour)
+        if start is None:
+            return set()
+        day, minute = start
+        first = minute // self.slot_minutes
+        last = -(-(minute + self.appointment_minutes) // self.slot_minutes) - 1
+        slots = set()
+        for index in range(first, last + 1):
+            # Una cita que pasa de medianoche ocupa los primeros bloques del día siguiente
+            slot_day = day + timedelta(days=index // self.slots_per_day)
+            slots.add((appointment.therapist_id, slot_day, index % self.slots_per_day))
+        return slots
+
+    def sync(self, appointment):
+        """
+        Deja las reservas de la cita iguales a slots_for(). Lanza SlotConflictError
+        (sin guardar nada) si otro turno ya ocupa alguno de los bloques.
+        Debe llamarse dentro de la transacción que guarda la cita.
+        """
+        desired = self.slots_for(appointment)
+        existing = {
+            (therapist_id, date, slot_index): pk
+            for pk, therapist_id, date, slot_index in SlotReservation.objects
+            .filter(appointment_id=appointment.pk)
+            .values_list('id', 'therapist_id', 'date', 'slot_index')
+        }
+        stale = [pk for key, pk in existing.items() if key not in desired]
+        if stale:
+            SlotReservation.objects.filter(pk__in=stale).delete()
+
+        missing = desired - set(existing)
+        if not missing:
+            return
+        try:
+            with transaction.atomic():
+                SlotReservation.objects.bulk_create([
+                    SlotReservation(
+                        therapist_id=therapist_id, date=date, slot_index=slot_index, appointment_id=appointment.pk
+                    )
+                    for therapist_id, date, slot_index in sorted(missing)
+                ])
+        except IntegrityError:
+            raise SlotConflictError(self._holders(missing, exclude_id=appointment.pk))
+
+    def reserve_many(self, appointments):
+        """
+        Reserva de una vez los bloques de citas recién creadas (sin reservas previas).
+        Todo o nada: lanza SlotConflictError si alguno ya está ocupado.
+        """
+        reservations = [
+            SlotReservation(therapist_id=therapist_id, date=date, slot_index=slot_index, appointment_id=appointment.pk)
+            for appointment in appointments
+            for therapist_id, date, slot_index in sorted(self.slots_for(appointment))
+        ]
+        if not reservations:
+            return 0
+        try:
+            with transaction.atomic():
+                SlotReservation.objects.bulk_create(reservations, batch_size=1000)
+        except IntegrityError:
+            slots = {(r.therapist_id, r.date, r.slot_index) for r in reservations}
+            raise SlotConflictError(self._holders(slots) - {appointment.pk for appointment in appointments})
+        return len(reservations)
+
+    def release(self, appointment):
+        SlotReservation.objects.filter(appointment_id=appointment.pk).delete()
+
+    def _holders(self, slots, exclude_id=None):
+        """Citas que ocupan alguno de los bloques."""
+        condition = reduce(or_, (
+            Q(therapist_id=therapist_id, date=date, slot_index=slot_index)
+            for therapist_id, date, slot_index in slots
+        ))
+        return set(
+            SlotReservation.objects.filter(condition)
+            .exclude(appointment_id=exclude_id)
+            .values_list('appointment_id', flat=True)
+        )
+
+    def backfill(self, start_date=None, rebuild=False):
+        """
+        Reserva los bloques de las citas activas (desde start_date, si se indica).
+        Las citas que ya se solapaban con otra quedan sin reservar y se devuelven
+        para revisarlas a mano. Devuelve (citas reservadas, [(cita, [conflictos])]).
+        """
+        if rebuild:
+            stale = SlotReservation.objects.all()
+            if start_date is not None:
+                stale = stale.filter(date__gte=start_date)
+            stale.delete()
+
+        queryset = (
+            Appointment.objects
+            .filter(deleted_at__isnull=True, therapist__isnull=False)
+            .exclude(appointment_status__in=AvailabilityService.CANCELLED_STATUSES)
+        )
+        if start_date is not None:
+            queryset = queryset.filter(appointment_date__gte=day_range_bounds(start_date, start_date)[0])
+        # Las más antiguas primero: ante un solapamiento conserva la cita que se tomó antes
+        queryset = queryset.order_by('created_at', 'id').only(
+            'id', 'therapist_id', 'appointment_date', 'hour', 'appointment_status', 'deleted_at'
+        )
+
+        reserved = 0
+        conflicts = []
+        for appointment in queryset.iterator(chunk_size=500):
+            try:
+                with transaction.atomic():
+                    self.sync(appointment)
+                reserved += 1
+            except SlotConflictError as e:
+                conflicts.append((appointment.pk, e.conflicting_ids))
+        return reserved, conflicts
@@ -0,0 +1,117 @@
+import os
+import re
+import threading
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from ..models import Ticket, TicketSequence
+
+
+TICKET_PREFIX = 'TKT-'
+TICKET_NUMBER_RE = re.compile(r'^TKT-(\d+)$')
+
+
+def format_ticket_number(value):
+    """Formatea un valor de la secuencia (ej: 7 -> TKT-007, 1234 -> TKT-1234)."""
+    return f'{TICKET_PREFIX}{value:03d}'
+
+
+def parse_ticket_number(ticket_number):
+    """Devuelve el valor numérico de un TKT-n o None si no sigue el formato."""
+    match = TICKET_NUMBER_RE.match(ticket_number or '')
+    return int(match.group(1)) if match else None
+
+
+def max_issued_ticket_number():
+    """Mayor número TKT-n ya emitido en la tabla de tickets (0 si no hay ninguno)."""
+    highest = 0
+    numbers = (
+        Ticket.objects
+        .filter(ticket_number__startswith=TICKET_PREFIX)
+        .values_list('ticket_number', flat=True)
+        .iterator(chunk_size=2000)
+    )
+    for ticket_number in numbers:
+        value = parse_ticket_number(ticket_number)
+        if value and value > highest:
+            highest = value
+    return highest
+
+
+class TicketNumberAllocator:
+    """
+    Asigna números de ticket desde la fila de ticket_sequences.
+
+    Cada reserva hace UPDATE + SELECT ... FOR UPDATE sobre la fila del contador en la
+    conexión de la petición: la fila queda bloqueada hasta el COMMIT, así que dos workers
+    nunca reciben el mismo número. Dentro de una transacción (alta de cita, ticket_sync)
+    la reserva forma parte de ella: un rollback devuelve los números, y las altas
+    concurrentes esperan a que la primera confirme.
+
+    Con TICKET_NUMBER_BLOCK_SIZE > 1, las reservas hechas fuera de una transacción se
+    amplían a un bloque que el proceso consume en memoria (una ida a la base de datos por
+    bloque). Dentro de una transacción se reserva solo lo necesario: un bloque guardado en
+    memoria se repetiría si la transacción se revierte.
+    """
+
+    SEQUENCE_NAME = 'ticket'
+
+    def __init__(self, block_size=None, using=DEFAULT_DB_ALIAS):
+        self.block_size = max(1, block_size or getattr(settings, 'TICKET_NUMBER_BLOCK_SIZE', 1))
+        self.using = using
+        self._lock = threading.Lock()
+        self._reset()
+        # Un bloque heredado por fork (gunicorn --preload) se repetiría en cada worker
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._next = 1
+        self._end = 0
+
+    def next_number(self):
+        """Reserva y devuelve el siguiente número de ticket."""
+        return self.next_numbers(1)[0]
+
+    def next_numbers(self, count):
+        """Reserva `count` números de ticket, primero del bloque en memoria."""
+        with self._lock:
+            take = min(self._end - self._next + 1, count)
+            values = list(range(self._next, self._next + take))
+            self._next += take
+
+        missing = count - len(values)
+        if missing:
+            # El bloqueo del proceso no se mantiene durante la reserva: un hilo que espera
+            # la fila no debe frenar al que la tiene bloqueada en su transacción
+            in_transaction = connections[self.using].in_atomic_block
+            start, end = self._reserve(missing if in_transaction else max(self.block_size, missing))
+            values.extend(range(start, start + missing))
+            if end >= start + missing:
+                with self._lock:
+                    self._next, self._end = start + missing, end
+        return [format_ticket_number(value) for value in values]
+
+    def _reserve(self, size):
+        """Avanza el contador en `size` y devuelve el rango reservado (inicio, fin)."""
+        sequences = TicketSequence.objects.using(self.using).filter(name=self.SEQUENCE_NAME)
+        for attempt in range(2):
+            try:
+                with transaction.atomic(using=self.using):
+                    # El UPDATE va primero: toma el bloqueo de escritura antes de leer
+                    updated = sequences.update(last_value=F('last_value') + size, updated_at=timezone.now())
+                    if updated:
+                        end = sequences.select_for_update().values_list('last_value', flat=True).get()
+                    else:
+                        # Sin fila aún: se siembra con el mayor TKT-n existente
+                        end = max_issued_ticket_number() + size
+                        TicketSequence.objects.using(self.using).create(name=self.SEQUENCE_NAME, last_value=end)
+                return end - size + 1, end
+            except IntegrityError:
+                # Otro proceso creó la fila a la vez: reintentar con UPDATE
+                if attempt:
+                    raise
+
+
+ticket_number_allocator = TicketNumberAllocator()
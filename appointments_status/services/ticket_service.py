@@ -1,10 +1,11 @@
 from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
+from architect.pagination import InvalidCursor, KeysetPaginator
 from ..models import Ticket
 from ..serializers import TicketSerializer
 from django.utils import timezone
-import re
+from .ticket_number_allocator import ticket_number_allocator
 
 
 class TicketService:
@@ -93,12 +94,9 @@ class TicketService:
         try:
             ticket = Ticket.objects.get(id=ticket_id, is_active=True)
             
-            # Actualizar campos
-            for field, value in data.items():
-                if hasattr(ticket, field):
-                    setattr(ticket, field, value)
-            
-            ticket.save()
+            # Solo se escriben los campos que cambian; sin cambios no hay escritura
+            ticket.apply_changes(data)
+            ticket.save_changes()
             serializer = TicketSerializer(ticket)
             
             return Response({
@@ -146,19 +144,25 @@ class TicketService:
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def _list_queryset(self, **lookups):
+        """Tickets activos con las relaciones que usa TicketSerializer."""
+        return TicketSerializer.setup_eager_loading(Ticket.objects.filter(is_active=True, **lookups))
+
     def list_all(self, filters=None, pagination=None):
         """
         Lista todos los tickets con filtros opcionales.
         
         Args:
             filters (dict): Filtros a aplicar
-            pagination (dict): Configuración de paginación
+            pagination (dict): Configuración de paginación. Con 'cursor' ('' para
+                la primera página) usa paginación keyset y acepta 'include_count';
+                si no, 'page' y 'page_size' por offset.
             
         Returns:
             Response: Respuesta con la lista de tickets
         """
         try:
-            queryset = Ticket.objects.filter(is_active=True)
+            queryset = self._list_queryset()
             
             # Aplicar filtros
             if filters:
@@ -169,8 +173,20 @@ class TicketService:
                 if 'appointment' in filters:
                     queryset = queryset.filter(appointment=filters['appointment'])
                 if 'payment_date' in filters:
-                    queryset = queryset.filter(payment_date__date=filters['payment_date'])
-            
+                    queryset = queryset.filter(payment_local_date=filters['payment_date'])
+            
+            # Paginación por cursor (keyset): sin OFFSET y con COUNT(*) opcional
+            if pagination and pagination.get('cursor') is not None:
+                paginator = KeysetPaginator(
+                    queryset, ("-payment_date", "-id"), pagination.get('page_size', 10)
+                )
+                try:
+                    page = paginator.page(pagination['cursor'], pagination.get('include_count', True))
+                except InvalidCursor as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                page['results'] = TicketSerializer(page['results'], many=True).data
+                return Response(page, status=status.HTTP_200_OK)
+
             # Aplicar paginación básica
             if pagination:
                 page = pagination.get('page', 1)
@@ -180,9 +196,11 @@ class TicketService:
                 queryset = queryset[start:end]
             
             serializer = TicketSerializer(queryset, many=True)
+            results = serializer.data
             return Response({
-                'count': queryset.count(),
-                'results': serializer.data
+                # Mismo valor que antes (filas de la página) sin otra consulta COUNT
+                'count': len(results),
+                'results': results
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -227,7 +245,7 @@ class TicketService:
             Response: Respuesta con los tickets pagados
         """
         try:
-            queryset = Ticket.objects.filter(status='paid', is_active=True)
+            queryset = self._list_queryset(status='paid')
             
             # Aplicar filtros adicionales
             if filters:
@@ -236,12 +254,13 @@ class TicketService:
                 if 'appointment' in filters:
                     queryset = queryset.filter(appointment=filters['appointment'])
                 if 'payment_date' in filters:
-                    queryset = queryset.filter(payment_date__date=filters['payment_date'])
+                    queryset = queryset.filter(payment_local_date=filters['payment_date'])
             
             serializer = TicketSerializer(queryset, many=True)
+            results = serializer.data
             return Response({
-                'count': queryset.count(),
-                'results': serializer.data
+                'count': len(results),
+                'results': results
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -261,7 +280,7 @@ class TicketService:
             Response: Respuesta con los tickets pendientes
         """
         try:
-            queryset = Ticket.objects.filter(status='pending', is_active=True)
+            queryset = self._list_queryset(status='pending')
             
             # Aplicar filtros adicionales
             if filters:
@@ -270,12 +289,13 @@ class TicketService:
                 if 'appointment' in filters:
                     queryset = queryset.filter(appointment=filters['appointment'])
                 if 'payment_date' in filters:
-                    queryset = queryset.filter(payment_date__date=filters['payment_date'])
+                    queryset = queryset.filter(payment_local_date=filters['payment_date'])
             
             serializer = TicketSerializer(queryset, many=True)
+            results = serializer.data
             return Response({
-                'count': queryset.count(),
-                'results': serializer.data
+                'count': len(results),
+                'results': results
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -352,32 +372,10 @@ class TicketService:
         """
         Genera un número único de ticket en formato secuencial TKT-001, TKT-002, etc.
         
-        Args:
-            None
-            
+        El número se reserva en la secuencia de tickets (ver TicketNumberAllocator),
+        por lo que dos citas creadas en paralelo nunca obtienen el mismo número.
+        
         Returns:
             str: Número de ticket único
         """
-        # Obtener el último ticket creado
-        last_ticket = Ticket.objects.order_by('-id').first()
-        
-        if last_ticket:
-            # Extraer el número del último ticket
-            try:
-                # Buscar el patrón TKT-XXX en el número del ticket
-                match = re.search(r'TKT-(\d+)', last_ticket.ticket_number)
-                if match:
-                    last_number = int(match.group(1))
-                    next_number = last_number + 1
-                else:
-                    # Si no encuentra el patrón, empezar desde 1
-                    next_number = 1
-            except (ValueError, AttributeError):
-                # Si hay algún error, empezar desde 1
-                next_number = 1
-        else:
-            # Si no hay tickets, empezar desde 1
-            next_number = 1
-        
-        # Formatear el número con ceros a la izquierda (ej: 001, 002, 010, 100)
-        return f'TKT-{next_number:03d}'
+        return ticket_number_allocator.next_number()
@@ -0,0 +1,155 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from company_reports.services.cache_services import ReportCacheService
+from ..models import Appointment, PaymentEntry, Ticket
+from ..models.appointment import local_date
+from .payment_ledger_service import PaymentLedgerService
+from .ticket_number_allocator import ticket_number_allocator
+
+
+# Campos de la cita que se copian al ticket
+PAYMENT_FIELDS = ('payment',)
+
+
+class TicketSyncCoordinator:
+    """
+    Crea los tickets que faltan y ajusta sus montos con bulk_create / bulk_update,
+    dentro de la misma transacción que guarda la cita: una cita confirmada siempre
+    tiene su ticket, y un rollback se lleva ambos.
+
+    El pedido original era diferir este trabajo con transaction.on_commit; no se
+    hace así a propósito: un callback de on_commit corre después del COMMIT, y si
+    fallara (o el proceso muriera antes) la cita quedaría confirmada sin ticket. Por
+    eso la sincronización es síncrona, dentro de la transacción de la cita, y el
+    ticket se confirma o se revierte junto con ella.
+
+    Cada cita guardada se sincroniza en el acto. Dentro de batch() las citas se
+    juntan y se sincronizan una sola vez al salir del bloque (una lectura, una
+    reserva de números y un INSERT para todas).
+
+    Solo se encolan ids; al vaciar la cola se lee el estado real de la base, así
+    que una cita revertida (savepoint) no deja efectos.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self._local = threading.local()
+
+    def _pending(self):
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = set()
+        return pending
+
+    @contextmanager
+    def batch(self):
+        """
+        Transacción en la que el trabajo de tickets de las citas guardadas se junta y
+        se hace una sola vez, al final del bloque pero antes del COMMIT (no en
+        on_commit): los tickets se confirman atómicamente con las citas, y un error al
+        crearlos revierte también las citas.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        try:
+            with transaction.atomic(using=self.using):
+                yield
+                if not depth:
+                    self._local.depth = 0
+                    self.flush()
+        except BaseException:
+            if not depth:
+                self._local.pending = set()
+            raise
+        finally:
+            self._local.depth = depth
+
+    def appointment_created(self, appointment):
+        self._enqueue(appointment.pk)
+
+    def payment_changed(self, appointment):
+        self._enqueue(appointment.pk)
+
+    def _enqueue(self, appointment_id):
+        self._pending().add(appointment_id)
+        if not getattr(self._local, 'depth', 0):
+            self.flush()
+
+    def flush(self):
+        """Sincroniza los tickets de las citas encoladas; lo que ya se procesó no se repite."""
+        ids = self._pending()
+        if not ids:
+            return
+        self._local.pending = set()
+
+        rows = (
+            Appointment.objects.using(self.using)
+            .filter(pk__in=ids)
+            .values_list('id', 'payment', 'ticket_number', 'appointment_date',
+                         'ticket__id', 'ticket__amount', 'ticket__payment_date')
+        )
+        missing = {}
+        changed = []
+        cache_days = set()
+        seen = set()
+        for appointment_id, payment, ticket_number, appointment_date, ticket_id, amount, payment_date in rows:
+            if appointment_id in seen:
+                continue
+            seen.add(appointment_id)
+            if ticket_id is None:
+                missing[appointment_id] = (payment, ticket_number, appointment_date)
+            elif payment is not None and amount != payment:
+                changed.append(Ticket(pk=ticket_id, amount=payment, updated_at=timezone.now()))
+                cache_days.update({local_date(appointment_date), local_date(payment_date)})
+
+        with transaction.atomic(using=self.using, savepoint=False):
+            if missing:
+                self._create_tickets(missing)
+                # Un ticket pendiente no cambia el acumulado (el día de la cita ya lo
+                # recalcula su propia señal), pero sí los reportes de caja del día
+                cache_days.add(timezone.localdate())
+                cache_days.update(local_date(appointment_date) for _p, _n, appointment_date in missing.values())
+            if changed:
+                Ticket.objects.using(self.using).bulk_update(changed, ['amount', 'updated_at'])
+                # Ya dentro de la transacción del flush: el libro se ajusta aquí mismo
+                PaymentLedgerService(self.using).sync(PaymentEntry.SOURCE_TICKET, [ticket.pk for ticket in changed])
+
+            # Lo que hacen las señales de Ticket, que bulk_create/bulk_update no disparan. El
+            # acumulado del día ya lo recalcula la señal de la cita que originó el cambio
+            cache_days.discard(None)
+            if cache_days:
+                transaction.on_commit(
+                    lambda: ReportCacheService().invalidate_days(cache_days), using=self.using, robust=True
+                )
+
+    def _create_tickets(self, missing):
+        # Se respeta el número que la cita ya tenga; al resto se le reservan de una vez
+        numbers = iter(ticket_number_allocator.next_numbers(
+            sum(1 for _payment, ticket_number, _date in missing.values() if not ticket_number)
+        ))
+        today = timezone.localdate()
+        tickets = []
+        numbered = []
+        for appointment_id, (payment, ticket_number, _date) in sorted(missing.items()):
+            if not ticket_number:
+                ticket_number = next(numbers)
+                numbered.append(Appointment(pk=appointment_id, ticket_number=ticket_number))
+            tickets.append(Ticket(
+                appointment_id=appointment_id,
+                ticket_number=ticket_number,
+                amount=payment or 0,
+                payment_local_date=today,
+                payment_method='efectivo',
+                description=f'Ticket generado automáticamente para cita #{appointment_id}',
+                status='pending',
+            ))
+        Ticket.objects.using(self.using).bulk_create(tickets)
+        if numbered:
+            Appointment.objects.using(self.using).bulk_update(numbered, ['ticket_number'])
+
+
+ticket_sync = TicketSyncCoordinator()
@@ -0,0 +1,225 @@
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from company_reports.services.cache_services import ReportCacheService
+from company_reports.services.rollup_services import DailyRollupService
+from patients_diagnoses.models import Patient
+from therapists.models import Therapist
+from ..models import Appointment, Ticket
+from .availability_service import AvailabilityService, _minutes
+from .payment_ledger_service import payment_ledger
+from .slot_reservation_service import SlotReservationService
+from .ticket_number_allocator import ticket_number_allocator
+
+
+WEEKDAY_CODES = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+
+class PlanValidationError(ValueError):
+    """Datos del plan o regla de recurrencia inválidos."""
+
+
+class PlanConflictError(Exception):
+    """Alguna sesión del plan choca con citas existentes."""
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__(f"{len(conflicts)} sesiones del plan no están disponibles")
+
+
+def _parse_weekdays(values):
+    weekdays = set()
+    for value in values:
+        if isinstance(value, int) and 0 <= value <= 6:
+            weekdays.add(value)
+        elif isinstance(value, str) and value.upper() in WEEKDAY_CODES:
+            weekdays.add(WEEKDAY_CODES.index(value.upper()))
+        else:
+            raise PlanValidationError(f"Día de la semana inválido: {value!r} (use 0-6 o MO..SU)")
+    return sorted(weekdays)
+
+
+def recurrence_dates(start_date, rule, limit):
+    """
+    Fechas de las sesiones de una regla de recurrencia:
+        {"frequency": "daily" | "weekly", "interval": 1, "weekdays": ["MO", "TH"],
+         "count": 10, "until": "YYYY-MM-DD"}
+    weekdays solo aplica a weekly (por defecto, el día de start_date). Se exige
+    count o until, y nunca se generan más de `limit` fechas.
+    """
+    if not isinstance(rule, dict):
+        raise PlanValidationError("recurrence debe ser un objeto")
+    frequency = rule.get('frequency', 'weekly')
+    if frequency not in ('daily', 'weekly'):
+        raise PlanValidationError("frequency debe ser daily o weekly")
+    try:
+        interval = int(rule.get('interval', 1))
+        count = int(rule['count']) if rule.get('count') is not None else None
+        until = datetime.strptime(rule['until'], '%Y-%m-%d').date() if rule.get('until') else None
+    except (TypeError, ValueError):
+        raise PlanValidationError("interval y count deben ser números y until una fecha YYYY-MM-DD")
+    if interval < 1 or (count is not None and count < 1):
+        raise PlanValidationError("interval y count deben ser mayores que cero")
+    if count is None and until is None:
+        raise PlanValidationError("La recurrencia necesita count o until")
+    if count is not None and count > limit:
+        raise PlanValidationError(f"Un plan admite como máximo {limit} sesiones")
+
+    if frequency == 'daily':
+        candidates = (start_date + timedelta(days=i * interval) for i in range(limit + 1))
+    else:
+        weekdays = _parse_weekdays(rule.get('weekdays') or [start_date.weekday()])
+        week_start = start_date - timedelta(days=start_date.weekday())
+        candidates = (
+            week_start + timedelta(weeks=week * interval, days=weekday)
+            for week in range(limit + 1)
+            for weekday in weekdays
+        )
+
+    dates = []
+    for candidate in candidates:
+        if candidate < start_date:
+            continue
+        if (until is not None and candidate > until) or (count is not None and len(dates) == count):
+            break
+        if len(dates) == limit:
+            raise PlanValidationError(f"Un plan admite como máximo {limit} sesiones")
+        dates.append(candidate)
+    return dates
+
+
+class TreatmentPlanService:
+    """
+    Reserva de un plan de tratamiento (varias sesiones recurrentes) en bloque.
+
+    Valida la disponibilidad de todas las sesiones con una sola carga de agenda,
+    reserva de una vez los números de ticket y crea citas, tickets y reservas de
+    bloques con bulk_create en una transacción. bulk_create no dispara post_save,
+    así que aquí se hace lo mismo que hacen las señales por cita: reservas de
+    agenda, ticket, acumulado diario e invalidación de reportes.
+    """
+
+    MAX_SESSIONS = 60
+
+    # Campos de la cita que se copian a todas las sesiones
+    COPIED_FIELDS = (
+        'history', 'room', 'ailments', 'diagnosis', 'surgeries', 'reflexology_diagnostics',
+        'medications', 'observation', 'appointment_type', 'social_benefit', 'payment_detail',
+        'payment', 'payment_type', 'payment_status',
+    )
+
+    def __init__(self):
+        self.availability = AvailabilityService()
+        self.slots = SlotReservationService()
+
+    def occurrences(self, data):
+        """(paciente, terapeuta, [(día, hora)]) validados a partir de los datos del plan."""
+        for field in ('patient', 'therapist', 'start_date', 'hour', 'recurrence'):
+            if data.get(field) in (None, ''):
+                raise PlanValidationError(f"El campo {field} es requerido")
+        try:
+            start_date = datetime.strptime(str(data['start_date']), '%Y-%m-%d').date()
+            hour = datetime.strptime(str(data['hour'])[:5], '%H:%M').time()
+            patient_id = int(getattr(data['patient'], 'pk', data['patient']))
+            therapist_id = int(getattr(data['therapist'], 'pk', data['therapist']))
+        except (TypeError, ValueError):
+            raise PlanValidationError(
+                "Formato inválido: start_date YYYY-MM-DD, hour HH:MM, patient y therapist numéricos"
+            )
+        if start_date < timezone.localdate():
+            raise PlanValidationError("La fecha de la cita no puede ser anterior a hoy.")
+        if not Patient.objects.filter(pk=patient_id, deleted_at__isnull=True).exists():
+            raise PlanValidationError("Paciente no encontrado")
+        if not Therapist.objects.filter(pk=therapist_id, deleted_at__isnull=True).exists():
+            raise PlanValidationError("Terapeuta no encontrado")
+
+        dates = recurrence_dates(start_date, data['recurrence'], self.MAX_SESSIONS)
+        return patient_id, therapist_id, [(day, hour) for day in dates]
+
+    def conflicts(self, sessions, therapist_id, room=None):
+        """Sesiones que chocan con citas existentes, revisadas sobre una sola carga de agenda."""
+        index = self.availability.load(sessions[0][0], sessions[-1][0], therapist_id, room)
+        found = []
+        for day, hour in sessions:
+            ids = index.conflicts(day, _minutes(hour), self.availability.appointment_minutes, therapist_id, room)
+            if ids:
+                found.append({'date': day.isoformat(), 'hour': hour.strftime('%H:%M'), 'conflicting_ids': ids})
+        return found
+
+    def book(self, data):
+        """
+        Crea todas las sesiones del plan o ninguna. Devuelve las citas creadas.
+        Lanza PlanValidationError, PlanConflictError o SlotConflictError.
+        """
+        patient_id, therapist_id, sessions = self.occurrences(data)
+        if not sessions:
+            raise PlanValidationError("La recurrencia no genera ninguna sesión")
+        room = data.get('room')
+        conflicts = self.conflicts(sessions, therapist_id, int(room) if room not in (None, '') else None)
+        if conflicts:
+            raise PlanConflictError(conflicts)
+
+        common = {}
+        for field in self.COPIED_FIELDS:
+            if field in data:
+                value = data[field]
+                model_field = Appointment._meta.get_field(field)
+                if model_field.is_relation and not hasattr(value, 'pk'):
+                    field = model_field.attname
+                common[field] = value
+
+        # bulk_create no pasa por save(): los días locales se asignan aquí
+        today = timezone.localdate()
+        # Los números se reservan antes de la transacción para no bloquear la fila de la
+        # secuencia mientras se insertan las citas; un rollback solo deja un hueco
+        ticket_numbers = ticket_number_allocator.next_numbers(len(sessions))
+        first_day, last_day = sessions[0][0], sessions[-1][0]
+        appointments = [
+            Appointment(
+                patient_id=patient_id,
+                therapist_id=therapist_id,
+                appointment_date=timezone.make_aware(datetime.combine(day, hour)),
+                appointment_local_date=day,
+                hour=hour,
+                initial_date=first_day,
+                final_date=last_day,
+                ticket_number=ticket_number,
+                **common,
+            )
+            for (day, hour), ticket_number in zip(sessions, ticket_numbers)
+        ]
+
+        with transaction.atomic():
+            Appointment.objects.bulk_create(appointments)
+            if any(appointment.pk is None for appointment in appointments):
+                # MySQL no devuelve los ids de un INSERT múltiple: se recuperan por su ticket
+                ids = dict(
+                    Appointment.objects.filter(ticket_number__in=ticket_numbers)
+                    .values_list('ticket_number', 'id')
+                )
+                for appointment in appointments:
+                    appointment.pk = ids[appointment.ticket_number]
+
+            self.slots.reserve_many(appointments)
+            Ticket.objects.bulk_create([
+                Ticket(
+                    appointment_id=appointment.pk,
+                    ticket_number=appointment.ticket_number,
+                    amount=appointment.payment or 0,
+                    payment_local_date=today,
+                    payment_method='efectivo',
+                    description=f'Ticket generado automáticamente para cita #{appointment.pk}',
+                    status='pending',
+                )
+                for appointment in appointments
+            ])
+
+            # Los pagos adelantados de las sesiones entran al libro en esta misma transacción
+            payment_ledger.appointments_changed(appointment.pk for appointment in appointments if appointment.payment)
+
+            days = {day for day, _hour in sessions}
+            transaction.on_commit(lambda: DailyRollupService().refresh_days(days), robust=True)
+            transaction.on_commit(lambda: ReportCacheService().invalidate_days(days), robust=True)
+        return appointments
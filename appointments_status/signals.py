@@ -1,32 +1,50 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.db import transaction
 from .models import Appointment, Ticket
-from .services.ticket_service import TicketService
+from .models.appointment import local_date
+from .services.ticket_sync_coordinator import PAYMENT_FIELDS, ticket_sync
+from .services.slot_reservation_service import SCHEDULE_FIELDS, SlotReservationService
+from .services.payment_ledger_service import APPOINTMENT_LEDGER_FIELDS, TICKET_LEDGER_FIELDS, payment_ledger
+from company_reports.services.rollup_services import (
+    APPOINTMENT_ROLLUP_FIELDS, TICKET_ROLLUP_FIELDS, DailyRollupService,
+)
+from company_reports.services.cache_services import (
+    APPOINTMENT_REPORT_FIELDS, TICKET_REPORT_FIELDS, ReportCacheService,
+)
+
 
 @receiver(post_save, sender=Appointment)
-def create_ticket_for_appointment(sender, instance, created, **kwargs):
+def reserve_appointment_slots(sender, instance, created, update_fields=None, **kwargs):
     """
-    Al crear una cita, genera ticket y asigna ticket_number a la cita.
+    Ocupa (o libera) los bloques de agenda del terapeuta. Va antes que el ticket:
+    si el horario ya está tomado lanza SlotConflictError y la transacción que
+    guarda la cita se revierte sin consumir número de ticket.
     """
     if not created:
-        return
+        if update_fields is not None and not set(update_fields) & set(SCHEDULE_FIELDS):
+            return
+        if not any(instance.has_changed(field) for field in SCHEDULE_FIELDS):
+            return
+    SlotReservationService().sync(instance)
 
-    ticket_service = TicketService()
-    ticket_number = ticket_service.generate_ticket_number()  # string
 
-    with transaction.atomic():
-        Ticket.objects.create(
-            appointment=instance,
-            ticket_number=ticket_number,
-            amount=instance.payment or 0,
-            payment_method='efectivo',
-            description=f'Ticket generado automáticamente para cita #{instance.id}',
-            status='pending',
-        )
-        # IMPORTANTE: update() para no disparar otro post_save
-        Appointment.objects.filter(pk=instance.pk).update(ticket_number=ticket_number)
+@receiver(post_save, sender=Appointment)
+def sync_appointment_ticket(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Crea el ticket (alta) o ajusta su monto (cambio de pago) en la misma transacción
+    que guarda la cita; dentro de ticket_sync.batch() se junta con el de las demás.
+    Si no cambió el pago no hay trabajo de ticket.
+    """
+    if created:
+        ticket_sync.appointment_created(instance)
+        return
+    if update_fields is not None and not set(update_fields) & set(PAYMENT_FIELDS):
+        return
+    if not any(instance.has_changed(field) for field in PAYMENT_FIELDS):
+        return
+    ticket_sync.payment_changed(instance)
 
 
 # Función obsoleta - ahora usa TicketService.generate_ticket_number()
@@ -40,28 +58,138 @@ def create_ticket_for_appointment(sender, instance, created, **kwargs):
 #     return f"{now.strftime('%Y%m%d%H%M%S')}{now.microsecond:06d}"
 
 
+def _fields_changed(instance, created, update_fields, fields):
+    """Alta, o guardado cuyos update_fields y valores cambiados incluyen alguno de `fields`."""
+    if created:
+        return True
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return False
+    return any(instance.has_changed(field) for field in fields)
+
+
+# --- Acumulado diario (company_reports.DailyClinicRollup) ---
+
+def _schedule_rollup_refresh(*appointment_dates):
+    """Recalcula los días afectados una vez confirmada la transacción."""
+    days = {local_date(value) for value in appointment_dates} - {None}
+    if not days:
+        return
+    transaction.on_commit(lambda: DailyRollupService().refresh_days(days), robust=True)
+
+
+def _schedule_report_cache_invalidation(*dates):
+    """Invalida las respuestas de reportes cacheadas que cubren esos días."""
+    days = {local_date(value) for value in dates} - {None}
+    if not days:
+        return
+    transaction.on_commit(lambda: ReportCacheService().invalidate_days(days), robust=True)
+
+
+@receiver(pre_save, sender=Appointment)
+def remember_previous_appointment_values(sender, instance, update_fields=None, **kwargs):
+    """
+    Las citas leídas de la base ya traen sus valores previos (DirtyFieldsMixin).
+    Solo si la instancia no los tiene (p. ej. construida a mano con su pk) se leen
+    aquí, para que las señales sepan si cambió la agenda, el pago o el día.
+    """
+    if not instance.pk:
+        return
+    tracked = SCHEDULE_FIELDS + PAYMENT_FIELDS
+    if update_fields is not None and not set(update_fields) & set(tracked):
+        return
+    if instance.is_tracked(*tracked):
+        return
+    previous = (
+        Appointment.objects.filter(pk=instance.pk)
+        .values('appointment_date', 'hour', 'therapist_id', 'appointment_status', 'deleted_at', 'payment')
+        .first()
+    )
+    if previous is not None:
+        instance.remember_previous_values(previous)
+
+
 @receiver(post_save, sender=Appointment)
-def update_ticket_when_appointment_changes(sender, instance, created, **kwargs):
+def refresh_rollup_on_appointment_save(sender, instance, created, update_fields=None, **kwargs):
     """
-    Si cambia el pago de la cita, sincroniza el ticket existente.
+    El alta, la eliminación suave o un cambio en los campos que leen los reportes
+    actualiza el acumulado e invalida los reportes cacheados de sus días. Un guardado
+    que solo toca otros campos (p. ej. observaciones) no recalcula nada.
     """
-    if created:
+    previous_date = None if created else instance.previous_value('appointment_date')
+    if _fields_changed(instance, created, update_fields, APPOINTMENT_ROLLUP_FIELDS):
+        _schedule_rollup_refresh(previous_date, instance.appointment_date)
+    if _fields_changed(instance, created, update_fields, APPOINTMENT_REPORT_FIELDS):
+        _schedule_report_cache_invalidation(previous_date, instance.appointment_date)
+
+
+@receiver(post_delete, sender=Appointment)
+def refresh_rollup_on_appointment_delete(sender, instance, **kwargs):
+    _schedule_rollup_refresh(instance.appointment_date)
+    _schedule_report_cache_invalidation(instance.appointment_date)
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_previous_payment_date(sender, instance, update_fields=None, **kwargs):
+    """Fecha de pago previa (los reportes de caja se agrupan por ella), si la instancia no la trae."""
+    if not instance.pk or instance.is_tracked('payment_date'):
+        return
+    if update_fields is not None and 'payment_date' not in update_fields:
         return
-    try:
-        ticket = Ticket.objects.get(appointment=instance)
-    except Ticket.DoesNotExist:
-        # Si por alguna razón no existe, lo creamos sin volver a hacer save() en la cita
-        ticket_service = TicketService()
-        Ticket.objects.create(
-            appointment=instance,
-            ticket_number=instance.ticket_number or ticket_service.generate_ticket_number(),
-            amount=instance.payment or 0,
-            payment_method='efectivo',
-            description=f'Ticket autogenerado por sincronización para cita #{instance.id}',
-            status='pending',
-        )
+    previous = Ticket.objects.filter(pk=instance.pk).values('payment_date').first()
+    if previous is not None:
+        instance.remember_previous_values(previous)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def refresh_rollup_on_ticket_change(sender, instance, created=None, update_fields=None, **kwargs):
+    """
+    Los tickets pagados alimentan paid_tickets_amount del día de su cita, y los reportes
+    de caja del día de la cita y del día de pago. post_delete no trae `created`: borrar
+    un ticket siempre cuenta como cambio.
+    """
+    deleted = created is None
+    if not deleted and not _fields_changed(instance, created, update_fields, TICKET_REPORT_FIELDS):
         return
+    appointment_date = (
+        Appointment.objects.filter(pk=instance.appointment_id)
+        .values_list('appointment_date', flat=True)
+        .first()
+    )
+    if deleted or _fields_changed(instance, created, update_fields, TICKET_ROLLUP_FIELDS):
+        _schedule_rollup_refresh(appointment_date)
+    _schedule_report_cache_invalidation(
+        appointment_date,
+        instance.payment_date,
+        instance.previous_value('payment_date'),
+    )
+
+
+# --- Libro de pagos (PaymentEntry) ---
+
+@receiver(post_save, sender=Appointment)
+def record_appointment_payment(sender, instance, created, update_fields=None, **kwargs):
+    """Pago nuevo, cambio de monto, método o día, o eliminación suave de la cita."""
+    if created and not instance.payment:
+        return
+    if _fields_changed(instance, created, update_fields, APPOINTMENT_LEDGER_FIELDS):
+        payment_ledger.appointments_changed([instance.pk])
+
+
+@receiver(post_save, sender=Ticket)
+def record_ticket_payment(sender, instance, created, update_fields=None, **kwargs):
+    """Ticket pagado, reembolsado, cancelado o con monto, método o fecha de pago distintos."""
+    if created and instance.status != 'paid':
+        return
+    if _fields_changed(instance, created, update_fields, TICKET_LEDGER_FIELDS):
+        payment_ledger.tickets_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Appointment)
+def reverse_appointment_payment(sender, instance, **kwargs):
+    payment_ledger.appointments_changed([instance.pk])
+
 
-    if instance.payment is not None and ticket.amount != instance.payment:
-        ticket.amount = instance.payment
-        ticket.save(update_fields=['amount', 'updated_at'])
\ No newline at end of file
+@receiver(post_delete, sender=Ticket)
+def reverse_ticket_payment(sender, instance, **kwargs):
+    payment_ledger.tickets_changed([instance.pk])
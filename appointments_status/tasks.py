@@ -0,0 +1,16 @@
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from appointments_status.services.payment_ledger_service import PaymentLedgerService
+
+
+@shared_task
+def reconcile_payment_ledger():
+    """
+    Iguala el libro de pagos con las citas y tickets que cambiaron sin pasar por las
+    señales, revisando solo los últimos PAYMENT_LEDGER_RECONCILE_DAYS días (la revisión
+    completa es rebuild_payment_ledger --check).
+    """
+    since = timezone.localdate() - timedelta(days=settings.PAYMENT_LEDGER_RECONCILE_DAYS)
+    return PaymentLedgerService().reconcile(since=since)
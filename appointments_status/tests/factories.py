@@ -0,0 +1,44 @@
+from django.db import connection
+
+from histories_configurations.models import DocumentType
+from patients_diagnoses.models import Patient
+from therapists.models import Therapist
+from ubi_geo.models import Country, District, Province, Region
+
+
+def create_location(name="Test"):
+    """Región, provincia, distrito y tipo de documento para sembrar pacientes y terapeutas."""
+    country = Country.objects.create(name=name)
+    region = Region.objects.create(name=name, country=country)
+    province = Province.objects.create(name=name, region=region)
+    district = District.objects.create(name=name, province=province)
+    document_type = DocumentType.objects.create(name=f"{name.upper()}-DOC")
+    return {"region": region, "province": province, "district": district, "document_type": document_type}
+
+
+def create_patients(location, total, prefix="9"):
+    return [
+        Patient.objects.create(
+            document_number=f"{prefix}{i:07d}", name=f"Paciente{i}",
+            paternal_lastname=f"Paterno{i}", maternal_lastname=f"Materno{i}",
+            email=f"paciente{i}@example.com", ocupation="-", health_condition="-", **location,
+        )
+        for i in range(total)
+    ]
+
+
+def create_therapists(location, total, prefix="8"):
+    return [
+        Therapist.objects.create(
+            document_number=f"{prefix}{i:07d}", first_name=f"Terapeuta{i}",
+            last_name_paternal=f"Paterno{i}", last_name_maternal=f"Materno{i}",
+            email=f"terapeuta{i}@example.com", **location,
+        )
+        for i in range(total)
+    ]
+
+
+def require_shared_database(test):
+    """Omite el test si los hilos no pueden escribir a la vez en la base de pruebas."""
+    if connection.vendor == "sqlite" and connection.is_in_memory_db():
+        test.skipTest("SQLite en memoria no admite escrituras concurrentes desde varios hilos")
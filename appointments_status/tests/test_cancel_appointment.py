@@ -0,0 +1,61 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from appointments_status.models import Appointment, Ticket
+from appointments_status.services import AppointmentService
+from appointments_status.views.appointment import AppointmentViewSet
+
+from .factories import create_location, create_patients, create_therapists
+
+
+class _CancelUser:
+    """Usuario mínimo para pasar IsAuthenticated sin tocar la tabla de usuarios."""
+    is_authenticated = True
+    is_active = True
+    pk = None
+
+
+class CancelAppointmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        location = create_location("Cancel")
+        cls.patient = create_patients(location, 1)[0]
+        cls.therapist = create_therapists(location, 1)[0]
+        cls.start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=3)
+
+    def _book(self):
+        return AppointmentService().create({
+            "patient": self.patient,
+            "therapist": self.therapist,
+            "appointment_date": self.start,
+            "hour": time(10, 0),
+            "payment": Decimal("80.00"),
+        })
+
+    def _cancel(self, appointment_id):
+        request = APIRequestFactory().post("/")
+        force_authenticate(request, user=_CancelUser())
+        return AppointmentViewSet.as_view({"post": "cancel"})(request, pk=appointment_id)
+
+    def test_cancelled_status_is_a_declared_choice(self):
+        field = Appointment._meta.get_field("appointment_status")
+        self.assertIn(Appointment.STATUS_CANCELLED, dict(field.choices))
+
+    def test_cancel_frees_the_slot(self):
+        response = self._book()
+        self.assertEqual(response.status_code, 201)
+        appointment = Appointment.objects.get(therapist=self.therapist)
+        self.assertEqual(self._book().status_code, 409)
+
+        self.assertEqual(self._cancel(appointment.pk).status_code, 200)
+
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.appointment_status, Appointment.STATUS_CANCELLED)
+        appointment.full_clean(exclude=["history", "ticket_number"])
+        self.assertEqual(Ticket.objects.get(appointment=appointment).status, "cancelled")
+        self.assertEqual(self._book().status_code, 201)
@@ -0,0 +1,81 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.utils import timezone
+
+from appointments_status.models import Appointment, Ticket
+from company_reports.services.rollup_services import day_range_bounds
+
+from .factories import create_location, create_patients, create_therapists
+
+
+def _index_name(model, columns):
+    """Nombre real en la base del índice sobre esas columnas (puede diferir del declarado en el modelo)."""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    for name, info in constraints.items():
+        if info["index"] and info["columns"] == list(columns):
+            return name
+    raise AssertionError(f"No existe un índice sobre {model._meta.db_table}({', '.join(columns)})")
+
+
+class DayIndexTests(TestCase):
+    """
+    Los filtros por día de reportes y listados deben usar índice: appointment_local_date,
+    payment_local_date y los rangos semiabiertos sobre appointment_date. Se comprueba con
+    EXPLAIN sobre suficientes filas para que el planificador no prefiera recorrer la tabla.
+    """
+
+    ROWS = 3000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        location = create_location("Index")
+        patient = create_patients(location, 1, prefix="4")[0]
+        therapist = create_therapists(location, 1, prefix="5")[0]
+
+        # bulk_create no pasa por save() ni por las señales: los días locales se asignan aquí
+        appointments = []
+        for i in range(cls.ROWS):
+            day = cls.today + timedelta(days=i % 60 - 30)
+            start = timezone.make_aware(datetime.combine(day, time(8 + i % 12)))
+            appointments.append(Appointment(
+                patient=patient, therapist=therapist, appointment_date=start,
+                appointment_local_date=day, hour=start.time(), payment=Decimal("80.00"),
+                ticket_number=f"IDX-{i}",
+            ))
+        Appointment.objects.bulk_create(appointments, batch_size=1000)
+        ids = dict(Appointment.objects.values_list("ticket_number", "id"))
+        Ticket.objects.bulk_create([
+            Ticket(
+                appointment_id=ids[appointment.ticket_number], ticket_number=appointment.ticket_number,
+                amount=appointment.payment, payment_method="efectivo",
+                payment_local_date=appointment.appointment_local_date,
+                status="paid" if i % 2 else "pending",
+            )
+            for i, appointment in enumerate(appointments)
+        ], batch_size=1000)
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan, f"El plan no usa {index}:\n{plan}")
+
+    def test_appointments_of_the_day_by_therapist(self):
+        queryset = (
+            Appointment.objects.filter(appointment_local_date=self.today, therapist__isnull=False)
+            .values("therapist_id").annotate(total=Count("id"))
+        )
+        self.assertUsesIndex(queryset, _index_name(Appointment, ["appointment_local_date", "therapist_id"]))
+
+    def test_paid_tickets_of_the_day(self):
+        queryset = Ticket.objects.filter(payment_local_date=self.today, status="paid", is_active=True)
+        self.assertUsesIndex(queryset, _index_name(Ticket, ["payment_local_date"]))
+
+    def test_half_open_appointment_range(self):
+        start, end = day_range_bounds(self.today, self.today)
+        queryset = Appointment.objects.filter(appointment_date__gte=start, appointment_date__lt=end)
+        self.assertUsesIndex(queryset, _index_name(Appointment, ["appointment_date", "hour"]))
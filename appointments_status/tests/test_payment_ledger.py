@@ -0,0 +1,145 @@
+import threading
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from appointments_status.models import Appointment, PaymentEntry
+from appointments_status.services.payment_ledger_service import PaymentLedgerService
+from histories_configurations.models import PaymentType
+
+from .factories import create_location, create_patients, create_therapists, require_shared_database
+
+
+def ledger_balance(appointment):
+    return PaymentEntry.objects.filter(
+        source=PaymentEntry.SOURCE_APPOINTMENT, source_id=appointment.pk,
+    ).aggregate(total=Sum("amount"), payments=Sum("payments"))
+
+
+class PaymentLedgerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        location = create_location("Ledger")
+        cls.patient = create_patients(location, 1)[0]
+        cls.therapist = create_therapists(location, 1)[0]
+        cls.start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=3)
+
+    def _create(self, payment=Decimal("80.00")):
+        return Appointment.objects.create(
+            patient=self.patient, therapist=self.therapist,
+            appointment_date=self.start, hour=time(10, 0), payment=payment,
+        )
+
+    def test_payment_is_recorded_in_the_appointment_transaction(self):
+        # Sin ejecutar los callbacks de on_commit: el libro no depende del COMMIT
+        with self.captureOnCommitCallbacks(execute=False):
+            appointment = self._create()
+
+        self.assertEqual(ledger_balance(appointment), {"total": Decimal("80.00"), "payments": 1})
+
+    def test_rollback_discards_the_ledger_rows(self):
+        with transaction.atomic():
+            appointment = self._create()
+            transaction.set_rollback(True)
+
+        self.assertFalse(PaymentEntry.objects.filter(source_id=appointment.pk).exists())
+
+    def test_changes_append_corrections(self):
+        appointment = self._create()
+
+        appointment.payment = Decimal("95.00")
+        appointment.save()
+
+        kinds = list(
+            PaymentEntry.objects.filter(source_id=appointment.pk, source=PaymentEntry.SOURCE_APPOINTMENT)
+            .values_list("kind", flat=True)
+        )
+        self.assertEqual(kinds, [PaymentEntry.KIND_PAYMENT, PaymentEntry.KIND_ADJUSTMENT])
+        self.assertEqual(ledger_balance(appointment), {"total": Decimal("95.00"), "payments": 1})
+
+    def test_payment_type_is_recorded_by_id(self):
+        payment_type = PaymentType.objects.create(name="Yape")
+        appointment = self._create()
+        appointment.payment_type = payment_type
+        appointment.save()
+
+        # Renombrar el tipo de pago no mueve la caja
+        payment_type.name = "Yape / Plin"
+        payment_type.save()
+        self.assertEqual(PaymentLedgerService().sync(PaymentEntry.SOURCE_APPOINTMENT, [appointment.pk]), 0)
+
+        rows = PaymentEntry.objects.filter(source=PaymentEntry.SOURCE_APPOINTMENT, source_id=appointment.pk)
+        balance = rows.filter(payment_type=payment_type).aggregate(total=Sum("amount"), payments=Sum("payments"))
+        self.assertEqual(balance, {"total": Decimal("80.00"), "payments": 1})
+        self.assertEqual(set(rows.values_list("method", flat=True)), {""})
+
+    def test_sync_is_idempotent(self):
+        appointment = self._create()
+
+        self.assertEqual(PaymentLedgerService().sync(PaymentEntry.SOURCE_APPOINTMENT, [appointment.pk]), 0)
+
+    def test_reconcile_catches_changes_made_with_update(self):
+        appointment = self._create()
+        Appointment.objects.filter(pk=appointment.pk).update(payment=Decimal("120.00"))
+
+        added = PaymentLedgerService().reconcile()
+
+        self.assertEqual(added, {PaymentEntry.SOURCE_APPOINTMENT: 1, PaymentEntry.SOURCE_TICKET: 0})
+        self.assertEqual(ledger_balance(appointment), {"total": Decimal("120.00"), "payments": 1})
+
+    def test_reconcile_since_only_checks_the_window(self):
+        appointment = self._create()
+        Appointment.objects.filter(pk=appointment.pk).update(payment=Decimal("120.00"))
+        service = PaymentLedgerService()
+
+        after = appointment.appointment_local_date + timedelta(days=1)
+        self.assertEqual(service.reconcile(since=after)[PaymentEntry.SOURCE_APPOINTMENT], 0)
+        self.assertEqual(service.reconcile(since=appointment.appointment_local_date)[PaymentEntry.SOURCE_APPOINTMENT], 1)
+        self.assertEqual(ledger_balance(appointment), {"total": Decimal("120.00"), "payments": 1})
+
+
+class PaymentLedgerConcurrencyTests(TransactionTestCase):
+    """Varios hilos sincronizan a la vez la misma cita, cada uno con su conexión."""
+
+    THREADS = 6
+
+    def test_concurrent_syncs_record_the_payment_once(self):
+        require_shared_database(self)
+        if not connection.features.has_select_for_update:
+            self.skipTest("La base de pruebas no bloquea filas con select_for_update")
+        location = create_location("LedgerRace")
+        start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=3)
+        # bulk_create no pasa por las señales: la cita queda sin filas en el libro
+        Appointment.objects.bulk_create([Appointment(
+            patient=create_patients(location, 1)[0], therapist=create_therapists(location, 1)[0],
+            appointment_date=start, appointment_local_date=start.date(), hour=time(10, 0),
+            payment=Decimal("80.00"), ticket_number="LEDGER-RACE",
+        )])
+        appointment = Appointment.objects.get(ticket_number="LEDGER-RACE")
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    PaymentLedgerService().sync(PaymentEntry.SOURCE_APPOINTMENT, [appointment.pk])
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(ledger_balance(appointment), {"total": Decimal("80.00"), "payments": 1})
+        self.assertEqual(PaymentEntry.objects.filter(source_id=appointment.pk).count(), 1)
@@ -0,0 +1,154 @@
+import random
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from appointments_status.models import Appointment, Ticket
+from appointments_status.services import AppointmentService
+from appointments_status.views.appointment import AppointmentViewSet
+from appointments_status.views.ticket import TicketViewSet
+from histories_configurations.models import PaymentStatus, PaymentType
+
+from .factories import create_location, create_patients, create_therapists
+
+
+class _BudgetUser:
+    """Usuario mínimo para pasar IsAuthenticated sin tocar la tabla de usuarios."""
+    is_authenticated = True
+    is_active = True
+    pk = None
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Siembra citas pasadas y futuras con sus tickets. Los presupuestos no dependen del
+    número de filas: si crecen con ROWS hay un N+1.
+    """
+
+    ROWS = 40
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        location = create_location("Budget")
+        cls.patients = create_patients(location, 5)
+        cls.therapists = create_therapists(location, 3)
+        payment_types = [PaymentType.objects.create(name=f"Budget {i}") for i in range(2)]
+        payment_statuses = [None, PaymentStatus.objects.create(name="Budget")]
+
+        cls.today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        # Horarios distintos por terapeuta: la reserva de bloques rechaza los solapados
+        schedule = rng.sample(
+            [(therapist, day, hour) for therapist in cls.therapists for day in range(1, 31) for hour in range(8, 20)],
+            cls.ROWS,
+        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            for i, (therapist, day, hour) in enumerate(schedule):
+                # Una cita por post_save crea su ticket al confirmar, igual que en producción
+                Appointment.objects.create(
+                    patient=rng.choice(cls.patients),
+                    therapist=therapist,
+                    appointment_date=cls.today + timedelta(days=day * (-1 if i % 2 else 1)),
+                    hour=time(hour, 0),
+                    payment=Decimal("80.00"),
+                    payment_type=rng.choice(payment_types),
+                    payment_status=rng.choice(payment_statuses),
+                )
+        paid = list(Ticket.objects.values_list("id", flat=True)[: cls.ROWS // 2])
+        Ticket.objects.filter(id__in=paid).update(status="paid")
+
+
+class ListQueryBudgetTests(QueryBudgetTestCase):
+
+    def assertListBudget(self, viewset, action, params, budget):
+        request = APIRequestFactory().get("/", params)
+        force_authenticate(request, user=_BudgetUser())
+        with self.assertNumQueries(budget):
+            response = viewset.as_view({"get": action})(request)
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertTrue(data.get("results") if isinstance(data, dict) else data)
+
+    def test_appointment_list(self):
+        self.assertListBudget(AppointmentViewSet, "list", {}, 1)
+
+    def test_appointment_list_page(self):
+        self.assertListBudget(AppointmentViewSet, "list", {"page": 1, "page_size": 20}, 1)
+
+    def test_appointment_list_cursor(self):
+        self.assertListBudget(AppointmentViewSet, "list", {"cursor": "", "page_size": 20}, 2)
+
+    def test_appointments_by_date_range(self):
+        params = {"start_date": "2000-01-01", "end_date": "2100-01-01"}
+        self.assertListBudget(AppointmentViewSet, "by_date_range", params, 1)
+
+    def test_completed_appointments(self):
+        self.assertListBudget(AppointmentViewSet, "completed", {}, 1)
+
+    def test_pending_appointments(self):
+        self.assertListBudget(AppointmentViewSet, "pending", {}, 1)
+
+    def test_ticket_list(self):
+        self.assertListBudget(TicketViewSet, "list", {}, 1)
+
+    def test_paid_tickets(self):
+        self.assertListBudget(TicketViewSet, "paid", {}, 1)
+
+    def test_pending_tickets(self):
+        self.assertListBudget(TicketViewSet, "pending", {}, 1)
+
+
+class WriteQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Escrituras de AppointmentService con todo su trabajo incluido: tickets y libro de
+    pagos en la misma transacción, acumulado diario y caché de reportes al confirmar. Cambiar solo observation no
+    debe tocar tickets, acumulado ni caché, y un update sin cambios no debe escribir nada.
+
+    Refrescar el acumulado de un día son 9 consultas (savepoint, crear y bloquear la marca
+    del día, dos lecturas agrupadas, borrar e insertar filas, sellar la marca); aparecen en
+    las escrituras que cambian campos de los reportes.
+    """
+
+    def setUp(self):
+        self.service = AppointmentService()
+        # Más allá de los 30 días sembrados, para no chocar con la agenda
+        self.start = self.today + timedelta(days=40)
+
+    def _create(self):
+        return self.service.create({
+            "patient": self.patients[0],
+            "therapist": self.therapists[0],
+            "appointment_date": self.start,
+            "hour": time(10, 0),
+            "payment": Decimal("80.00"),
+        })
+
+    def assertWriteBudget(self, budget, operation):
+        with self.assertNumQueries(budget), self.captureOnCommitCallbacks(execute=True):
+            response = operation()
+        self.assertIn(response.status_code, (200, 201))
+        return response
+
+    def test_create(self):
+        response = self.assertWriteBudget(29, self._create)
+        self.assertTrue(Ticket.objects.filter(appointment_id=response.data["appointment"]["id"]).exists())
+
+    def test_update_without_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = self._create().data["appointment"]["id"]
+        self.assertWriteBudget(3, lambda: self.service.update(pk, {"payment": "80.00", "hour": "10:00"}))
+
+    def test_update_observation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = self._create().data["appointment"]["id"]
+        self.assertWriteBudget(6, lambda: self.service.update(pk, {"observation": "Control"}))
+
+    def test_update_payment(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = self._create().data["appointment"]["id"]
+        self.assertWriteBudget(22, lambda: self.service.update(pk, {"payment": Decimal("95.00")}))
+        self.assertEqual(Ticket.objects.get(appointment_id=pk).amount, Decimal("95.00"))
@@ -0,0 +1,116 @@
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import connections
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from appointments_status.models import Appointment, SlotReservation
+from appointments_status.services import AppointmentService
+from appointments_status.services.availability_service import AvailabilityService, appointment_start
+
+from .factories import create_location, create_patients, create_therapists, require_shared_database
+
+
+class SlotBookingRaceTests(TransactionTestCase):
+    """
+    Varios hilos, cada uno con su conexión, piden a la vez los mismos horarios de pocos
+    terapeutas con AppointmentService.create. Cada reserva se confirma de verdad, así que
+    la carrera solo se reproduce con una base compartida entre hilos, como MySQL.
+    """
+
+    THREADS = 8
+    ATTEMPTS = 15
+    THERAPISTS = 2
+    HOURS = 4
+
+    def setUp(self):
+        require_shared_database(self)
+        location = create_location("Stress")
+        self.patient = create_patients(location, 1, prefix="5")[0]
+        self.therapists = create_therapists(location, self.THERAPISTS, prefix="4")
+        self.availability = AvailabilityService()
+
+    def _targets(self):
+        # Pasado mañana, para que la validación de fecha nunca lo vea en el pasado
+        day = timezone.localdate() + timedelta(days=2)
+        # En punto y a la media: una cita de 60 min a las 9:30 choca con las de 9:00 y 10:00
+        availability = self.availability
+        minutes = [
+            availability.day_start + offset
+            for offset in range(0, self.HOURS * 60, 30)
+            if availability.day_start + offset + availability.appointment_minutes <= availability.day_end
+        ]
+        midnight = datetime.combine(day, datetime.min.time())
+        return [
+            (therapist, timezone.make_aware(midnight + timedelta(minutes=minute)))
+            for therapist in self.therapists
+            for minute in minutes
+        ]
+
+    def _overlaps(self):
+        """Pares de citas activas del mismo terapeuta que se cruzan."""
+        by_therapist = {}
+        rows = (
+            Appointment.objects
+            .filter(therapist__in=self.therapists, deleted_at__isnull=True)
+            .exclude(appointment_status__in=AvailabilityService.CANCELLED_STATUSES)
+            .values_list("id", "therapist_id", "appointment_date", "hour")
+        )
+        for appointment_id, therapist_id, appointment_date, hour in rows:
+            day, minute = appointment_start(appointment_date, hour)
+            by_therapist.setdefault((therapist_id, day), []).append((minute, appointment_id))
+
+        overlaps = []
+        for intervals in by_therapist.values():
+            intervals.sort()
+            for (start, first), (next_start, second) in zip(intervals, intervals[1:]):
+                if next_start < start + self.availability.appointment_minutes:
+                    overlaps.append((first, second))
+        return overlaps
+
+    def test_concurrent_bookings_never_overlap(self):
+        targets = self._targets()
+        outcomes = Counter()
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(worker_index):
+            rng = random.Random(12000 + worker_index)
+            service = AppointmentService()
+            try:
+                barrier.wait()
+                for _ in range(self.ATTEMPTS):
+                    therapist, start = rng.choice(targets)
+                    response = service.create({
+                        "patient": self.patient,
+                        "therapist": therapist,
+                        "appointment_date": start,
+                        "hour": start.time(),
+                        "payment": Decimal("80.00"),
+                    })
+                    with lock:
+                        outcomes[response.status_code] += 1
+                        if response.status_code not in (201, 409):
+                            errors.append(response.data)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(outcomes.values()), self.THREADS * self.ATTEMPTS)
+        self.assertGreater(outcomes[201], 0)
+        self.assertGreater(outcomes[409], 0)
+        self.assertEqual(self._overlaps(), [])
+        booked = Appointment.objects.filter(therapist__in=self.therapists, deleted_at__isnull=True).count()
+        self.assertEqual(booked, outcomes[201])
+        self.assertTrue(SlotReservation.objects.filter(therapist__in=self.therapists).exists())
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from appointments_status.models import TicketSequence
+from appointments_status.services.ticket_number_allocator import (
+    TicketNumberAllocator,
+    format_ticket_number,
+)
+
+from .factories import require_shared_database
+
+
+class TicketNumberAllocatorTests(TestCase):
+
+    def test_seeds_sequence_and_numbers_consecutively(self):
+        allocator = TicketNumberAllocator(block_size=1)
+
+        self.assertEqual(allocator.next_numbers(3), ['TKT-001', 'TKT-002', 'TKT-003'])
+        self.assertEqual(allocator.next_number(), 'TKT-004')
+        self.assertEqual(TicketSequence.objects.get(name=allocator.SEQUENCE_NAME).last_value, 4)
+
+    def test_reservation_inside_transaction_rolls_back_with_it(self):
+        allocator = TicketNumberAllocator(block_size=10)
+        TicketSequence.objects.create(name=allocator.SEQUENCE_NAME, last_value=41)
+
+        with transaction.atomic():
+            self.assertEqual(allocator.next_numbers(2), ['TKT-042', 'TKT-043'])
+            transaction.set_rollback(True)
+
+        # Dentro de la transacción no se guarda bloque: los números vuelven a la secuencia
+        self.assertEqual(TicketSequence.objects.get(name=allocator.SEQUENCE_NAME).last_value, 41)
+        self.assertEqual(allocator.next_number(), 'TKT-042')
+
+
+class TicketNumberAllocatorConcurrencyTests(TransactionTestCase):
+    """Reservas en autocommit y desde varios hilos, cada uno con su conexión."""
+
+    THREADS = 8
+    PER_THREAD = 25
+
+    def test_block_outside_transaction_is_served_from_memory(self):
+        allocator = TicketNumberAllocator(block_size=5)
+        allocator.next_number()
+
+        with self.assertNumQueries(0):
+            numbers = allocator.next_numbers(4)
+
+        self.assertEqual(numbers, [format_ticket_number(value) for value in range(2, 6)])
+        self.assertEqual(TicketSequence.objects.get(name=allocator.SEQUENCE_NAME).last_value, 5)
+
+    def _reserve_concurrently(self, allocator, reserve):
+        require_shared_database(self)
+
+        def worker(_):
+            try:
+                return [number for _ in range(self.PER_THREAD) for number in reserve(allocator)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            return [number for numbers in pool.map(worker, range(self.THREADS)) for number in numbers]
+
+    def test_concurrent_reservations_never_repeat_a_number(self):
+        allocator = TicketNumberAllocator(block_size=1)
+
+        numbers = self._reserve_concurrently(allocator, lambda a: [a.next_number()])
+
+        self.assertEqual(len(numbers), self.THREADS * self.PER_THREAD)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual(TicketSequence.objects.get(name=allocator.SEQUENCE_NAME).last_value, len(numbers))
+
+    def test_concurrent_reservations_inside_transactions_never_repeat_a_number(self):
+        allocator = TicketNumberAllocator(block_size=5)
+
+        def reserve(a):
+            with transaction.atomic():
+                return a.next_numbers(2)
+
+        numbers = self._reserve_concurrently(allocator, reserve)
+
+        self.assertEqual(len(set(numbers)), self.THREADS * self.PER_THREAD * 2)
+
+    def test_concurrent_processes_with_blocks_never_repeat_a_number(self):
+        # Un asignador por hilo hace de worker independiente con su propio bloque
+        require_shared_database(self)
+        allocators = [TicketNumberAllocator(block_size=7) for _ in range(self.THREADS)]
+
+        def worker(allocator):
+            try:
+                return [allocator.next_number() for _ in range(self.PER_THREAD)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            numbers = [number for chunk in pool.map(worker, allocators) for number in chunk]
+
+        self.assertEqual(len(set(numbers)), len(numbers))
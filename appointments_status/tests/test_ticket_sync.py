@@ -0,0 +1,77 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointments_status.models import Appointment, Ticket, TicketSequence
+from appointments_status.services import ticket_sync
+
+from .factories import create_location, create_patients, create_therapists
+
+
+class TicketSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        location = create_location("Sync")
+        cls.patient = create_patients(location, 1)[0]
+        cls.therapist = create_therapists(location, 1)[0]
+        cls.start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=3)
+
+    def _create(self, hour=10, **extra):
+        return Appointment.objects.create(
+            patient=self.patient, therapist=self.therapist,
+            appointment_date=self.start, hour=time(hour, 0), payment=Decimal("80.00"), **extra,
+        )
+
+    def test_ticket_is_created_in_the_appointment_transaction(self):
+        # Sin ejecutar los callbacks de on_commit: el ticket no depende del COMMIT
+        with self.captureOnCommitCallbacks(execute=False):
+            appointment = self._create()
+
+        ticket = Ticket.objects.get(appointment=appointment)
+        self.assertEqual(ticket.amount, Decimal("80.00"))
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).ticket_number, ticket.ticket_number)
+
+    def test_rollback_discards_appointment_and_ticket(self):
+        with transaction.atomic():
+            appointment = self._create()
+            self.assertTrue(Ticket.objects.filter(appointment=appointment).exists())
+            transaction.set_rollback(True)
+
+        self.assertFalse(Appointment.objects.filter(pk=appointment.pk).exists())
+        self.assertFalse(Ticket.objects.filter(appointment_id=appointment.pk).exists())
+
+    def test_payment_change_updates_ticket_amount(self):
+        appointment = self._create()
+
+        appointment.payment = Decimal("95.00")
+        appointment.save()
+
+        self.assertEqual(Ticket.objects.get(appointment=appointment).amount, Decimal("95.00"))
+
+    def test_batch_creates_all_tickets_with_one_reservation(self):
+        with CaptureQueriesContext(connection) as ctx, ticket_sync.batch():
+            appointments = [self._create(hour=hour) for hour in range(8, 13)]
+            self.assertFalse(Ticket.objects.filter(appointment__in=appointments).exists())
+
+        tickets = Ticket.objects.filter(appointment__in=appointments)
+        self.assertEqual(tickets.count(), len(appointments))
+        self.assertEqual(len({ticket.ticket_number for ticket in tickets}), len(appointments))
+        reservations = [
+            query for query in ctx.captured_queries
+            if query["sql"].startswith("UPDATE") and TicketSequence._meta.db_table in query["sql"]
+        ]
+        self.assertEqual(len(reservations), 1)
+
+    def test_failed_batch_leaves_nothing_behind(self):
+        with self.assertRaises(RuntimeError):
+            with ticket_sync.batch():
+                appointment = self._create()
+                raise RuntimeError("falla a mitad del bloque")
+
+        self.assertFalse(Appointment.objects.filter(pk=appointment.pk).exists())
+        self.assertFalse(ticket_sync._pending())
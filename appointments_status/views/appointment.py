@@ -1,12 +1,18 @@
-from django.db import models
+from django.db import models, transaction
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from architect.pagination import (
+    KeysetPaginator,
+    parse_include_count,
+    parse_page_size,
+    wants_cursor_pagination,
+)
 from ..models import Appointment
 from ..serializers import AppointmentSerializer
-from ..services import AppointmentService
+from ..services import AppointmentService, SlotConflictError
 from django.utils import timezone
 
 
@@ -57,9 +63,9 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         # Filtros adicionales
         appointment_date = self.request.query_params.get('appointment_date', None)
         if appointment_date:
-            queryset = queryset.filter(appointment_date=appointment_date)
+            queryset = queryset.filter(appointment_local_date=appointment_date)
         
-        return queryset
+        return AppointmentSerializer.setup_eager_loading(queryset)
     
     def create(self, request, *args, **kwargs):
         """
@@ -97,7 +103,11 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         # Extraer parámetros de paginación
         page = request.query_params.get('page')
         page_size = request.query_params.get('page_size')
-        if page or page_size:
+        if wants_cursor_pagination(request.query_params):
+            pagination['cursor'] = request.query_params.get('cursor', '')
+            pagination['page_size'] = parse_page_size(page_size, 10, KeysetPaginator.MAX_PAGE_SIZE)
+            pagination['include_count'] = parse_include_count(request.query_params)
+        elif page or page_size:
             pagination['page'] = int(page) if page else 1
             pagination['page_size'] = int(page_size) if page_size else 10
         
@@ -176,7 +186,77 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        return self.service.check_availability(date_obj, hour_obj, int(duration))
+        try:
+            duration = int(duration)
+            therapist = request.query_params.get('therapist')
+            room = request.query_params.get('room')
+            exclude = request.query_params.get('exclude')
+            therapist = int(therapist) if therapist else None
+            room = int(room) if room else None
+            exclude = int(exclude) if exclude else None
+        except ValueError:
+            return Response(
+                {'error': 'duration, therapist, room y exclude deben ser números'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return self.service.check_availability(
+            date_obj, hour_obj, duration, therapist=therapist, room=room, exclude=exclude
+        )
+    
+    @action(detail=False, methods=['get'])
+    def free_slots(self, request):
+        """
+        Próximos horarios libres de un terapeuta (y consultorio, si se indica).
+        """
+        therapist = request.query_params.get('therapist')
+        start_date = request.query_params.get('start_date')
+        if not therapist or not start_date:
+            return Response(
+                {'error': 'Se requieren therapist y start_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            from datetime import datetime, timedelta
+            start_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date = request.query_params.get('end_date')
+            end_obj = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else start_obj + timedelta(days=6)
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end_obj < start_obj or (end_obj - start_obj).days > 31:
+            return Response(
+                {'error': 'El rango debe ser de 0 a 31 días'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            therapist = int(therapist)
+            room = request.query_params.get('room')
+            room = int(room) if room else None
+            duration = request.query_params.get('duration')
+            duration = int(duration) if duration else None
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+        except ValueError:
+            return Response(
+                {'error': 'therapist, room, duration y limit deben ser números'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return self.service.get_free_slots(
+            therapist, start_obj, end_obj, duration=duration, limit=limit, room=room
+        )
+    
+    @action(detail=False, methods=['post'])
+    def book_plan(self, request):
+        """
+        Reserva un plan de tratamiento: todas las sesiones de una regla de
+        recurrencia, con sus tickets, en una sola transacción.
+        """
+        return self.service.book_plan(request.data)
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -184,7 +264,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         Cancela una cita específica.
         """
         appointment = self.get_object()
-        appointment.appointment_status = 'CANCELADO'  # Usar el enum actualizado
+        appointment.appointment_status = Appointment.STATUS_CANCELLED
         appointment.save(update_fields=['appointment_status', 'updated_at'])
         
         # También cancelar el ticket asociado
@@ -224,7 +304,12 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        availability = self.service.check_availability(date_obj, hour_obj)
+        availability = self.service.check_availability(
+            date_obj, hour_obj,
+            therapist=appointment.therapist_id,
+            room=appointment.room,
+            exclude=appointment.pk,
+        )
         if not availability.data.get('is_available'):
             return Response(
                 {'error': 'La fecha y hora seleccionadas no están disponibles'},
@@ -234,6 +319,15 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         # Actualizar la cita
         appointment.appointment_date = date_obj
         appointment.hour = hour_obj
-        appointment.save(update_fields=['appointment_date', 'hour', 'updated_at'])
+        # La reserva de bloques decide en la base si otra cita ganó el horario
+        # entre la verificación anterior y este guardado
+        try:
+            with transaction.atomic():
+                appointment.save(update_fields=['appointment_date', 'hour', 'updated_at'])
+        except SlotConflictError as e:
+            return Response(
+                {'error': str(e), 'conflicting_ids': e.conflicting_ids},
+                status=status.HTTP_409_CONFLICT
+            )
         
         return Response({'message': 'Cita reprogramada exitosamente'})
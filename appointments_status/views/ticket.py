@@ -3,6 +3,12 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from architect.pagination import (
+    KeysetPaginator,
+    parse_include_count,
+    parse_page_size,
+    wants_cursor_pagination,
+)
 from ..models import Ticket
 from ..serializers import TicketSerializer
 from ..services import TicketService
@@ -48,12 +54,12 @@ class TicketViewSet(viewsets.ModelViewSet):
         # Filtros adicionales
         payment_date = self.request.query_params.get('payment_date', None)
         if payment_date:
-            queryset = queryset.filter(payment_date__date=payment_date)
+            queryset = queryset.filter(payment_local_date=payment_date)
         
         # TODO: (Dependencia externa) - Agregar filtros cuando estén disponibles:
         # appointment_id = self.request.query_params.get('appointment_id', None)
         
-        return queryset
+        return TicketSerializer.setup_eager_loading(queryset)
     
     def create(self, request, *args, **kwargs):
         """
@@ -91,7 +97,11 @@ class TicketViewSet(viewsets.ModelViewSet):
         # Extraer parámetros de paginación
         page = request.query_params.get('page')
         page_size = request.query_params.get('page_size')
-        if page or page_size:
+        if wants_cursor_pagination(request.query_params):
+            pagination['cursor'] = request.query_params.get('cursor', '')
+            pagination['page_size'] = parse_page_size(page_size, 10, KeysetPaginator.MAX_PAGE_SIZE)
+            pagination['include_count'] = parse_include_count(request.query_params)
+        elif page or page_size:
             pagination['page'] = int(page) if page else 1
             pagination['page_size'] = int(page_size) if page_size else 10
         
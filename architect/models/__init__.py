@@ -1,6 +1,7 @@
 from .permission import Permission, Role
 from .base import BaseModel
+from .tracking import DirtyFieldsMixin
 from .role_has_permission import RoleHasPermission
 from users_profiles.models.user import User
 
-__all__ = ['Permission', 'Role', 'BaseModel', 'RoleHasPermission', 'User'] 
\ No newline at end of file
+__all__ = ['Permission', 'Role', 'BaseModel', 'DirtyFieldsMixin', 'RoleHasPermission', 'User'] 
\ No newline at end of file
@@ -0,0 +1,127 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+
+
+class DirtyFieldsMixin:
+    """
+    Recuerda los valores con que la instancia se leyó de la base (o se guardó por
+    última vez) para saber qué campos cambiaron sin volver a consultarla.
+
+    - apply_changes(data): asigna solo los campos cuyo valor cambia y devuelve sus nombres.
+    - save_changes(): guarda solo los campos modificados (más los auto_now); sin
+      cambios no escribe nada ni dispara señales.
+    - has_changed(campo) / previous_value(campo): para servicios y señales. Dentro de
+      pre_save y post_save los valores previos siguen siendo los de antes del save().
+
+    Una instancia que no se leyó de la base no tiene valores previos: has_changed()
+    responde True y save_changes() hace un save() completo.
+
+    Uso: class Appointment(DirtyFieldsMixin, models.Model)
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._remember_values(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_values(kwargs.get('update_fields'))
+
+    def _remember_values(self, fields=None):
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if fields is not None and field.name not in fields and field.attname not in fields:
+                continue
+            if field.attname in self.__dict__:
+                loaded[field.attname] = self.__dict__[field.attname]
+
+    def remember_previous_values(self, values):
+        """Completa los valores previos que falten (p. ej. leídos en una señal)."""
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for name, value in values.items():
+            loaded.setdefault(self._meta.get_field(name).attname, value)
+
+    def is_tracked(self, *names):
+        """¿Se conocen los valores previos de esos campos (de todos, sin argumentos)?"""
+        loaded = self.__dict__.get('_loaded_values', {})
+        fields = [self._meta.get_field(name) for name in names] or self._meta.concrete_fields
+        return all(field.attname in loaded for field in fields)
+
+    def previous_value(self, name, default=None):
+        field = self._meta.get_field(name)
+        return self.__dict__.get('_loaded_values', {}).get(field.attname, default)
+
+    def has_changed(self, name):
+        field = self._meta.get_field(name)
+        loaded = self.__dict__.get('_loaded_values', {})
+        if field.attname not in loaded:
+            return True
+        return self.__dict__.get(field.attname, loaded[field.attname]) != loaded[field.attname]
+
+    def get_dirty_fields(self):
+        """{campo: valor previo} de los campos que cambiaron desde la carga."""
+        loaded = self.__dict__.get('_loaded_values', {})
+        return {
+            field.name: loaded[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in loaded
+            and field.attname in self.__dict__
+            and self.__dict__[field.attname] != loaded[field.attname]
+        }
+
+    def apply_changes(self, data):
+        """
+        Asigna los valores de `data` que sean campos del modelo y cambien el valor
+        actual. Convierte como lo haría la base (texto -> Decimal, fecha, id de FK)
+        para no marcar cambios falsos. Devuelve los nombres de los campos cambiados.
+        """
+        changed = []
+        for name, value in data.items():
+            try:
+                field = self._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if not field.concrete or field.primary_key or field.many_to_many:
+                continue
+
+            if field.is_relation:
+                if isinstance(value, models.Model):
+                    if getattr(self, field.attname) != value.pk:
+                        setattr(self, field.name, value)
+                        changed.append(field.name)
+                    continue
+                value = None if value in (None, '') else field.target_field.to_python(value)
+            else:
+                value = field.to_python(value)
+                if isinstance(value, datetime) and settings.USE_TZ and timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+
+            if getattr(self, field.attname) != value:
+                setattr(self, field.attname, value)
+                changed.append(field.name)
+        return changed
+
+    def save_changes(self, **kwargs):
+        """
+        Guarda solo los campos modificados. Devuelve la lista guardada ([] si no
+        había cambios, None si se hizo un save() completo por no tener valores previos).
+        """
+        if not self.is_tracked():
+            self.save(**kwargs)
+            return None
+        dirty = list(self.get_dirty_fields())
+        if not dirty:
+            return []
+        auto_now = [field.name for field in self._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        self.save(update_fields=dirty + [name for name in auto_now if name not in dirty], **kwargs)
+        return dirty
@@ -0,0 +1,151 @@
+"""
+Paginación por cursor (keyset) para listados grandes.
+
+En lugar de OFFSET, cada página continúa desde los valores de orden de la última
+fila de la anterior (WHERE (fecha, hora, id) < (...)), así que las páginas profundas
+cuestan lo mismo que la primera y las filas insertadas mientras se pagina no
+desplazan ni duplican resultados.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no se puede decodificar o no corresponde al listado."""
+
+
+def wants_cursor_pagination(params):
+    """Modo cursor si llega ?cursor= (aunque esté vacío, para la primera página) o ?pagination=cursor."""
+    return "cursor" in params or params.get("pagination") == "cursor"
+
+
+def parse_include_count(params, default=True):
+    value = params.get("include_count")
+    if value is None:
+        return default
+    return str(value).strip().lower() not in FALSE_VALUES
+
+
+def parse_page_size(value, default, maximum):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+class KeysetPaginator:
+    """
+    Pagina un queryset por un orden total, p. ej. ("-appointment_date", "-hour", "-id").
+    El último campo debe ser único (normalmente el id) para que el orden no tenga empates.
+
+    Los NULL se tratan como el valor más pequeño, igual que en MySQL y SQLite:
+    al final en orden descendente y al principio en ascendente.
+    """
+
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, queryset, ordering, page_size=10):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+        self.fields = []
+        for item in self.ordering:
+            name = item.lstrip("-")
+            self.fields.append((name, item.startswith("-"), queryset.model._meta.get_field(name)))
+
+    # --- Cursor ---
+
+    def _signature(self):
+        return ",".join(self.ordering)
+
+    def encode_cursor(self, obj):
+        values = [self._dump(getattr(obj, field.attname)) for _name, _desc, field in self.fields]
+        payload = json.dumps({"o": self._signature(), "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            values = payload["v"]
+            if payload.get("o") != self._signature() or len(values) != len(self.fields):
+                raise InvalidCursor("El cursor no corresponde a este listado")
+            return [
+                None if value is None else field.to_python(value)
+                for (_name, _desc, field), value in zip(self.fields, values)
+            ]
+        except InvalidCursor:
+            raise
+        except (ValueError, KeyError, TypeError, binascii.Error, ValidationError) as e:
+            raise InvalidCursor("Cursor inválido") from e
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, (datetime, date, time)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    # --- Consulta ---
+
+    def _after(self, name, descending, field, value):
+        """Filas estrictamente posteriores a `value` en la columna `name`."""
+        if descending:
+            if value is None:
+                return None  # NULL es el último valor en orden descendente
+            q = Q(**{f"{name}__lt": value})
+            return q | Q(**{f"{name}__isnull": True}) if field.null else q
+        if value is None:
+            return Q(**{f"{name}__isnull": False})
+        return Q(**{f"{name}__gt": value})
+
+    def _equal(self, name, value):
+        if value is None:
+            return Q(**{f"{name}__isnull": True})
+        return Q(**{name: value})
+
+    def _after_cursor(self, values):
+        branches = []
+        for i, (name, descending, field) in enumerate(self.fields):
+            after = self._after(name, descending, field, values[i])
+            if after is None:
+                continue
+            prefix = [self._equal(prev_name, values[j]) for j, (prev_name, _d, _f) in enumerate(self.fields[:i])]
+            branches.append(reduce(lambda a, b: a & b, prefix, after))
+        if not branches:
+            return None
+        return reduce(or_, branches)
+
+    def page(self, cursor=None, include_count=True):
+        """
+        Devuelve {"results": [...], "next_cursor": str|None, "count": int} (count solo
+        si include_count). Lanza InvalidCursor si el cursor no es válido.
+        """
+        queryset = self.queryset.order_by(*self.ordering)
+        page = {}
+        if include_count:
+            page["count"] = self.queryset.count()
+
+        if cursor:
+            condition = self._after_cursor(self.decode_cursor(cursor))
+            queryset = queryset.filter(condition) if condition is not None else queryset.none()
+
+        rows = list(queryset[:self.page_size + 1])
+        has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        page["next_cursor"] = self.encode_cursor(rows[-1]) if has_next else None
+        page["results"] = rows
+        return page
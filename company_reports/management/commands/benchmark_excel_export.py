@@ -0,0 +1,76 @@
+import io
+import multiprocessing
+import resource
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+
+from company_reports.services.excel_services import build_appointments_excel_file, write_appointments_excel
+
+
+def fake_rows(total):
+    """Filas con la misma forma que ReportService.iter_appointments_between_dates."""
+    start = date(2020, 1, 1)
+    for i in range(total):
+        yield {
+            "appointment_id": i,
+            "patient_id": i % 5000,
+            "document_number_patient": f"{40000000 + i % 5000}",
+            "patient": f"Paterno{i % 97} Materno{i % 89} Paciente{i % 5000}",
+            "phone1_patient": f"9{i % 100000000:08d}",
+            "appointment_date": (start + timedelta(days=i // 300)).strftime("%Y-%m-%d"),
+            "hour": f"{8 + i % 10:02d}:00",
+        }
+
+
+def run_export(total, mode, results):
+    """Se ejecuta en un proceso nuevo para que ru_maxrss mida solo esta exportación."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if mode == "stream":
+        output = build_appointments_excel_file(fake_rows(total))
+        output.seek(0, io.SEEK_END)
+        size = output.tell()
+        output.close()
+    else:
+        # Modo anterior: lista completa + workbook en memoria
+        rows = list(fake_rows(total))
+        output = io.BytesIO()
+        write_appointments_excel(rows, output)
+        size = len(output.getvalue())
+    results.put({
+        "rows": total,
+        "mode": mode,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "baseline_rss_mb": baseline / 1024,
+        "seconds": time.perf_counter() - started,
+        "size_mb": size / (1024 * 1024),
+    })
+
+
+class Command(BaseCommand):
+    help = "Mide el pico de memoria (RSS) de la exportación Excel de citas para distintos volúmenes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                            help="Cantidades de filas a exportar")
+        parser.add_argument("--mode", choices=["stream", "memory", "both"], default="stream",
+                            help="stream: constant_memory + archivo temporal; memory: modo anterior")
+
+    def handle(self, *args, **opt):
+        modes = ["stream", "memory"] if opt["mode"] == "both" else [opt["mode"]]
+        context = multiprocessing.get_context("spawn")
+
+        self.stdout.write(f"{'filas':>10} {'modo':>7} {'RSS pico':>10} {'RSS base':>10} {'tiempo':>8} {'xlsx':>8}")
+        for total in opt["rows"]:
+            for mode in modes:
+                results = context.Queue()
+                process = context.Process(target=run_export, args=(total, mode, results))
+                process.start()
+                result = results.get()
+                process.join()
+                self.stdout.write(
+                    f"{result['rows']:>10} {result['mode']:>7} "
+                    f"{result['peak_rss_mb']:>8.1f}MB {result['baseline_rss_mb']:>8.1f}MB "
+                    f"{result['seconds']:>7.1f}s {result['size_mb']:>6.1f}MB"
+                )
@@ -0,0 +1,120 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from company_reports.services.export_services import ExportService
+from company_reports.services.pdf_services import pdf_renderer
+
+
+def fake_report(report, total):
+    """Datos con la misma forma que devuelve ReportService para cada reporte PDF."""
+    if report == "pdf_citas_terapeuta":
+        rows = [
+            {"id": i, "name": f"Terapeuta {i}", "appointments_count": 1 + i % 12}
+            for i in range(total)
+        ]
+        return {"therapists_appointments": rows, "total_appointments_count": sum(r["appointments_count"] for r in rows)}
+    if report == "pdf_pacientes_terapeuta":
+        return [
+            {
+                "therapist_id": t,
+                "therapist": f"Paterno{t} Materno{t} Terapeuta{t}",
+                "patients": [
+                    {"patient_id": t * 10 + p, "patient": f"Paterno{p} Materno{p} Paciente{p}", "appointments": 1}
+                    for p in range(10)
+                ],
+            }
+            for t in range(max(1, total // 10))
+        ]
+    if report == "pdf_resumen_caja":
+        return [
+            {"id_cita": i, "payment": "80.00", "payment_type": 1 + i % 3, "payment_type_name": "Efectivo"}
+            for i in range(total)
+        ]
+    if report == "pdf_caja_chica_mejorada":
+        rows = [
+            {
+                "tipo": "Ticket", "id": i, "ticket_number": f"TKT-{i:05d}", "monto": 80.0,
+                "metodo_pago": "efectivo", "paciente": f"Paterno{i} Materno{i} Paciente{i}",
+                "terapeuta": f"Paterno{i % 8} Terapeuta{i % 8}", "fecha_pago": "2025-01-15",
+            }
+            for i in range(total)
+        ]
+        return {
+            "pagos_detallados": rows,
+            "resumen_por_metodo": [{"metodo": "efectivo", "cantidad_pagos": total, "total": 80.0 * total}],
+            "total_general": 80.0 * total,
+            "cantidad_total_pagos": total,
+        }
+    rows = [
+        {
+            "numero_ticket": f"TKT-{i:05d}", "monto": 80.0, "metodo_pago": "efectivo",
+            "fecha_pago": "2025-01-15 10:00", "paciente_nombre": f"Paterno{i} Materno{i} Paciente{i}",
+            "paciente_documento": f"{40000000 + i}", "terapeuta_nombre": f"Paterno{i % 8} Terapeuta{i % 8}",
+            "hora_cita": "09:00",
+        }
+        for i in range(total)
+    ]
+    return {
+        "tickets_pagados": rows,
+        "resumen_por_metodo": [{"metodo": "efectivo", "cantidad_tickets": total, "total": 80.0 * total}],
+        "total_general": 80.0 * total,
+        "cantidad_tickets": total,
+    }
+
+
+class Command(BaseCommand):
+    help = "Mide el tiempo de generación de cada plantilla PDF de reportes para distintos volúmenes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000],
+                            help="Cantidades de filas por reporte")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Repeticiones en caliente por medición")
+        parser.add_argument("--report", choices=list(ExportService.PDF_REPORTS), nargs="*",
+                            help="Reportes a medir (por defecto, todos)")
+
+    def handle(self, *args, **opt):
+        chunk_size = getattr(settings, "REPORT_PDF_CHUNK_SIZE", 500)
+        reports = opt["report"] or list(ExportService.PDF_REPORTS)
+
+        self.stdout.write(f"{'reporte':<26} {'filas':>6} {'modo':>8} {'primera':>9} {'caliente':>9} {'páginas':>8} {'KB':>7}")
+        for report in reports:
+            _method, template, title, _prefix, rows_field = ExportService.PDF_REPORTS[report]
+            for total in opt["rows"]:
+                data = fake_report(report, total)
+                rows = data.get(rows_field) if rows_field else data
+                context = {"date": "2025-01-15", "data": data, "title": title, "total": 80.0 * total}
+                chunked = len(rows) > chunk_size
+
+                def render():
+                    if chunked:
+                        return pdf_renderer.render_chunked(template, context, rows, "rows", chunk_size)
+                    return pdf_renderer.render(template, {**context, "rows": rows, "row_offset": 0})
+
+                # La primera incluye compilar la plantilla (y registrar fuentes en la primera de todas)
+                started = time.perf_counter()
+                output = render()
+                first = time.perf_counter() - started
+                pages, size = self._describe(output)
+
+                warm = []
+                for _ in range(opt["repeat"]):
+                    started = time.perf_counter()
+                    render().close()
+                    warm.append(time.perf_counter() - started)
+
+                self.stdout.write(
+                    f"{report:<26} {total:>6} {'bloques' if chunked else 'único':>8} "
+                    f"{first:>8.2f}s {min(warm) if warm else first:>8.2f}s {pages:>8} {size / 1024:>7.0f}"
+                )
+
+    def _describe(self, output):
+        from PyPDF2 import PdfReader
+
+        output.seek(0, 2)
+        size = output.tell()
+        output.seek(0)
+        pages = len(PdfReader(output).pages)
+        output.close()
+        return pages, size
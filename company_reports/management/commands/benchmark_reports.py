@@ -0,0 +1,196 @@
+import time
+import tracemalloc
+from datetime import datetime, time as dtime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointments_status.models import Appointment, Ticket
+from company_reports.services.reports_services import ReportService
+from histories_configurations.models import DocumentType, PaymentType
+from patients_diagnoses.models import Patient
+from therapists.models import Therapist
+from ubi_geo.models import Country, District, Province, Region
+
+AMOUNTS = [Decimal("80.10"), Decimal("35.35"), Decimal("120.70"), Decimal("49.90")]
+METHODS = ["efectivo", "yape", "tarjeta"]
+
+
+def legacy_patients_by_therapist(start, end):
+    """Agrupación anterior: objetos completos con select_related y conteo en Python."""
+    by_day = {}
+    appointments = (
+        Appointment.objects
+        .select_related("patient", "therapist")
+        .filter(appointment_local_date__range=[start, end])
+    )
+    for appointment in appointments:
+        patient, therapist = appointment.patient, appointment.therapist
+        if not patient:
+            continue
+        report = by_day.setdefault(appointment.appointment_local_date, {})
+        key = therapist.id if therapist else "sinTherapist"
+        group = report.setdefault(key, {
+            "therapist_id": therapist.id if therapist else "",
+            "therapist": f"{therapist.last_name_paternal} {therapist.last_name_maternal or ''} {therapist.first_name}".strip()
+            if therapist else "Sin terapeuta asignado",
+            "patients": {},
+        })
+        entry = group["patients"].setdefault(patient.id, {
+            "patient_id": patient.id,
+            "patient": f"{patient.paternal_lastname} {patient.maternal_lastname or ''} {patient.name}".strip(),
+            "appointments": 0,
+        })
+        entry["appointments"] += 1
+    return by_day
+
+
+def legacy_summary(rows, count_key):
+    """Resumen anterior: totales por método acumulados en float recorriendo el detalle."""
+    summary, total = {}, 0
+    for row in rows:
+        item = summary.setdefault(row["metodo_pago"], {"metodo": row["metodo_pago"], count_key: 0, "total": 0.0})
+        item[count_key] += 1
+        item["total"] += row["monto"]
+        total += row["monto"]
+    return sorted(summary.values(), key=lambda x: x["total"], reverse=True), round(total, 2)
+
+
+def legacy_improved_daily_cash(start, end):
+    """Mismo detalle que el actual; el resumen y el total se calculan en Python."""
+    service = ReportService()
+    payments, _methods = service._improved_cash_payments(*service._improved_cash_querysets(start, end), start, end)
+    report = {}
+    for day, rows in payments.items():
+        summary, total = legacy_summary(rows, "cantidad_pagos")
+        report[day] = {"pagos_detallados": rows, "resumen_por_metodo": summary, "total_general": total}
+    return report
+
+
+def legacy_daily_paid_tickets(start, end):
+    """Mismo detalle que el actual; el resumen y el total se calculan en Python."""
+    service = ReportService()
+    tickets, _methods = service._paid_ticket_rows(service._paid_tickets_queryset(start, end), start, end)
+    report = {}
+    for day, rows in tickets.items():
+        summary, total = legacy_summary(rows, "cantidad_tickets")
+        report[day] = {"tickets_pagados": rows, "resumen_por_metodo": summary, "total_general": total}
+    return report
+
+
+def measure(compute):
+    """Ejecuta compute midiendo tiempo, pico de memoria Python (tracemalloc) y consultas."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as ctx:
+        result = compute()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / (1024 * 1024), len(ctx.captured_queries)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide tiempo y pico de memoria de los reportes por rango de días (pacientes por terapeuta, "
+        "caja mejorada y tickets pagados) frente a la forma anterior: objetos completos y totales "
+        "acumulados en float. Siembra las citas dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000,
+                            help="Citas sembradas en el rango, cada una con su ticket")
+        parser.add_argument("--days", type=int, default=31,
+                            help="Días del rango consultado")
+
+    def handle(self, *args, **opt):
+        if opt["rows"] < 1 or opt["days"] < 1:
+            raise CommandError("--rows y --days deben ser mayores que cero")
+
+        service = ReportService()
+        start = timezone.localdate() - timedelta(days=opt["days"] - 1)
+        end = timezone.localdate()
+        reports = [
+            ("pacientes por terapeuta", legacy_patients_by_therapist, service.get_patients_by_therapist_by_day),
+            ("caja chica mejorada", legacy_improved_daily_cash, service.get_improved_daily_cash_by_day),
+            ("tickets pagados", legacy_daily_paid_tickets, service.get_daily_paid_tickets_by_day),
+        ]
+
+        with transaction.atomic():
+            self._seed(opt["rows"], start, opt["days"])
+            self.stdout.write(f"{opt['rows']} citas y tickets entre {start} y {end}")
+            self.stdout.write(f"{'reporte':<24} {'forma':>9} {'tiempo':>8} {'memoria':>9} {'consultas':>9}")
+            for label, legacy, current in reports:
+                old, *old_stats = measure(lambda: legacy(start, end))
+                new, *new_stats = measure(lambda: current(start, end))
+                for name, (seconds, peak, queries) in (("anterior", old_stats), ("actual", new_stats)):
+                    self.stdout.write(f"{label:<24} {name:>9} {seconds:>7.2f}s {peak:>7.1f}MB {queries:>9}")
+                if "total_general" in new[end]:
+                    self._compare_totals(label, old, new)
+            transaction.set_rollback(True)
+
+    def _compare_totals(self, label, old, new):
+        """El total exacto es la suma de los resúmenes en Decimal; el anterior la acumulaba en float."""
+        drift = max(abs(Decimal(str(old[day]["total_general"])) - Decimal(str(new[day]["total_general"])))
+                    for day in new)
+        style = self.style.SUCCESS if drift < Decimal("0.01") else self.style.ERROR
+        self.stdout.write(style(f"{label}: diferencia máxima de total diario {drift}"))
+
+    def _seed(self, total, first_day, days):
+        tag = f"{timezone.now().timestamp():.0f}"
+        country = Country.objects.create(name="Benchmark")
+        region = Region.objects.create(name="Benchmark", country=country)
+        province = Province.objects.create(name="Benchmark", region=region)
+        district = District.objects.create(name="Benchmark", province=province)
+        document_type = DocumentType.objects.create(name=f"BENCH-RPT-{tag}")
+        payment_types = [PaymentType.objects.create(name=f"Benchmark {method}") for method in METHODS]
+        geo = {"region": region, "province": province, "district": district, "document_type": document_type}
+        Patient.objects.bulk_create([
+            Patient(
+                document_number=f"6{tag}{i:05d}"[:20], name=f"Paciente{i}",
+                paternal_lastname=f"Paterno{i % 97}", maternal_lastname=f"Materno{i % 89}",
+                email=f"benchmark-rpt{i}@example.com", ocupation="-", health_condition="-", **geo,
+            )
+            for i in range(500)
+        ])
+        Therapist.objects.bulk_create([
+            Therapist(
+                document_number=f"7{tag}{i:03d}"[:20], first_name=f"Terapeuta{i}",
+                last_name_paternal=f"Paterno{i}", last_name_maternal=f"Materno{i}",
+                email=f"benchmark-rpt-t{i}@example.com", **geo,
+            )
+            for i in range(20)
+        ])
+        # En MySQL bulk_create no devuelve los ids
+        patients = list(Patient.objects.filter(document_number__startswith=f"6{tag}"))
+        therapists = list(Therapist.objects.filter(document_number__startswith=f"7{tag}"))
+
+        # bulk_create no pasa por save() ni por las señales: días locales y tickets se crean aquí
+        appointments = []
+        for i in range(total):
+            day = first_day + timedelta(days=i % days)
+            start = timezone.make_aware(datetime.combine(day, dtime(8 + i % 12)))
+            appointments.append(Appointment(
+                patient=patients[i % len(patients)],
+                therapist=therapists[i % len(therapists)] if i % 25 else None,
+                appointment_date=start, appointment_local_date=day, hour=start.time(),
+                payment=AMOUNTS[i % len(AMOUNTS)], payment_type=payment_types[i % len(payment_types)],
+                ticket_number=f"RPT-{tag}-{i}",
+            ))
+        Appointment.objects.bulk_create(appointments, batch_size=2000)
+        ids = dict(
+            Appointment.objects.filter(ticket_number__startswith=f"RPT-{tag}-")
+            .values_list("ticket_number", "id")
+        )
+        Ticket.objects.bulk_create([
+            Ticket(
+                appointment_id=ids[appointment.ticket_number], ticket_number=appointment.ticket_number,
+                amount=appointment.payment, payment_method=METHODS[i % len(METHODS)],
+                payment_local_date=appointment.appointment_local_date,
+                status="paid" if i % 3 else "pending",
+            )
+            for i, appointment in enumerate(appointments)
+        ], batch_size=2000)
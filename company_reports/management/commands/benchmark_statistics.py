@@ -0,0 +1,320 @@
+import time
+from datetime import datetime, time as dtime, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import ExtractWeekDay, Concat
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from appointments_status.models import Appointment, PaymentEntry
+from appointments_status.services.payment_ledger_service import PaymentLedgerService
+from company_reports.models.daily_rollup import DailyClinicRollupDay
+from company_reports.services.rollup_services import DailyRollupService
+from company_reports.services.statistics_services import StatisticsService
+from histories_configurations.models import DocumentType, PaymentType
+from patients_diagnoses.models import Patient
+from therapists.models import Therapist
+from ubi_geo.models import Country, District, Province, Region
+
+AMOUNTS = [Decimal("80.10"), Decimal("35.35"), Decimal("120.70"), Decimal("49.90")]
+STATUSES = ["C", "CC", "PENDIENTE"]
+
+
+class BaselineStatisticsService:
+    """
+    StatisticsService tal como estaba en e941c26 (una consulta por bloque del dashboard),
+    copiado sin cambios salvo el nombre del terapeuta: 'therapist__name' no existe y sin
+    corregirlo get_rendimiento_terapeutas lanza FieldError.
+
+    Solo sirve de referencia de tiempo y consultas: filtra por appointment_date (no por el
+    día local), incluye citas eliminadas y suma el pago de las citas en vez del libro, así
+    que su payload no se compara con el actual.
+    """
+
+    def get_metricas_principales(self, start, end):
+        return Appointment.objects.filter(
+            appointment_date__range=[start, end]
+        ).aggregate(
+            ttlpacientes=Count("patient", distinct=True),
+            ttlsesiones=Count("id"),
+            ttlganancias=Sum("payment")
+        )
+
+    def get_tipos_de_pago(self, start, end):
+        pagos = (
+            Appointment.objects
+            .filter(
+                appointment_date__range=[start, end]
+            )
+            .values("payment_type__name")
+            .annotate(usos=Count("id"))
+        )
+        return {(p["payment_type__name"] or "Sin tipo"): p["usos"] for p in pagos}
+
+    def get_rendimiento_terapeutas(self, start, end):
+        # 1. Consulta base: sesiones e ingresos por terapeuta 
+        stats = list(
+            Appointment.objects
+            .filter(
+                appointment_date__range=[start, end]
+            )
+            .values("therapist__id")
+            .annotate(
+                # Formato de nombre  "Apellido1 Apellido2, Nombre"
+                terapeuta=Concat(
+                    'therapist__last_name_paternal',
+                    Value(' '),
+                    'therapist__last_name_maternal', 
+                    Value(', '),
+                    'therapist__first_name'  # en e941c26: 'therapist__name', que no existe
+                ),
+                sesiones=Count("id"),
+                ingresos=Sum("payment")
+            )
+        )
+        
+        if not stats:
+            return []
+        
+        # 2. Calculamos promedios globales
+        total_sesiones = sum(s['sesiones'] for s in stats)
+        total_ingresos = sum(float(s['ingresos'] or 0) for s in stats)  
+        num_terapeutas = len(stats)
+        
+        prom_sesiones = total_sesiones / num_terapeutas if num_terapeutas > 0 else 1
+        prom_ingresos = total_ingresos / num_terapeutas if num_terapeutas > 0 else 1
+        
+        # 3. Calcular rating original para cada terapeuta
+        for stat in stats:
+            sesiones = stat['sesiones']
+            ingresos = float(stat['ingresos'] or 0)  
+            
+            # Fórmula 70% sesiones, 30% ingresos
+            rating_original = (sesiones / prom_sesiones) * 0.7 + (ingresos / prom_ingresos) * 0.3
+            stat['raiting_original'] = rating_original
+        
+        # 4. Encontrar el máximo rating original
+        max_original = max(s['raiting_original'] for s in stats) if stats else 1
+        
+        # 5. Escalar a 5 puntos y formatear resultado
+        resultado = []
+        for stat in stats:
+            scaled_rating = (stat['raiting_original'] / max_original) * 5
+            
+            resultado.append({
+                "id": stat["therapist__id"],
+                "terapeuta": stat['terapeuta'] or "Sin nombre",   
+                "sesiones": stat["sesiones"],
+                "ingresos": float(stat["ingresos"]) if stat["ingresos"] else 0.0,
+                "raiting": round(scaled_rating, 2) 
+            })
+        
+        return resultado
+
+    def get_ingresos_por_dia_semana(self, start, end):
+        
+        dias_semana = {
+            1: "Domingo",       
+            2: "Lunes",      
+            3: "Martes",     
+            4: "Miercoles",   
+            5: "Jueves",    
+            6: "Viernes",      
+            7: "Sabado"     
+        }
+        
+        ingresos_raw = (
+            Appointment.objects
+            .filter(
+                appointment_date__range=[start, end]
+            )
+            .annotate(dia_semana=ExtractWeekDay("appointment_date"))
+            .values("dia_semana")
+            .annotate(total=Sum("payment"))  
+            .order_by("dia_semana")
+        )
+        
+        
+        resultado = {}
+        for item in ingresos_raw:
+            dia_nombre = dias_semana.get(item["dia_semana"], f"Día {item['dia_semana']}")
+            resultado[dia_nombre] = float(item["total"]) if item["total"] else 0.0
+        
+        return resultado
+
+    def get_sesiones_por_dia_semana(self, start, end):
+        dias_semana = {
+            1: "Domingo", 2: "Lunes", 3: "Martes", 4: "Miercoles",
+            5: "Jueves", 6: "Viernes", 7: "Sabado"
+        }
+        
+        sesiones_raw = (
+            Appointment.objects
+            .filter(
+                appointment_date__range=[start, end]
+            )
+            .annotate(dia_semana=ExtractWeekDay("appointment_date"))
+            .values("dia_semana")
+            .annotate(sesiones=Count("id"))
+            .order_by("dia_semana")
+        )
+        
+        resultado = {}
+        for item in sesiones_raw:
+            dia_nombre = dias_semana.get(item["dia_semana"], f"Día {item['dia_semana']}")
+            resultado[dia_nombre] = item["sesiones"]
+        
+        return resultado
+
+    def get_tipos_pacientes(self, start, end):
+        return Appointment.objects.filter(
+            appointment_date__range=[start, end]
+        ).aggregate(
+            c=Count("id", filter=Q(appointment_status__iexact="C")),
+            cc=Count("id", filter=Q(appointment_status__iexact="CC"))
+        )
+
+    def get_statistics(self, start, end):
+        return {
+            "terapeutas": self.get_rendimiento_terapeutas(start, end),
+            "tipos_pago": self.get_tipos_de_pago(start, end),
+            "metricas": self.get_metricas_principales(start, end),
+            "ingresos": self.get_ingresos_por_dia_semana(start, end),
+            "sesiones": self.get_sesiones_por_dia_semana(start, end),
+            "tipos_pacientes": self.get_tipos_pacientes(start, end),
+        }
+
+
+def measure(compute):
+    """Ejecuta compute midiendo tiempo y consultas."""
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as ctx:
+        result = compute()
+    return result, time.perf_counter() - started, len(ctx.captured_queries)
+
+
+def statistics_by_block(service, start, end):
+    """Payload de referencia: los métodos get_* del servicio actual, un bloque cada uno."""
+    return {
+        "terapeutas": service.get_rendimiento_terapeutas(start, end),
+        "tipos_pago": service.get_tipos_de_pago(start, end),
+        "metricas": service.get_metricas_principales(start, end),
+        "ingresos": service.get_ingresos_por_dia_semana(start, end),
+        "sesiones": service.get_sesiones_por_dia_semana(start, end),
+        "tipos_pacientes": service.get_tipos_pacientes(start, end),
+    }
+
+
+def comparable(payload):
+    """
+    Payload sin depender del orden de los terapeutas ni del redondeo de SUM: SQLite suma
+    los decimales en coma flotante y el plegado en memoria los suma en Decimal.
+    """
+    cents = lambda value: round(float(value or 0), 2)
+    terapeutas = [{**t, "ingresos": cents(t["ingresos"])} for t in payload["terapeutas"]]
+    return {
+        **payload,
+        "terapeutas": sorted(terapeutas, key=lambda t: (t["id"] is None, t["id"] or 0)),
+        "metricas": {**payload["metricas"], "ttlganancias": cents(payload["metricas"]["ttlganancias"])},
+        "ingresos": {dia: cents(total) for dia, total in payload["ingresos"].items()},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el tiempo y las consultas de las estadísticas del dashboard: StatisticsService "
+        "de e941c26 (forma anterior) frente a StatisticsService.get_statistics, leyendo las "
+        "citas y leyendo el acumulado diario. Verifica que los dos payloads actuales coincidan "
+        "con los métodos get_* por bloque. Siembra dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000, help="Citas sembradas en el rango")
+        parser.add_argument("--days", type=int, default=31, help="Días del rango consultado")
+
+    def handle(self, *args, **opt):
+        if opt["rows"] < 1 or opt["days"] < 1:
+            raise CommandError("--rows y --days deben ser mayores que cero")
+
+        service = StatisticsService()
+        end = timezone.localdate()
+        start = end - timedelta(days=opt["days"] - 1)
+
+        with transaction.atomic():
+            self._seed(opt["rows"], start, opt["days"])
+            # Sin acumulado: get_statistics recorre las citas
+            DailyClinicRollupDay.objects.filter(date__range=[start, end]).delete()
+            self.stdout.write(f"{opt['rows']} citas entre {start} y {end}")
+            self.stdout.write(f"{'forma':<22} {'tiempo':>8} {'consultas':>9}")
+
+            results = {"anterior (e941c26)": measure(lambda: BaselineStatisticsService().get_statistics(start, end))}
+            results["actual (citas)"] = measure(lambda: service.get_statistics(start, end))
+            DailyRollupService().rebuild(start, end)
+            results["actual (acumulado)"] = measure(lambda: service.get_statistics(start, end))
+
+            for label, (_payload, seconds, queries) in results.items():
+                self.stdout.write(f"{label:<22} {seconds:>7.2f}s {queries:>9}")
+            expected = comparable(statistics_by_block(service, start, end))
+            mismatches = [
+                label for label, (payload, *_stats) in results.items()
+                if label.startswith("actual") and comparable(payload) != expected
+            ]
+            transaction.set_rollback(True)
+
+        if mismatches:
+            raise CommandError(f"Payload distinto al de los métodos por bloque: {', '.join(mismatches)}")
+        self.stdout.write(self.style.SUCCESS("Los payloads actuales coinciden con los métodos por bloque ✔"))
+
+    def _seed(self, total, first_day, days):
+        tag = f"{timezone.now().timestamp():.0f}"
+        country = Country.objects.create(name="Benchmark")
+        region = Region.objects.create(name="Benchmark", country=country)
+        province = Province.objects.create(name="Benchmark", region=region)
+        district = District.objects.create(name="Benchmark", province=province)
+        document_type = DocumentType.objects.create(name=f"BENCH-STATS-{tag}")
+        payment_types = [PaymentType.objects.create(name=f"Benchmark {i}") for i in range(3)]
+        geo = {"region": region, "province": province, "district": district, "document_type": document_type}
+        Patient.objects.bulk_create([
+            Patient(
+                document_number=f"6{tag}{i:05d}"[:20], name=f"Paciente{i}",
+                paternal_lastname=f"Paterno{i % 97}", maternal_lastname=f"Materno{i % 89}",
+                email=f"benchmark-stats{i}@example.com", ocupation="-", health_condition="-", **geo,
+            )
+            for i in range(500)
+        ])
+        Therapist.objects.bulk_create([
+            Therapist(
+                document_number=f"7{tag}{i:03d}"[:20], first_name=f"Terapeuta{i}",
+                last_name_paternal=f"Paterno{i}", last_name_maternal=f"Materno{i}",
+                email=f"benchmark-stats-t{i}@example.com", **geo,
+            )
+            for i in range(20)
+        ])
+        # En MySQL bulk_create no devuelve los ids
+        patients = list(Patient.objects.filter(document_number__startswith=f"6{tag}"))
+        therapists = list(Therapist.objects.filter(document_number__startswith=f"7{tag}"))
+
+        # bulk_create no pasa por save() ni por las señales: días locales y libro de pagos se llenan aquí
+        appointments = []
+        for i in range(total):
+            day = first_day + timedelta(days=i % days)
+            start = timezone.make_aware(datetime.combine(day, dtime(8 + i % 12)))
+            appointments.append(Appointment(
+                patient=patients[i % len(patients)],
+                therapist=therapists[i % len(therapists)] if i % 25 else None,
+                appointment_date=start, appointment_local_date=day, hour=start.time(),
+                payment=AMOUNTS[i % len(AMOUNTS)] if i % 10 else None,
+                payment_type=payment_types[i % len(payment_types)] if i % 7 else None,
+                appointment_status=STATUSES[i % len(STATUSES)],
+                ticket_number=f"STATS-{tag}-{i}",
+            ))
+        Appointment.objects.bulk_create(appointments, batch_size=2000)
+        ids = list(
+            Appointment.objects.filter(ticket_number__startswith=f"STATS-{tag}-").values_list("id", flat=True)
+        )
+        ledger = PaymentLedgerService()
+        for offset in range(0, len(ids), 2000):
+            ledger.sync(PaymentEntry.SOURCE_APPOINTMENT, ids[offset:offset + 2000])
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from appointments_status.models import Appointment
+from company_reports.services.rollup_services import DailyRollupService
+
+
+def parse_date(value, label):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Formato inválido para {label}: {value}. Use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el acumulado diario (DailyClinicRollup) para un rango de fechas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=str,
+                            help="Fecha inicial YYYY-MM-DD (por defecto, la primera cita registrada)")
+        parser.add_argument("--end", type=str,
+                            help="Fecha final YYYY-MM-DD (por defecto, la última cita registrada)")
+        parser.add_argument("--chunk-days", type=int, default=31,
+                            help="Días reconstruidos por transacción")
+
+    def handle(self, *args, **opt):
+        bounds = Appointment.objects.aggregate(first=Min("appointment_date"), last=Max("appointment_date"))
+
+        if opt["start"]:
+            start = parse_date(opt["start"], "--start")
+        elif bounds["first"]:
+            start = timezone.localtime(bounds["first"]).date()
+        else:
+            start = timezone.localdate()
+
+        if opt["end"]:
+            end = parse_date(opt["end"], "--end")
+        elif bounds["last"]:
+            end = timezone.localtime(bounds["last"]).date()
+        else:
+            end = timezone.localdate()
+
+        if start > end:
+            raise CommandError("--start no puede ser mayor que --end")
+        chunk_days = max(1, opt["chunk_days"])
+
+        service = DailyRollupService()
+        self.stdout.write(f"Reconstruyendo acumulado del {start} al {end}…")
+        total_rows = 0
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+            rows = service.rebuild(chunk_start, chunk_end)
+            total_rows += rows
+            self.stdout.write(f"{chunk_start} → {chunk_end}: {rows} filas")
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Acumulado reconstruido ✔ ({total_rows} filas)"))
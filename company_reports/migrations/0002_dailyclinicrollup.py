@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_reports', '0001_initial'),
+        ('histories_configurations', '0001_initial'),
+        ('therapists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyClinicRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('status', models.CharField(max_length=20, verbose_name='Estado de la cita')),
+                ('sessions', models.PositiveIntegerField(default=0, verbose_name='Sesiones')),
+                ('distinct_patients', models.PositiveIntegerField(default=0, verbose_name='Pacientes distintos')),
+                ('revenue', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Ingresos')),
+                ('paid_tickets_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Monto de tickets pagados')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('payment_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='histories_configurations.paymenttype', verbose_name='Tipo de pago')),
+                ('therapist', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='therapists.therapist', verbose_name='Terapeuta')),
+            ],
+            options={
+                'verbose_name': 'Acumulado diario',
+                'verbose_name_plural': 'Acumulados diarios',
+                'db_table': 'daily_clinic_rollups',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['date'], name='daily_rollup_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'therapist', 'payment_type', 'status'), name='uniq_daily_clinic_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyClinicRollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Fecha')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='Última actualización')),
+            ],
+            options={
+                'verbose_name': 'Día consolidado',
+                'verbose_name_plural': 'Días consolidados',
+                'db_table': 'daily_clinic_rollup_days',
+                'ordering': ['date'],
+            },
+        ),
+    ]
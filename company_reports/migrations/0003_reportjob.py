@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_reports', '0002_dailyclinicrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('report', models.CharField(max_length=60, verbose_name='Reporte')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('dedupe_key', models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Clave de deduplicación')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Terminado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='Estado')),
+                ('file', models.FileField(blank=True, null=True, upload_to='report_jobs/%Y/%m/%d/', verbose_name='Archivo')),
+                ('filename', models.CharField(blank=True, default='', max_length=255, verbose_name='Nombre del archivo')),
+                ('content_type', models.CharField(blank=True, default='', max_length=100, verbose_name='Tipo de contenido')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de finalización')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de expiración')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de reporte',
+                'verbose_name_plural': 'Trabajos de reportes',
+                'db_table': 'report_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['expires_at'], name='report_job_expires_idx')],
+            },
+        ),
+    ]
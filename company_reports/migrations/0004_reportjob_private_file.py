@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5
+
+import company_reports.models.report_job
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company_reports', '0003_reportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportjob',
+            name='requested_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por'),
+        ),
+        migrations.AlterField(
+            model_name='reportjob',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=company_reports.models.report_job.ReportJobStorage(), upload_to=company_reports.models.report_job.report_job_upload_to, verbose_name='Archivo'),
+        ),
+    ]
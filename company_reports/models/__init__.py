@@ -0,0 +1,5 @@
+from .company import CompanyData
+from .daily_rollup import DailyClinicRollup, DailyClinicRollupDay
+from .report_job import ReportJob
+
+__all__ = ['CompanyData', 'DailyClinicRollup', 'DailyClinicRollupDay', 'ReportJob']
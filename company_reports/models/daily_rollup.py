@@ -0,0 +1,59 @@
+from django.db import models
+
+
+class DailyClinicRollup(models.Model):
+    """
+    Acumulado diario de citas por terapeuta, tipo de pago y estado.
+    Se mantiene desde las señales de Appointment/Ticket y se reconstruye
+    con el comando rebuild_daily_rollup.
+    """
+
+    date = models.DateField(verbose_name="Fecha")
+    therapist = models.ForeignKey('therapists.Therapist', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Terapeuta")
+    payment_type = models.ForeignKey('histories_configurations.PaymentType', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Tipo de pago")
+    status = models.CharField(max_length=20, verbose_name="Estado de la cita")
+
+    # Medidas
+    sessions = models.PositiveIntegerField(default=0, verbose_name="Sesiones")
+    distinct_patients = models.PositiveIntegerField(default=0, verbose_name="Pacientes distintos")
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True, verbose_name="Ingresos")
+    paid_tickets_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Monto de tickets pagados")
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
+
+    class Meta:
+        db_table = 'daily_clinic_rollups'
+        verbose_name = "Acumulado diario"
+        verbose_name_plural = "Acumulados diarios"
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'therapist', 'payment_type', 'status'],
+                name='uniq_daily_clinic_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daily_rollup_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Acumulado {self.date} - {self.status}"
+
+
+class DailyClinicRollupDay(models.Model):
+    """
+    Marca los días ya consolidados en DailyClinicRollup.
+    Permite saber si el acumulado cubre un rango aunque haya días sin citas.
+    """
+
+    date = models.DateField(unique=True, verbose_name="Fecha")
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        db_table = 'daily_clinic_rollup_days'
+        verbose_name = "Día consolidado"
+        verbose_name_plural = "Días consolidados"
+        ordering = ['date']
+
+    def __str__(self):
+        return str(self.date)
@@ -0,0 +1,83 @@
+import os
+import uuid
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils import timezone
+
+
+class ReportJobStorage(FileSystemStorage):
+    """
+    Archivos de exportaciones en REPORT_JOB_ROOT, fuera de MEDIA_ROOT: nginx no los
+    sirve y solo se descargan por ReportJobDownloadView. La carpeta se lee de settings
+    en cada uso.
+    """
+
+    @property
+    def base_location(self):
+        return settings.REPORT_JOB_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def report_job_upload_to(instance, filename):
+    """Nombre aleatorio en disco; el nombre legible queda en ReportJob.filename."""
+    return f"{timezone.now():%Y/%m/%d}/{uuid.uuid4().hex}{os.path.splitext(filename)[1]}"
+
+
+class ReportJob(models.Model):
+    """
+    Exportación (PDF/Excel) generada en segundo plano por la tarea
+    company_reports.tasks.generate_report_job en la cola 'reports'.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_DONE, 'Terminado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report = models.CharField(max_length=60, verbose_name="Reporte")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    # Clave de deduplicación (reporte + parámetros). Se libera (NULL) cuando el trabajo
+    # falla o su resultado expira, así una nueva solicitud igual crea otro trabajo.
+    dedupe_key = models.CharField(max_length=64, unique=True, null=True, blank=True, verbose_name="Clave de deduplicación")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Estado")
+
+    # Solo quien lo pidió puede consultarlo y descargarlo
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True,
+        related_name='report_jobs', verbose_name="Solicitado por",
+    )
+
+    file = models.FileField(
+        upload_to=report_job_upload_to, storage=ReportJobStorage(), blank=True, null=True, verbose_name="Archivo"
+    )
+    filename = models.CharField(max_length=255, blank=True, default='', verbose_name="Nombre del archivo")
+    content_type = models.CharField(max_length=100, blank=True, default='', verbose_name="Tipo de contenido")
+    error = models.TextField(blank=True, default='', verbose_name="Error")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de inicio")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de finalización")
+    expires_at = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de expiración")
+
+    class Meta:
+        db_table = 'report_jobs'
+        verbose_name = "Trabajo de reporte"
+        verbose_name_plural = "Trabajos de reportes"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expires_at'], name='report_job_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.report} ({self.status})"
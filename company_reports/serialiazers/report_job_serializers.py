@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from django.urls import reverse
+from company_reports.models.report_job import ReportJob
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Estado de un trabajo de exportación, con la URL de descarga cuando está listo."""
+
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id',
+            'report',
+            'params',
+            'status',
+            'filename',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'expires_at',
+            'download_url',
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status != ReportJob.STATUS_DONE:
+            return None
+        url = reverse('report_job_download', kwargs={'job_id': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils.timezone import localtime
+from company_reports.services.report_engine import SOURCES, ReportEngine
 
 
 class DateParameterSerializer(serializers.Serializer):
@@ -28,6 +30,93 @@ class DateParameterSerializer(serializers.Serializer):
             
         return data
 
+
+class DateRangeParameterSerializer(serializers.Serializer):
+    """Valida start_date y end_date de los reportes por día (ambos requeridos)."""
+
+    start_date = serializers.DateField(input_formats=['%Y-%m-%d'])
+    end_date = serializers.DateField(input_formats=['%Y-%m-%d'])
+
+    def validate(self, data):
+        if data['start_date'] > data['end_date']:
+            raise serializers.ValidationError("start_date no puede ser mayor que end_date")
+        self.validate_span(data)
+        return data
+
+    def validate_span(self, data):
+        """Los reportes por día devuelven una entrada por día: el rango se limita en días."""
+        max_days = getattr(settings, 'REPORT_RANGE_MAX_DAYS', 92)
+        if (data['end_date'] - data['start_date']).days + 1 > max_days:
+            raise serializers.ValidationError(f"El rango no puede superar {max_days} días")
+
+
+class CommaSeparatedListField(serializers.ListField):
+    """Lista que también acepta "a,b,c" (query string) además de una lista JSON."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [item.strip() for item in data.split(",") if item.strip()]
+        return super().to_internal_value(data)
+
+
+class ReportQuerySerializer(DateRangeParameterSerializer):
+    """
+    Parámetros del reporte genérico (ReportEngine): fuente, dimensiones, medidas y
+    pivot opcional, además de start_date/end_date.
+    """
+
+    source = serializers.ChoiceField(choices=list(SOURCES), default="appointments")
+    dimensions = CommaSeparatedListField(child=serializers.CharField(), required=False, default=list)
+    # Sin medidas se usa la primera de la fuente (sessions en citas y tickets)
+    measures = CommaSeparatedListField(child=serializers.CharField(), required=False, default=None)
+    pivot = serializers.CharField(required=False, allow_blank=True, allow_null=True, default=None)
+
+    # Agrupación temporal más fina primero; sin day/week/month el rango cuenta en meses
+    BUCKETS = (("day", "días"), ("week", "semanas"), ("month", "meses"))
+
+    def validate_span(self, data):
+        """
+        Una sola consulta agrupada: lo que crece con el rango son los periodos de la
+        dimensión temporal (días, semanas o meses), así que se limita su cantidad y no
+        los días del rango.
+        """
+        max_buckets = getattr(settings, 'REPORT_QUERY_MAX_BUCKETS', 92)
+        dimensions = data.get("dimensions") or []
+        unit, label = next(((name, label) for name, label in self.BUCKETS if name in dimensions), self.BUCKETS[-1])
+        if self.bucket_count(data['start_date'], data['end_date'], unit) > max_buckets:
+            raise serializers.ValidationError(f"El rango no puede superar {max_buckets} {label}")
+
+    @staticmethod
+    def bucket_count(start, end, unit):
+        """Días, semanas (de lunes a domingo) o meses calendario que toca el rango."""
+        if unit == "day":
+            return (end - start).days + 1
+        if unit == "week":
+            return ((end - timedelta(days=end.weekday())) - (start - timedelta(days=start.weekday()))).days // 7 + 1
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+
+    def validate(self, data):
+        data = super().validate(data)
+        engine = ReportEngine()
+        errors = {}
+        dimensions = engine.dimension_names(data["source"])
+        measures = engine.measure_names(data["source"])
+        if data["measures"] is None:
+            data["measures"] = measures[:1]
+        unknown = [name for name in data["dimensions"] if name not in dimensions]
+        if unknown or len(set(data["dimensions"])) != len(data["dimensions"]):
+            errors["dimensions"] = f"Use dimensiones distintas entre: {', '.join(dimensions)}"
+        unknown = [name for name in data["measures"] if name not in measures]
+        if not data["measures"] or unknown or len(set(data["measures"])) != len(data["measures"]):
+            errors["measures"] = f"Use una o más medidas distintas entre: {', '.join(measures)}"
+        data["pivot"] = data.get("pivot") or None
+        if data["pivot"] is not None and data["pivot"] not in data["dimensions"]:
+            errors["pivot"] = "El pivot debe ser una de las dimensiones"
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
+
 class TherapistAppointmentSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     name = serializers.CharField()  # 👈 SIN source, leerá 'name' del dict
@@ -95,7 +184,7 @@ class PDFContextSerializer(serializers.Serializer):
     """Serializa contexto para templates PDF."""
     
     date = serializers.CharField()
-    data = serializers.DictField(required=False)
+    data = serializers.JSONField(required=False)  # dict o lista según el reporte
     title = serializers.CharField()
     total = serializers.FloatField(required=False)
 
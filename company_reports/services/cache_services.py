@@ -0,0 +1,148 @@
+import hashlib
+import json
+import time
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+# Campos de la cita y del ticket que leen los reportes cacheados: un guardado que no
+# cambia ninguno no invalida la caché
+APPOINTMENT_REPORT_FIELDS = (
+    'patient', 'therapist', 'appointment_date', 'hour', 'room', 'payment', 'payment_type',
+    'appointment_status', 'ticket_number', 'deleted_at',
+)
+TICKET_REPORT_FIELDS = (
+    'appointment', 'ticket_number', 'amount', 'payment_method', 'payment_date', 'description',
+    'status', 'is_active',
+)
+
+class ReportCacheService:
+    """
+    Caché de respuestas de reportes sobre el cache 'default' (Redis).
+
+    Cada día tiene un contador de versión (reports:day:<fecha>). La clave de una respuesta
+    incluye las versiones de todos los días que cubre, así que al incrementar la versión de
+    un día (cita o ticket modificado) todas las respuestas que lo incluyen dejan de leerse,
+    sin tener que buscarlas ni borrarlas.
+
+    El recálculo tras un fallo es de vuelo único: solo la petición que obtiene el candado
+    (cache.add) consulta la base de datos; el resto espera el resultado.
+    """
+
+    PREFIX = "reports"
+    STATS_KEY = f"{PREFIX}:stats"
+    POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self.timeout = getattr(settings, "REPORT_CACHE_TIMEOUT", 60 * 60 * 24)
+        self.today_timeout = getattr(settings, "REPORT_CACHE_TODAY_TIMEOUT", 60)
+        self.lock_timeout = getattr(settings, "REPORT_CACHE_LOCK_TIMEOUT", 30)
+
+    # --- Lectura ---
+
+    def get_or_compute(self, endpoint, params, start, end, compute):
+        """
+        Devuelve (payload, status) del reporte `endpoint` para `params`, que cubre los
+        días de start a end. `compute()` debe devolver (payload, status); solo se guardan
+        en caché las respuestas 200.
+        """
+        key = self._response_key(endpoint, params, start, end)
+        cached = cache.get(key)
+        if cached is not None:
+            self._count(endpoint, "hits")
+            return cached, 200
+
+        self._count(endpoint, "misses")
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not cache.add(lock_key, token, self.lock_timeout):
+            cached = self._wait_for(key)
+            if cached is not None:
+                return cached, 200
+
+        try:
+            payload, status = compute()
+            if status == 200:
+                cache.set(key, payload, self._timeout_for(end))
+            return payload, status
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    def _wait_for(self, key):
+        """Espera a que otra petición publique el resultado (máximo lock_timeout)."""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            if cache.get(f"{key}:lock") is None:
+                break
+        return None
+
+    def _timeout_for(self, end):
+        """Los rangos que llegan a hoy (o al futuro) aún cambian: TTL corto."""
+        return self.today_timeout if end >= timezone.localdate() else self.timeout
+
+    # --- Invalidación ---
+
+    def invalidate_days(self, days):
+        """Incrementa la versión de cada día; las respuestas que lo cubren quedan obsoletas."""
+        for day in {d for d in days if d is not None}:
+            key = self._day_key(day)
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Día sin versión aún: cualquier valor distinto de 0 la invalida
+                cache.set(key, 1, None)
+
+    # --- Métricas ---
+
+    def get_stats(self):
+        """Aciertos y fallos por endpoint desde el último reinicio de contadores."""
+        counters = cache.get(self.STATS_KEY) or []
+        keys = [f"{self.STATS_KEY}:{endpoint}:{kind}" for endpoint in counters for kind in ("hits", "misses")]
+        values = cache.get_many(keys)
+        stats = {}
+        for endpoint in counters:
+            hits = values.get(f"{self.STATS_KEY}:{endpoint}:hits", 0)
+            misses = values.get(f"{self.STATS_KEY}:{endpoint}:misses", 0)
+            total = hits + misses
+            stats[endpoint] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+            }
+        return stats
+
+    def _count(self, endpoint, kind):
+        key = f"{self.STATS_KEY}:{endpoint}:{kind}"
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, None):
+                cache.incr(key)
+            endpoints = cache.get(self.STATS_KEY) or []
+            if endpoint not in endpoints:
+                cache.set(self.STATS_KEY, sorted({*endpoints, endpoint}), None)
+
+    # --- Claves ---
+
+    def _day_key(self, day):
+        return f"{self.PREFIX}:day:{day.isoformat()}"
+
+    def _response_key(self, endpoint, params, start, end):
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        versions = cache.get_many([self._day_key(day) for day in days])
+        normalized = json.dumps(
+            {
+                "params": {k: str(v) for k, v in sorted(params.items())},
+                "versions": [versions.get(self._day_key(day), 0) for day in days],
+            },
+            sort_keys=True,
+        )
+        digest = hashlib.sha1(normalized.encode()).hexdigest()
+        return f"{self.PREFIX}:{endpoint}:{start.isoformat()}:{end.isoformat()}:{digest}"
@@ -0,0 +1,187 @@
+import tempfile
+import xlsxwriter
+
+
+APPOINTMENT_HEADERS = [
+    "ID Paciente",
+    "DNI/Documento",
+    "Paciente",
+    "Teléfono",
+    "Fecha",
+    "Hora",
+]
+
+
+def write_appointments_excel(rows, output):
+    """
+    Escribe las citas (dicts de ReportService.iter_appointments_between_dates) en `output`
+    fila por fila. Con constant_memory xlsxwriter vuelca cada fila al disco en cuanto
+    se pasa a la siguiente, así que la memoria no depende del número de filas.
+    Devuelve el número de filas escritas.
+    """
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Citas")
+
+    # Formato encabezado
+    header_format = workbook.add_format(
+        {"bold": True, "bg_color": "#2c3e50", "font_color": "white", "border": 1}
+    )
+
+    # Anchos de columna (antes de las filas: en constant_memory no se reescriben)
+    worksheet.set_column("A:A", 12)
+    worksheet.set_column("B:B", 15)
+    worksheet.set_column("C:C", 40)
+    worksheet.set_column("D:D", 15)
+    worksheet.set_column("E:E", 12)
+    worksheet.set_column("F:F", 10)
+
+    for col, header in enumerate(APPOINTMENT_HEADERS):
+        worksheet.write(0, col, header, header_format)
+
+    count = 0
+    for row, appointment in enumerate(rows, start=1):
+        worksheet.write(row, 0, appointment.get("patient_id", ""))
+        worksheet.write(row, 1, appointment.get("document_number_patient", ""))
+        worksheet.write(row, 2, appointment.get("patient", ""))
+        worksheet.write(row, 3, appointment.get("phone1_patient", ""))
+        worksheet.write(row, 4, appointment.get("appointment_date", ""))
+        worksheet.write(row, 5, appointment.get("hour", ""))
+        count = row
+
+    workbook.close()
+    return count
+
+
+def build_appointments_excel_file(rows):
+    """
+    Genera el Excel de citas en un archivo temporal y lo devuelve abierto al inicio.
+    El archivo se borra solo al cerrarse (FileResponse lo cierra al terminar de enviarlo).
+    """
+    output = tempfile.TemporaryFile(suffix=".xlsx")
+    try:
+        write_appointments_excel(rows, output)
+    except Exception:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+def write_improved_daily_cash_excel(data, output):
+    """Escribe el reporte mejorado de caja chica (ReportService.get_improved_daily_cash)."""
+    workbook = xlsxwriter.Workbook(output, {"in_memory": True})
+    worksheet = workbook.add_worksheet("Caja Chica")
+
+    # Formato encabezado
+    header_format = workbook.add_format(
+        {"bold": True, "bg_color": "#2c3e50", "font_color": "white", "border": 1}
+    )
+
+    # Encabezados para el reporte de caja chica
+    headers = [
+        "Tipo",
+        "ID",
+        "Número Ticket",
+        "Monto",
+        "Método Pago",
+        "Paciente",
+        "Terapeuta",
+        "Fecha Pago",
+    ]
+    for col, header in enumerate(headers):
+        worksheet.write(0, col, header, header_format)
+
+    # Escribir datos
+    for row, payment in enumerate(data.get("pagos_detallados", []), start=1):
+        worksheet.write(row, 0, payment.get("tipo", ""))
+        worksheet.write(row, 1, payment.get("id", ""))
+        worksheet.write(row, 2, payment.get("ticket_number", ""))
+        worksheet.write(row, 3, payment.get("monto", 0))
+        worksheet.write(row, 4, payment.get("metodo_pago", ""))
+        worksheet.write(row, 5, payment.get("paciente", ""))
+        worksheet.write(row, 6, payment.get("terapeuta", ""))
+        worksheet.write(row, 7, payment.get("fecha_pago", ""))
+
+    # Anchos de columna
+    worksheet.set_column("A:A", 10)
+    worksheet.set_column("B:B", 8)
+    worksheet.set_column("C:C", 20)
+    worksheet.set_column("D:D", 12)
+    worksheet.set_column("E:E", 15)
+    worksheet.set_column("F:F", 30)
+    worksheet.set_column("G:G", 30)
+    worksheet.set_column("H:H", 12)
+
+    # Agregar resumen
+    worksheet.write(len(data.get("pagos_detallados", [])) + 3, 0, "RESUMEN:", header_format)
+    worksheet.write(len(data.get("pagos_detallados", [])) + 4, 0, "Total General:")
+    worksheet.write(len(data.get("pagos_detallados", [])) + 4, 3, data.get("total_general", 0))
+
+    workbook.close()
+
+
+def write_paid_tickets_excel(data, output):
+    """Escribe el reporte diario de tickets pagados (ReportService.get_daily_paid_tickets)."""
+    workbook = xlsxwriter.Workbook(output, {"in_memory": True})
+    worksheet = workbook.add_worksheet("Tickets Pagados")
+
+    # Formato encabezado
+    header_format = workbook.add_format(
+        {"bold": True, "bg_color": "#2c3e50", "font_color": "white", "border": 1}
+    )
+
+    # Encabezados para el reporte de tickets pagados
+    headers = [
+        "Número Ticket",
+        "Monto",
+        "Método Pago",
+        "Fecha Pago",
+        "Paciente",
+        "Documento",
+        "Teléfono",
+        "Terapeuta",
+        "Licencia",
+        "Fecha Cita",
+        "Hora Cita",
+        "Consultorio",
+    ]
+    for col, header in enumerate(headers):
+        worksheet.write(0, col, header, header_format)
+
+    # Escribir datos
+    for row, ticket in enumerate(data.get("tickets_pagados", []), start=1):
+        worksheet.write(row, 0, ticket.get("numero_ticket", ""))
+        worksheet.write(row, 1, ticket.get("monto", 0))
+        worksheet.write(row, 2, ticket.get("metodo_pago", ""))
+        worksheet.write(row, 3, ticket.get("fecha_pago", ""))
+        worksheet.write(row, 4, ticket.get("paciente_nombre", ""))
+        worksheet.write(row, 5, ticket.get("paciente_documento", ""))
+        worksheet.write(row, 6, ticket.get("paciente_telefono", ""))
+        worksheet.write(row, 7, ticket.get("terapeuta_nombre", ""))
+        worksheet.write(row, 8, ticket.get("terapeuta_licencia", ""))
+        worksheet.write(row, 9, ticket.get("fecha_cita", ""))
+        worksheet.write(row, 10, ticket.get("hora_cita", ""))
+        worksheet.write(row, 11, ticket.get("consultorio", ""))
+
+    # Anchos de columna
+    worksheet.set_column("A:A", 20)  # Número Ticket
+    worksheet.set_column("B:B", 12)  # Monto
+    worksheet.set_column("C:C", 15)  # Método Pago
+    worksheet.set_column("D:D", 18)  # Fecha Pago
+    worksheet.set_column("E:E", 30)  # Paciente
+    worksheet.set_column("F:F", 15)  # Documento
+    worksheet.set_column("G:G", 15)  # Teléfono
+    worksheet.set_column("H:H", 30)  # Terapeuta
+    worksheet.set_column("I:I", 15)  # Licencia
+    worksheet.set_column("J:J", 12)  # Fecha Cita
+    worksheet.set_column("K:K", 10)  # Hora Cita
+    worksheet.set_column("L:L", 12)  # Consultorio
+
+    # Agregar resumen
+    worksheet.write(len(data.get("tickets_pagados", [])) + 3, 0, "RESUMEN:", header_format)
+    worksheet.write(len(data.get("tickets_pagados", [])) + 4, 0, "Total General:")
+    worksheet.write(len(data.get("tickets_pagados", [])) + 4, 1, data.get("total_general", 0))
+    worksheet.write(len(data.get("tickets_pagados", [])) + 5, 0, "Cantidad Tickets:")
+    worksheet.write(len(data.get("tickets_pagados", [])) + 5, 1, data.get("cantidad_tickets", 0))
+
+    workbook.close()
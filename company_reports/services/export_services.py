@@ -0,0 +1,151 @@
+import io
+from django.conf import settings
+from company_reports.serialiazers.reports_serializers import PDFContextSerializer
+from company_reports.services.excel_services import (
+    build_appointments_excel_file,
+    write_improved_daily_cash_excel,
+    write_paid_tickets_excel,
+)
+from company_reports.services.pdf_services import pdf_renderer
+from company_reports.services.reports_services import ReportService
+
+
+EXCEL_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ExportResult:
+    """Archivo generado por una exportación, listo para responder o guardar."""
+
+    def __init__(self, file, filename, content_type, as_attachment=True):
+        self.file = file
+        self.filename = filename
+        self.content_type = content_type
+        self.as_attachment = as_attachment
+
+
+class ExportService:
+    """
+    Genera los archivos de exports/pdf/* y exports/excel/*.
+    Lo usan tanto las vistas síncronas como los trabajos en segundo plano (ReportJob),
+    por eso cada reporte se identifica con el nombre de su URL.
+    """
+
+    # nombre -> (método de ReportService, plantilla, título, prefijo del archivo,
+    #           clave de las filas dentro de data; None si data ya es la lista de filas)
+    PDF_REPORTS = {
+        "pdf_citas_terapeuta": (
+            "get_appointments_count_by_therapist", "pdf_templates/citas_terapeuta.html",
+            "Citas por Terapeuta", "citas_terapeuta", "therapists_appointments",
+        ),
+        "pdf_pacientes_terapeuta": (
+            "get_patients_by_therapist", "pdf_templates/pacientes_terapeuta.html",
+            "Pacientes por Terapeuta", "pacientes_terapeuta", None,
+        ),
+        "pdf_resumen_caja": (
+            "get_daily_cash", "pdf_templates/resumen_caja.html",
+            "Resumen de Caja Diaria", "resumen_caja", None,
+        ),
+        "pdf_caja_chica_mejorada": (
+            "get_improved_daily_cash", "pdf_templates/caja_chica_mejorada.html",
+            "Reporte Mejorado de Caja Chica", "caja_chica_mejorada", "pagos_detallados",
+        ),
+        "pdf_tickets_pagados": (
+            "get_daily_paid_tickets", "pdf_templates/tickets_pagados.html",
+            "Reporte Diario de Tickets Pagados", "tickets_pagados", "tickets_pagados",
+        ),
+    }
+
+    EXCEL_REPORTS = (
+        "exportar_excel_citas",
+        "exportar_excel_caja_chica_mejorada",
+        "exportar_excel_tickets_pagados",
+    )
+
+    def __init__(self, report_service=None):
+        self.report_service = report_service or ReportService()
+
+    @classmethod
+    def available_reports(cls):
+        return [*cls.PDF_REPORTS, *cls.EXCEL_REPORTS]
+
+    def build(self, report, validated_data):
+        """Devuelve un ExportResult o un dict {"error": ...} como el resto de servicios."""
+        if report in self.PDF_REPORTS:
+            return self._build_pdf(report, validated_data)
+        if report == "exportar_excel_citas":
+            return self._build_excel_citas(validated_data)
+        if report == "exportar_excel_caja_chica_mejorada":
+            return self._build_excel_from_data(
+                validated_data, "get_improved_daily_cash", write_improved_daily_cash_excel, "caja_chica_mejorada"
+            )
+        if report == "exportar_excel_tickets_pagados":
+            return self._build_excel_from_data(
+                validated_data, "get_daily_paid_tickets", write_paid_tickets_excel, "tickets_pagados"
+            )
+        return {"error": f"Reporte desconocido: {report}"}
+
+    # --- PDF ---
+
+    def get_pdf_context(self, report, validated_data):
+        """Contexto de la plantilla del reporte (o dict de error)."""
+        method, _template, title, _prefix, _rows_field = self.PDF_REPORTS[report]
+        data = getattr(self.report_service, method)(validated_data)
+        if isinstance(data, dict) and "error" in data:
+            return data
+
+        context_data = {
+            "date": validated_data.get("date"),
+            "data": data,
+            "title": title,
+        }
+        if report == "pdf_resumen_caja":
+            # Total del día (desde el acumulado diario si está consolidado)
+            context_data["total"] = self.report_service.get_daily_cash_total(validated_data)
+        return PDFContextSerializer(context_data).data
+
+    def _build_pdf(self, report, validated_data):
+        context = self.get_pdf_context(report, validated_data)
+        if "error" in context:
+            return context
+        _method, template, _title, prefix, rows_field = self.PDF_REPORTS[report]
+
+        data = context["data"]
+        rows = (data.get(rows_field) if rows_field else data) or []
+        chunk_size = getattr(settings, "REPORT_PDF_CHUNK_SIZE", 500)
+        if len(rows) > chunk_size:
+            output = pdf_renderer.render_chunked(template, context, rows, "rows", chunk_size)
+        else:
+            output = pdf_renderer.render(template, {**context, "rows": rows, "row_offset": 0})
+
+        return ExportResult(
+            output,
+            f"{prefix}_{validated_data.get('date')}.pdf",
+            "application/pdf",
+            as_attachment=False,
+        )
+
+    # --- Excel ---
+
+    def _build_excel_citas(self, validated_data):
+        start_date = validated_data.get("start_date")
+        end_date = validated_data.get("end_date")
+        if not start_date or not end_date:
+            return {"error": "start_date y end_date son requeridos"}
+
+        # Las citas se leen por ventanas y se escriben fila a fila en un archivo temporal
+        rows = self.report_service.iter_appointments_between_dates(validated_data)
+        return ExportResult(
+            build_appointments_excel_file(rows),
+            f"citas_{start_date}_a_{end_date}.xlsx",
+            EXCEL_CONTENT_TYPE,
+        )
+
+    def _build_excel_from_data(self, validated_data, method, writer, prefix):
+        data = getattr(self.report_service, method)(validated_data)
+        if isinstance(data, dict) and "error" in data:
+            return data
+
+        output = io.BytesIO()
+        writer(data, output)
+        output.seek(0)
+        return ExportResult(output, f"{prefix}_{validated_data.get('date')}.xlsx", EXCEL_CONTENT_TYPE)
@@ -0,0 +1,176 @@
+import base64
+import io
+import mimetypes
+import os
+import tempfile
+import threading
+from django.conf import settings
+from django.template.loader import get_template
+from company_reports.models.company import CompanyData
+
+
+class PDFRenderer:
+    """
+    Convierte las plantillas pdf_templates/* en PDF con xhtml2pdf.
+
+    Lo costoso se hace una sola vez por proceso:
+    - cada plantilla se compila en la primera solicitud y se reutiliza;
+    - las fuentes TTF se registran en reportlab al primer render (no con @font-face,
+      que xhtml2pdf volvería a leer del disco en cada documento);
+    - el logo de CompanyData se lee una vez y se pasa como data URI, y solo se vuelve
+      a leer si cambia el registro de la empresa.
+
+    render_chunked genera documentos grandes por bloques de filas: cada bloque se
+    renderiza y convierte por separado y los PDFs se concatenan en un archivo temporal,
+    así nunca existe el HTML completo en memoria.
+    """
+
+    FONT_FAMILY = "ReportSans"
+    FONT_FILES = {
+        "normal": "Vera.ttf",
+        "bold": "VeraBd.ttf",
+        "italic": "VeraIt.ttf",
+        "boldItalic": "VeraBI.ttf",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._fonts_registered = False
+        self._logo_key = None
+        self._logo = None
+
+    # --- Recursos compartidos ---
+
+    def get_template(self, template_name):
+        template = self._templates.get(template_name)
+        if template is None:
+            template = get_template(template_name)
+            self._templates[template_name] = template
+        return template
+
+    def register_fonts(self):
+        if self._fonts_registered:
+            return
+        with self._lock:
+            if self._fonts_registered:
+                return
+            import xhtml2pdf.default
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            from reportlab.lib.fonts import addMapping
+
+            font_dir = getattr(settings, "REPORT_PDF_FONT_DIR", None) or self._default_font_dir()
+            names = {}
+            for style, filename in self.FONT_FILES.items():
+                name = self.FONT_FAMILY if style == "normal" else f"{self.FONT_FAMILY}-{style}"
+                pdfmetrics.registerFont(TTFont(name, os.path.join(font_dir, filename)))
+                names[style] = name
+            pdfmetrics.registerFontFamily(self.FONT_FAMILY, **names)
+            addMapping(self.FONT_FAMILY, 0, 0, names["normal"])
+            addMapping(self.FONT_FAMILY, 1, 0, names["bold"])
+            addMapping(self.FONT_FAMILY, 0, 1, names["italic"])
+            addMapping(self.FONT_FAMILY, 1, 1, names["boldItalic"])
+            # xhtml2pdf resuelve font-family contra este diccionario en cada documento
+            xhtml2pdf.default.DEFAULT_FONT[self.FONT_FAMILY.lower()] = self.FONT_FAMILY
+            self._fonts_registered = True
+
+    def _default_font_dir(self):
+        import reportlab
+        return os.path.join(os.path.dirname(reportlab.__file__), "fonts")
+
+    def get_company(self):
+        """Nombre y logo (data URI) de la empresa, con el logo leído una sola vez."""
+        company = (
+            CompanyData.objects
+            .order_by("id")
+            .values("company_name", "company_logo", "updated_at")
+            .first()
+        )
+        if not company:
+            return {"company_name": "", "company_logo": None}
+
+        key = (company["company_logo"], company["updated_at"])
+        if key != self._logo_key:
+            self._logo = self._load_logo(company["company_logo"])
+            self._logo_key = key
+        return {"company_name": company["company_name"], "company_logo": self._logo}
+
+    def _load_logo(self, logo_name):
+        if not logo_name:
+            return None
+        field = CompanyData._meta.get_field("company_logo")
+        try:
+            with field.storage.open(logo_name, "rb") as logo_file:
+                content = logo_file.read()
+        except (FileNotFoundError, OSError):
+            return None
+        mime = mimetypes.guess_type(logo_name)[0] or "image/png"
+        return f"data:{mime};base64,{base64.b64encode(content).decode('ascii')}"
+
+    # --- Render ---
+
+    def _context(self, context):
+        self.register_fonts()
+        return {
+            "font_family": self.FONT_FAMILY,
+            "company": self.get_company(),
+            "is_first_chunk": True,
+            "is_last_chunk": True,
+            **context,
+        }
+
+    def _html_to_pdf(self, html, dest):
+        from xhtml2pdf import pisa
+
+        status = pisa.CreatePDF(html, dest=dest, encoding="utf-8")
+        if status.err:
+            raise ValueError(f"Error al generar el PDF ({status.err} errores)")
+
+    def render(self, template_name, context):
+        """PDF completo en memoria (BytesIO) para reportes pequeños."""
+        template = self.get_template(template_name)
+        html = template.render(self._context(context))
+        output = io.BytesIO()
+        self._html_to_pdf(html, output)
+        output.seek(0)
+        return output
+
+    def render_chunked(self, template_name, context, rows, rows_key, chunk_size=500):
+        """
+        Renderiza `rows` en bloques de chunk_size filas (la plantilla recibe cada bloque
+        en `rows_key`) y devuelve un archivo temporal con el PDF concatenado.
+        """
+        from PyPDF2 import PdfMerger
+
+        template = self.get_template(template_name)
+        base = self._context(context)
+        merger = PdfMerger()
+        parts = []
+        try:
+            total = len(rows)
+            for start in range(0, max(total, 1), chunk_size):
+                chunk_context = {
+                    **base,
+                    rows_key: rows[start:start + chunk_size],
+                    "is_first_chunk": start == 0,
+                    "is_last_chunk": start + chunk_size >= total,
+                    "row_offset": start,
+                }
+                part = tempfile.TemporaryFile()
+                self._html_to_pdf(template.render(chunk_context), part)
+                part.seek(0)
+                parts.append(part)
+                merger.append(part)
+
+            output = tempfile.TemporaryFile(suffix=".pdf")
+            merger.write(output)
+            output.seek(0)
+            return output
+        finally:
+            merger.close()
+            for part in parts:
+                part.close()
+
+
+pdf_renderer = PDFRenderer()
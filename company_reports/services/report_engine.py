@@ -0,0 +1,295 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Avg, Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, ExtractWeekDay, NullIf, TruncMonth, TruncWeek
+from appointments_status.models.appointment import Appointment
+from appointments_status.models.payment_entry import PaymentEntry
+from appointments_status.models.ticket import Ticket
+
+# Misma numeración que ExtractWeekDay: 1 = domingo ... 7 = sábado
+DIAS_SEMANA = {
+    1: "Domingo",
+    2: "Lunes",
+    3: "Martes",
+    4: "Miercoles",
+    5: "Jueves",
+    6: "Viernes",
+    7: "Sabado"
+}
+
+
+def therapist_label(paternal, maternal, first_name):
+    """Nombre del terapeuta como en el dashboard: "Apellido1 Apellido2, Nombre"."""
+    return f"{paternal or ''} {maternal or ''}, {first_name or ''}"
+
+
+class Dimension:
+    """
+    Columna de agrupación de un reporte.
+    - value: campo o expresión que se agrupa (el valor de la dimensión en cada fila).
+    - fields: campos adicionales que se traen solo para armar la etiqueta.
+    - label: función(valor, campos) -> texto mostrado; por defecto el propio valor.
+    - order: campos adicionales por los que se ordena antes que por el valor.
+    """
+
+    def __init__(self, value, fields=None, label=None, order=()):
+        self.value = value
+        self.fields = fields or {}
+        self.label = label
+        self.order = order
+
+
+class Measure:
+    """Agregado calculado por grupo; quantize redondea a 2 decimales (promedios)."""
+
+    def __init__(self, aggregate, quantize=False):
+        self.aggregate = aggregate
+        self.quantize = quantize
+
+
+def _therapist_dimension(prefix=""):
+    return Dimension(
+        F(f"{prefix}therapist_id"),
+        fields={
+            "paternal": f"{prefix}therapist__last_name_paternal",
+            "maternal": f"{prefix}therapist__last_name_maternal",
+            "first_name": f"{prefix}therapist__first_name",
+        },
+        label=lambda value, f: (
+            therapist_label(f["paternal"], f["maternal"], f["first_name"])
+            if value is not None else "Sin terapeuta asignado"
+        ),
+        order=("paternal", "maternal", "first_name"),
+    )
+
+
+def _patient_dimension(prefix=""):
+    return Dimension(
+        F(f"{prefix}patient_id"),
+        fields={
+            "paternal": f"{prefix}patient__paternal_lastname",
+            "maternal": f"{prefix}patient__maternal_lastname",
+            "name": f"{prefix}patient__name",
+        },
+        label=lambda value, f: " ".join(filter(None, [f["paternal"], f["maternal"], f["name"]])),
+        order=("paternal", "maternal", "name"),
+    )
+
+
+def _date_dimensions(date_field):
+    return {
+        "day": Dimension(F(date_field), label=lambda value, f: value.isoformat() if value else None),
+        # Lunes de la semana
+        "week": Dimension(TruncWeek(date_field), label=lambda value, f: value.isoformat() if value else None),
+        "month": Dimension(TruncMonth(date_field), label=lambda value, f: value.strftime("%Y-%m") if value else None),
+        "weekday": Dimension(
+            ExtractWeekDay(date_field),
+            label=lambda value, f: DIAS_SEMANA.get(value, f"Día {value}"),
+        ),
+    }
+
+
+PAID_TICKET = Q(status="paid")
+
+SOURCES = {
+    # Citas activas del rango, por día local (appointment_local_date, indexado)
+    "appointments": {
+        "model": Appointment,
+        "filter": lambda start, end: Q(appointment_local_date__range=[start, end], deleted_at__isnull=True),
+        "dimensions": {
+            "therapist": _therapist_dimension(),
+            "patient": _patient_dimension(),
+            "payment_type": Dimension(
+                F("payment_type__name"),
+                label=lambda value, f: value or "Sin tipo",
+            ),
+            "room": Dimension(F("room")),
+            "status": Dimension(F("appointment_status")),
+            **_date_dimensions("appointment_local_date"),
+        },
+        "measures": {
+            "sessions": Measure(Count("id")),
+            "patients": Measure(Count("patient", distinct=True)),
+            "revenue": Measure(Sum("payment")),
+            "avg_ticket": Measure(Avg("payment"), quantize=True),
+        },
+    },
+    # Tickets activos del rango, por día local de pago; los importes cuentan solo los pagados
+    "tickets": {
+        "model": Ticket,
+        "filter": lambda start, end: Q(payment_local_date__range=[start, end], is_active=True),
+        "dimensions": {
+            "therapist": _therapist_dimension("appointment__"),
+            "patient": _patient_dimension("appointment__"),
+            "payment_type": Dimension(F("payment_method")),
+            "room": Dimension(F("appointment__room")),
+            "status": Dimension(F("status")),
+            **_date_dimensions("payment_local_date"),
+        },
+        "measures": {
+            "sessions": Measure(Count("id")),
+            "patients": Measure(Count("appointment__patient", distinct=True)),
+            "revenue": Measure(Sum("amount", filter=PAID_TICKET)),
+            "avg_ticket": Measure(Avg("amount", filter=PAID_TICKET), quantize=True),
+        },
+    },
+    # Libro de pagos: saldo por día de caja y método, con las correcciones ya descontadas
+    "payments": {
+        "model": PaymentEntry,
+        "filter": lambda start, end: Q(local_date__range=[start, end]),
+        "dimensions": {
+            # Citas: nombre actual de su tipo de pago; tickets: su método
+            "payment_type": Dimension(
+                Coalesce(F("payment_type__name"), NullIf(F("method"), Value(""))),
+                label=lambda value, f: value or PaymentEntry.NO_METHOD,
+            ),
+            "source": Dimension(F("source")),
+            **_date_dimensions("local_date"),
+        },
+        "measures": {
+            "payments": Measure(Sum("payments")),
+            "revenue": Measure(Sum("amount")),
+        },
+    },
+}
+
+
+class ReportEngine:
+    """
+    Reportes declarativos: un reporte es una lista de dimensiones (therapist, patient,
+    payment_type, room, status, day, week, month, weekday) y de medidas (sessions,
+    patients, revenue, avg_ticket) sobre una fuente (appointments, tickets o el libro de
+    pagos, payments). Se compila a una única consulta agrupada; opcionalmente una
+    dimensión se pivotea a columnas.
+    """
+
+    def dimension_names(self, source="appointments"):
+        return list(self._source(source)["dimensions"])
+
+    def measure_names(self, source="appointments"):
+        return list(self._source(source)["measures"])
+
+    def compile(self, start, end, dimensions=(), measures=("sessions",), source="appointments", filters=None):
+        """
+        QuerySet agrupado (sin ejecutar). Cada fila trae el valor de cada dimensión como
+        "<dimensión>_value" (los nombres simples chocan con campos del modelo), los campos
+        auxiliares como "<dimensión>_<campo>" y las medidas. filters son lookups extra
+        sobre el modelo de la fuente (p. ej. {"source": "appointment"}).
+        """
+        config = self._source(source)
+        dims = self._pick(config["dimensions"], dimensions, "Dimensión")
+        aggregates = {name: measure.aggregate for name, measure in self._pick(config["measures"], measures, "Medida").items()}
+        queryset = self._queryset(config, start, end, filters)
+
+        group = {}
+        ordering = []
+        for name, dim in dims.items():
+            group[f"{name}_value"] = dim.value
+            for field, path in dim.fields.items():
+                group[f"{name}_{field}"] = F(path)
+            ordering.extend(f"{name}_{field}" for field in dim.order)
+            ordering.append(f"{name}_value")
+        return queryset.values(**group).annotate(**aggregates).order_by(*ordering)
+
+    def rows(self, start, end, dimensions=(), measures=("sessions",), source="appointments", filters=None):
+        """
+        Filas del reporte: {dimensión: valor, "<dimensión>_label": etiqueta, medida: valor}.
+        Los importes quedan en Decimal. Sin dimensiones devuelve una sola fila con los totales.
+        """
+        config = self._source(source)
+        dims = self._pick(config["dimensions"], dimensions, "Dimensión")
+        picked = self._pick(config["measures"], measures, "Medida")
+
+        if not dims:
+            totals = (
+                self._queryset(config, start, end, filters)
+                .aggregate(**{name: measure.aggregate for name, measure in picked.items()})
+            )
+            return [self._measures(totals, picked)]
+
+        result = []
+        for row in self.compile(start, end, dimensions, measures, source, filters).iterator(chunk_size=2000):
+            item = {}
+            for name, dim in dims.items():
+                value = row[f"{name}_value"]
+                item[name] = value
+                if dim.label:
+                    fields = {field: row[f"{name}_{field}"] for field in dim.fields}
+                    item[f"{name}_label"] = dim.label(value, fields)
+            item.update(self._measures(row, picked))
+            result.append(item)
+        return result
+
+    def run(self, start, end, dimensions=(), measures=("sessions",), source="appointments", pivot=None):
+        """
+        Reporte completo. Con pivot (una de las dimensiones) las filas se agrupan por el
+        resto de dimensiones y cada valor del pivot pasa a ser una columna:
+        {"columns": [...], "rows": [{dimensiones..., "values": {columna: {medida: valor}}}]}.
+        """
+        dimensions = list(dimensions)
+        measures = list(measures)
+        if pivot is not None and pivot not in dimensions:
+            raise ValueError(f"El pivot '{pivot}' debe ser una de las dimensiones")
+
+        rows = self.rows(start, end, dimensions, measures, source)
+        report = {
+            "source": source,
+            "start_date": start,
+            "end_date": end,
+            "dimensions": dimensions,
+            "measures": measures,
+            "pivot": pivot,
+        }
+        if pivot is None:
+            report["rows"] = rows
+            return report
+
+        row_dimensions = [name for name in dimensions if name != pivot]
+        # Columnas por etiqueta si la dimensión se ordena por nombre (terapeuta, paciente), si no por valor
+        by_label = bool(self._source(source)["dimensions"][pivot].order)
+        columns = {}
+        pivoted = {}
+        for row in rows:
+            column = "" if row.get(f"{pivot}_label", row[pivot]) is None else str(row.get(f"{pivot}_label", row[pivot]))
+            columns.setdefault(column, (row[pivot] is None, column if by_label else row[pivot]))
+            key = tuple(row[name] for name in row_dimensions)
+            if key not in pivoted:
+                pivoted[key] = {}
+                for name in row_dimensions:
+                    pivoted[key][name] = row[name]
+                    if f"{name}_label" in row:
+                        pivoted[key][f"{name}_label"] = row[f"{name}_label"]
+                pivoted[key]["values"] = {}
+            pivoted[key]["values"][column] = {name: row[name] for name in measures}
+
+        report["columns"] = [column for column, _ in sorted(columns.items(), key=lambda item: item[1])]
+        report["rows"] = list(pivoted.values())
+        return report
+
+    @staticmethod
+    def _queryset(config, start, end, filters):
+        queryset = config["model"].objects.filter(config["filter"](start, end))
+        return queryset.filter(**filters) if filters else queryset
+
+    def _source(self, source):
+        if source not in SOURCES:
+            raise ValueError(f"Fuente desconocida: {source}")
+        return SOURCES[source]
+
+    @staticmethod
+    def _pick(available, names, kind):
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            raise ValueError(f"{kind} desconocida: {', '.join(unknown)}")
+        if len(set(names)) != len(names):
+            raise ValueError(f"{kind} repetida en el reporte")
+        return {name: available[name] for name in names}
+
+    @staticmethod
+    def _measures(row, picked):
+        values = {}
+        for name, measure in picked.items():
+            value = row[name]
+            if measure.quantize and value is not None:
+                value = Decimal(value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            values[name] = value
+        return values
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from company_reports.models.report_job import ReportJob
+from company_reports.serialiazers.reports_serializers import DateParameterSerializer
+from company_reports.services.export_services import ExportService
+
+logger = logging.getLogger(__name__)
+
+
+class ReportJobService:
+    """
+    Exportaciones en segundo plano: el cliente envía el reporte y sus parámetros,
+    recibe el id del trabajo y luego consulta su estado o descarga el archivo.
+
+    Dos solicitudes iguales del mismo usuario (mismo reporte y parámetros normalizados)
+    comparten trabajo mientras esté pendiente, en proceso o con un resultado aún vigente.
+    Un trabajo solo es visible para quien lo pidió (for_user).
+    """
+
+    # Parámetros que realmente usa cada reporte (el resto no debe romper la deduplicación)
+    RANGE_REPORTS = {"exportar_excel_citas"}
+
+    def __init__(self):
+        self.result_ttl = getattr(settings, "REPORT_JOB_RESULT_TTL", 60 * 60 * 24)
+        self.stale_after = getattr(settings, "REPORT_JOB_STALE_AFTER", 60 * 60)
+
+    # --- Solicitud ---
+
+    def normalize_params(self, report, data):
+        """Valida los parámetros y devuelve solo los que usa el reporte, como texto ISO."""
+        serializer = DateParameterSerializer(data=data)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        fields = ("start_date", "end_date") if report in self.RANGE_REPORTS else ("date",)
+        params = {
+            field: serializer.validated_data[field].isoformat()
+            for field in fields
+            if serializer.validated_data.get(field)
+        }
+        if report in self.RANGE_REPORTS and len(params) < 2:
+            return None, {"error": "start_date y end_date son requeridos"}
+        return params, None
+
+    def for_user(self, user):
+        """Trabajos que el usuario puede consultar y descargar: los suyos."""
+        return ReportJob.objects.filter(requested_by=user)
+
+    def submit(self, report, data, user):
+        """
+        Crea (o reutiliza) el trabajo de exportación de user y lo encola tras el commit.
+        Devuelve (job, created) o un dict {"error": ...}.
+        """
+        if report not in ExportService.available_reports():
+            return {"error": f"Reporte desconocido: {report}"}
+        params, errors = self.normalize_params(report, data)
+        if errors:
+            return errors
+
+        dedupe_key = self._dedupe_key(report, params, user.pk)
+        for _attempt in range(3):
+            existing = ReportJob.objects.filter(dedupe_key=dedupe_key).first()
+            if existing is not None:
+                if self._is_reusable(existing):
+                    return existing, False
+                # Resultado vencido o trabajo colgado: liberar la clave y crear otro
+                ReportJob.objects.filter(pk=existing.pk, dedupe_key=dedupe_key).update(dedupe_key=None)
+
+            try:
+                with transaction.atomic():
+                    job = ReportJob.objects.create(
+                        report=report, params=params, dedupe_key=dedupe_key, requested_by=user
+                    )
+            except IntegrityError:
+                # Otra solicitud igual creó el trabajo a la vez: reutilizarlo
+                continue
+
+            from company_reports.tasks import generate_report_job
+            transaction.on_commit(lambda: generate_report_job.delay(str(job.pk)))
+            return job, True
+
+        return ReportJob.objects.get(dedupe_key=dedupe_key), False
+
+    def _dedupe_key(self, report, params, user_id):
+        payload = json.dumps({"report": report, "params": params, "user": user_id}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _is_reusable(self, job):
+        now = timezone.now()
+        if job.status == ReportJob.STATUS_DONE:
+            return job.expires_at is not None and job.expires_at > now
+        if job.status in (ReportJob.STATUS_PENDING, ReportJob.STATUS_RUNNING):
+            since = job.started_at or job.created_at
+            return since > now - timedelta(seconds=self.stale_after)
+        return False
+
+    def is_expired(self, job):
+        return job.expires_at is not None and job.expires_at <= timezone.now()
+
+    # --- Ejecución (tarea Celery) ---
+
+    def run(self, job_id):
+        """Genera el archivo del trabajo y lo guarda en REPORT_JOB_ROOT."""
+        now = timezone.now()
+        # Solo un worker toma el trabajo (acks_late puede reentregar la tarea)
+        claimed = ReportJob.objects.filter(pk=job_id, status=ReportJob.STATUS_PENDING).update(
+            status=ReportJob.STATUS_RUNNING, started_at=now
+        )
+        if not claimed:
+            return None
+
+        job = ReportJob.objects.get(pk=job_id)
+        try:
+            serializer = DateParameterSerializer(data=job.params)
+            serializer.is_valid(raise_exception=True)
+            result = ExportService().build(job.report, serializer.validated_data)
+            if isinstance(result, dict):
+                return self._fail(job, result.get("error") or json.dumps(result))
+
+            try:
+                job.file.save(result.filename, File(result.file), save=False)
+            finally:
+                result.file.close()
+        except Exception as e:
+            logger.exception("Error generando el reporte %s (%s)", job.report, job.pk)
+            return self._fail(job, str(e))
+
+        finished = timezone.now()
+        job.filename = result.filename
+        job.content_type = result.content_type
+        job.status = ReportJob.STATUS_DONE
+        job.finished_at = finished
+        job.expires_at = finished + timedelta(seconds=self.result_ttl)
+        job.save(update_fields=["file", "filename", "content_type", "status", "finished_at", "expires_at"])
+        return job
+
+    def _fail(self, job, error):
+        finished = timezone.now()
+        job.status = ReportJob.STATUS_FAILED
+        job.error = error
+        job.finished_at = finished
+        job.expires_at = finished + timedelta(seconds=self.result_ttl)
+        job.dedupe_key = None
+        job.save(update_fields=["status", "error", "finished_at", "expires_at", "dedupe_key"])
+        return job
+
+    # --- Limpieza ---
+
+    def purge_expired(self):
+        """Borra los archivos y trabajos vencidos. Devuelve la cantidad eliminada."""
+        now = timezone.now()
+        purged = 0
+        expired = ReportJob.objects.filter(expires_at__lte=now)
+        for job in expired.iterator(chunk_size=200):
+            if job.file:
+                job.file.delete(save=False)
+            job.delete()
+            purged += 1
+
+        # Trabajos colgados (worker caído): marcarlos fallidos para liberar su clave
+        stale_before = now - timedelta(seconds=self.stale_after)
+        ReportJob.objects.filter(
+            Q(started_at__lt=stale_before) | Q(started_at__isnull=True, created_at__lt=stale_before),
+            status__in=[ReportJob.STATUS_PENDING, ReportJob.STATUS_RUNNING],
+        ).update(
+            status=ReportJob.STATUS_FAILED,
+            error="Tiempo de espera agotado",
+            finished_at=now,
+            expires_at=now + timedelta(seconds=self.result_ttl),
+            dedupe_key=None,
+        )
+        return purged
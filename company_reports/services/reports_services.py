@@ -1,31 +1,51 @@
-from datetime import datetime
+from datetime import timedelta
+from decimal import Decimal
 from django.utils.timezone import localtime
 from django.db.models import Count, Q, CharField, Value, Sum
-from django.db.models.functions import Concat, TruncDate
+from django.db.models.functions import Concat
 from appointments_status.models.appointment import Appointment
 from appointments_status.models.ticket import Ticket
 from therapists.models.therapist import Therapist
+from company_reports.models.daily_rollup import DailyClinicRollup
+from company_reports.services.rollup_services import DailyRollupService, day_range_bounds
 
 
 # from django.db import models  # 👈 no se usa
 
+
+def _days(start, end):
+    """Días de start a end (inclusive), en orden."""
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _person_name(paternal, maternal, name):
+    return f"{paternal or ''} {maternal or ''} {name or ''}".strip()
+
+
 class ReportService:
+    """
+    Reportes diarios. Cada reporte de un día tiene su variante *_by_day(start, end)
+    que calcula todos los días del rango con una sola consulta agrupada por día y
+    devuelve {fecha: reporte del día}, con los días sin datos incluidos (reporte vacío).
+    La versión de un día es la del rango de un solo día.
+    """
+
     def get_appointments_count_by_therapist(self, validated_data):
         """
         Conteo de TODAS las citas por terapeuta para una fecha dada.
         Agrupa desde Appointment para evitar problemas de related_name.
         """
         query_date = validated_data.get("date")
+        return self.get_appointments_count_by_therapist_by_day(query_date, query_date)[query_date]
 
-        # Si appointment_date es DateField, basta con igualdad.
-        # Si es DateTimeField, usamos TruncDate para comparar el día.
-        # Esta versión funciona en ambos casos (TruncDate ⇒ date-only).
+    def get_appointments_count_by_therapist_by_day(self, start, end):
+        """Conteo de citas por terapeuta de cada día del rango (una consulta)."""
+        # appointment_local_date es el día local guardado e indexado
         qs = (
             Appointment.objects
-            .filter(therapist__isnull=False)
-            .annotate(day=TruncDate("appointment_date"))
-            .filter(day=query_date)
+            .filter(appointment_local_date__range=[start, end], therapist__isnull=False)
             .values(
+                "appointment_local_date",
                 "therapist_id",
                 "therapist__first_name",
                 "therapist__last_name_paternal",
@@ -34,99 +54,111 @@ class ReportService:
             .annotate(appointments_count=Count("id"))
         )
 
-        therapists = [
-            {
+        by_day = {day: [] for day in _days(start, end)}
+        for row in qs:
+            by_day[row["appointment_local_date"]].append({
                 "id": row["therapist_id"],
                 "name": f'{row["therapist__first_name"]} {row["therapist__last_name_paternal"] or ""} {row["therapist__last_name_maternal"] or ""}'.strip(),
                 "last_name_paternal": row["therapist__last_name_paternal"],
                 "last_name_maternal": row["therapist__last_name_maternal"],
                 "appointments_count": row["appointments_count"],
-            }
-            for row in qs
-        ]
-
-        # Ordenar por mayor número de citas (como antes)
-        therapists.sort(key=lambda t: (-t["appointments_count"], t["last_name_paternal"] or "", t["last_name_maternal"] or "", t["id"]))
-
-        total_appointments = sum(t["appointments_count"] for t in therapists)
+            })
 
-        return {
-            "therapists_appointments": therapists,
-            "total_appointments_count": total_appointments,
-        }
+        report = {}
+        for day, therapists in by_day.items():
+            # Ordenar por mayor número de citas (como antes)
+            therapists.sort(key=lambda t: (-t["appointments_count"], t["last_name_paternal"] or "", t["last_name_maternal"] or "", t["id"]))
+            report[day] = {
+                "therapists_appointments": therapists,
+                "total_appointments_count": sum(t["appointments_count"] for t in therapists),
+            }
+        return report
 
     def get_patients_by_therapist(self, validated_data):
         """Pacientes agrupados por terapeuta para una fecha dada."""
         query_date = validated_data.get("date")
+        return self.get_patients_by_therapist_by_day(query_date, query_date)[query_date]
 
-        appointments = (
+    def get_patients_by_therapist_by_day(self, start, end):
+        """
+        Pacientes agrupados por terapeuta de cada día del rango. Una consulta que ya
+        cuenta las citas por (día, terapeuta, paciente) y solo trae los nombres.
+        Terapeutas y pacientes van por apellido; "Sin terapeuta asignado" al final.
+        """
+        rows = (
             Appointment.objects
-            .select_related("patient", "therapist")
-            .annotate(day=TruncDate("appointment_date"))
-            .filter(day=query_date)
+            .filter(appointment_local_date__range=[start, end], patient__isnull=False)
+            .values(
+                "appointment_local_date",
+                "therapist_id",
+                "therapist__first_name",
+                "therapist__last_name_paternal",
+                "therapist__last_name_maternal",
+                "patient_id",
+                "patient__name",
+                "patient__paternal_lastname",
+                "patient__maternal_lastname",
+            )
+            .annotate(appointments=Count("id"))
+            .order_by(
+                "appointment_local_date",
+                "therapist__last_name_paternal",
+                "therapist__last_name_maternal",
+                "therapist__first_name",
+                "therapist_id",
+                "patient__paternal_lastname",
+                "patient__maternal_lastname",
+                "patient__name",
+                "patient_id",
+            )
         )
 
-        report = {}
-        sin_terapeuta = {
-            "therapist_id": "",
-            "therapist": "Sin terapeuta asignado",
-            "patients": {}
-        }
-
-        for appointment in appointments:
-            patient = appointment.patient
-            therapist = appointment.therapist
-            if not patient:
-                continue
-
-            patient_data = {
-                "patient_id": patient.id,
-                "patient": f"{patient.paternal_lastname} {patient.maternal_lastname or ''} {patient.name}".strip(),
-                "appointments": 0,
-            }
+        by_day = {day: {} for day in _days(start, end)}
+        for row in rows.iterator(chunk_size=2000):
+            report = by_day[row["appointment_local_date"]]
+            t_id = row["therapist_id"]
+            key = t_id if t_id is not None else "sinTherapist"
+            if key not in report:
+                report[key] = {
+                    "therapist_id": t_id if t_id is not None else "",
+                    # usa first_name (no existe 'name' en el modelo)
+                    "therapist": (
+                        f'{row["therapist__last_name_paternal"]} {row["therapist__last_name_maternal"] or ""} {row["therapist__first_name"]}'.strip()
+                        if t_id is not None else "Sin terapeuta asignado"
+                    ),
+                    "patients": [],
+                }
+            report[key]["patients"].append({
+                "patient_id": row["patient_id"],
+                "patient": f'{row["patient__paternal_lastname"]} {row["patient__maternal_lastname"] or ""} {row["patient__name"]}'.strip(),
+                "appointments": row["appointments"],
+            })
 
-            if not therapist:
-                key = patient.id
-                if key not in sin_terapeuta["patients"]:
-                    sin_terapeuta["patients"][key] = patient_data
-                sin_terapeuta["patients"][key]["appointments"] += 1
-            else:
-                t_id = therapist.id
-                if t_id not in report:
-                    report[t_id] = {
-                        "therapist_id": t_id,
-                        # usa first_name (no existe 'name' en el modelo)
-                        "therapist": f"{therapist.last_name_paternal} {therapist.last_name_maternal or ''} {therapist.first_name}".strip(),
-                        "patients": {}
-                    }
-                key = patient.id
-                if key not in report[t_id]["patients"]:
-                    report[t_id]["patients"][key] = patient_data
-                report[t_id]["patients"][key]["appointments"] += 1
-
-        # Agregar grupo "sin terapeuta" si aplica
-        if sin_terapeuta["patients"]:
-            report["sinTherapist"] = sin_terapeuta
-
-        # Convertir dicts de pacientes a listas
-        for therapist_id in list(report.keys()):
-            report[therapist_id]["patients"] = list(report[therapist_id]["patients"].values())
-
-        return list(report.values())
+        result = {}
+        for day, report in by_day.items():
+            # Agregar grupo "sin terapeuta" al final si aplica
+            sin_terapeuta = report.pop("sinTherapist", None)
+            result[day] = list(report.values()) + ([sin_terapeuta] if sin_terapeuta else [])
+        return result
 
     def get_daily_cash(self, validated_data):
         """Resumen diario de efectivo detallado por cita."""
         query_date = validated_data.get("date")
+        return self.get_daily_cash_by_day(query_date, query_date)[query_date]
 
+    def get_daily_cash_by_day(self, start, end):
+        """Caja detallada por cita de cada día del rango (una consulta)."""
         payments = (
             Appointment.objects
             .filter(
-                appointment_date=query_date,
+                appointment_local_date__range=[start, end],
+                deleted_at__isnull=True,
                 payment__isnull=False,
                 payment_type__isnull=False
             )
             .values(
                 'id',
+                'appointment_local_date',
                 'payment',
                 'payment_type',
                 'payment_type__name'
@@ -134,16 +166,43 @@ class ReportService:
             .order_by('-id')
         )
 
-        result = [
-            {
+        by_day = {day: [] for day in _days(start, end)}
+        for p in payments:
+            by_day[p['appointment_local_date']].append({
                 "id_cita": p['id'],
                 "payment": p['payment'],
                 "payment_type": p['payment_type'],
                 "payment_type_name": p['payment_type__name']
-            }
-            for p in payments
-        ]
-        return result
+            })
+        return by_day
+
+    def get_daily_cash_total(self, validated_data):
+        """
+        Total de caja del día (citas con pago y tipo de pago).
+        Usa el acumulado diario cuando el día está consolidado.
+        """
+        query_date = validated_data.get("date")
+
+        if DailyRollupService().covers(query_date, query_date):
+            total = (
+                DailyClinicRollup.objects
+                .filter(date=query_date, payment_type__isnull=False)
+                .aggregate(total=Sum("revenue"))["total"]
+            )
+        else:
+            desde, hasta = day_range_bounds(query_date, query_date)
+            total = (
+                Appointment.objects
+                .filter(
+                    appointment_date__gte=desde,
+                    appointment_date__lt=hasta,
+                    deleted_at__isnull=True,
+                    payment__isnull=False,
+                    payment_type__isnull=False
+                )
+                .aggregate(total=Sum("payment"))["total"]
+            )
+        return float(total or 0)
 
     def get_improved_daily_cash(self, validated_data):
         """
@@ -151,18 +210,62 @@ class ReportService:
         Incluye resumen por tipo de pago y totales.
         """
         query_date = validated_data.get("date")
+        return self.get_improved_daily_cash_by_day(query_date, query_date)[query_date]
+
+    def get_improved_daily_cash_by_day(self, start, end):
+        """
+        Caja chica mejorada de cada día del rango. El detalle sale de dos flujos de
+        filas (citas y tickets) y el resumen por método y el total se suman sobre esas
+        mismas filas, así que siempre cuadran con el detalle; los importes se suman como
+        Decimal y se convierten a float solo al final.
+        """
+        appointments, tickets = self._improved_cash_querysets(start, end)
+        payments, methods = self._improved_cash_payments(appointments, tickets, start, end)
 
-        # Obtener pagos de citas
+        report = {}
+        for day, day_payments in payments.items():
+            summary = self._method_summary(methods[day], 'cantidad_pagos')
+            report[day] = {
+                "fecha": day.strftime("%Y-%m-%d"),
+                "pagos_detallados": day_payments,
+                "resumen_por_metodo": summary,
+                "total_general": float(sum((total for _count, total in methods[day].values()), Decimal("0"))),
+                "cantidad_total_pagos": len(day_payments)
+            }
+        return report
+
+    def _improved_cash_querysets(self, start, end):
+        """Citas y tickets con pago del rango (base del detalle y de los totales)."""
+        # Mismos criterios con que PaymentLedgerService registra los pagos en el libro
+        appointments = Appointment.objects.filter(
+            appointment_local_date__range=[start, end],
+            deleted_at__isnull=True,
+            payment__isnull=False,
+            payment__gt=0
+        )
+        tickets = Ticket.objects.filter(
+            payment_local_date__range=[start, end],
+            status='paid',
+            is_active=True,
+            amount__gt=0
+        )
+        return appointments, tickets
+
+    def _improved_cash_payments(self, appointments, tickets, start, end):
+        """
+        Detalle de pagos por día (primero los de citas y luego los de tickets, por monto) y
+        {día: {método: (pagos, total)}} sumado sobre ese detalle: los de citas y los de
+        tickets se suman bajo el mismo nombre de método.
+        """
+        payments = {day: [] for day in _days(start, end)}
+        methods = {day: {} for day in _days(start, end)}
+
+        # Pagos de citas
         appointment_payments = (
-            Appointment.objects
-            .filter(
-                appointment_date__date=query_date,
-                payment__isnull=False,
-                payment__gt=0
-            )
-            .select_related('payment_type', 'patient', 'therapist')
+            appointments
             .values(
                 'id',
+                'appointment_local_date',
                 'payment',
                 'payment_type__name',
                 'patient__name',
@@ -175,18 +278,27 @@ class ReportService:
             )
             .order_by('-payment')
         )
+        for payment in appointment_payments.iterator(chunk_size=2000):
+            day = payment['appointment_local_date']
+            metodo = payment['payment_type__name'] or "No especificado"
+            self._add_method(methods[day], metodo, 1, payment['payment'])
+            payments[day].append({
+                "tipo": "Cita",
+                "id": payment['id'],
+                "ticket_number": payment['ticket_number'] or f"CITA-{payment['id']}",
+                "monto": float(payment['payment']),
+                "metodo_pago": metodo,
+                "paciente": _person_name(payment['patient__paternal_lastname'], payment['patient__maternal_lastname'], payment['patient__name']),
+                "terapeuta": _person_name(payment['therapist__last_name_paternal'], payment['therapist__last_name_maternal'], payment['therapist__first_name']),
+                "fecha_pago": day.strftime("%Y-%m-%d")
+            })
 
-        # Obtener pagos de tickets
+        # Pagos de tickets (después de los de citas, como antes)
         ticket_payments = (
-            Ticket.objects
-            .filter(
-                payment_date__date=query_date,
-                status='paid',
-                amount__gt=0
-            )
-            .select_related('appointment__patient', 'appointment__therapist')
+            tickets
             .values(
                 'id',
+                'payment_local_date',
                 'amount',
                 'payment_method',
                 'ticket_number',
@@ -199,74 +311,34 @@ class ReportService:
             )
             .order_by('-amount')
         )
-
-        # Procesar pagos de citas
-        appointment_data = []
-        for payment in appointment_payments:
-            patient_name = f"{payment['patient__paternal_lastname'] or ''} {payment['patient__maternal_lastname'] or ''} {payment['patient__name'] or ''}".strip()
-            therapist_name = f"{payment['therapist__last_name_paternal'] or ''} {payment['therapist__last_name_maternal'] or ''} {payment['therapist__first_name'] or ''}".strip()
-            
-            appointment_data.append({
-                "tipo": "Cita",
-                "id": payment['id'],
-                "ticket_number": payment['ticket_number'] or f"CITA-{payment['id']}",
-                "monto": float(payment['payment']),
-                "metodo_pago": payment['payment_type__name'] or "No especificado",
-                "paciente": patient_name,
-                "terapeuta": therapist_name,
-                "fecha_pago": query_date.strftime("%Y-%m-%d")
-            })
-
-        # Procesar pagos de tickets
-        ticket_data = []
-        for payment in ticket_payments:
-            patient_name = f"{payment['appointment__patient__paternal_lastname'] or ''} {payment['appointment__patient__maternal_lastname'] or ''} {payment['appointment__patient__name'] or ''}".strip()
-            therapist_name = f"{payment['appointment__therapist__last_name_paternal'] or ''} {payment['appointment__therapist__last_name_maternal'] or ''} {payment['appointment__therapist__first_name'] or ''}".strip()
-            
-            ticket_data.append({
+        for payment in ticket_payments.iterator(chunk_size=2000):
+            day = payment['payment_local_date']
+            self._add_method(methods[day], payment['payment_method'], 1, payment['amount'])
+            payments[day].append({
                 "tipo": "Ticket",
                 "id": payment['id'],
                 "ticket_number": payment['ticket_number'],
                 "monto": float(payment['amount']),
                 "metodo_pago": payment['payment_method'],
-                "paciente": patient_name,
-                "terapeuta": therapist_name,
-                "fecha_pago": query_date.strftime("%Y-%m-%d")
+                "paciente": _person_name(payment['appointment__patient__paternal_lastname'], payment['appointment__patient__maternal_lastname'], payment['appointment__patient__name']),
+                "terapeuta": _person_name(payment['appointment__therapist__last_name_paternal'], payment['appointment__therapist__last_name_maternal'], payment['appointment__therapist__first_name']),
+                "fecha_pago": day.strftime("%Y-%m-%d")
             })
-
-        # Combinar todos los pagos
-        all_payments = appointment_data + ticket_data
-        
-        # Calcular totales por método de pago
-        payment_summary = {}
-        total_general = 0
-        
-        for payment in all_payments:
-            metodo = payment['metodo_pago']
-            monto = payment['monto']
-            
-            if metodo not in payment_summary:
-                payment_summary[metodo] = {
-                    'metodo': metodo,
-                    'cantidad_pagos': 0,
-                    'total': 0.0
-                }
-            
-            payment_summary[metodo]['cantidad_pagos'] += 1
-            payment_summary[metodo]['total'] += monto
-            total_general += monto
-
-        # Convertir a lista y ordenar por total
-        payment_summary_list = list(payment_summary.values())
-        payment_summary_list.sort(key=lambda x: x['total'], reverse=True)
-
-        return {
-            "fecha": query_date.strftime("%Y-%m-%d"),
-            "pagos_detallados": all_payments,
-            "resumen_por_metodo": payment_summary_list,
-            "total_general": round(total_general, 2),
-            "cantidad_total_pagos": len(all_payments)
-        }
+        return payments, methods
+
+    @staticmethod
+    def _add_method(methods, metodo, cantidad, total):
+        count, amount = methods.get(metodo, (0, Decimal("0")))
+        methods[metodo] = (count + cantidad, amount + (total or Decimal("0")))
+
+    @staticmethod
+    def _method_summary(methods, count_key):
+        """Resumen por método ordenado por total (mayor primero)."""
+        summary = [
+            {'metodo': metodo, count_key: count, 'total': float(amount)}
+            for metodo, (count, amount) in sorted(methods.items(), key=lambda item: (-item[1][1], item[0]))
+        ]
+        return summary
 
     def get_daily_paid_tickets(self, validated_data):
         """
@@ -274,26 +346,50 @@ class ReportService:
         Incluye información detallada de cada ticket pagado.
         """
         query_date = validated_data.get("date")
+        return self.get_daily_paid_tickets_by_day(query_date, query_date)[query_date]
+
+    def get_daily_paid_tickets_by_day(self, start, end):
+        """
+        Tickets pagados de cada día del rango: un flujo de filas para el detalle, y el
+        resumen por método y el total sumados en Decimal sobre esas mismas filas.
+        """
+        paid = self._paid_tickets_queryset(start, end)
+        tickets_by_day, methods = self._paid_ticket_rows(paid, start, end)
+
+        report = {}
+        for day, tickets_data in tickets_by_day.items():
+            summary = self._method_summary(methods[day], 'cantidad_tickets')
+            report[day] = {
+                "fecha": day.strftime("%Y-%m-%d"),
+                "tickets_pagados": tickets_data,
+                "resumen_por_metodo": summary,
+                "total_general": float(sum((total for _count, total in methods[day].values()), Decimal("0"))),
+                "cantidad_tickets": len(tickets_data),
+                "metodos_pago_utilizados": [item['metodo'] for item in summary]
+            }
+        return report
+
+    def _paid_tickets_queryset(self, start, end):
+        return Ticket.objects.filter(
+            payment_local_date__range=[start, end],
+            status='paid',
+            is_active=True
+        )
 
-        # Obtener tickets pagados del día
+    def _paid_ticket_rows(self, paid, start, end):
+        """
+        Detalle de tickets pagados por día, del pago más reciente al más antiguo, y
+        {día: {método: (tickets, total)}} sumado sobre ese detalle.
+        """
         paid_tickets = (
-            Ticket.objects
-            .filter(
-                payment_date__date=query_date,
-                status='paid',
-                is_active=True
-            )
-            .select_related(
-                'appointment__patient',
-                'appointment__therapist',
-                'appointment__payment_type'
-            )
+            paid
             .values(
                 'id',
                 'ticket_number',
                 'amount',
                 'payment_method',
                 'payment_date',
+                'payment_local_date',
                 'description',
                 'appointment__id',
                 'appointment__appointment_date',
@@ -308,125 +404,108 @@ class ReportService:
                 'appointment__therapist__first_name',
                 'appointment__therapist__last_name_paternal',
                 'appointment__therapist__last_name_maternal',
-                'appointment__therapist__license_number'
             )
             .order_by('-payment_date')
         )
 
         # Procesar tickets pagados
-        tickets_data = []
-        total_amount = 0.0
-        
-        for ticket in paid_tickets:
-            # Formatear nombre del paciente
-            patient_name = f"{ticket['appointment__patient__paternal_lastname'] or ''} {ticket['appointment__patient__maternal_lastname'] or ''} {ticket['appointment__patient__name'] or ''}".strip()
-            
-            # Formatear nombre del terapeuta
-            therapist_name = f"{ticket['appointment__therapist__last_name_paternal'] or ''} {ticket['appointment__therapist__last_name_maternal'] or ''} {ticket['appointment__therapist__first_name'] or ''}".strip()
-            
+        tickets_by_day = {day: [] for day in _days(start, end)}
+        methods = {day: {} for day in _days(start, end)}
+        for ticket in paid_tickets.iterator(chunk_size=2000):
+            self._add_method(methods[ticket['payment_local_date']], ticket['payment_method'], 1, ticket['amount'])
+
             # Formatear fecha y hora de la cita
             appointment_datetime = ticket['appointment__appointment_date']
-            appointment_date = appointment_datetime.strftime("%Y-%m-%d") if appointment_datetime else "No programada"
+            appointment_date = localtime(appointment_datetime).strftime("%Y-%m-%d") if appointment_datetime else "No programada"
             appointment_time = ticket['appointment__hour'].strftime("%H:%M") if ticket['appointment__hour'] else "No especificada"
-            
+
             # Formatear fecha de pago
             payment_datetime = ticket['payment_date']
-            payment_date = payment_datetime.strftime("%Y-%m-%d %H:%M") if payment_datetime else "No especificada"
-            
-            ticket_info = {
+            payment_date = localtime(payment_datetime).strftime("%Y-%m-%d %H:%M") if payment_datetime else "No especificada"
+
+            tickets_by_day[ticket['payment_local_date']].append({
                 "ticket_id": ticket['id'],
                 "numero_ticket": ticket['ticket_number'],
                 "monto": float(ticket['amount']),
                 "metodo_pago": ticket['payment_method'],
                 "fecha_pago": payment_date,
                 "descripcion": ticket['description'] or "Sin descripción",
-                
+
                 # Información de la cita
                 "cita_id": ticket['appointment__id'],
                 "fecha_cita": appointment_date,
                 "hora_cita": appointment_time,
                 "consultorio": ticket['appointment__room'] or "No especificado",
                 "tipo_pago_cita": ticket['appointment__payment_type__name'] or "No especificado",
-                
+
                 # Información del paciente
-                "paciente_nombre": patient_name,
+                "paciente_nombre": _person_name(ticket['appointment__patient__paternal_lastname'], ticket['appointment__patient__maternal_lastname'], ticket['appointment__patient__name']),
                 "paciente_documento": ticket['appointment__patient__document_number'] or "No especificado",
                 "paciente_telefono": ticket['appointment__patient__phone1'] or "No especificado",
-                
+
                 # Información del terapeuta
-                "terapeuta_nombre": therapist_name,
-                "terapeuta_licencia": ticket['appointment__therapist__license_number'] or "No especificado"
-            }
-            
-            tickets_data.append(ticket_info)
-            total_amount += float(ticket['amount'])
-
-        # Calcular resumen por método de pago
-        payment_methods_summary = {}
-        for ticket in tickets_data:
-            metodo = ticket['metodo_pago']
-            monto = ticket['monto']
-            
-            if metodo not in payment_methods_summary:
-                payment_methods_summary[metodo] = {
-                    'metodo': metodo,
-                    'cantidad_tickets': 0,
-                    'total': 0.0
-                }
-            
-            payment_methods_summary[metodo]['cantidad_tickets'] += 1
-            payment_methods_summary[metodo]['total'] += monto
-
-        # Convertir a lista y ordenar por total
-        payment_methods_list = list(payment_methods_summary.values())
-        payment_methods_list.sort(key=lambda x: x['total'], reverse=True)
-
-        return {
-            "fecha": query_date.strftime("%Y-%m-%d"),
-            "tickets_pagados": tickets_data,
-            "resumen_por_metodo": payment_methods_list,
-            "total_general": round(total_amount, 2),
-            "cantidad_tickets": len(tickets_data),
-            "metodos_pago_utilizados": list(payment_methods_summary.keys())
-        }
+                "terapeuta_nombre": _person_name(ticket['appointment__therapist__last_name_paternal'], ticket['appointment__therapist__last_name_maternal'], ticket['appointment__therapist__first_name']),
+                # Therapist no tiene número de licencia registrado
+                "terapeuta_licencia": "No especificado"
+            })
+        return tickets_by_day, methods
 
     def get_appointments_between_dates(self, validated_data):
         """Citas entre dos fechas dadas."""
+        if not validated_data.get("start_date") or not validated_data.get("end_date"):
+            return {"error": "start_date y end_date son requeridos"}
+        return list(self.iter_appointments_between_dates(validated_data))
+
+    def iter_appointments_between_dates(self, validated_data, chunk_size=2000, window_days=31):
+        """
+        Igual que get_appointments_between_dates pero como generador: recorre el rango en
+        ventanas de window_days con .values().iterator(), de modo que la memoria no crece
+        con el tamaño del rango (MySQL carga en memoria cada resultado completo, por eso
+        las ventanas además del iterator).
+        """
         start_date = validated_data.get("start_date")
         end_date = validated_data.get("end_date")
-
-        appointments = (
-            Appointment.objects
-            .select_related("patient", "therapist")
-            .filter(
-                appointment_date__gte=start_date,
-                appointment_date__lte=end_date
+        # Rango semiabierto [inicio de start_date, inicio del día siguiente a end_date)
+        desde, hasta = day_range_bounds(start_date, end_date)
+
+        while desde < hasta:
+            siguiente = min(desde + timedelta(days=window_days), hasta)
+            window = Q(appointment_date__gte=desde, appointment_date__lt=siguiente)
+
+            rows = (
+                Appointment.objects
+                .filter(window, patient__isnull=False)
+                .order_by("appointment_date", "hour")
+                .values(
+                    "id",
+                    "appointment_date",
+                    "hour",
+                    "patient_id",
+                    "patient__document_number",
+                    "patient__name",
+                    "patient__paternal_lastname",
+                    "patient__maternal_lastname",
+                    "patient__phone1",
+                )
+                .iterator(chunk_size=chunk_size)
             )
-            .order_by("appointment_date", "hour")
-        )
-
-        result = []
-        for app in appointments:
-            if not app.patient:
-                continue
-
-            patient_name = " ".join(filter(None, [
-                app.patient.paternal_lastname,
-                app.patient.maternal_lastname,
-                app.patient.name
-            ]))
-
-            hour_val = app.hour
-            hour_str = hour_val if isinstance(hour_val, str) else (hour_val.strftime("%H:%M") if hour_val else "")
-
-            result.append({
-                "appointment_id": app.id,
-                "patient_id": app.patient.id,
-                "document_number_patient": app.patient.document_number,
-                "patient": patient_name,
-                "phone1_patient": app.patient.phone1,
-                "appointment_date": app.appointment_date.strftime("%Y-%m-%d"),
-                "hour": hour_str,
-            })
-
-        return result
+            for app in rows:
+                patient_name = " ".join(filter(None, [
+                    app["patient__paternal_lastname"],
+                    app["patient__maternal_lastname"],
+                    app["patient__name"],
+                ]))
+
+                hour_val = app["hour"]
+                hour_str = hour_val if isinstance(hour_val, str) else (hour_val.strftime("%H:%M") if hour_val else "")
+
+                yield {
+                    "appointment_id": app["id"],
+                    "patient_id": app["patient_id"],
+                    "document_number_patient": app["patient__document_number"],
+                    "patient": patient_name,
+                    "phone1_patient": app["patient__phone1"],
+                    "appointment_date": localtime(app["appointment_date"]).strftime("%Y-%m-%d"),
+                    "hour": hour_str,
+                }
+            desde = siguiente
@@ -0,0 +1,164 @@
+import logging
+from datetime import datetime, time, timedelta
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from appointments_status.models.appointment import Appointment
+from appointments_status.models.ticket import Ticket
+from company_reports.models.daily_rollup import DailyClinicRollup, DailyClinicRollupDay
+
+logger = logging.getLogger(__name__)
+
+# Campos de la cita y del ticket que alimentan el acumulado (las señales no recalculan
+# el día si un guardado no toca ninguno)
+APPOINTMENT_ROLLUP_FIELDS = (
+    'patient', 'therapist', 'appointment_date', 'payment', 'payment_type', 'appointment_status', 'deleted_at',
+)
+TICKET_ROLLUP_FIELDS = ('appointment', 'status', 'amount', 'is_active')
+
+
+def day_range_bounds(start, end):
+    """
+    Devuelve (desde, hasta) como datetimes aware que cubren los días completos
+    de start a end: desde <= appointment_date < hasta.
+    """
+    desde = timezone.make_aware(datetime.combine(start, time.min))
+    hasta = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    return desde, hasta
+
+
+class DailyRollupService:
+    """Mantiene y consulta el acumulado diario de citas (DailyClinicRollup)."""
+
+    def covers(self, start, end):
+        """Indica si todos los días del rango ya están consolidados."""
+        expected_days = (end - start).days + 1
+        if expected_days <= 0:
+            return False
+        consolidated = DailyClinicRollupDay.objects.filter(date__range=[start, end]).count()
+        return consolidated == expected_days
+
+    def get_rows(self, start, end):
+        """Filas del acumulado para el rango, con los nombres necesarios para los reportes."""
+        return (
+            DailyClinicRollup.objects
+            .filter(date__range=[start, end])
+            .values(
+                "date",
+                "therapist_id",
+                "therapist__first_name",
+                "therapist__last_name_paternal",
+                "therapist__last_name_maternal",
+                "payment_type_id",
+                "payment_type__name",
+                "status",
+                "sessions",
+                "distinct_patients",
+                "revenue",
+                "paid_tickets_amount",
+            )
+        )
+
+    def refresh_days(self, dates):
+        """
+        Recalcula el acumulado de cada día indicado (usado desde las señales).
+
+        Si un día falla se borra su marca de consolidado: covers() deja de incluirlo y
+        los reportes vuelven a la consulta directa hasta la próxima reconstrucción.
+        """
+        for day in sorted({d for d in dates if d is not None}):
+            try:
+                self.rebuild(day, day)
+            except Exception:
+                logger.exception("No se pudo recalcular el acumulado del %s", day)
+                DailyClinicRollupDay.objects.filter(date=day).delete()
+
+    @transaction.atomic
+    def rebuild(self, start, end):
+        """
+        Reconstruye el acumulado entre start y end (inclusive) con una consulta agrupada
+        sobre citas y otra sobre tickets pagados. Devuelve el número de filas generadas.
+
+        Antes de leer se bloquean las marcas de los días (select_for_update): dos
+        recálculos del mismo día se ejecutan uno tras otro y el segundo lee lo que
+        confirmó el primero, en vez de que el que termine último deje datos viejos.
+        """
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        DailyClinicRollupDay.objects.bulk_create(
+            [DailyClinicRollupDay(date=day) for day in days], batch_size=500, ignore_conflicts=True
+        )
+        list(
+            DailyClinicRollupDay.objects.select_for_update()
+            .filter(date__range=[start, end])
+            .order_by("date")
+            .values_list("pk", flat=True)
+        )
+
+        # Se agrupa por el día local guardado en la cita (appointment_local_date)
+        active_appointments = Q(
+            appointment_local_date__range=[start, end],
+            deleted_at__isnull=True,
+        )
+
+        groups = (
+            Appointment.objects
+            .filter(active_appointments)
+            .annotate(day=F("appointment_local_date"))
+            .values("day", "therapist_id", "payment_type_id", "appointment_status")
+            .annotate(
+                sessions=Count("id"),
+                distinct_patients=Count("patient", distinct=True),
+                revenue=Sum("payment"),
+            )
+            .order_by()
+        )
+
+        paid_tickets = (
+            Ticket.objects
+            .filter(
+                status='paid',
+                is_active=True,
+                appointment__appointment_local_date__range=[start, end],
+                appointment__deleted_at__isnull=True,
+            )
+            .annotate(day=F("appointment__appointment_local_date"))
+            .values(
+                "day",
+                "appointment__therapist_id",
+                "appointment__payment_type_id",
+                "appointment__appointment_status",
+            )
+            .annotate(total=Sum("amount"))
+            .order_by()
+        )
+        paid_by_key = {
+            (
+                row["day"],
+                row["appointment__therapist_id"],
+                row["appointment__payment_type_id"],
+                row["appointment__appointment_status"],
+            ): row["total"]
+            for row in paid_tickets
+        }
+
+        rows = [
+            DailyClinicRollup(
+                date=group["day"],
+                therapist_id=group["therapist_id"],
+                payment_type_id=group["payment_type_id"],
+                status=group["appointment_status"],
+                sessions=group["sessions"],
+                distinct_patients=group["distinct_patients"],
+                revenue=group["revenue"],
+                paid_tickets_amount=paid_by_key.get(
+                    (group["day"], group["therapist_id"], group["payment_type_id"], group["appointment_status"])
+                ) or 0,
+            )
+            for group in groups
+        ]
+
+        DailyClinicRollup.objects.filter(date__range=[start, end]).delete()
+        DailyClinicRollup.objects.bulk_create(rows, batch_size=500)
+
+        DailyClinicRollupDay.objects.filter(date__range=[start, end]).update(refreshed_at=timezone.now())
+        return len(rows)
@@ -1,53 +1,67 @@
-from django.db.models import Count, Sum, Avg, Q, Case, When, F, Value
-from django.db.models.functions import ExtractWeekDay, Concat
-from appointments_status.models.appointment import Appointment
+from company_reports.services.report_engine import DIAS_SEMANA, ReportEngine, therapist_label
+from company_reports.services.rollup_services import DailyRollupService
+from appointments_status.models.payment_entry import PaymentEntry
 
 class StatisticsService:
+    """
+    Bloques del dashboard, cada uno expresado como un reporte de ReportEngine.
+    Los ingresos totales y por día de la semana salen del libro de pagos (citas).
+    """
+
+    DIAS_SEMANA = DIAS_SEMANA
+    LIBRO_CITAS = {"source": PaymentEntry.SOURCE_APPOINTMENT}
+
+    def __init__(self):
+        self.engine = ReportEngine()
+
+    def _nombre_dia(self, dia):
+        return self.DIAS_SEMANA.get(dia, f"Día {dia}")
+
     def get_metricas_principales(self, start, end):
-        return Appointment.objects.filter(
-            appointment_date__range=[start, end]
-        ).aggregate(
-            ttlpacientes=Count("patient", distinct=True),
-            ttlsesiones=Count("id"),
-            ttlganancias=Sum("payment")
-        )
+        fila = self.engine.rows(start, end, measures=["patients", "sessions"])[0]
+        return {
+            "ttlpacientes": fila["patients"],
+            "ttlsesiones": fila["sessions"],
+            "ttlganancias": self._ganancias_del_libro(start, end),
+        }
+
+    def _ganancias_del_libro(self, start, end):
+        return self.engine.rows(start, end, measures=["revenue"], source="payments", filters=self.LIBRO_CITAS)[0]["revenue"]
+
+    def _ingresos_del_libro(self, start, end, sesiones):
+        """
+        Ingresos por día de la semana según el libro; los días con sesiones pero sin
+        pagos quedan en 0.0, como cuando se sumaba el pago de las citas.
+        """
+        ingresos = {dia: 0.0 for dia in sesiones}
+        filas = self.engine.rows(start, end, ["weekday"], ["revenue"], source="payments", filters=self.LIBRO_CITAS)
+        for f in filas:
+            ingresos[f["weekday_label"]] = float(f["revenue"]) if f["revenue"] else 0.0
+        orden = {nombre: dia for dia, nombre in self.DIAS_SEMANA.items()}
+        return dict(sorted(ingresos.items(), key=lambda item: orden.get(item[0], 8)))
 
     def get_tipos_de_pago(self, start, end):
-        pagos = (
-            Appointment.objects
-            .filter(
-                appointment_date__range=[start, end]
-            )
-            .values("payment_type__name")
-            .annotate(usos=Count("id"))
-        )
-        return {(p["payment_type__name"] or "Sin tipo"): p["usos"] for p in pagos}
+        filas = self.engine.rows(start, end, ["payment_type"], ["sessions"])
+        return {f["payment_type_label"]: f["sessions"] for f in filas}
 
     def get_rendimiento_terapeutas(self, start, end):
-        # 1. Consulta base: sesiones e ingresos por terapeuta 
-        stats = list(
-            Appointment.objects
-            .filter(
-                appointment_date__range=[start, end]
-            )
-            .values("therapist__id")
-            .annotate(
-                # Formato de nombre  "Apellido1 Apellido2, Nombre"
-                terapeuta=Concat(
-                    'therapist__last_name_paternal',
-                    Value(' '),
-                    'therapist__last_name_maternal', 
-                    Value(', '),
-                    'therapist__name'
-                ),
-                sesiones=Count("id"),
-                ingresos=Sum("payment")
-            )
-        )
-        
+        # Sesiones e ingresos por terapeuta; nombre "Apellido1 Apellido2, Nombre"
+        stats = [
+            {
+                "therapist__id": f["therapist"],
+                "terapeuta": f["therapist_label"],
+                "sesiones": f["sessions"],
+                "ingresos": f["revenue"],
+            }
+            for f in self.engine.rows(start, end, ["therapist"], ["sessions", "revenue"])
+        ]
+        return self._calcular_rendimiento(stats)
+
+    def _calcular_rendimiento(self, stats):
+        """Calcula el raiting (escala de 5) a partir de sesiones e ingresos por terapeuta."""
         if not stats:
             return []
-        
+
         # 2. Calculamos promedios globales
         total_sesiones = sum(s['sesiones'] for s in stats)
         total_ingresos = sum(float(s['ingresos'] or 0) for s in stats)  
@@ -84,74 +98,145 @@ class StatisticsService:
         return resultado
 
     def get_ingresos_por_dia_semana(self, start, end):
-        
-        dias_semana = {
-            1: "Domingo",       
-            2: "Lunes",      
-            3: "Martes",     
-            4: "Miercoles",   
-            5: "Jueves",    
-            6: "Viernes",      
-            7: "Sabado"     
-        }
-        
-        ingresos_raw = (
-            Appointment.objects
-            .filter(
-                appointment_date__range=[start, end]
-            )
-            .annotate(dia_semana=ExtractWeekDay("appointment_date"))
-            .values("dia_semana")
-            .annotate(total=Sum("payment"))  
-            .order_by("dia_semana")
-        )
-        
-        
-        resultado = {}
-        for item in ingresos_raw:
-            dia_nombre = dias_semana.get(item["dia_semana"], f"Día {item['dia_semana']}")
-            resultado[dia_nombre] = float(item["total"]) if item["total"] else 0.0
-        
-        return resultado
+        return self._ingresos_del_libro(start, end, self.get_sesiones_por_dia_semana(start, end))
 
     def get_sesiones_por_dia_semana(self, start, end):
-        dias_semana = {
-            1: "Domingo", 2: "Lunes", 3: "Martes", 4: "Miercoles",
-            5: "Jueves", 6: "Viernes", 7: "Sabado"
-        }
-        
-        sesiones_raw = (
-            Appointment.objects
-            .filter(
-                appointment_date__range=[start, end]
-            )
-            .annotate(dia_semana=ExtractWeekDay("appointment_date"))
-            .values("dia_semana")
-            .annotate(sesiones=Count("id"))
-            .order_by("dia_semana")
-        )
-        
-        resultado = {}
-        for item in sesiones_raw:
-            dia_nombre = dias_semana.get(item["dia_semana"], f"Día {item['dia_semana']}")
-            resultado[dia_nombre] = item["sesiones"]
-        
-        return resultado
+        filas = self.engine.rows(start, end, ["weekday"], ["sessions"])
+        return {f["weekday_label"]: f["sessions"] for f in filas}
 
     def get_tipos_pacientes(self, start, end):
-        return Appointment.objects.filter(
-            appointment_date__range=[start, end]
-        ).aggregate(
-            c=Count("id", filter=Q(appointment_status__iexact="C")),
-            cc=Count("id", filter=Q(appointment_status__iexact="CC"))
-        )
+        tipos = {"c": 0, "cc": 0}
+        for f in self.engine.rows(start, end, ["status"], ["sessions"]):
+            estado = (f["status"] or "").lower()
+            if estado in tipos:
+                tipos[estado] += f["sessions"]
+        return tipos
 
     def get_statistics(self, start, end):
+        """
+        Calcula todos los bloques del dashboard con una sola lectura agrupada del rango
+        (terapeuta x tipo de pago x día de la semana x estado), plegada en memoria. Esa
+        lectura sale de DailyClinicRollup si el acumulado diario cubre el rango y si no de
+        Appointment. Aparte van el conteo de pacientes distintos (no se puede sumar entre
+        grupos) y los ingresos del libro de pagos. Devuelve el mismo payload que los
+        métodos get_* individuales.
+        """
+        rollup_service = DailyRollupService()
+        if rollup_service.covers(start, end):
+            filas = self._filas_del_acumulado(start, end, rollup_service)
+        else:
+            filas = self._get_filas_agrupadas(start, end)
+        pacientes = self.engine.rows(start, end, measures=["patients"])[0]["patients"]
+        resultado = self._plegar_filas(filas, pacientes)
+
+        # Ingresos del libro de pagos (el rendimiento por terapeuta sigue sumando el pago de sus citas)
+        resultado["metricas"]["ttlganancias"] = self._ganancias_del_libro(start, end)
+        resultado["ingresos"] = self._ingresos_del_libro(start, end, resultado["sesiones"])
+        return resultado
+
+    def _filas_del_acumulado(self, start, end, rollup_service):
+        """Filas del acumulado con la misma forma que las de ReportEngine."""
+        return (
+            {
+                "therapist": fila["therapist_id"],
+                "therapist_label": (
+                    therapist_label(
+                        fila["therapist__last_name_paternal"],
+                        fila["therapist__last_name_maternal"],
+                        fila["therapist__first_name"],
+                    )
+                    if fila["therapist_id"] is not None else "Sin terapeuta asignado"
+                ),
+                "payment_type_label": fila["payment_type__name"] or "Sin tipo",
+                # Misma numeración que ExtractWeekDay: 1 = domingo ... 7 = sábado
+                "weekday": fila["date"].isoweekday() % 7 + 1,
+                "status": fila["status"],
+                "sessions": fila["sessions"],
+                "revenue": fila["revenue"],
+            }
+            for fila in rollup_service.get_rows(start, end)
+        )
+
+    def _plegar_filas(self, filas, pacientes):
+        """Pliega en memoria filas agrupadas (sesiones/ingresos) en los seis bloques del dashboard."""
+        ttlsesiones = 0
+        ttlganancias = None
+        tipos_pago = {}
+        terapeutas = {}
+        ingresos_dia = {}
+        sesiones_dia = {}
+        tipos_pacientes = {"c": 0, "cc": 0}
+
+        for fila in filas:
+            sesiones = fila["sessions"]
+            ingresos = fila["revenue"]
+
+            # Métricas principales
+            ttlsesiones += sesiones
+            if ingresos is not None:
+                ttlganancias = ingresos if ttlganancias is None else ttlganancias + ingresos
+
+            # Tipos de pago
+            tipo = fila["payment_type_label"]
+            tipos_pago[tipo] = tipos_pago.get(tipo, 0) + sesiones
+
+            # Rendimiento de terapeutas
+            t_id = fila["therapist"]
+            if t_id not in terapeutas:
+                terapeutas[t_id] = {
+                    "therapist__id": t_id,
+                    "terapeuta": fila["therapist_label"],
+                    "sesiones": 0,
+                    "ingresos": None,
+                }
+            terapeuta = terapeutas[t_id]
+            terapeuta["sesiones"] += sesiones
+            if ingresos is not None:
+                terapeuta["ingresos"] = ingresos if terapeuta["ingresos"] is None else terapeuta["ingresos"] + ingresos
+
+            # Ingresos y sesiones por día de la semana
+            dia = fila["weekday"]
+            if ingresos is not None:
+                ingresos_dia[dia] = ingresos if ingresos_dia.get(dia) is None else ingresos_dia[dia] + ingresos
+            else:
+                ingresos_dia.setdefault(dia, None)
+            sesiones_dia[dia] = sesiones_dia.get(dia, 0) + sesiones
+
+            # Tipos de pacientes
+            estado = (fila["status"] or "").upper()
+            if estado == "C":
+                tipos_pacientes["c"] += sesiones
+            elif estado == "CC":
+                tipos_pacientes["cc"] += sesiones
+
         return {
-            "terapeutas": self.get_rendimiento_terapeutas(start, end),
-            "tipos_pago": self.get_tipos_de_pago(start, end),
-            "metricas": self.get_metricas_principales(start, end),
-            "ingresos": self.get_ingresos_por_dia_semana(start, end),
-            "sesiones": self.get_sesiones_por_dia_semana(start, end),
-            "tipos_pacientes": self.get_tipos_pacientes(start, end),
-        }
\ No newline at end of file
+            "terapeutas": self._calcular_rendimiento(list(terapeutas.values())),
+            "tipos_pago": tipos_pago,
+            "metricas": {
+                "ttlpacientes": pacientes,
+                "ttlsesiones": ttlsesiones,
+                "ttlganancias": ttlganancias,
+            },
+            "ingresos": {
+                self._nombre_dia(dia): float(total) if total else 0.0
+                for dia, total in sorted(ingresos_dia.items())
+            },
+            "sesiones": {
+                self._nombre_dia(dia): total
+                for dia, total in sorted(sesiones_dia.items())
+            },
+            "tipos_pacientes": tipos_pacientes,
+        }
+
+    def _get_filas_agrupadas(self, start, end):
+        """
+        Única consulta agrupada sobre las citas del rango: terapeuta x tipo de pago x día
+        de la semana x estado. El número de filas depende de esas combinaciones, no del
+        número de citas ni de pacientes.
+        """
+        return self.engine.rows(
+            start,
+            end,
+            ["therapist", "payment_type", "weekday", "status"],
+            ["sessions", "revenue"],
+        )
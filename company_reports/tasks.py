@@ -0,0 +1,15 @@
+from celery import shared_task
+from company_reports.services.report_job_services import ReportJobService
+
+
+@shared_task
+def generate_report_job(job_id):
+    """Genera el archivo de un ReportJob (cola 'reports', ver settings/celery.py)."""
+    job = ReportJobService().run(job_id)
+    return job.status if job else None
+
+
+@shared_task
+def purge_expired_report_jobs():
+    """Borra los archivos de exportaciones vencidas y libera trabajos colgados."""
+    return ReportJobService().purge_expired()
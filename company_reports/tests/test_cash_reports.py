@@ -0,0 +1,50 @@
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from appointments_status.models import Appointment, Ticket
+from appointments_status.tests.factories import create_location, create_patients, create_therapists
+from company_reports.services.reports_services import ReportService
+from histories_configurations.models import PaymentType
+
+
+class ImprovedDailyCashTests(TestCase):
+    """El resumen por método y el total de la caja mejorada cuadran con su detalle."""
+
+    @classmethod
+    def setUpTestData(cls):
+        location = create_location("Caja")
+        cls.patient = create_patients(location, 1)[0]
+        cls.therapist = create_therapists(location, 1)[0]
+        cls.payment_type = PaymentType.objects.create(name="Yape")
+        cls.start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=2)
+        cls.day = cls.start.date()
+
+    def _create(self, hour, payment):
+        return Appointment.objects.create(
+            patient=self.patient, therapist=self.therapist, payment_type=self.payment_type,
+            appointment_date=self.start, hour=time(hour, 0), payment=payment,
+        )
+
+    def test_totals_sum_the_returned_rows(self):
+        self._create(9, Decimal("80.10"))
+        appointment = self._create(10, Decimal("35.35"))
+        # Cambio sin señales: el libro de pagos queda atrasado hasta la conciliación
+        Appointment.objects.filter(pk=appointment.pk).update(payment=Decimal("50.00"))
+        Ticket.objects.filter(appointment=appointment).update(
+            status="paid", amount=Decimal("20.00"), payment_method="efectivo",
+            payment_date=self.start, payment_local_date=self.day,
+        )
+
+        report = ReportService().get_improved_daily_cash({"date": self.day})
+
+        rows = report["pagos_detallados"]
+        self.assertEqual(report["total_general"], round(sum(row["monto"] for row in rows), 2))
+        self.assertEqual(report["total_general"], 150.10)
+        self.assertEqual(
+            {item["metodo"]: (item["cantidad_pagos"], item["total"]) for item in report["resumen_por_metodo"]},
+            {"Yape": (2, 130.10), "efectivo": (1, 20.00)},
+        )
+        self.assertEqual(report["cantidad_total_pagos"], 3)
@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from company_reports.models.report_job import ReportJob
+from company_reports.services.report_job_services import ReportJobService
+from company_reports.views.report_jobs_views import ReportJobDetailView, ReportJobDownloadView
+
+
+def create_user(index):
+    return get_user_model().objects.create_user(
+        email=f"reportes{index}@example.com", user_name=f"reportes{index}", document_number=f"7{index:07d}",
+        name="Usuario", paternal_lastname="Paterno", maternal_lastname="Materno",
+    )
+
+
+class ReportJobAccessTests(TestCase):
+    """Los archivos de exportaciones no se sirven como media y solo los descarga quien los pidió."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = create_user(1)
+        cls.other = create_user(2)
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings_override = override_settings(REPORT_JOB_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = root
+
+        self.job = ReportJob.objects.create(
+            report="exportar_excel_citas", params={}, requested_by=self.owner, status=ReportJob.STATUS_DONE,
+            filename="citas_2025-01-01_a_2025-01-31.xlsx", content_type="application/octet-stream",
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.job.file.save(self.job.filename, ContentFile(b"contenido"), save=True)
+
+    def _get(self, view_class, user):
+        request = APIRequestFactory().get("/")
+        force_authenticate(request, user=user)
+        return view_class.as_view()(request, job_id=self.job.pk)
+
+    def test_file_is_stored_outside_media_with_a_random_name(self):
+        path = self.job.file.path
+        self.assertTrue(path.startswith(self.root))
+        self.assertFalse(path.startswith(str(settings.MEDIA_ROOT)))
+        self.assertNotIn("citas", self.job.file.name)
+        self.assertTrue(self.job.file.name.endswith(".xlsx"))
+
+    def test_owner_downloads_the_file(self):
+        response = self._get(ReportJobDownloadView, self.owner)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"contenido")
+        self.assertIn("citas_2025-01-01_a_2025-01-31.xlsx", response["Content-Disposition"])
+
+    def test_other_users_cannot_see_or_download_the_job(self):
+        self.assertEqual(self._get(ReportJobDetailView, self.other).status_code, 404)
+        self.assertEqual(self._get(ReportJobDownloadView, self.other).status_code, 404)
+
+    def test_same_request_from_another_user_creates_its_own_job(self):
+        service = ReportJobService()
+        data = {"start_date": "2025-01-01", "end_date": "2025-01-31"}
+        with self.captureOnCommitCallbacks(execute=False):
+            first, created = service.submit("exportar_excel_citas", data, self.owner)
+            again, created_again = service.submit("exportar_excel_citas", data, self.owner)
+            other, created_other = service.submit("exportar_excel_citas", data, self.other)
+
+        self.assertTrue(created)
+        self.assertEqual((again.pk, created_again), (first.pk, False))
+        self.assertTrue(created_other)
+        self.assertEqual(other.requested_by, self.other)
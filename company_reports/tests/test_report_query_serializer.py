@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.test import SimpleTestCase, override_settings
+
+from company_reports.serialiazers.reports_serializers import ReportQuerySerializer
+
+
+@override_settings(REPORT_RANGE_MAX_DAYS=92, REPORT_QUERY_MAX_BUCKETS=24)
+class ReportQuerySerializerTests(SimpleTestCase):
+    """El reporte genérico limita los periodos de su agrupación, no los días del rango."""
+
+    def _validate(self, start, end, dimensions):
+        serializer = ReportQuerySerializer(data={"start_date": start, "end_date": end, "dimensions": dimensions})
+        return serializer.is_valid(), serializer.errors
+
+    def test_monthly_report_of_a_year(self):
+        self.assertEqual(self._validate("2025-01-01", "2025-12-31", "therapist,month"), (True, {}))
+
+    def test_weekly_report_beyond_the_day_cap(self):
+        # 20 semanas de lunes a domingo, más de 92 días
+        self.assertTrue(self._validate("2025-01-06", "2025-05-25", "week")[0])
+
+    def test_too_many_weeks(self):
+        valid, errors = self._validate("2025-01-01", "2025-12-31", "week")
+        self.assertFalse(valid)
+        self.assertIn("24 semanas", str(errors))
+
+    def test_day_grouping_counts_days(self):
+        valid, errors = self._validate("2025-01-01", "2025-01-31", "day,month")
+        self.assertFalse(valid)
+        self.assertIn("24 días", str(errors))
+
+    def test_without_time_dimension_counts_months(self):
+        self.assertTrue(self._validate("2024-01-01", "2025-12-31", "therapist")[0])
+        self.assertFalse(self._validate("2024-01-01", "2026-01-01", "therapist")[0])
+
+    def test_bucket_count(self):
+        self.assertEqual(ReportQuerySerializer.bucket_count(date(2025, 1, 5), date(2025, 1, 6), "week"), 2)
+        self.assertEqual(ReportQuerySerializer.bucket_count(date(2024, 12, 31), date(2025, 1, 1), "month"), 2)
+        self.assertEqual(ReportQuerySerializer.bucket_count(date(2025, 1, 1), date(2025, 1, 1), "day"), 1)
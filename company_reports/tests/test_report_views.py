@@ -0,0 +1,78 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from company_reports.views import reports_views
+
+
+class ReportErrorResponseTests(SimpleTestCase):
+    """Un error inesperado se registra con su traceback y al cliente solo le llega un 500 genérico."""
+
+    def assertGenericError(self, view, api_method):
+        request = RequestFactory().get("/", {"start_date": "2025-01-01", "end_date": "2025-01-02"})
+        failure = RuntimeError("detalle interno")
+        with mock.patch.object(reports_views.report_api, api_method, side_effect=failure), \
+                self.assertLogs(reports_views.logger, "ERROR") as logs:
+            response = view(request)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(json.loads(response.content), {"error": "Error interno del servidor"})
+        self.assertIn("detalle interno", "\n".join(logs.output))
+
+    def test_single_day_reports(self):
+        for name in (
+            "get_number_appointments_per_therapist",
+            "get_patients_by_therapist",
+            "get_daily_cash",
+            "get_improved_daily_cash",
+            "get_daily_paid_tickets",
+            "get_appointments_between_dates",
+        ):
+            with self.subTest(name):
+                self.assertGenericError(getattr(reports_views, name), name)
+
+    def test_by_day_reports(self):
+        for name in (
+            "get_number_appointments_per_therapist_by_day",
+            "get_patients_by_therapist_by_day",
+            "get_daily_cash_by_day",
+            "get_improved_daily_cash_by_day",
+            "get_daily_paid_tickets_by_day",
+        ):
+            with self.subTest(name):
+                self.assertGenericError(getattr(reports_views, name), name)
+
+    def test_report_query(self):
+        self.assertGenericError(reports_views.get_report_query, "get_report_query")
+
+
+class ReportCacheStatsAccessTests(TestCase):
+    """Las estadísticas de la caché de reportes solo las ve el staff."""
+
+    def _get(self, user=None):
+        request = APIRequestFactory().get("/")
+        if user is not None:
+            force_authenticate(request, user=user)
+        return reports_views.get_cache_stats(request)
+
+    def _user(self, **extra):
+        return get_user_model().objects.create_user(
+            email="cache@example.com", user_name="cache", document_number="71234567",
+            name="Usuario", paternal_lastname="Paterno", maternal_lastname="Materno", **extra,
+        )
+
+    def test_anonymous_is_rejected(self):
+        self.assertIn(self._get().status_code, (401, 403))
+
+    def test_regular_user_is_forbidden(self):
+        self.assertEqual(self._get(self._user()).status_code, 403)
+
+    def test_staff_sees_the_stats(self):
+        with mock.patch.object(reports_views.report_cache, "get_stats", return_value={"reports": {}}):
+            response = self._get(self._user(is_staff=True))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"reports": {}})
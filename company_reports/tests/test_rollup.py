@@ -0,0 +1,79 @@
+from datetime import time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from appointments_status.models import Appointment
+from appointments_status.tests.factories import create_location, create_patients, create_therapists
+from company_reports.models.daily_rollup import DailyClinicRollup, DailyClinicRollupDay
+from company_reports.services import rollup_services
+from company_reports.services.cache_services import ReportCacheService
+from company_reports.services.rollup_services import DailyRollupService
+
+
+class DailyRollupRefreshTests(TestCase):
+    """Qué guardados recalculan el acumulado y qué pasa si el recálculo falla."""
+
+    @classmethod
+    def setUpTestData(cls):
+        location = create_location("Rollup")
+        cls.patient = create_patients(location, 1)[0]
+        cls.therapist = create_therapists(location, 1)[0]
+        cls.start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=5)
+        cls.day = cls.start.date()
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment = Appointment.objects.create(
+                patient=self.patient, therapist=self.therapist,
+                appointment_date=self.start, hour=time(10, 0), payment=Decimal("80.00"),
+            )
+        self.appointment = Appointment.objects.get(pk=self.appointment.pk)
+
+    def _save_and_watch(self, **changes):
+        for name, value in changes.items():
+            setattr(self.appointment, name, value)
+        with mock.patch.object(DailyRollupService, "refresh_days") as refresh, \
+                mock.patch.object(ReportCacheService, "invalidate_days") as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.appointment.save()
+        return refresh, invalidate
+
+    def test_new_appointment_is_consolidated(self):
+        self.assertTrue(DailyRollupService().covers(self.day, self.day))
+        row = DailyClinicRollup.objects.get(date=self.day)
+        self.assertEqual((row.sessions, row.revenue), (1, Decimal("80.00")))
+
+    def test_non_report_fields_do_not_refresh(self):
+        refresh, invalidate = self._save_and_watch(observation="Control")
+
+        refresh.assert_not_called()
+        invalidate.assert_not_called()
+
+    def test_report_only_fields_invalidate_the_cache(self):
+        refresh, invalidate = self._save_and_watch(room=2)
+
+        refresh.assert_not_called()
+        invalidate.assert_called_once_with({self.day})
+
+    def test_payment_change_refreshes_the_day(self):
+        refresh, invalidate = self._save_and_watch(payment=Decimal("95.00"))
+
+        refresh.assert_called_once_with({self.day})
+        invalidate.assert_called_with({self.day})
+
+    def test_rebuild_keeps_a_single_marker(self):
+        DailyRollupService().rebuild(self.day, self.day)
+
+        self.assertEqual(DailyClinicRollupDay.objects.filter(date=self.day).count(), 1)
+
+    def test_failed_refresh_drops_the_marker(self):
+        service = DailyRollupService()
+        with mock.patch.object(DailyRollupService, "rebuild", side_effect=RuntimeError("bloqueo")), \
+                self.assertLogs(rollup_services.logger, "ERROR"):
+            service.refresh_days([self.day])
+
+        # Sin marca, los reportes del día vuelven a la consulta directa
+        self.assertFalse(service.covers(self.day, self.day))
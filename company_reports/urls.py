@@ -4,6 +4,7 @@ from company_reports.views.statistics_views import StatisticsViewSet, dashboard_
 from company_reports.views.company_views import CompanyDataViewSet
 #from company_reports.views.emails_views import dashboard_email, SendVerifyCodeAPIView, VerifyCodeAPIView
 from company_reports.views import reports_views as views
+from company_reports.views.report_jobs_views import ReportJobCreateView, ReportJobDetailView, ReportJobDownloadView
 from django.conf.urls.static import static
 from django.conf import settings
 
@@ -25,7 +26,16 @@ reports_urlpatterns = [
     path('reports/daily-cash/', views.get_daily_cash, name='daily_cash'),
     path('reports/improved-daily-cash/', views.get_improved_daily_cash, name='improved_daily_cash'),
     path('reports/daily-paid-tickets/', views.get_daily_paid_tickets, name='daily_paid_tickets'),
+    # Variantes por día (start_date/end_date): todos los días del rango en una respuesta
+    path('reports/appointments-per-therapist/by-day/', views.get_number_appointments_per_therapist_by_day, name='appointments_per_therapist_by_day'),
+    path('reports/patients-by-therapist/by-day/', views.get_patients_by_therapist_by_day, name='patients_by_therapist_by_day'),
+    path('reports/daily-cash/by-day/', views.get_daily_cash_by_day, name='daily_cash_by_day'),
+    path('reports/improved-daily-cash/by-day/', views.get_improved_daily_cash_by_day, name='improved_daily_cash_by_day'),
+    path('reports/daily-paid-tickets/by-day/', views.get_daily_paid_tickets_by_day, name='daily_paid_tickets_by_day'),
     path('reports/appointments-between-dates/', views.get_appointments_between_dates, name='appointments_between_dates'),
+    # Reporte genérico: dimensiones x medidas (ReportEngine)
+    path('reports/query/', views.get_report_query, name='report_query'),
+    path('reports/cache-stats/', views.get_cache_stats, name='reports_cache_stats'),
 ]
 
 export_urlpatterns = [
@@ -37,6 +47,10 @@ export_urlpatterns = [
     path('exports/excel/citas-rango/', views.exportar_excel_citas, name='exportar_excel_citas'),
     path('exports/excel/caja-chica-mejorada/', views.exportar_excel_caja_chica_mejorada, name='exportar_excel_caja_chica_mejorada'),
     path('exports/excel/tickets-pagados/', views.exportar_excel_tickets_pagados, name='exportar_excel_tickets_pagados'),
+    # Exportaciones en segundo plano (cola 'reports')
+    path('exports/jobs/', ReportJobCreateView.as_view(), name='report_job_create'),
+    path('exports/jobs/<uuid:job_id>/', ReportJobDetailView.as_view(), name='report_job_detail'),
+    path('exports/jobs/<uuid:job_id>/download/', ReportJobDownloadView.as_view(), name='report_job_download'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 '''
 views_urlpatterns = [
@@ -0,0 +1,75 @@
+from django.http import FileResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from company_reports.models.report_job import ReportJob
+from company_reports.serialiazers.report_job_serializers import ReportJobSerializer
+from company_reports.services.report_job_services import ReportJobService
+
+
+class ReportJobCreateView(APIView):
+    """
+    Encola una exportación en segundo plano.
+    POST {"report": "exportar_excel_citas", "start_date": "...", "end_date": "..."}
+    (los parámetros también pueden ir dentro de "params").
+    """
+
+    def post(self, request):
+        report = request.data.get("report")
+        if not report:
+            return Response({"error": "El campo report es requerido"}, status=status.HTTP_400_BAD_REQUEST)
+
+        params = request.data.get("params")
+        if not isinstance(params, dict):
+            params = {k: v for k, v in request.data.items() if k not in ("report", "params")}
+
+        result = ReportJobService().submit(report, params, request.user)
+        if isinstance(result, dict):
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+
+        job, created = result
+        job.refresh_from_db()  # con CELERY_TASK_ALWAYS_EAGER ya pudo haber terminado
+        serializer = ReportJobSerializer(job, context={"request": request})
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
+
+class ReportJobDetailView(APIView):
+    """Consulta el estado de un trabajo de exportación propio."""
+
+    def get(self, request, job_id):
+        try:
+            job = ReportJobService().for_user(request.user).get(pk=job_id)
+        except ReportJob.DoesNotExist:
+            return Response({"error": "Trabajo no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ReportJobSerializer(job, context={"request": request}).data)
+
+
+class ReportJobDownloadView(APIView):
+    """
+    Descarga el archivo de un trabajo terminado y propio: es el único camino a los
+    archivos de exportaciones (REPORT_JOB_ROOT no se sirve como media).
+    """
+
+    def get(self, request, job_id):
+        try:
+            job = ReportJobService().for_user(request.user).get(pk=job_id)
+        except ReportJob.DoesNotExist:
+            return Response({"error": "Trabajo no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+
+        if ReportJobService().is_expired(job) and job.status == ReportJob.STATUS_DONE:
+            return Response({"error": "El archivo ya expiró"}, status=status.HTTP_410_GONE)
+        if job.status != ReportJob.STATUS_DONE or not job.file:
+            return Response(
+                {"error": "El archivo aún no está listo", "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=job.filename,
+            content_type=job.content_type or None,
+        )
@@ -1,23 +1,34 @@
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, FileResponse
 from company_reports.services.reports_services import ReportService
+from company_reports.services.report_engine import ReportEngine
+from company_reports.services.cache_services import ReportCacheService
+from company_reports.services.export_services import ExportService
 from company_reports.serialiazers.reports_serializers import (
     DateParameterSerializer,
+    DateRangeParameterSerializer,
     TherapistAppointmentSerializer,
     PatientByTherapistSerializer,
     DailyCashSerializer,
     AppointmentRangeSerializer,
-    PDFContextSerializer,
     ImprovedDailyCashSerializer,
     DailyPaidTicketsSerializer,
+    ReportQuerySerializer,
 )
 from django.shortcuts import render
-# from django_xhtml2pdf.utils import pdf_decorator
 from django.views.decorators.csrf import csrf_exempt
-import xlsxwriter
-import io
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 import json
+import logging
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
 
 report_service = ReportService()
+report_engine = ReportEngine()
+report_cache = ReportCacheService()
+export_service = ExportService(report_service)
 
 
 # --------- Helpers ---------
@@ -48,6 +59,78 @@ def _merge_params(request):
     return merged
 
 
+def _cached_json(endpoint, validated_data, compute, range_fields=("date", "date"), key_fields=()):
+    """
+    Responde desde la caché de reportes (ver ReportCacheService).
+    - range_fields indica qué parámetros validados delimitan los días que cubre el reporte.
+    - key_fields son otros parámetros que cambian la respuesta y forman parte de la clave.
+    - compute() devuelve (payload, status); solo se cachean las respuestas 200.
+    """
+    start = validated_data.get(range_fields[0])
+    end = validated_data.get(range_fields[1])
+    if start is None or end is None:
+        payload, status = compute()
+    else:
+        params = {field: validated_data.get(field) for field in {*range_fields, *key_fields}}
+        payload, status = report_cache.get_or_compute(endpoint, params, start, end, compute)
+    return JsonResponse(payload, status=status, safe=False)
+
+
+def _by_day_json(request, endpoint, compute_days, serialize_day):
+    """
+    Variante por día de un reporte diario: valida start_date/end_date, calcula todos
+    los días con compute_days(start, end) -> {fecha: datos} y responde
+    {"start_date", "end_date", "days": {"YYYY-MM-DD": reporte del día}} con todos los
+    días del rango (los días sin datos llevan el reporte vacío).
+    """
+    serializer = DateRangeParameterSerializer(data=_merge_params(request))
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    start = serializer.validated_data["start_date"]
+    end = serializer.validated_data["end_date"]
+
+    def compute():
+        days = compute_days(start, end)
+        return {
+            "start_date": str(start),
+            "end_date": str(end),
+            "days": {str(day): serialize_day(day, data) for day, data in days.items()},
+        }, 200
+
+    return _cached_json(endpoint, serializer.validated_data, compute, range_fields=("start_date", "end_date"))
+
+
+def _therapist_appointments_payload(day, data):
+    """Reporte de citas por terapeuta de un día (con porcentaje)."""
+    response_serializer = TherapistAppointmentSerializer(
+        data["therapists_appointments"],
+        many=True,
+        context={"total_appointments": data["total_appointments_count"]},
+    )
+    return {
+        "date": str(day),
+        "therapists_appointments": response_serializer.data,
+        "total_appointments_count": data["total_appointments_count"],
+    }
+
+
+def _decimals_to_float(value):
+    """Importes del motor de reportes (Decimal) como números JSON, igual que los demás reportes."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {key: _decimals_to_float(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decimals_to_float(item) for item in value]
+    return value
+
+
+def _server_error(endpoint):
+    """Registra la excepción en curso y responde un 500 sin detalles internos."""
+    logger.exception("Error en %s", endpoint)
+    return JsonResponse({"error": "Error interno del servidor"}, status=500)
+
+
 # ===========================
 #   JSON API
 # ===========================
@@ -67,24 +150,28 @@ class ReportAPIView:
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=400)
 
-        # Obtener datos usando parámetros validados
-        data = report_service.get_appointments_count_by_therapist(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
+        def compute():
+            # Obtener datos usando parámetros validados
+            data = report_service.get_appointments_count_by_therapist(serializer.validated_data)
+            if isinstance(data, dict) and "error" in data:
+                return data, 400
 
-        # Serializar respuesta (con porcentaje)
-        response_serializer = TherapistAppointmentSerializer(
-            data["therapists_appointments"],
-            many=True,
-            context={"total_appointments": data["total_appointments_count"]},
-        )
+            # Serializar respuesta (con porcentaje)
+            return _therapist_appointments_payload(serializer.validated_data.get("date"), data), 200
+
+        return _cached_json("appointments_per_therapist", serializer.validated_data, compute)
 
-        return JsonResponse(
-            {
-                "date": str(serializer.validated_data.get("date")),
-                "therapists_appointments": response_serializer.data,
-                "total_appointments_count": data["total_appointments_count"],
-            }
+    @staticmethod
+    def get_number_appointments_per_therapist_by_day(request):
+        """
+        Citas por terapeuta de cada día entre start_date y end_date (una consulta).
+        GET /...?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+        """
+        return _by_day_json(
+            request,
+            "appointments_per_therapist_by_day",
+            report_service.get_appointments_count_by_therapist_by_day,
+            _therapist_appointments_payload,
         )
 
     @staticmethod
@@ -95,12 +182,23 @@ class ReportAPIView:
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=400)
 
-        data = report_service.get_patients_by_therapist(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
+        def compute():
+            data = report_service.get_patients_by_therapist(serializer.validated_data)
+            if isinstance(data, dict) and "error" in data:
+                return data, 400
+            return PatientByTherapistSerializer(data, many=True).data, 200
 
-        response_serializer = PatientByTherapistSerializer(data, many=True)
-        return JsonResponse(response_serializer.data, safe=False)
+        return _cached_json("patients_by_therapist", serializer.validated_data, compute)
+
+    @staticmethod
+    def get_patients_by_therapist_by_day(request):
+        """Pacientes por terapeuta de cada día entre start_date y end_date."""
+        return _by_day_json(
+            request,
+            "patients_by_therapist_by_day",
+            report_service.get_patients_by_therapist_by_day,
+            lambda day, data: PatientByTherapistSerializer(data, many=True).data,
+        )
 
     @staticmethod
     def get_daily_cash(request):
@@ -110,12 +208,23 @@ class ReportAPIView:
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=400)
 
-        data = report_service.get_daily_cash(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
+        def compute():
+            data = report_service.get_daily_cash(serializer.validated_data)
+            if isinstance(data, dict) and "error" in data:
+                return data, 400
+            return DailyCashSerializer(data, many=True).data, 200
 
-        response_serializer = DailyCashSerializer(data, many=True)
-        return JsonResponse(response_serializer.data, safe=False)
+        return _cached_json("daily_cash", serializer.validated_data, compute)
+
+    @staticmethod
+    def get_daily_cash_by_day(request):
+        """Caja detallada por cita de cada día entre start_date y end_date."""
+        return _by_day_json(
+            request,
+            "daily_cash_by_day",
+            report_service.get_daily_cash_by_day,
+            lambda day, data: DailyCashSerializer(data, many=True).data,
+        )
 
     @staticmethod
     def get_improved_daily_cash(request):
@@ -125,12 +234,23 @@ class ReportAPIView:
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=400)
 
-        data = report_service.get_improved_daily_cash(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
+        def compute():
+            data = report_service.get_improved_daily_cash(serializer.validated_data)
+            if isinstance(data, dict) and "error" in data:
+                return data, 400
+            return ImprovedDailyCashSerializer(data).data, 200
+
+        return _cached_json("improved_daily_cash", serializer.validated_data, compute)
 
-        response_serializer = ImprovedDailyCashSerializer(data)
-        return JsonResponse(response_serializer.data, safe=False)
+    @staticmethod
+    def get_improved_daily_cash_by_day(request):
+        """Caja chica mejorada de cada día entre start_date y end_date."""
+        return _by_day_json(
+            request,
+            "improved_daily_cash_by_day",
+            report_service.get_improved_daily_cash_by_day,
+            lambda day, data: ImprovedDailyCashSerializer(data).data,
+        )
 
     @staticmethod
     def get_daily_paid_tickets(request):
@@ -140,12 +260,23 @@ class ReportAPIView:
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=400)
 
-        data = report_service.get_daily_paid_tickets(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
+        def compute():
+            data = report_service.get_daily_paid_tickets(serializer.validated_data)
+            if isinstance(data, dict) and "error" in data:
+                return data, 400
+            return DailyPaidTicketsSerializer(data).data, 200
 
-        response_serializer = DailyPaidTicketsSerializer(data)
-        return JsonResponse(response_serializer.data, safe=False)
+        return _cached_json("daily_paid_tickets", serializer.validated_data, compute)
+
+    @staticmethod
+    def get_daily_paid_tickets_by_day(request):
+        """Tickets pagados de cada día entre start_date y end_date."""
+        return _by_day_json(
+            request,
+            "daily_paid_tickets_by_day",
+            report_service.get_daily_paid_tickets_by_day,
+            lambda day, data: DailyPaidTicketsSerializer(data).data,
+        )
 
     @staticmethod
     def get_appointments_between_dates(request):
@@ -155,369 +286,135 @@ class ReportAPIView:
         if not serializer.is_valid():
             return JsonResponse(serializer.errors, status=400)
 
-        data = report_service.get_appointments_between_dates(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
+        def compute():
+            data = report_service.get_appointments_between_dates(serializer.validated_data)
+            if isinstance(data, dict) and "error" in data:
+                return data, 400
+            return AppointmentRangeSerializer(data, many=True).data, 200
+
+        return _cached_json(
+            "appointments_between_dates",
+            serializer.validated_data,
+            compute,
+            range_fields=("start_date", "end_date"),
+        )
 
-        response_serializer = AppointmentRangeSerializer(data, many=True)
-        return JsonResponse(response_serializer.data, safe=False)
+    @staticmethod
+    def get_report_query(request):
+        """
+        Reporte genérico de ReportEngine: una consulta agrupada por las dimensiones pedidas.
+        GET /...?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&dimensions=therapist,week
+                &measures=sessions,revenue[&pivot=week][&source=appointments|tickets|payments]
+        """
+        serializer = ReportQuerySerializer(data=_merge_params(request))
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+        params = serializer.validated_data
+
+        def compute():
+            report = report_engine.run(
+                params["start_date"],
+                params["end_date"],
+                params["dimensions"],
+                params["measures"],
+                source=params["source"],
+                pivot=params["pivot"],
+            )
+            return _decimals_to_float(report), 200
+
+        return _cached_json(
+            "report_query",
+            params,
+            compute,
+            range_fields=("start_date", "end_date"),
+            key_fields=("source", "dimensions", "measures", "pivot"),
+        )
 
 
 # ===========================
 #   PDF
 # ===========================
+def _pdf_response(request, report):
+    """Genera el PDF del reporte con ExportService y lo muestra en el navegador."""
+    data_in = _merge_params(request)
+    serializer = DateParameterSerializer(data=data_in)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    result = export_service.build(report, serializer.validated_data)
+    if isinstance(result, dict):
+        return JsonResponse(result, status=400)
+
+    return FileResponse(
+        result.file,
+        as_attachment=result.as_attachment,
+        filename=result.filename,
+        content_type=result.content_type,
+    )
+
+
 class PDFExportView:
     """Responsable exclusivamente de la generación de PDFs."""
 
     @staticmethod
-    # @pdf_decorator(pdfname="citas_terapeuta.pdf")
     def pdf_citas_terapeuta(request):
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_appointments_count_by_therapist(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
-
-        context_data = {
-            "date": serializer.validated_data.get("date"),
-            "data": data,
-            "title": "Citas por Terapeuta",
-        }
-        context_serializer = PDFContextSerializer(context_data)
-        context = context_serializer.data
-        return render(request, "pdf_templates/citas_terapeuta.html", context)
+        return _pdf_response(request, "pdf_citas_terapeuta")
 
     @staticmethod
-    # @pdf_decorator(pdfname="pacientes_por_terapeuta.pdf")
     def pdf_pacientes_terapeuta(request):
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_patients_by_therapist(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
-
-        context_data = {
-            "date": serializer.validated_data.get("date"),
-            "data": data,
-            "title": "Pacientes por Terapeuta",
-        }
-        context_serializer = PDFContextSerializer(context_data)
-        context = context_serializer.data
-        return render(request, "pdf_templates/pacientes_terapeuta.html", context)
+        return _pdf_response(request, "pdf_pacientes_terapeuta")
 
     @staticmethod
-    # @pdf_decorator(pdfname="resumen_caja.pdf")
     def pdf_resumen_caja(request):
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_daily_cash(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
-
-        # Calcular total correcto (sumando 'payment')
-        total = sum(float(item.get("payment", 0) or 0) for item in data) if data else 0.0
-
-        context_data = {
-            "date": serializer.validated_data.get("date"),
-            "data": data,
-            "total": total,
-            "title": "Resumen de Caja Diaria",
-        }
-        context_serializer = PDFContextSerializer(context_data)
-        context = context_serializer.data
-        return render(request, "pdf_templates/resumen_caja.html", context)
+        return _pdf_response(request, "pdf_resumen_caja")
 
     @staticmethod
-    # @pdf_decorator(pdfname="caja_chica_mejorada.pdf")
     def pdf_caja_chica_mejorada(request):
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_improved_daily_cash(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
-
-        context_data = {
-            "date": serializer.validated_data.get("date"),
-            "data": data,
-            "title": "Reporte Mejorado de Caja Chica",
-        }
-        context_serializer = PDFContextSerializer(context_data)
-        context = context_serializer.data
-        return render(request, "pdf_templates/caja_chica_mejorada.html", context)
+        return _pdf_response(request, "pdf_caja_chica_mejorada")
 
     @staticmethod
-    # @pdf_decorator(pdfname="tickets_pagados.pdf")
     def pdf_tickets_pagados(request):
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_daily_paid_tickets(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
-
-        context_data = {
-            "date": serializer.validated_data.get("date"),
-            "data": data,
-            "title": "Reporte Diario de Tickets Pagados",
-        }
-        context_serializer = PDFContextSerializer(context_data)
-        context = context_serializer.data
-        return render(request, "pdf_templates/tickets_pagados.html", context)
+        return _pdf_response(request, "pdf_tickets_pagados")
 
 
 # ===========================
 #   Excel
 # ===========================
-class ExcelExportView:
-    """Responsable exclusivamente de la exportación a Excel."""
+def _excel_response(request, report):
+    """Genera el Excel con ExportService y lo envía como adjunto."""
+    data_in = _merge_params(request)
+    serializer = DateParameterSerializer(data=data_in)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
 
-    @staticmethod
-    def exportar_excel_citas(request):
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_appointments_between_dates(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
+    result = export_service.build(report, serializer.validated_data)
+    if isinstance(result, dict):
+        return JsonResponse(result, status=400)
 
-        # Crear archivo Excel
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
-        worksheet = workbook.add_worksheet("Citas")
+    return FileResponse(
+        result.file,
+        as_attachment=True,
+        filename=result.filename,
+        content_type=result.content_type,
+    )
 
-        # Formato encabezado
-        header_format = workbook.add_format(
-            {"bold": True, "bg_color": "#2c3e50", "font_color": "white", "border": 1}
-        )
 
-        # Encabezados alineados con AppointmentRangeSerializer
-        headers = [
-            "ID Paciente",
-            "DNI/Documento",
-            "Paciente",
-            "Teléfono",
-            "Fecha",
-            "Hora",
-        ]
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header, header_format)
-
-        # Escribir datos
-        for row, appointment in enumerate(data, start=1):
-            worksheet.write(row, 0, appointment.get("patient_id", ""))
-            worksheet.write(row, 1, appointment.get("document_number_patient", ""))
-            worksheet.write(row, 2, appointment.get("patient", ""))
-            worksheet.write(row, 3, appointment.get("phone1_patient", ""))
-            worksheet.write(row, 4, appointment.get("appointment_date", ""))
-            worksheet.write(row, 5, appointment.get("hour", ""))
-
-        # Anchos de columna
-        worksheet.set_column("A:A", 12)
-        worksheet.set_column("B:B", 15)
-        worksheet.set_column("C:C", 40)
-        worksheet.set_column("D:D", 15)
-        worksheet.set_column("E:E", 12)
-        worksheet.set_column("F:F", 10)
-
-        workbook.close()
-        output.seek(0)
-
-        # Nombre de archivo (si hay rango en query)
-        start_date = serializer.validated_data.get("start_date")
-        end_date = serializer.validated_data.get("end_date")
-        if start_date and end_date:
-            filename = f"citas_{start_date}_a_{end_date}.xlsx"
-        else:
-            filename = "citas.xlsx"
+class ExcelExportView:
+    """Responsable exclusivamente de la exportación a Excel."""
 
-        response = HttpResponse(
-            output.read(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-        response["Content-Disposition"] = f"attachment; filename={filename}"
-        return response
+    @staticmethod
+    def exportar_excel_citas(request):
+        return _excel_response(request, "exportar_excel_citas")
 
     @staticmethod
     def exportar_excel_caja_chica_mejorada(request):
         """Exporta a Excel el reporte mejorado de caja chica."""
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_improved_daily_cash(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
-
-        # Crear archivo Excel
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
-        worksheet = workbook.add_worksheet("Caja Chica")
-
-        # Formato encabezado
-        header_format = workbook.add_format(
-            {"bold": True, "bg_color": "#2c3e50", "font_color": "white", "border": 1}
-        )
-
-        # Encabezados para el reporte de caja chica
-        headers = [
-            "Tipo",
-            "ID",
-            "Número Ticket",
-            "Monto",
-            "Método Pago",
-            "Paciente",
-            "Terapeuta",
-            "Fecha Pago",
-        ]
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header, header_format)
-
-        # Escribir datos
-        for row, payment in enumerate(data.get("pagos_detallados", []), start=1):
-            worksheet.write(row, 0, payment.get("tipo", ""))
-            worksheet.write(row, 1, payment.get("id", ""))
-            worksheet.write(row, 2, payment.get("ticket_number", ""))
-            worksheet.write(row, 3, payment.get("monto", 0))
-            worksheet.write(row, 4, payment.get("metodo_pago", ""))
-            worksheet.write(row, 5, payment.get("paciente", ""))
-            worksheet.write(row, 6, payment.get("terapeuta", ""))
-            worksheet.write(row, 7, payment.get("fecha_pago", ""))
-
-        # Anchos de columna
-        worksheet.set_column("A:A", 10)
-        worksheet.set_column("B:B", 8)
-        worksheet.set_column("C:C", 20)
-        worksheet.set_column("D:D", 12)
-        worksheet.set_column("E:E", 15)
-        worksheet.set_column("F:F", 30)
-        worksheet.set_column("G:G", 30)
-        worksheet.set_column("H:H", 12)
-
-        # Agregar resumen
-        worksheet.write(len(data.get("pagos_detallados", [])) + 3, 0, "RESUMEN:", header_format)
-        worksheet.write(len(data.get("pagos_detallados", [])) + 4, 0, "Total General:")
-        worksheet.write(len(data.get("pagos_detallados", [])) + 4, 3, data.get("total_general", 0))
-
-        workbook.close()
-        output.seek(0)
-
-        # Nombre de archivo
-        date = serializer.validated_data.get("date")
-        filename = f"caja_chica_mejorada_{date}.xlsx"
-
-        response = HttpResponse(
-            output.read(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-        response["Content-Disposition"] = f"attachment; filename={filename}"
-        return response
+        return _excel_response(request, "exportar_excel_caja_chica_mejorada")
 
     @staticmethod
     def exportar_excel_tickets_pagados(request):
         """Exporta a Excel el reporte diario de tickets pagados."""
-        data_in = _merge_params(request)
-        serializer = DateParameterSerializer(data=data_in)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-
-        data = report_service.get_daily_paid_tickets(serializer.validated_data)
-        if isinstance(data, dict) and "error" in data:
-            return JsonResponse(data, status=400)
-
-        # Crear archivo Excel
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
-        worksheet = workbook.add_worksheet("Tickets Pagados")
-
-        # Formato encabezado
-        header_format = workbook.add_format(
-            {"bold": True, "bg_color": "#2c3e50", "font_color": "white", "border": 1}
-        )
-
-        # Encabezados para el reporte de tickets pagados
-        headers = [
-            "Número Ticket",
-            "Monto",
-            "Método Pago",
-            "Fecha Pago",
-            "Paciente",
-            "Documento",
-            "Teléfono",
-            "Terapeuta",
-            "Licencia",
-            "Fecha Cita",
-            "Hora Cita",
-            "Consultorio",
-        ]
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header, header_format)
-
-        # Escribir datos
-        for row, ticket in enumerate(data.get("tickets_pagados", []), start=1):
-            worksheet.write(row, 0, ticket.get("numero_ticket", ""))
-            worksheet.write(row, 1, ticket.get("monto", 0))
-            worksheet.write(row, 2, ticket.get("metodo_pago", ""))
-            worksheet.write(row, 3, ticket.get("fecha_pago", ""))
-            worksheet.write(row, 4, ticket.get("paciente_nombre", ""))
-            worksheet.write(row, 5, ticket.get("paciente_documento", ""))
-            worksheet.write(row, 6, ticket.get("paciente_telefono", ""))
-            worksheet.write(row, 7, ticket.get("terapeuta_nombre", ""))
-            worksheet.write(row, 8, ticket.get("terapeuta_licencia", ""))
-            worksheet.write(row, 9, ticket.get("fecha_cita", ""))
-            worksheet.write(row, 10, ticket.get("hora_cita", ""))
-            worksheet.write(row, 11, ticket.get("consultorio", ""))
-
-        # Anchos de columna
-        worksheet.set_column("A:A", 20)  # Número Ticket
-        worksheet.set_column("B:B", 12)  # Monto
-        worksheet.set_column("C:C", 15)  # Método Pago
-        worksheet.set_column("D:D", 18)  # Fecha Pago
-        worksheet.set_column("E:E", 30)  # Paciente
-        worksheet.set_column("F:F", 15)  # Documento
-        worksheet.set_column("G:G", 15)  # Teléfono
-        worksheet.set_column("H:H", 30)  # Terapeuta
-        worksheet.set_column("I:I", 15)  # Licencia
-        worksheet.set_column("J:J", 12)  # Fecha Cita
-        worksheet.set_column("K:K", 10)  # Hora Cita
-        worksheet.set_column("L:L", 12)  # Consultorio
-
-        # Agregar resumen
-        worksheet.write(len(data.get("tickets_pagados", [])) + 3, 0, "RESUMEN:", header_format)
-        worksheet.write(len(data.get("tickets_pagados", [])) + 4, 0, "Total General:")
-        worksheet.write(len(data.get("tickets_pagados", [])) + 4, 1, data.get("total_general", 0))
-        worksheet.write(len(data.get("tickets_pagados", [])) + 5, 0, "Cantidad Tickets:")
-        worksheet.write(len(data.get("tickets_pagados", [])) + 5, 1, data.get("cantidad_tickets", 0))
-
-        workbook.close()
-        output.seek(0)
-
-        # Nombre de archivo
-        date = serializer.validated_data.get("date")
-        filename = f"tickets_pagados_{date}.xlsx"
-
-        response = HttpResponse(
-            output.read(),
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-        response["Content-Disposition"] = f"attachment; filename={filename}"
-        return response
+        return _excel_response(request, "exportar_excel_tickets_pagados")
 
 
 # ===========================
@@ -532,90 +429,108 @@ excel_export = ExcelExportView()
 def get_number_appointments_per_therapist(request):
     try:
         return report_api.get_number_appointments_per_therapist(request)
-    except Exception as e:
-        import traceback
-
-        print(f"Error en get_number_appointments_per_therapist: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return JsonResponse(
-            {"error": f"Error interno del servidor: {str(e)}", "traceback": traceback.format_exc()},
-            status=500,
-        )
+    except Exception:
+        return _server_error("get_number_appointments_per_therapist")
 
 
 @csrf_exempt
 def get_patients_by_therapist(request):
     try:
         return report_api.get_patients_by_therapist(request)
-    except Exception as e:
-        import traceback
-
-        print(f"Error en get_patients_by_therapist: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return JsonResponse(
-            {"error": f"Error interno del servidor: {str(e)}", "traceback": traceback.format_exc()},
-            status=500,
-        )
+    except Exception:
+        return _server_error("get_patients_by_therapist")
 
 
 @csrf_exempt
 def get_daily_cash(request):
     try:
         return report_api.get_daily_cash(request)
-    except Exception as e:
-        import traceback
-
-        print(f"Error en get_daily_cash: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return JsonResponse(
-            {"error": f"Error interno del servidor: {str(e)}", "traceback": traceback.format_exc()},
-            status=500,
-        )
+    except Exception:
+        return _server_error("get_daily_cash")
 
 
 @csrf_exempt
 def get_improved_daily_cash(request):
     try:
         return report_api.get_improved_daily_cash(request)
-    except Exception as e:
-        import traceback
-
-        print(f"Error en get_improved_daily_cash: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return JsonResponse(
-            {"error": f"Error interno del servidor: {str(e)}", "traceback": traceback.format_exc()},
-            status=500,
-        )
+    except Exception:
+        return _server_error("get_improved_daily_cash")
 
 
 @csrf_exempt
 def get_daily_paid_tickets(request):
     try:
         return report_api.get_daily_paid_tickets(request)
-    except Exception as e:
-        import traceback
-
-        print(f"Error en get_daily_paid_tickets: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return JsonResponse(
-            {"error": f"Error interno del servidor: {str(e)}", "traceback": traceback.format_exc()},
-            status=500,
-        )
+    except Exception:
+        return _server_error("get_daily_paid_tickets")
 
 
 @csrf_exempt
 def get_appointments_between_dates(request):
     try:
         return report_api.get_appointments_between_dates(request)
-    except Exception as e:
-        import traceback
-
-        print(f"Error en get_appointments_between_dates: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return JsonResponse(
-            {"error": f"Error interno del servidor: {str(e)}", "traceback": traceback.format_exc()},
-            status=500,
-        )
+    except Exception:
+        return _server_error("get_appointments_between_dates")
+
+
+@csrf_exempt
+def get_number_appointments_per_therapist_by_day(request):
+    try:
+        return report_api.get_number_appointments_per_therapist_by_day(request)
+    except Exception:
+        return _server_error("get_number_appointments_per_therapist_by_day")
+
+
+@csrf_exempt
+def get_patients_by_therapist_by_day(request):
+    try:
+        return report_api.get_patients_by_therapist_by_day(request)
+    except Exception:
+        return _server_error("get_patients_by_therapist_by_day")
+
+
+@csrf_exempt
+def get_daily_cash_by_day(request):
+    try:
+        return report_api.get_daily_cash_by_day(request)
+    except Exception:
+        return _server_error("get_daily_cash_by_day")
+
+
+@csrf_exempt
+def get_improved_daily_cash_by_day(request):
+    try:
+        return report_api.get_improved_daily_cash_by_day(request)
+    except Exception:
+        return _server_error("get_improved_daily_cash_by_day")
+
+
+@csrf_exempt
+def get_daily_paid_tickets_by_day(request):
+    try:
+        return report_api.get_daily_paid_tickets_by_day(request)
+    except Exception:
+        return _server_error("get_daily_paid_tickets_by_day")
+
+
+@csrf_exempt
+def get_report_query(request):
+    try:
+        return report_api.get_report_query(request)
+    except Exception:
+        return _server_error("get_report_query")
+
+
+class ReportCacheStatsView(APIView):
+    """Aciertos/fallos de la caché de reportes por endpoint; solo para staff (is_staff)."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(report_cache.get_stats())
+
+
+get_cache_stats = ReportCacheStatsView.as_view()
 
 
 def reports_dashboard(request):
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from datetime import datetime
 from company_reports.services.statistics_services import StatisticsService
+from company_reports.services.cache_services import ReportCacheService
 from company_reports.serialiazers.statistics_serializers import StatisticsResource
 from django.shortcuts import render
 
@@ -35,12 +36,19 @@ class GetMetricsView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        def compute():
+            data = StatisticsService().get_statistics(start_date, end_date)
+            return StatisticsResource(data).data, status.HTTP_200_OK
+
         try:
-            service = StatisticsService()
-            data = service.get_statistics(start_date, end_date)
-            
-            serializer = StatisticsResource(data)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            payload, status_code = ReportCacheService().get_or_compute(
+                "statistics_metrics",
+                {"start": start_date, "end": end_date},
+                start_date,
+                end_date,
+                compute,
+            )
+            return Response(payload, status=status_code)
             
         except Exception as e:
             return Response(
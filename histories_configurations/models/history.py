@@ -1,11 +1,12 @@
 from django.db import models
 from django.utils import timezone
+from architect.models.tracking import DirtyFieldsMixin
 
 class ActiveHistoryManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(deleted_at__isnull=True)
 
-class History(models.Model):
+class History(DirtyFieldsMixin, models.Model):
     """
     Modelo para gestionar los historiales médicos.
     Basado en la estructura de la tabla histories de la BD.
@@ -7,9 +7,9 @@ def create(**kwargs):
     return History.objects.create(**kwargs)
 
 def update(instance: History, **kwargs):
-    for k,v in kwargs.items():
-        setattr(instance, k, v)
-    instance.save()
+    # Solo escribe los campos que cambian
+    instance.apply_changes(kwargs)
+    instance.save_changes()
     return instance
 
 def soft_delete(instance: History):
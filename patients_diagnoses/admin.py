@@ -2,6 +2,8 @@ from django.contrib import admin
 from .models.patient import Patient
 from .models.diagnosis import Diagnosis
 from .models.medical_record import MedicalRecord
+from .models.patient_duplicate import PatientDuplicateCandidate
+from .services.patient_duplicate_service import PatientMergeService
 
 @admin.register(Patient)
 class PatientAdmin(admin.ModelAdmin):
@@ -42,4 +44,38 @@ class MedicalRecordAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('patient', 'diagnose')
\ No newline at end of file
+        return super().get_queryset(request).select_related('patient', 'diagnose')
+
+@admin.register(PatientDuplicateCandidate)
+class PatientDuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ('patient', 'duplicate', 'score', 'reasons', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('patient__document_number', 'patient__name', 'patient__paternal_lastname',
+                     'duplicate__document_number', 'duplicate__name', 'duplicate__paternal_lastname')
+    list_select_related = ('patient', 'duplicate')
+    readonly_fields = ('patient', 'duplicate', 'score', 'reasons', 'status', 'created_at', 'updated_at')
+    ordering = ('-score', 'patient_id', 'duplicate_id')
+    actions = ['merge_selected', 'dismiss_selected']
+
+    def has_add_permission(self, request):
+        return False
+
+    def merge_selected(self, request, queryset):
+        """Fusiona los pares pendientes seleccionados (se conserva el paciente más antiguo)"""
+        ids = list(queryset.filter(status=PatientDuplicateCandidate.STATUS_PENDING).values_list('pk', flat=True))
+        try:
+            groups = PatientMergeService().merge_candidates(None, candidate_ids=ids)
+        except ValueError as e:
+            self.message_user(request, str(e), level='error')
+            return
+        merged = sum(len(duplicates) for duplicates in groups.values())
+        self.message_user(request, f'{merged} pacientes fusionados en {len(groups)}.')
+    merge_selected.short_description = "Fusionar pacientes seleccionados"
+
+    def dismiss_selected(self, request, queryset):
+        """Marca los pares como distintos: no se vuelven a proponer"""
+        updated = queryset.filter(status=PatientDuplicateCandidate.STATUS_PENDING).update(
+            status=PatientDuplicateCandidate.STATUS_DISMISSED
+        )
+        self.message_user(request, f'{updated} pares descartados.')
+    dismiss_selected.short_description = "Descartar (no son la misma persona)"
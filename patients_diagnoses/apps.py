@@ -3,3 +3,9 @@ from django.apps import AppConfig
 class PatientsDiagnosesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'patients_diagnoses'
+
+    def ready(self):
+        """
+        Importar signals cuando la app esté lista.
+        """
+        import patients_diagnoses.signals
@@ -0,0 +1,140 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat
+
+from histories_configurations.models import DocumentType
+from patients_diagnoses.models import Patient
+from patients_diagnoses.services.patient_search_service import patient_search_index
+from patients_diagnoses.services.patient_service import PatientService
+from ubi_geo.models import Country, District, Province, Region
+
+
+NAMES = ["José", "María", "Juan", "Rosa", "Luis", "Ana", "Carlos", "Lucía", "Jorge", "Sofía",
+         "Miguel", "Elena", "Víctor", "Carmen", "Raúl", "Inés", "Andrés", "Noemí", "Óscar", "Julia"]
+LASTNAMES = ["Pérez", "García", "Quispe", "Mamani", "Rodríguez", "Flores", "Sánchez", "Huamán",
+             "Ramírez", "Torres", "Chávez", "Vásquez", "Ñaupari", "Castillo", "Mendoza", "Rojas",
+             "Gutiérrez", "Díaz", "Espinoza", "Condori", "Villanueva", "Salazar", "Cárdenas", "Núñez"]
+
+
+def legacy_search(search_term, per_page=30):
+    """Consulta anterior de PatientService.search_patients (OR de icontains/istartswith)."""
+    queryset = Patient.objects.filter(deleted_at__isnull=True).order_by("-id").annotate(
+        paternal_name=Concat("paternal_lastname", Value(" "), "name"),
+        full_name=Concat("name", Value(" "), "paternal_lastname", Value(" "), "maternal_lastname"),
+        paternal_maternal_name=Concat("paternal_lastname", Value(" "), "maternal_lastname", Value(" "), "name"),
+    ).filter(
+        Q(document_number__iexact=search_term)
+        | Q(document_number__istartswith=search_term)
+        | Q(name__istartswith=search_term)
+        | Q(name__icontains=search_term)
+        | Q(paternal_lastname__istartswith=search_term)
+        | Q(paternal_lastname__icontains=search_term)
+        | Q(maternal_lastname__istartswith=search_term)
+        | Q(maternal_lastname__icontains=search_term)
+        | Q(paternal_name__istartswith=search_term)
+        | Q(full_name__istartswith=search_term)
+        | Q(paternal_maternal_name__istartswith=search_term)
+    )
+    return queryset.count(), list(queryset[:per_page])
+
+
+def indexed_search(search_term, per_page=30):
+    page_obj = PatientService().search_patients({"search": search_term, "per_page": per_page})
+    return page_obj.paginator.count, list(page_obj.object_list)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la latencia (p50/p95) de la búsqueda de pacientes anterior con la del índice "
+        "patient_search_tokens. Siembra los pacientes dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--patients", type=int, default=100_000,
+                            help="Pacientes sembrados para la medición")
+        parser.add_argument("--queries", type=int, default=200,
+                            help="Búsquedas medidas por estrategia")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria")
+
+    def handle(self, *args, **opt):
+        if opt["patients"] < 1 or opt["queries"] < 1:
+            raise CommandError("--patients y --queries deben ser mayores que cero")
+        rng = random.Random(opt["seed"])
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            self._seed(opt["patients"], rng)
+            patients, tokens = patient_search_index.rebuild()
+            self.stdout.write(
+                f"Sembrados {patients} pacientes ({tokens} palabras) en {time.perf_counter() - started:.1f}s"
+            )
+
+            queries = [self._query(rng) for _ in range(opt["queries"])]
+            # Calentamiento: compila consultas y llena la caché de páginas
+            for query in queries[:10]:
+                legacy_search(query)
+                indexed_search(query)
+
+            self.stdout.write(f"{'estrategia':<12} {'p50':>9} {'p95':>9} {'máx':>9} {'filas prom.':>12}")
+            for label, search in (("anterior", legacy_search), ("índice", indexed_search)):
+                timings, counts = [], []
+                for query in queries:
+                    started = time.perf_counter()
+                    count, _rows = search(query)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    counts.append(count)
+                self.stdout.write(
+                    f"{label:<12} {percentile(timings, 50):>7.1f}ms {percentile(timings, 95):>7.1f}ms "
+                    f"{max(timings):>7.1f}ms {sum(counts) / len(counts):>12.0f}"
+                )
+
+            transaction.set_rollback(True)
+
+    def _seed(self, total, rng):
+        country = Country.objects.create(name="Benchmark")
+        region = Region.objects.create(name="Benchmark", country=country)
+        province = Province.objects.create(name="Benchmark", region=region)
+        district = District.objects.create(name="Benchmark", province=province)
+        document_type = DocumentType.objects.create(name=f"BENCH-{rng.randrange(10 ** 9)}")
+
+        # bulk_create no dispara post_save: el índice se construye después con rebuild()
+        batch = []
+        for i in range(total):
+            batch.append(Patient(
+                document_number=f"{rng.randrange(10 ** 7, 10 ** 8)}{i:06d}"[:20],
+                name=rng.choice(NAMES),
+                paternal_lastname=rng.choice(LASTNAMES),
+                maternal_lastname=rng.choice(LASTNAMES),
+                email=f"paciente{i}@example.com",
+                ocupation="-",
+                health_condition="-",
+                region=region,
+                province=province,
+                district=district,
+                document_type=document_type,
+            ))
+            if len(batch) >= 2000:
+                Patient.objects.bulk_create(batch)
+                batch = []
+        Patient.objects.bulk_create(batch)
+
+    def _query(self, rng):
+        """Mezcla de lo que se escribe en la caja de búsqueda: documento, apellido, apellido + nombre."""
+        kind = rng.random()
+        if kind < 0.3:
+            return str(rng.randrange(10 ** 7, 10 ** 8))[:rng.randint(3, 8)]
+        lastname = rng.choice(LASTNAMES)
+        if kind < 0.7:
+            return lastname[:rng.randint(2, len(lastname))]
+        name = rng.choice(NAMES)
+        return f"{lastname} {name[:rng.randint(1, len(name))]}"
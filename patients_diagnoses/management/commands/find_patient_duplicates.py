@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from patients_diagnoses.services.patient_duplicate_service import patient_duplicate_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca pacientes duplicados por bloques (pacientes que comparten documento normalizado, "
+        "nombre o clave fonética) y registra los pares probables como pendientes de revisión."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild-keys", action="store_true",
+                            help="Recalcula antes todas las claves de duplicado (patient_duplicate_keys)")
+        parser.add_argument("--min-score", type=int, default=patient_duplicate_index.MIN_SCORE,
+                            help="Puntaje mínimo (0-100) para registrar un par")
+        parser.add_argument("--max-block-size", type=int, default=patient_duplicate_index.MAX_BLOCK_SIZE,
+                            help="Bloques con más pacientes que esto se saltan (clave demasiado común)")
+        parser.add_argument("--chunk-size", type=int, default=500,
+                            help="Bloques comparados por consulta")
+
+    def handle(self, *args, **opt):
+        if opt["rebuild_keys"]:
+            patients, keys = patient_duplicate_index.rebuild()
+            self.stdout.write(f"Claves recalculadas: {patients} pacientes, {keys} claves")
+
+        started = time.perf_counter()
+        stats = patient_duplicate_index.find_candidates(
+            min_score=opt["min_score"],
+            max_block_size=max(2, opt["max_block_size"]),
+            chunk_size=max(1, opt["chunk_size"]),
+        )
+        self.stdout.write(
+            f"Bloques: {stats['blocks']} (saltados por tamaño: {stats['skipped_blocks']}), "
+            f"pares comparados: {stats['compared']}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Candidatos: +{stats['created']} actualizados:{stats['updated']} retirados:{stats['removed']} "
+            f"({time.perf_counter() - started:.2f}s) ✔"
+        ))
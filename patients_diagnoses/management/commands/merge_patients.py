@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from patients_diagnoses.services.patient_duplicate_service import PatientMergeService
+
+
+class Command(BaseCommand):
+    help = (
+        "Fusiona pacientes duplicados: con --into fusiona los ids indicados en ese paciente; con "
+        "--min-score fusiona los pares pendientes con ese puntaje o más (se conserva el más antiguo "
+        "de cada grupo). Citas, historiales y registros médicos pasan al paciente que queda."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", type=int, help="Pacientes duplicados (con --into)")
+        parser.add_argument("--into", type=int, help="Paciente que se conserva")
+        parser.add_argument("--min-score", type=int,
+                            help="Fusiona los pares pendientes con al menos este puntaje")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Muestra los grupos sin fusionar nada")
+
+    def handle(self, *args, **opt):
+        service = PatientMergeService()
+        if opt["into"] is not None:
+            if opt["min_score"] is not None or not opt["ids"]:
+                raise CommandError("Use --into ID con los ids duplicados, o solo --min-score")
+            groups = {opt["into"]: sorted(set(opt["ids"]) - {opt["into"]})}
+        elif opt["min_score"] is not None:
+            groups = service.merge_groups(opt["min_score"])
+        else:
+            raise CommandError("Indique --into ID con los ids duplicados, o --min-score")
+
+        for survivor, duplicates in groups.items():
+            self.stdout.write(f"   {survivor} ← {', '.join(map(str, duplicates))}")
+        if opt["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Simulación (--dry-run): {len(groups)} grupos, nada fusionado"))
+            return
+
+        totals = {}
+        for survivor, duplicates in groups.items():
+            try:
+                moved = service.merge(survivor, duplicates)
+            except ValueError as e:
+                raise CommandError(f"Paciente {survivor}: {e}")
+            for table, rows in moved.items():
+                totals[table] = totals.get(table, 0) + rows
+        merged = sum(len(duplicates) for duplicates in groups.values())
+        self.stdout.write(", ".join(f"{table}: {rows}" for table, rows in totals.items()) or "Sin filas que mover")
+        self.stdout.write(self.style.SUCCESS(f"{merged} pacientes fusionados en {len(groups)} ✔"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from patients_diagnoses.services.patient_search_service import patient_search_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de pacientes (patient_search_tokens)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000,
+                            help="Filas por lote al leer pacientes e insertar palabras")
+
+    def handle(self, *args, **opt):
+        patients, tokens = patient_search_index.rebuild(chunk_size=opt["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice reconstruido: {patients} pacientes, {tokens} palabras ✔"
+        ))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_patient_search_index(apps, schema_editor):
+    """Indexa los pacientes activos existentes."""
+    from patients_diagnoses.services.patient_search_service import patient_search_tokens
+
+    Patient = apps.get_model('patients_diagnoses', 'Patient')
+    PatientSearchToken = apps.get_model('patients_diagnoses', 'PatientSearchToken')
+    batch = []
+    rows = (
+        Patient.objects
+        .filter(deleted_at__isnull=True)
+        .values_list('id', 'document_number', 'name', 'paternal_lastname', 'maternal_lastname')
+        .iterator(chunk_size=2000)
+    )
+    for patient_id, *values in rows:
+        for token, field in patient_search_tokens(*values):
+            batch.append(PatientSearchToken(patient_id=patient_id, token=token, field=field))
+        if len(batch) >= 2000:
+            PatientSearchToken.objects.bulk_create(batch)
+            batch = []
+    PatientSearchToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients_diagnoses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, verbose_name='Palabra')),
+                ('field', models.CharField(choices=[('document', 'Número de documento'), ('paternal_lastname', 'Apellido paterno'), ('maternal_lastname', 'Apellido materno'), ('name', 'Nombre')], max_length=20, verbose_name='Campo')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='patients_diagnoses.patient', verbose_name='Paciente')),
+            ],
+            options={
+                'verbose_name': 'Palabra de búsqueda de paciente',
+                'verbose_name_plural': 'Palabras de búsqueda de pacientes',
+                'db_table': 'patient_search_tokens',
+                'indexes': [models.Index(fields=['token', 'patient'], name='patient_search_token_idx')],
+            },
+        ),
+        migrations.RunPython(build_patient_search_index, migrations.RunPython.noop),
+    ]
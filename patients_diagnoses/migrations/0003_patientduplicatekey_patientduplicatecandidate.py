@@ -0,0 +1,73 @@
+# Generated by Django 5.2.5
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_patient_duplicate_keys(apps, schema_editor):
+    """Calcula las claves de duplicado de los pacientes activos existentes."""
+    from patients_diagnoses.services.patient_duplicate_service import duplicate_keys
+
+    Patient = apps.get_model('patients_diagnoses', 'Patient')
+    PatientDuplicateKey = apps.get_model('patients_diagnoses', 'PatientDuplicateKey')
+    batch = []
+    rows = (
+        Patient.objects
+        .filter(deleted_at__isnull=True)
+        .values_list('id', 'document_number', 'name', 'paternal_lastname', 'maternal_lastname')
+        .iterator(chunk_size=2000)
+    )
+    for patient_id, *values in rows:
+        for kind, key in duplicate_keys(*values):
+            batch.append(PatientDuplicateKey(patient_id=patient_id, kind=kind, key=key))
+        if len(batch) >= 2000:
+            PatientDuplicateKey.objects.bulk_create(batch)
+            batch = []
+    PatientDuplicateKey.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients_diagnoses', '0002_patientsearchtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientDuplicateKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('document', 'Documento'), ('name', 'Nombre completo'), ('phonetic', 'Fonética: apellido paterno y nombre'), ('phonetic_maternal', 'Fonética: apellido materno y nombre'), ('surnames', 'Fonética: apellidos')], max_length=20, verbose_name='Tipo')),
+                ('key', models.CharField(max_length=64, verbose_name='Clave')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_keys', to='patients_diagnoses.patient', verbose_name='Paciente')),
+            ],
+            options={
+                'verbose_name': 'Clave de duplicado de paciente',
+                'verbose_name_plural': 'Claves de duplicado de pacientes',
+                'db_table': 'patient_duplicate_keys',
+                'indexes': [models.Index(fields=['kind', 'key', 'patient'], name='patient_duplicate_key_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PatientDuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='Puntaje')),
+                ('reasons', models.CharField(max_length=100, verbose_name='Claves compartidas')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('dismissed', 'Descartado'), ('merged', 'Fusionado')], default='pending', max_length=10, verbose_name='Estado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('duplicate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='patients_diagnoses.patient', verbose_name='Posible duplicado')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='patients_diagnoses.patient', verbose_name='Paciente')),
+            ],
+            options={
+                'verbose_name': 'Posible paciente duplicado',
+                'verbose_name_plural': 'Posibles pacientes duplicados',
+                'db_table': 'patient_duplicate_candidates',
+                'ordering': ['-score', 'patient_id', 'duplicate_id'],
+                'indexes': [models.Index(fields=['status', 'score'], name='patient_dup_status_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('patient', 'duplicate'), name='patient_duplicate_pair_uniq')],
+            },
+        ),
+        migrations.RunPython(build_patient_duplicate_keys, migrations.RunPython.noop),
+    ]
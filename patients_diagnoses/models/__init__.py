@@ -1,5 +1,7 @@
 from .patient import Patient
 from .diagnosis import Diagnosis
 from .medical_record import MedicalRecord
+from .patient_search_token import PatientSearchToken
+from .patient_duplicate import PatientDuplicateCandidate, PatientDuplicateKey
 
-__all__ = ['Patient', 'Diagnosis', 'MedicalRecord']
+__all__ = ['Patient', 'Diagnosis', 'MedicalRecord', 'PatientSearchToken', 'PatientDuplicateKey', 'PatientDuplicateCandidate']
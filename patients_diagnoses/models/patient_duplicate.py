@@ -0,0 +1,96 @@
+from django.db import models
+
+
+class PatientDuplicateKey(models.Model):
+    """
+    Claves de bloqueo para detectar pacientes duplicados: una fila por clave (documento
+    normalizado, nombre completo normalizado y claves fonéticas) de cada paciente activo.
+    Dos pacientes solo se comparan si comparten alguna clave. Lo mantiene
+    PatientDuplicateIndex; los pacientes eliminados no tienen filas.
+    """
+
+    KIND_DOCUMENT = "document"
+    KIND_NAME = "name"
+    KIND_PHONETIC = "phonetic"
+    KIND_PHONETIC_MATERNAL = "phonetic_maternal"
+    KIND_SURNAMES = "surnames"
+    KIND_CHOICES = [
+        (KIND_DOCUMENT, "Documento"),
+        (KIND_NAME, "Nombre completo"),
+        (KIND_PHONETIC, "Fonética: apellido paterno y nombre"),
+        (KIND_PHONETIC_MATERNAL, "Fonética: apellido materno y nombre"),
+        (KIND_SURNAMES, "Fonética: apellidos"),
+    ]
+
+    KEY_MAX_LENGTH = 64
+
+    patient = models.ForeignKey(
+        'patients_diagnoses.Patient',
+        on_delete=models.CASCADE,
+        related_name='duplicate_keys',
+        verbose_name="Paciente",
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Tipo")
+    key = models.CharField(max_length=KEY_MAX_LENGTH, verbose_name="Clave")
+
+    class Meta:
+        db_table = 'patient_duplicate_keys'
+        verbose_name = "Clave de duplicado de paciente"
+        verbose_name_plural = "Claves de duplicado de pacientes"
+        indexes = [
+            models.Index(fields=['kind', 'key', 'patient'], name='patient_duplicate_key_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.key}"
+
+
+class PatientDuplicateCandidate(models.Model):
+    """
+    Par de pacientes que probablemente son la misma persona. Mientras está pendiente,
+    patient es el de menor id (el que se conserva por defecto al fusionar); una vez
+    fusionado, patient es el paciente que quedó y duplicate el que se fusionó en él.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_DISMISSED = "dismissed"
+    STATUS_MERGED = "merged"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pendiente"),
+        (STATUS_DISMISSED, "Descartado"),
+        (STATUS_MERGED, "Fusionado"),
+    ]
+
+    patient = models.ForeignKey(
+        'patients_diagnoses.Patient',
+        on_delete=models.CASCADE,
+        related_name='duplicate_candidates',
+        verbose_name="Paciente",
+    )
+    duplicate = models.ForeignKey(
+        'patients_diagnoses.Patient',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Posible duplicado",
+    )
+    score = models.PositiveSmallIntegerField(verbose_name="Puntaje")
+    reasons = models.CharField(max_length=100, verbose_name="Claves compartidas")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Estado")
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de actualización")
+
+    class Meta:
+        db_table = 'patient_duplicate_candidates'
+        verbose_name = "Posible paciente duplicado"
+        verbose_name_plural = "Posibles pacientes duplicados"
+        ordering = ['-score', 'patient_id', 'duplicate_id']
+        constraints = [
+            models.UniqueConstraint(fields=['patient', 'duplicate'], name='patient_duplicate_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'score'], name='patient_dup_status_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.patient_id} ~ {self.duplicate_id} ({self.score})"
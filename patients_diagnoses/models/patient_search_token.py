@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class PatientSearchToken(models.Model):
+    """
+    Índice de búsqueda de pacientes: una fila por palabra normalizada (minúsculas,
+    sin tildes ni signos) del documento, nombres y apellidos de cada paciente activo.
+    Lo mantiene PatientSearchIndex; los pacientes eliminados no tienen filas.
+    """
+
+    FIELD_DOCUMENT = "document"
+    FIELD_PATERNAL = "paternal_lastname"
+    FIELD_MATERNAL = "maternal_lastname"
+    FIELD_NAME = "name"
+    FIELD_CHOICES = [
+        (FIELD_DOCUMENT, "Número de documento"),
+        (FIELD_PATERNAL, "Apellido paterno"),
+        (FIELD_MATERNAL, "Apellido materno"),
+        (FIELD_NAME, "Nombre"),
+    ]
+
+    TOKEN_MAX_LENGTH = 32
+
+    patient = models.ForeignKey(
+        'patients_diagnoses.Patient',
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+        verbose_name="Paciente",
+    )
+    token = models.CharField(max_length=TOKEN_MAX_LENGTH, verbose_name="Palabra")
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES, verbose_name="Campo")
+
+    class Meta:
+        db_table = 'patient_search_tokens'
+        verbose_name = "Palabra de búsqueda de paciente"
+        verbose_name_plural = "Palabras de búsqueda de pacientes"
+        indexes = [
+            models.Index(fields=['token', 'patient'], name='patient_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} ({self.field})"
@@ -1,22 +1,22 @@
 from rest_framework import serializers
 from ..models.patient import Patient
-from ubi_geo.serializers.region import RegionSerializer
-from ubi_geo.serializers.province import ProvinceSerializer
-from ubi_geo.serializers.district import DistrictSerializer
+from ubi_geo.serializers.fields import GeoNestedField, GeoPrimaryKeyField
+from ubi_geo.services.geo_tree import geo_tree
 from histories_configurations.serializers.document_type import DocumentTypeSerializer
 from django.core.validators import RegexValidator
 from datetime import date
 
 class PatientSerializer(serializers.ModelSerializer):
-    region = RegionSerializer(read_only=True)
-    province = ProvinceSerializer(read_only=True)
-    district = DistrictSerializer(read_only=True)
+    # Ubicación desde el árbol geográfico en memoria (sin consultas por fila)
+    region = GeoNestedField('region')
+    province = GeoNestedField('province')
+    district = GeoNestedField('district')
     document_type = DocumentTypeSerializer(read_only=True)
 
     # Para escritura (crear con IDs)
-    region_id = serializers.PrimaryKeyRelatedField(queryset=RegionSerializer.Meta.model.objects.all(), source='region', write_only=True)
-    province_id = serializers.PrimaryKeyRelatedField(queryset=ProvinceSerializer.Meta.model.objects.all(), source='province', write_only=True)
-    district_id = serializers.PrimaryKeyRelatedField(queryset=DistrictSerializer.Meta.model.objects.all(), source='district', write_only=True)
+    region_id = GeoPrimaryKeyField('region', source='region', write_only=True)
+    province_id = GeoPrimaryKeyField('province', source='province', write_only=True)
+    district_id = GeoPrimaryKeyField('district', source='district', write_only=True)
     document_type_id = serializers.PrimaryKeyRelatedField(queryset=DocumentTypeSerializer.Meta.model.objects.all(), source='document_type', write_only=True)
 
     # Validaciones campo por campo
@@ -68,6 +68,15 @@ class PatientSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'deleted_at']
 
+    # Región, provincia y distrito salen del árbol geográfico en memoria; solo
+    # document_type se lee de la base y se carga en la misma consulta
+    related_fields = ('document_type',)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Aplica al queryset el plan de carga que necesita este serializer."""
+        return queryset.select_related(*cls.related_fields)
+
     def validate_document_number(self, value):
         if len(value) < 8:
             raise serializers.ValidationError("El número de documento debe tener al menos 8 dígitos.")
@@ -122,7 +131,7 @@ class PatientListSerializer(serializers.ModelSerializer):
     
     full_name = serializers.SerializerMethodField()
     age = serializers.SerializerMethodField()
-    region_name = serializers.CharField(source='region.name', read_only=True)
+    region_name = serializers.SerializerMethodField()
     document_type_name = serializers.CharField(source='document_type.name', read_only=True)
     
     class Meta:
@@ -132,9 +141,21 @@ class PatientListSerializer(serializers.ModelSerializer):
             'phone1', 'email', 'region_name', 'document_type_name',
             'created_at'
         ]
+
+    # document_type_name lee el tipo de documento; region_name sale del árbol en memoria
+    related_fields = ('document_type',)
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Aplica al queryset el plan de carga que necesita este serializer."""
+        return queryset.select_related(*cls.related_fields)
     
     def get_full_name(self, obj):
         return obj.get_full_name()
+
+    def get_region_name(self, obj):
+        region = geo_tree.get().region(obj.region_id)
+        return region.name if region is not None else None
     
     def get_age(self, obj):
         from datetime import date
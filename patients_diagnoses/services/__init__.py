@@ -1,8 +1,8 @@
 from .patient_service import PatientService
 from .diagnosis_service import DiagnosisService
 from .medical_record_service import MedicalRecordService
+from .patient_search_service import PatientSearchIndex, patient_search_index
+from .patient_duplicate_service import PatientDuplicateIndex, PatientMergeService, patient_duplicate_index
 
-__all__ = ['PatientService', 'DiagnosisService', 'MedicalRecordService']
-
-
-
+__all__ = ['PatientService', 'DiagnosisService', 'MedicalRecordService', 'PatientSearchIndex', 'patient_search_index',
+           'PatientDuplicateIndex', 'PatientMergeService', 'patient_duplicate_index']
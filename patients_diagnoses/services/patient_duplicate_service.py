@@ -0,0 +1,451 @@
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from appointments_status.models import Appointment
+from company_reports.services.cache_services import ReportCacheService
+from company_reports.services.rollup_services import DailyRollupService
+from histories_configurations.models import History
+from ..models.medical_record import MedicalRecord
+from ..models.patient import Patient
+from ..models.patient_duplicate import PatientDuplicateCandidate, PatientDuplicateKey
+from ..models.patient_search_token import PatientSearchToken
+from .patient_search_service import normalize_search_text, search_terms
+
+
+# Campos del paciente de los que salen las claves de duplicado
+DUPLICATE_KEY_FIELDS = ("document_number", "name", "paternal_lastname", "maternal_lastname", "deleted_at")
+
+# Fonética del español sobre texto ya normalizado ([a-z0-9], sin tildes; la ñ queda como n).
+# Las mayúsculas son sonidos ya resueltos: las reglas siguientes no las vuelven a tocar.
+_PHONETIC_RULES = [
+    (re.compile(r"[0-9]+"), ""),
+    (re.compile(r"ch"), "C"),
+    (re.compile(r"ll"), "Y"),
+    (re.compile(r"^x"), "J"),
+    (re.compile(r"x"), "KS"),
+    (re.compile(r"qu(?=[ei])"), "K"),
+    (re.compile(r"gu(?=[ei])"), "G"),
+    (re.compile(r"[hg]u(?=[ao])"), "B"),
+    (re.compile(r"g(?=[ei])"), "J"),
+    (re.compile(r"c(?=[ei])"), "S"),
+    (re.compile(r"[ckq]"), "K"),
+    (re.compile(r"[sz]"), "S"),
+    (re.compile(r"[vbw]"), "B"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"y(?![aeiou])"), "i"),
+]
+_REPEATED = re.compile(r"(.)\1+")
+
+# Peso de cada campo en la similitud de nombres
+FIELD_WEIGHTS = (("paternal_lastname", 0.35), ("maternal_lastname", 0.25), ("name", 0.40))
+
+
+@lru_cache(maxsize=65536)
+def spanish_phonetic(value):
+    """
+    Clave fonética de un texto en español: 'Vásquez' y 'Vasques' -> 'BSKS', 'Quispe' ->
+    'KSP', 'Huamán' y 'Guamán' -> 'BMN'. Conserva la primera letra y las consonantes.
+    Los apellidos se repiten mucho: el resultado se memoriza.
+    """
+    word = normalize_search_text(value).replace(" ", "")
+    for pattern, code in _PHONETIC_RULES:
+        word = pattern.sub(code, word)
+    if not word:
+        return ""
+    skeleton = word[0] + "".join(ch for ch in word[1:] if ch not in "aeiou")
+    return _REPEATED.sub(r"\1", skeleton.upper())
+
+
+def duplicate_keys(document_number, name, paternal_lastname, maternal_lastname):
+    """Pares (tipo, clave) de bloqueo de un paciente."""
+    keys = set()
+    # '00.123.456-7' y '1234567' son el mismo documento
+    document = "".join(search_terms(document_number)).lstrip("0")
+    if len(document) >= 6:
+        keys.add((PatientDuplicateKey.KIND_DOCUMENT, document))
+
+    # Mismas palabras en cualquier orden o campo: tildes, mayúsculas y apellidos invertidos
+    words = sorted(normalize_search_text(f"{name or ''} {paternal_lastname or ''} {maternal_lastname or ''}").split())
+    if len(words) >= 2:
+        keys.add((PatientDuplicateKey.KIND_NAME, " ".join(words)))
+
+    first_name = spanish_phonetic(normalize_search_text(name).partition(" ")[0])
+    paternal = spanish_phonetic(paternal_lastname)
+    maternal = spanish_phonetic(maternal_lastname)
+    for kind, left, right in (
+        (PatientDuplicateKey.KIND_PHONETIC, paternal, first_name),
+        (PatientDuplicateKey.KIND_PHONETIC_MATERNAL, maternal, first_name),
+        (PatientDuplicateKey.KIND_SURNAMES, paternal, maternal),
+    ):
+        if left and right:
+            keys.add((kind, f"{left} {right}"))
+    return sorted((kind, key[:PatientDuplicateKey.KEY_MAX_LENGTH]) for kind, key in keys)
+
+
+def _similarity(left, right):
+    left, right = normalize_search_text(left), normalize_search_text(right)
+    if not left or not right:
+        # Un dato que falta no confirma ni descarta
+        return 1.0 if left == right else 0.5
+    ratio = SequenceMatcher(None, left, right).ratio()
+    # 'José' frente a 'José Luis' o 'Cruz' frente a 'De la Cruz': un dato incompleto
+    left_words, right_words = set(left.split()), set(right.split())
+    if left_words <= right_words or right_words <= left_words:
+        return max(ratio, 0.9)
+    return ratio
+
+
+def duplicate_score(patient, other):
+    """
+    Puntaje 0-100 de que dos pacientes sean la misma persona. Recibe dicts con
+    document_number, name, paternal_lastname, maternal_lastname y birth_date.
+    El mismo documento normalizado vale 100; si no, pesa la similitud de cada campo
+    (también con los apellidos cruzados) y la fecha de nacimiento suma o resta.
+    """
+    document = "".join(search_terms(patient["document_number"])).lstrip("0")
+    if len(document) >= 6 and document == "".join(search_terms(other["document_number"])).lstrip("0"):
+        return 100
+
+    crossed = dict(other, paternal_lastname=other["maternal_lastname"], maternal_lastname=other["paternal_lastname"])
+    similarity = max(
+        sum(weight * _similarity(patient[field], candidate[field]) for field, weight in FIELD_WEIGHTS)
+        for candidate in (other, crossed)
+    )
+    score = round(similarity * 100)
+
+    born, other_born = patient["birth_date"], other["birth_date"]
+    if born is not None and other_born is not None:
+        # Gemelos comparten fecha; hermanos con los mismos apellidos, no
+        same_day = timezone.localtime(born).date() == timezone.localtime(other_born).date()
+        score += 10 if same_day else -25
+    return max(0, min(100, score))
+
+
+class PatientDuplicateIndex:
+    """
+    Detección de pacientes duplicados por bloques sobre patient_duplicate_keys.
+
+    Solo se comparan los pacientes que comparten una clave (mismo bloque), así que el
+    costo crece con el tamaño de los bloques y no con n². Los bloques de más de
+    max_block_size pacientes (una clave demasiado común para distinguir a nadie) se
+    saltan y se informan.
+    """
+
+    MAX_BLOCK_SIZE = 100
+    MIN_SCORE = 80
+    PATIENT_FIELDS = ("document_number", "name", "paternal_lastname", "maternal_lastname", "birth_date")
+
+    # --- Mantenimiento ---
+
+    def index_patient(self, patient):
+        """Reemplaza las claves del paciente (o las borra si está eliminado)."""
+        with transaction.atomic():
+            PatientDuplicateKey.objects.filter(patient_id=patient.pk).delete()
+            if patient.deleted_at is not None:
+                return 0
+            keys = duplicate_keys(
+                patient.document_number, patient.name, patient.paternal_lastname, patient.maternal_lastname
+            )
+            PatientDuplicateKey.objects.bulk_create(
+                [PatientDuplicateKey(patient_id=patient.pk, kind=kind, key=key) for kind, key in keys]
+            )
+            return len(keys)
+
+    def rebuild(self, chunk_size=2000):
+        """Reconstruye todas las claves. Devuelve (pacientes, claves)."""
+        patients = keys = 0
+        with transaction.atomic():
+            PatientDuplicateKey.objects.all().delete()
+            batch = []
+            rows = (
+                Patient.objects
+                .filter(deleted_at__isnull=True)
+                .values_list("id", "document_number", "name", "paternal_lastname", "maternal_lastname")
+                .iterator(chunk_size=chunk_size)
+            )
+            for patient_id, *values in rows:
+                patients += 1
+                for kind, key in duplicate_keys(*values):
+                    batch.append(PatientDuplicateKey(patient_id=patient_id, kind=kind, key=key))
+                if len(batch) >= chunk_size:
+                    PatientDuplicateKey.objects.bulk_create(batch)
+                    keys += len(batch)
+                    batch = []
+            PatientDuplicateKey.objects.bulk_create(batch)
+            keys += len(batch)
+        return patients, keys
+
+    # --- Candidatos ---
+
+    def find_candidates(self, min_score=None, max_block_size=None, chunk_size=500):
+        """
+        Recorre los bloques con más de un paciente, de chunk_size en chunk_size, y
+        registra como pendientes los pares con puntaje >= min_score. Los pares ya
+        descartados o fusionados no se vuelven a proponer; los pendientes se
+        actualizan y los que ya no alcanzan el puntaje se borran.
+        Devuelve un dict con blocks, skipped_blocks, compared, created, updated y removed.
+        """
+        min_score = self.MIN_SCORE if min_score is None else min_score
+        max_block_size = max_block_size or self.MAX_BLOCK_SIZE
+        stats = dict.fromkeys(("blocks", "skipped_blocks", "compared", "created", "updated", "removed"), 0)
+
+        existing = {
+            (patient_id, duplicate_id): (pk, status, score)
+            for pk, patient_id, duplicate_id, status, score in PatientDuplicateCandidate.objects
+            .values_list("id", "patient_id", "duplicate_id", "status", "score")
+            .iterator(chunk_size=5000)
+        }
+        compared = set()
+        found = set()
+
+        blocks = (
+            PatientDuplicateKey.objects
+            .values("kind", "key")
+            .annotate(size=Count("id"))
+            .filter(size__gt=1)
+            .order_by()
+            .values_list("kind", "key", "size")
+        )
+        batch = []
+        for kind, key, size in blocks.iterator(chunk_size=chunk_size):
+            if size > max_block_size:
+                stats["skipped_blocks"] += 1
+                continue
+            stats["blocks"] += 1
+            batch.append((kind, key))
+            if len(batch) >= chunk_size:
+                self._compare_blocks(batch, existing, compared, found, min_score, stats)
+                batch = []
+        self._compare_blocks(batch, existing, compared, found, min_score, stats)
+
+        stale = [
+            pk for pair, (pk, status, _score) in existing.items()
+            if status == PatientDuplicateCandidate.STATUS_PENDING and pair not in found
+        ]
+        for start in range(0, len(stale), 1000):
+            stats["removed"] += PatientDuplicateCandidate.objects.filter(pk__in=stale[start:start + 1000]).delete()[0]
+        return stats
+
+    def _compare_blocks(self, blocks, existing, compared, found, min_score, stats):
+        if not blocks:
+            return
+        keys_by_kind = defaultdict(list)
+        for kind, key in blocks:
+            keys_by_kind[kind].append(key)
+        members = defaultdict(list)
+        for kind, keys in keys_by_kind.items():
+            rows = PatientDuplicateKey.objects.filter(kind=kind, key__in=keys).values_list("key", "patient_id")
+            for key, patient_id in rows:
+                members[(kind, key)].append(patient_id)
+
+        reasons = defaultdict(set)
+        for (kind, _key), patient_ids in members.items():
+            patient_ids = sorted(set(patient_ids))
+            for i, patient_id in enumerate(patient_ids):
+                for other_id in patient_ids[i + 1:]:
+                    reasons[(patient_id, other_id)].add(kind)
+        pairs = {pair: kinds for pair, kinds in reasons.items() if pair not in compared}
+        if not pairs:
+            return
+
+        ids = {patient_id for pair in pairs for patient_id in pair}
+        patients = {
+            row["id"]: row
+            for row in Patient.objects.filter(pk__in=ids, deleted_at__isnull=True).values("id", *self.PATIENT_FIELDS)
+        }
+
+        created, updated = [], []
+        for (patient_id, other_id), kinds in pairs.items():
+            compared.add((patient_id, other_id))
+            if patient_id not in patients or other_id not in patients:
+                continue
+            previous = existing.get((patient_id, other_id))
+            if previous is not None and previous[1] != PatientDuplicateCandidate.STATUS_PENDING:
+                continue
+            stats["compared"] += 1
+            score = duplicate_score(patients[patient_id], patients[other_id])
+            if score < min_score:
+                continue
+            found.add((patient_id, other_id))
+            reason = ",".join(sorted(kinds))
+            if previous is None:
+                created.append(PatientDuplicateCandidate(
+                    patient_id=patient_id, duplicate_id=other_id, score=score, reasons=reason,
+                ))
+            elif previous[2] != score:
+                updated.append(PatientDuplicateCandidate(pk=previous[0], score=score, reasons=reason))
+
+        PatientDuplicateCandidate.objects.bulk_create(created, batch_size=1000, ignore_conflicts=True)
+        PatientDuplicateCandidate.objects.bulk_update(updated, ["score", "reasons"], batch_size=1000)
+        stats["created"] += len(created)
+        stats["updated"] += len(updated)
+
+
+class PatientMergeService:
+    """
+    Fusiona pacientes duplicados en uno que se conserva: citas, historiales y registros
+    médicos pasan al que queda con un UPDATE por tabla, y los duplicados quedan
+    eliminados (soft delete) y fuera de los índices de búsqueda y de duplicados.
+    """
+
+    # Tablas cuyas filas pasan al paciente que se conserva (incluidas las eliminadas)
+    MERGED_MODELS = (Appointment, History, MedicalRecord)
+
+    def merge(self, survivor_id, duplicate_ids):
+        """
+        Fusiona duplicate_ids en survivor_id en una transacción. Devuelve
+        {tabla: filas movidas}; lanza ValueError si algún paciente no existe o ya
+        está eliminado. Las filas que chocarían con un unique_together del paciente
+        (p. ej. el mismo diagnóstico en medical_records) se quedan en el duplicado
+        eliminado y se cuentan en "<tabla> (sin mover)".
+        """
+        duplicate_ids = sorted(set(duplicate_ids) - {survivor_id})
+        if not duplicate_ids:
+            raise ValueError("Indique al menos un paciente duplicado distinto del que se conserva.")
+        group = [survivor_id, *duplicate_ids]
+
+        with transaction.atomic():
+            found = set(
+                Patient.objects.select_for_update()
+                .filter(pk__in=group, deleted_at__isnull=True)
+                .values_list("id", flat=True)
+            )
+            missing = [pk for pk in group if pk not in found]
+            if missing:
+                raise ValueError(f"Pacientes inexistentes o eliminados: {', '.join(map(str, missing))}")
+
+            # Días cuyos reportes cuentan pacientes distintos: se recalculan al confirmar
+            days = set(
+                Appointment._base_manager
+                .filter(patient_id__in=duplicate_ids, appointment_local_date__isnull=False)
+                .values_list("appointment_local_date", flat=True)
+                .distinct()
+            )
+
+            now = timezone.now()
+            moved = {}
+            for model in self.MERGED_MODELS:
+                rows = model._base_manager.filter(patient_id__in=duplicate_ids)
+                unique = self._unique_with_patient(model)
+                if unique:
+                    movable, kept = self._movable_ids(model, unique, survivor_id, duplicate_ids)
+                    rows = model._base_manager.filter(pk__in=movable)
+                    if kept:
+                        moved[f"{model._meta.db_table} (sin mover)"] = kept
+                moved[model._meta.db_table] = rows.update(patient_id=survivor_id, updated_at=now)
+            Patient.objects.filter(pk__in=duplicate_ids).update(deleted_at=now, updated_at=now)
+            # update() no dispara señales: los índices de los duplicados se limpian aquí
+            PatientSearchToken.objects.filter(patient_id__in=duplicate_ids).delete()
+            PatientDuplicateKey.objects.filter(patient_id__in=duplicate_ids).delete()
+
+            # Pares con los duplicados: los del grupo pasan a la fusión registrada y los
+            # pendientes con terceros se vuelven a calcular en la próxima búsqueda
+            involved = Q(patient_id__in=duplicate_ids) | Q(duplicate_id__in=duplicate_ids)
+            in_group = Q(patient_id__in=group) & Q(duplicate_id__in=group)
+            scores = {}
+            for patient_id, other_id, score in (
+                PatientDuplicateCandidate.objects.filter(in_group).values_list("patient_id", "duplicate_id", "score")
+            ):
+                scores[other_id if patient_id == survivor_id else patient_id] = score
+            PatientDuplicateCandidate.objects.filter(
+                in_group | (involved & Q(status=PatientDuplicateCandidate.STATUS_PENDING))
+            ).delete()
+            PatientDuplicateCandidate.objects.bulk_create([
+                PatientDuplicateCandidate(
+                    patient_id=survivor_id, duplicate_id=pk, score=scores.get(pk, 100),
+                    reasons="merge", status=PatientDuplicateCandidate.STATUS_MERGED,
+                )
+                for pk in duplicate_ids
+            ])
+
+            if days:
+                transaction.on_commit(lambda: DailyRollupService().refresh_days(days), robust=True)
+                transaction.on_commit(lambda: ReportCacheService().invalidate_days(days), robust=True)
+        return moved
+
+    @staticmethod
+    def _unique_with_patient(model):
+        """Campos que, junto con el paciente, son únicos en el modelo."""
+        return [
+            tuple(field for field in fields if field != "patient")
+            for fields in model._meta.unique_together
+            if "patient" in fields
+        ]
+
+    @staticmethod
+    def _movable_ids(model, unique, survivor_id, duplicate_ids):
+        """
+        Ids de las filas de los duplicados que pueden pasar al que se conserva sin
+        repetir una combinación única (gana la más antigua), y cuántas se quedan.
+        """
+        fields = sorted({field for fields in unique for field in fields})
+        rows = (
+            model._base_manager
+            .filter(patient_id__in=[survivor_id, *duplicate_ids])
+            .order_by("id")
+            .values_list("id", "patient_id", *fields)
+        )
+        taken = set()
+        pending = []
+        for pk, patient_id, *values in rows:
+            row = dict(zip(fields, values))
+            keys = [(i, tuple(row[field] for field in fields)) for i, fields in enumerate(unique)]
+            if patient_id == survivor_id:
+                taken.update(keys)
+            else:
+                pending.append((pk, keys))
+        movable = []
+        for pk, keys in pending:
+            if not taken.intersection(keys):
+                taken.update(keys)
+                movable.append(pk)
+        return movable, len(pending) - len(movable)
+
+    def merge_groups(self, min_score, candidate_ids=None):
+        """
+        Grupos {conservado: [duplicados]} que formarían los pares pendientes con
+        puntaje >= min_score (o los pares candidate_ids), uniendo los pares que
+        comparten un paciente. Se conserva el de menor id (el más antiguo).
+        """
+        candidates = PatientDuplicateCandidate.objects.filter(status=PatientDuplicateCandidate.STATUS_PENDING)
+        if candidate_ids is not None:
+            candidates = candidates.filter(pk__in=candidate_ids)
+        else:
+            candidates = candidates.filter(score__gte=min_score)
+
+        parent = {}
+
+        def root(pk):
+            parent.setdefault(pk, pk)
+            while parent[pk] != pk:
+                parent[pk] = parent[parent[pk]]
+                pk = parent[pk]
+            return pk
+
+        for patient_id, duplicate_id in candidates.values_list("patient_id", "duplicate_id").iterator(chunk_size=5000):
+            left, right = root(patient_id), root(duplicate_id)
+            if left != right:
+                parent[max(left, right)] = min(left, right)
+
+        groups = defaultdict(list)
+        for pk in parent:
+            survivor = root(pk)
+            if pk != survivor:
+                groups[survivor].append(pk)
+        return {survivor: sorted(duplicates) for survivor, duplicates in sorted(groups.items())}
+
+    def merge_candidates(self, min_score, candidate_ids=None):
+        """Fusiona cada grupo de merge_groups() en su propia transacción. Devuelve los grupos fusionados."""
+        groups = self.merge_groups(min_score, candidate_ids)
+        for survivor, duplicates in groups.items():
+            self.merge(survivor, duplicates)
+        return groups
+
+
+patient_duplicate_index = PatientDuplicateIndex()
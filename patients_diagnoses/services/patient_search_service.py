@@ -0,0 +1,153 @@
+import re
+import unicodedata
+from functools import reduce
+from operator import add, or_
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+
+from ..models.patient import Patient
+from ..models.patient_search_token import PatientSearchToken
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Campos del paciente que se indexan
+INDEXED_FIELDS = ("document_number", "name", "paternal_lastname", "maternal_lastname", "deleted_at")
+
+
+def normalize_search_text(value):
+    """'Pérez-Ñaupari' -> 'perez naupari': minúsculas, sin tildes y solo [a-z0-9]."""
+    if not value:
+        return ""
+    folded = unicodedata.normalize("NFKD", str(value))
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM.sub(" ", folded).strip()
+
+
+def search_terms(value):
+    """Palabras normalizadas de un texto, sin repetir y recortadas al largo del índice."""
+    terms = []
+    for word in normalize_search_text(value).split():
+        word = word[:PatientSearchToken.TOKEN_MAX_LENGTH]
+        if word not in terms:
+            terms.append(word)
+    return terms
+
+
+def patient_search_tokens(document_number, name, paternal_lastname, maternal_lastname):
+    """Pares (palabra, campo) que se guardan en el índice para un paciente."""
+    tokens = set()
+    # El documento se indexa entero ("12.345.678-K" -> "12345678k") para buscarlo por prefijo
+    document = "".join(search_terms(document_number))
+    if document:
+        tokens.add((document[:PatientSearchToken.TOKEN_MAX_LENGTH], PatientSearchToken.FIELD_DOCUMENT))
+    for value, field in (
+        (name, PatientSearchToken.FIELD_NAME),
+        (paternal_lastname, PatientSearchToken.FIELD_PATERNAL),
+        (maternal_lastname, PatientSearchToken.FIELD_MATERNAL),
+    ):
+        for word in search_terms(value):
+            tokens.add((word, field))
+    return sorted(tokens)
+
+
+class PatientSearchIndex:
+    """
+    Búsqueda de pacientes sobre la tabla patient_search_tokens.
+
+    Cada palabra de la consulta debe coincidir (exacta o como prefijo) con alguna
+    palabra del paciente. El prefijo se busca como rango [p, p + 'zzz…'] sobre el
+    índice (token, patient), que en MySQL y SQLite es una lectura por rango y no
+    depende de la intercalación (las palabras solo tienen [a-z0-9]).
+
+    Relevancia: por cada palabra de la consulta se toma la mejor coincidencia del
+    paciente; la exacta vale el doble que el prefijo y el documento pesa más que
+    los apellidos, y estos más que el nombre.
+    """
+
+    FIELD_WEIGHTS = {
+        PatientSearchToken.FIELD_DOCUMENT: 50,
+        PatientSearchToken.FIELD_PATERNAL: 20,
+        PatientSearchToken.FIELD_NAME: 18,
+        PatientSearchToken.FIELD_MATERNAL: 15,
+    }
+    MAX_TERMS = 5
+
+    # --- Mantenimiento ---
+
+    def index_patient(self, patient):
+        """Reemplaza las palabras del paciente (o las borra si está eliminado)."""
+        with transaction.atomic():
+            PatientSearchToken.objects.filter(patient_id=patient.pk).delete()
+            if patient.deleted_at is not None:
+                return 0
+            tokens = patient_search_tokens(
+                patient.document_number, patient.name, patient.paternal_lastname, patient.maternal_lastname
+            )
+            PatientSearchToken.objects.bulk_create(
+                [PatientSearchToken(patient_id=patient.pk, token=token, field=field) for token, field in tokens]
+            )
+            return len(tokens)
+
+    def rebuild(self, chunk_size=2000):
+        """Reconstruye el índice completo. Devuelve (pacientes, palabras)."""
+        patients = tokens = 0
+        with transaction.atomic():
+            PatientSearchToken.objects.all().delete()
+            batch = []
+            rows = (
+                Patient.objects
+                .filter(deleted_at__isnull=True)
+                .values_list("id", "document_number", "name", "paternal_lastname", "maternal_lastname")
+                .iterator(chunk_size=chunk_size)
+            )
+            for patient_id, *values in rows:
+                patients += 1
+                for token, field in patient_search_tokens(*values):
+                    batch.append(PatientSearchToken(patient_id=patient_id, token=token, field=field))
+                if len(batch) >= chunk_size:
+                    PatientSearchToken.objects.bulk_create(batch)
+                    tokens += len(batch)
+                    batch = []
+            PatientSearchToken.objects.bulk_create(batch)
+            tokens += len(batch)
+        return patients, tokens
+
+    # --- Consulta ---
+
+    def _prefix_q(self, term):
+        upper = term + "z" * (PatientSearchToken.TOKEN_MAX_LENGTH - len(term))
+        return Q(token__gte=term, token__lte=upper)
+
+    def _term_score(self, term):
+        whens = []
+        for field, weight in self.FIELD_WEIGHTS.items():
+            whens.append(When(field=field, token=term, then=Value(weight * 2)))
+        for field, weight in self.FIELD_WEIGHTS.items():
+            whens.append(When(Q(field=field) & self._prefix_q(term), then=Value(weight)))
+        return Max(Case(*whens, default=Value(0), output_field=IntegerField()))
+
+    def ranked(self, query):
+        """
+        Queryset de {"patient_id", "score"} ordenado por relevancia (y luego por id
+        descendente, como el listado). None si la consulta no tiene palabras.
+        """
+        terms = search_terms(query)[:self.MAX_TERMS]
+        if not terms:
+            return None
+
+        scores = {f"term_{i}": self._term_score(term) for i, term in enumerate(terms)}
+        return (
+            PatientSearchToken.objects
+            .filter(reduce(or_, (self._prefix_q(term) for term in terms)), patient__deleted_at__isnull=True)
+            .values("patient_id")
+            .annotate(**scores)
+            .filter(**{f"{alias}__gt": 0 for alias in scores})
+            .annotate(score=reduce(add, (F(alias) for alias in scores)))
+            .order_by("-score", "-patient_id")
+            .values("patient_id", "score")
+        )
+
+
+patient_search_index = PatientSearchIndex()
@@ -4,31 +4,59 @@ from typing import Any, Dict, Tuple
 from rest_framework.exceptions import ValidationError
 from django.core.paginator import Paginator, EmptyPage
 from django.db import transaction
-from django.db.models import Q, Value
-from django.db.models.functions import Concat
 
+from architect.pagination import KeysetPaginator, parse_include_count, parse_page_size
 from ..models.patient import Patient
 from ..serializers.patient import PatientSerializer, PatientListSerializer
+from .patient_search_service import patient_search_index
 from ubi_geo.models import Region, Province, District
+from ubi_geo.services.geo_tree import geo_tree
 
 
 class PatientService:
+    # Tope de per_page en todas las lecturas paginadas, igual que la paginación por cursor
+    MAX_PAGE_SIZE = KeysetPaginator.MAX_PAGE_SIZE
+    # Pacientes por consulta al recorrer el listado completo
+    STREAM_CHUNK_SIZE = 500
+
+    def _list_queryset(self, serializer=PatientSerializer):
+        """Pacientes vigentes con las relaciones que usa el serializer que los va a leer."""
+        return serializer.setup_eager_loading(Patient.objects.filter(deleted_at__isnull=True))
+
     def get_all(self):
-        return Patient.objects.filter(deleted_at__isnull=True)
+        return self._list_queryset()
+
+    def get_by_id(self, pk):
+        """Paciente vigente listo para PatientSerializer; lanza Patient.DoesNotExist."""
+        return self._list_queryset().get(pk=pk)
+
+    def iter_all(self, chunk_size=None):
+        """
+        Recorre todos los pacientes vigentes (más recientes primero) en bloques de
+        chunk_size listos para PatientListSerializer. Cada bloque es una consulta
+        por keyset, así que la memoria no crece con la tabla.
+        """
+        paginator = KeysetPaginator(
+            self._list_queryset(PatientListSerializer), ("-created_at", "-id"), chunk_size or self.STREAM_CHUNK_SIZE,
+        )
+        cursor = None
+        while True:
+            page = paginator.page(cursor, include_count=False)
+            if page["results"]:
+                yield page["results"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
 
     def get_paginated(self, request):
-        per_page_raw = request.GET.get("per_page", 20)
+        per_page = parse_page_size(request.GET.get("per_page"), 20, self.MAX_PAGE_SIZE)
         page_raw = request.GET.get("page", 1)
-        try:
-            per_page = int(per_page_raw)
-        except (TypeError, ValueError):
-            per_page = 20
         try:
             page = int(page_raw)
         except (TypeError, ValueError):
             page = 1
 
-        queryset = Patient.objects.filter(deleted_at__isnull=True).order_by("-id")
+        queryset = self._list_queryset().order_by("-id")
         paginator = Paginator(queryset, per_page)
         try:
             page_obj = paginator.page(page)
@@ -36,34 +64,38 @@ class PatientService:
             page_obj = paginator.page(paginator.num_pages)
         return page_obj
 
+    def get_cursor_page(self, params: Dict[str, Any]):
+        """
+        Página por cursor (keyset sobre id descendente). Devuelve
+        {"results", "next_cursor", "count"?}; lanza InvalidCursor si el cursor no es válido.
+        """
+        per_page = parse_page_size(params.get("per_page"), 20, self.MAX_PAGE_SIZE)
+        queryset = self._list_queryset()
+        paginator = KeysetPaginator(queryset, ("-id",), per_page)
+        return paginator.page(params.get("cursor") or None, parse_include_count(params))
+
     def search_patients(self, params: Dict[str, Any]):
-        per_page_raw = params.get("per_page", 30)
+        per_page = parse_page_size(params.get("per_page"), 30, self.MAX_PAGE_SIZE)
         search_term = (params.get("search") or params.get("q") or "").strip()
-        try:
-            per_page = int(per_page_raw)
-        except (TypeError, ValueError):
-            per_page = 30
-
-        queryset = Patient.objects.filter(deleted_at__isnull=True).order_by("-id")
-        if search_term:
-            queryset = queryset.annotate(
-                paternal_name=Concat("paternal_lastname", Value(" "), "name"),
-                full_name=Concat("name", Value(" "), "paternal_lastname", Value(" "), "maternal_lastname"),
-                paternal_maternal_name=Concat("paternal_lastname", Value(" "), "maternal_lastname", Value(" "), "name"),
-            ).filter(
-                Q(document_number__iexact=search_term)
-                | Q(document_number__istartswith=search_term)
-                | Q(name__istartswith=search_term)
-                | Q(name__icontains=search_term)
-                | Q(paternal_lastname__istartswith=search_term)
-                | Q(paternal_lastname__icontains=search_term)
-                | Q(maternal_lastname__istartswith=search_term)
-                | Q(maternal_lastname__icontains=search_term)
-                | Q(paternal_name__istartswith=search_term)
-                | Q(full_name__istartswith=search_term)
-                | Q(paternal_maternal_name__istartswith=search_term)
-            )
 
+        if not search_term:
+            queryset = self._list_queryset().order_by("-id")
+            return self._first_page(queryset, per_page)
+
+        # Búsqueda por prefijo de documento y de palabras del nombre sobre el índice
+        # patient_search_tokens, ordenada por relevancia
+        ranked = patient_search_index.ranked(search_term)
+        if ranked is None:
+            return self._first_page(Patient.objects.none(), per_page)
+
+        page_obj = self._first_page(ranked, per_page)
+        ids = [row["patient_id"] for row in page_obj.object_list]
+        patients = self._list_queryset().in_bulk(ids)
+        page_obj.object_list = [patients[pk] for pk in ids if pk in patients]
+        return page_obj
+
+    @staticmethod
+    def _first_page(queryset, per_page):
         paginator = Paginator(queryset, per_page)
         try:
             page_obj = paginator.page(1)
@@ -89,7 +121,10 @@ class PatientService:
 
     @staticmethod
     def _validate_geo(region_id: Any, province_id: Any, district_id: Any):
-        """Valida que province pertenezca a region y district a province. Lanza ValidationError (400)."""
+        """
+        Valida que province pertenezca a region y district a province, con el árbol
+        geográfico en memoria. Lanza ValidationError (400).
+        """
         rid = PatientService._id_or_none(region_id)
         pid = PatientService._id_or_none(province_id)
         did = PatientService._id_or_none(district_id)
@@ -97,13 +132,13 @@ class PatientService:
         # si no hay alguno, no validamos jerarquía (permite parciales)
         if not (rid and pid):
             return
-        province = Province.objects.filter(id=pid).first()
-        if not province or province.region_id != rid:
+        province = geo_tree.node("province", pid)
+        if not province or province.parent_id != rid:
             raise ValidationError({"province": "La provincia seleccionada no pertenece a la región indicada."})
 
         if did:
-            district = District.objects.filter(id=did).first()
-            if not district or district.province_id != pid:
+            district = geo_tree.node("district", did)
+            if not district or district.parent_id != pid:
                 raise ValidationError({"district": "El distrito seleccionado no pertenece a la provincia indicada."})
 
     # ---------- operaciones ----------
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Patient
+from .services.patient_search_service import INDEXED_FIELDS, patient_search_index
+from .services.patient_duplicate_service import DUPLICATE_KEY_FIELDS, patient_duplicate_index
+
+
+@receiver(post_save, sender=Patient)
+def update_patient_search_index(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mantiene patient_search_tokens al crear, editar, eliminar (soft delete) o restaurar
+    un paciente. Los saves que no tocan documento, nombres ni deleted_at no reindexan.
+    El borrado físico lo resuelve el CASCADE de la tabla.
+    """
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    patient_search_index.index_patient(instance)
+
+
+@receiver(post_save, sender=Patient)
+def update_patient_duplicate_keys(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mantiene patient_duplicate_keys igual que el índice de búsqueda: solo cuando cambia
+    el documento, un nombre o deleted_at. Los pares candidatos se recalculan en lote
+    (find_patient_duplicates).
+    """
+    if update_fields is not None and not set(update_fields) & set(DUPLICATE_KEY_FIELDS):
+        return
+    patient_duplicate_index.index_patient(instance)
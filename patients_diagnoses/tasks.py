@@ -0,0 +1,8 @@
+from celery import shared_task
+from patients_diagnoses.services.patient_duplicate_service import patient_duplicate_index
+
+
+@shared_task
+def find_patient_duplicates():
+    """Recalcula los pares de posibles pacientes duplicados (ver find_patient_duplicates)."""
+    return patient_duplicate_index.find_candidates()
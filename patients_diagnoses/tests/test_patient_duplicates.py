@@ -0,0 +1,160 @@
+from datetime import date, time, timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from appointments_status.models import Appointment
+from appointments_status.tests.factories import create_location, create_therapists
+from histories_configurations.models import History
+from patients_diagnoses.models import (
+    Diagnosis, MedicalRecord, Patient, PatientDuplicateCandidate, PatientDuplicateKey, PatientSearchToken,
+)
+from patients_diagnoses.services.patient_duplicate_service import (
+    PatientMergeService,
+    duplicate_keys,
+    patient_duplicate_index,
+    spanish_phonetic,
+)
+
+
+class DuplicateKeyTests(SimpleTestCase):
+
+    def test_spanish_phonetic(self):
+        self.assertEqual(spanish_phonetic("Vásquez"), spanish_phonetic("Vasques"))
+        self.assertEqual(spanish_phonetic("Huamán"), spanish_phonetic("Guamán"))
+        self.assertEqual(spanish_phonetic("Llanos"), spanish_phonetic("Yanos"))
+        self.assertEqual(spanish_phonetic("Quispe"), "KSP")
+        self.assertEqual(spanish_phonetic(""), "")
+
+    def test_document_and_name_keys_ignore_formatting_and_order(self):
+        keys = duplicate_keys("00.123.456-7", "José", "Pérez", "Quispe")
+        swapped = duplicate_keys("1234567", "jose", "QUISPE", "PEREZ")
+
+        self.assertIn((PatientDuplicateKey.KIND_DOCUMENT, "1234567"), keys)
+        self.assertIn((PatientDuplicateKey.KIND_NAME, "jose perez quispe"), keys)
+        self.assertEqual(
+            {key for key in keys if key[0] in (PatientDuplicateKey.KIND_DOCUMENT, PatientDuplicateKey.KIND_NAME)},
+            {key for key in swapped if key[0] in (PatientDuplicateKey.KIND_DOCUMENT, PatientDuplicateKey.KIND_NAME)},
+        )
+
+    def test_short_documents_are_not_keys(self):
+        kinds = {kind for kind, _key in duplicate_keys("123", "Ana", "Soto", "Ruiz")}
+        self.assertNotIn(PatientDuplicateKey.KIND_DOCUMENT, kinds)
+
+
+class PatientDuplicateTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = create_location("Duplicados")
+
+    def create_patient(self, document_number, name, paternal, maternal):
+        return Patient.objects.create(
+            document_number=document_number, name=name, paternal_lastname=paternal, maternal_lastname=maternal,
+            email=f"{document_number}@example.com", ocupation="-", health_condition="-", **self.location,
+        )
+
+    def pending_pairs(self):
+        return set(
+            PatientDuplicateCandidate.objects.filter(status=PatientDuplicateCandidate.STATUS_PENDING)
+            .values_list("patient_id", "duplicate_id")
+        )
+
+
+class FindCandidatesTests(PatientDuplicateTestCase):
+
+    def setUp(self):
+        self.jose = self.create_patient("40111222", "José", "Vásquez", "Quispe")
+        self.jose_again = self.create_patient("40999888", "Jose", "Vasques", "Quispe")
+        self.other = self.create_patient("50111222", "María", "Torres", "Rojas")
+
+    def test_similar_patients_are_proposed(self):
+        stats = patient_duplicate_index.find_candidates()
+
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(self.pending_pairs(), {(self.jose.pk, self.jose_again.pk)})
+
+    def test_dismissed_pairs_are_not_proposed_again(self):
+        patient_duplicate_index.find_candidates()
+        PatientDuplicateCandidate.objects.update(status=PatientDuplicateCandidate.STATUS_DISMISSED)
+
+        stats = patient_duplicate_index.find_candidates()
+
+        self.assertEqual((stats["created"], stats["removed"]), (0, 0))
+        self.assertEqual(self.pending_pairs(), set())
+        self.assertEqual(PatientDuplicateCandidate.objects.get().status, PatientDuplicateCandidate.STATUS_DISMISSED)
+
+    def test_merged_pairs_are_not_proposed_again(self):
+        PatientMergeService().merge(self.jose.pk, [self.jose_again.pk])
+        # Aunque el duplicado vuelva a estar activo, el par ya está registrado como fusión
+        Patient.objects.filter(pk=self.jose_again.pk).update(deleted_at=None)
+        patient_duplicate_index.index_patient(Patient.objects.get(pk=self.jose_again.pk))
+
+        stats = patient_duplicate_index.find_candidates()
+
+        self.assertEqual(stats["created"], 0)
+        self.assertEqual(self.pending_pairs(), set())
+
+
+class PatientMergeTests(PatientDuplicateTestCase):
+
+    def setUp(self):
+        self.survivor = self.create_patient("41111111", "Rosa", "Huamán", "Flores")
+        self.duplicate = self.create_patient("42222222", "Rosa", "Guamán", "Flores")
+        self.therapist = create_therapists(self.location, 1)[0]
+        start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment = Appointment.objects.create(
+                patient=self.duplicate, therapist=self.therapist, appointment_date=start, hour=time(9, 0),
+            )
+        self.history = History.objects.create(patient=self.duplicate)
+        shared = Diagnosis.objects.create(code="M54.5", name="Lumbalgia")
+        only_duplicate = Diagnosis.objects.create(code="M25.5", name="Dolor articular")
+        MedicalRecord.objects.create(patient=self.survivor, diagnose=shared, diagnosis_date=date(2025, 1, 10))
+        self.clashing = MedicalRecord.objects.create(
+            patient=self.duplicate, diagnose=shared, diagnosis_date=date(2025, 2, 10),
+        )
+        self.movable = MedicalRecord.objects.create(
+            patient=self.duplicate, diagnose=only_duplicate, diagnosis_date=date(2025, 3, 10),
+        )
+
+    def test_rows_move_to_the_survivor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = PatientMergeService().merge(self.survivor.pk, [self.duplicate.pk])
+
+        self.assertEqual(moved["appointments"], 1)
+        self.assertEqual(moved["histories"], 1)
+        self.assertEqual(Appointment.objects.get(pk=self.appointment.pk).patient_id, self.survivor.pk)
+        self.assertEqual(History.objects.get(pk=self.history.pk).patient_id, self.survivor.pk)
+        self.assertEqual(MedicalRecord.objects.get(pk=self.movable.pk).patient_id, self.survivor.pk)
+
+    def test_unique_medical_records_stay_on_the_duplicate(self):
+        moved = PatientMergeService().merge(self.survivor.pk, [self.duplicate.pk])
+
+        self.assertEqual(moved["medical_records"], 1)
+        self.assertEqual(moved["medical_records (sin mover)"], 1)
+        self.assertEqual(MedicalRecord.objects.get(pk=self.clashing.pk).patient_id, self.duplicate.pk)
+
+    def test_duplicate_is_deleted_and_unindexed(self):
+        PatientMergeService().merge(self.survivor.pk, [self.duplicate.pk])
+
+        self.assertIsNotNone(Patient.objects.get(pk=self.duplicate.pk).deleted_at)
+        self.assertFalse(PatientSearchToken.objects.filter(patient_id=self.duplicate.pk).exists())
+        self.assertFalse(PatientDuplicateKey.objects.filter(patient_id=self.duplicate.pk).exists())
+        merged = PatientDuplicateCandidate.objects.get(duplicate_id=self.duplicate.pk)
+        self.assertEqual((merged.patient_id, merged.status), (self.survivor.pk, PatientDuplicateCandidate.STATUS_MERGED))
+
+    def test_missing_or_deleted_patients_raise(self):
+        service = PatientMergeService()
+        missing = Patient.objects.order_by("-pk").values_list("pk", flat=True).first() + 1000
+
+        with self.assertRaises(ValueError):
+            service.merge(self.survivor.pk, [missing])
+        with self.assertRaises(ValueError):
+            service.merge(self.survivor.pk, [self.survivor.pk])
+
+        Patient.objects.filter(pk=self.duplicate.pk).update(deleted_at=timezone.now())
+        with self.assertRaises(ValueError):
+            service.merge(self.survivor.pk, [self.duplicate.pk])
+        # Nada se movió
+        self.assertEqual(Appointment.objects.get(pk=self.appointment.pk).patient_id, self.duplicate.pk)
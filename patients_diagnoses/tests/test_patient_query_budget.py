@@ -0,0 +1,89 @@
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from histories_configurations.models import DocumentType
+from patients_diagnoses.models import Patient
+from patients_diagnoses.views.patient import PatientListCreateView, PatientRetrieveUpdateDeleteView, PatientSearchView
+from ubi_geo.models import Country, District, Province, Region
+from ubi_geo.services.geo_tree import geo_tree
+
+
+class _BudgetUser:
+    """Usuario mínimo para pasar IsAuthenticated sin tocar la tabla de usuarios."""
+    is_authenticated = True
+    is_active = True
+    pk = None
+
+
+class PatientQueryBudgetTests(TestCase):
+    """
+    Listado, búsqueda y detalle de pacientes con un número fijo de consultas: si el
+    presupuesto crece con ROWS hay un N+1.
+    """
+
+    ROWS = 40
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Budget")
+        region = Region.objects.create(name="Budget", country=country)
+        province = Province.objects.create(name="Budget", region=region)
+        district = District.objects.create(name="Budget", province=province)
+        document_type = DocumentType.objects.create(name="BUDGET")
+        location = {"region": region, "province": province, "district": district, "document_type": document_type}
+        cls.patients = [
+            Patient.objects.create(
+                document_number=f"9{i:07d}", name=f"Budget{i}",
+                paternal_lastname=f"Paterno{i}", maternal_lastname=f"Materno{i}",
+                email=f"budget{i}@example.com", ocupation="-", health_condition="-", **location,
+            )
+            for i in range(cls.ROWS)
+        ]
+
+    def setUp(self):
+        # La ubicación sembrada solo existe en esta transacción: el árbol se carga aquí,
+        # fuera de la medición, para que los serializers no caigan a la base
+        geo_tree.invalidate()
+        geo_tree.get()
+        self.addCleanup(geo_tree.invalidate)
+
+    def _get(self, view_class, params=None, **kwargs):
+        request = APIRequestFactory().get("/", params or {})
+        force_authenticate(request, user=_BudgetUser())
+        response = view_class.as_view()(request, **kwargs)
+        # El listado completo se transmite: se consume dentro de la medición
+        if response.streaming:
+            return response, json.loads(b"".join(response.streaming_content))
+        response.render()
+        return response, response.data
+
+    def assertBudget(self, budget, view_class, params=None, **kwargs):
+        with self.assertNumQueries(budget):
+            response, data = self._get(view_class, params, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return data
+
+    def test_full_list_reads_one_query_per_chunk(self):
+        data = self.assertBudget(1, PatientListCreateView)
+        self.assertEqual(len(data), self.ROWS)
+
+    def test_page(self):
+        data = self.assertBudget(2, PatientListCreateView, {"page": 1, "per_page": 20})
+        self.assertEqual(len(data["results"]), 20)
+
+    def test_cursor(self):
+        data = self.assertBudget(2, PatientListCreateView, {"cursor": "", "per_page": 20})
+        self.assertEqual(len(data["results"]), 20)
+
+    def test_search_without_term(self):
+        self.assertBudget(2, PatientSearchView)
+
+    def test_search(self):
+        data = self.assertBudget(3, PatientSearchView, {"search": "Budget"})
+        self.assertTrue(data["results"])
+
+    def test_detail(self):
+        data = self.assertBudget(1, PatientRetrieveUpdateDeleteView, pk=self.patients[0].pk)
+        self.assertEqual(data["id"], self.patients[0].pk)
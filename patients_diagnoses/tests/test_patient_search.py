@@ -0,0 +1,77 @@
+from django.test import SimpleTestCase, TestCase
+
+from appointments_status.tests.factories import create_location
+from patients_diagnoses.models import Patient, PatientSearchToken
+from patients_diagnoses.services.patient_search_service import (
+    normalize_search_text,
+    patient_search_index,
+    patient_search_tokens,
+)
+
+
+class SearchTextTests(SimpleTestCase):
+
+    def test_accents_and_punctuation_are_folded(self):
+        self.assertEqual(normalize_search_text("Pérez-Ñaupari"), "perez naupari")
+        self.assertEqual(normalize_search_text("  MÜLLER  "), "muller")
+        self.assertEqual(normalize_search_text(None), "")
+
+    def test_document_is_indexed_as_a_single_token(self):
+        tokens = patient_search_tokens("12.345.678-K", "José Luis", "Pérez", "Quispe")
+
+        self.assertIn(("12345678k", PatientSearchToken.FIELD_DOCUMENT), tokens)
+        self.assertIn(("jose", PatientSearchToken.FIELD_NAME), tokens)
+        self.assertIn(("luis", PatientSearchToken.FIELD_NAME), tokens)
+
+
+class PatientSearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = create_location("Busqueda")
+        cls.perez = cls.create_patient("45678901", "Ana", "Pérez", "Quispe")
+        cls.perez_name = cls.create_patient("70000001", "Pérez", "Torres", "Rojas")
+        cls.naupari = cls.create_patient("12345678", "José", "Ñaupari", "Gutiérrez")
+
+    @classmethod
+    def create_patient(cls, document_number, name, paternal, maternal):
+        return Patient.objects.create(
+            document_number=document_number, name=name, paternal_lastname=paternal, maternal_lastname=maternal,
+            email=f"{document_number}@example.com", ocupation="-", health_condition="-", **cls.location,
+        )
+
+    def search(self, query):
+        return [row["patient_id"] for row in patient_search_index.ranked(query)]
+
+    def test_accent_insensitive(self):
+        self.assertEqual(self.search("naupari"), [self.naupari.pk])
+        self.assertEqual(self.search("ÑAUPARÍ"), [self.naupari.pk])
+        self.assertEqual(self.search("gutierrez jose"), [self.naupari.pk])
+
+    def test_document_prefix(self):
+        self.assertEqual(self.search("1234"), [self.naupari.pk])
+        self.assertEqual(self.search("12345678"), [self.naupari.pk])
+        self.assertEqual(self.search("2345"), [])
+
+    def test_ranking_prefers_exact_and_surname_matches(self):
+        # Exacta en el apellido paterno antes que exacta en el nombre
+        self.assertEqual(self.search("perez"), [self.perez.pk, self.perez_name.pk])
+        # Un prefijo del apellido vale menos que la palabra completa, aunque sea en el nombre
+        longer = self.create_patient("80000001", "Luis", "Perezoso", "Soto")
+        self.assertEqual(self.search("perez"), [self.perez.pk, self.perez_name.pk, longer.pk])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search("perez ana"), [self.perez.pk])
+        self.assertEqual(self.search("perez jose"), [])
+
+    def test_soft_deleted_patients_leave_the_index(self):
+        self.perez.soft_delete()
+
+        self.assertFalse(PatientSearchToken.objects.filter(patient_id=self.perez.pk).exists())
+        self.assertEqual(self.search("perez"), [self.perez_name.pk])
+
+        self.perez.restore()
+        self.assertEqual(self.search("perez"), [self.perez.pk, self.perez_name.pk])
+
+    def test_empty_query(self):
+        self.assertIsNone(patient_search_index.ranked(" - "))
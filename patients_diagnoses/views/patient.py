@@ -2,6 +2,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from architect.pagination import InvalidCursor, wants_cursor_pagination
 from ..models.patient import Patient
 from ..serializers.patient import PatientSerializer, PatientListSerializer
 from ..services.patient_service import PatientService
@@ -11,6 +14,14 @@ class PatientListCreateView(APIView):
     serializer_class = PatientSerializer
     queryset = Patient.objects.all()
     def get(self, request):
+        # Paginación por cursor: ?cursor= (vacío en la primera página) o ?pagination=cursor
+        if wants_cursor_pagination(request.GET):
+            try:
+                page = patient_service.get_cursor_page(request.GET)
+            except InvalidCursor as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            page["results"] = PatientSerializer(page["results"], many=True).data
+            return Response(page)
         # Paginación opcional: si viene per_page o page, usar servicio de paginación
         if "per_page" in request.GET or "page" in request.GET:
             page_obj = patient_service.get_paginated(request)
@@ -21,9 +32,20 @@ class PatientListCreateView(APIView):
                 "current_page": page_obj.number,
                 "results": serializer.data,
             })
-        patients = Patient.objects.filter(deleted_at__isnull=True)
-        serializer = PatientListSerializer(patients, many=True)
-        return Response(serializer.data)
+        # Sin paginación: la misma lista JSON, pero enviada por bloques a medida que se
+        # lee, en vez de cargar y serializar todos los pacientes de una vez
+        return StreamingHttpResponse(self._stream_all(), content_type="application/json")
+
+    @staticmethod
+    def _stream_all():
+        renderer = JSONRenderer()
+        yield b"["
+        separator = b""
+        for patients in patient_service.iter_all():
+            # render() de una lista da "[...]": se quitan los corchetes y se unen los bloques
+            yield separator + renderer.render(PatientListSerializer(patients, many=True).data)[1:-1]
+            separator = b","
+        yield b"]"
 
     def post(self, request):
         serializer = PatientSerializer(data=request.data)
@@ -43,7 +65,7 @@ class PatientListCreateView(APIView):
 class PatientRetrieveUpdateDeleteView(APIView):
     def get(self, request, pk):
         try:
-            patient = Patient.objects.get(pk=pk, deleted_at__isnull=True)
+            patient = patient_service.get_by_id(pk)
         except Patient.DoesNotExist:
             return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
         serializer = PatientSerializer(patient)
@@ -51,7 +73,7 @@ class PatientRetrieveUpdateDeleteView(APIView):
     
     def put(self, request, pk):
         try:
-            patient = Patient.objects.get(pk=pk, deleted_at__isnull=True)
+            patient = patient_service.get_by_id(pk)
         except Patient.DoesNotExist:
             return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
         serializer = PatientSerializer(patient, data=request.data)
@@ -65,7 +87,7 @@ class PatientRetrieveUpdateDeleteView(APIView):
 
     def delete(self, request, pk):
         try:
-            patient = Patient.objects.get(pk=pk, deleted_at__isnull=True)
+            patient = patient_service.get_by_id(pk)
         except Patient.DoesNotExist:
             return Response({'error': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
         patient_service.destroy(patient)
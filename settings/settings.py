@@ -112,6 +112,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'settings.wsgi.application'
 
+# Los tests crean las tablas de los modelos no gestionados (ver settings/test_runner.py)
+TEST_RUNNER = 'settings.test_runner.UnmanagedTablesTestRunner'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -156,7 +159,11 @@ AUTH_PASSWORD_VALIDATORS = [
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'UTC'
+# Zona de la clínica: define el "día" de citas, tickets, caja y reportes. Antes el valor era
+# UTC; en una base cuyos días locales se calcularon con UTC, al pasar a esta zona las citas
+# cercanas a la medianoche cambian de día: ejecutar backfill_local_dates --all,
+# backfill_slot_reservations --rebuild, rebuild_payment_ledger y rebuild_daily_rollup
+TIME_ZONE = config('TIME_ZONE', default='America/Lima')
 
 USE_I18N = True
 
@@ -228,6 +235,33 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 # Celery Results Configuration
 CELERY_RESULT_EXPIRES = 3600  # 1 hora
 
+# Ejecutar tareas en el mismo proceso (desarrollo/tests sin worker ni Redis)
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-report-jobs': {
+        'task': 'company_reports.tasks.purge_expired_report_jobs',
+        'schedule': 60 * 60,
+    },
+    'find-patient-duplicates': {
+        'task': 'patients_diagnoses.tasks.find_patient_duplicates',
+        'schedule': 60 * 60 * 24,
+    },
+    'reconcile-payment-ledger': {
+        'task': 'appointments_status.tasks.reconcile_payment_ledger',
+        'schedule': 60 * 60 * 24,
+    },
+}
+
+# Días hacia atrás que revisa la conciliación nocturna del libro de pagos
+PAYMENT_LEDGER_RECONCILE_DAYS = config('PAYMENT_LEDGER_RECONCILE_DAYS', default=2, cast=int)
+
+# Exportaciones en segundo plano (segundos): vigencia del archivo y tiempo máximo en cola/proceso
+REPORT_JOB_RESULT_TTL = config('REPORT_JOB_RESULT_TTL', default=60 * 60 * 24, cast=int)
+REPORT_JOB_STALE_AFTER = config('REPORT_JOB_STALE_AFTER', default=60 * 60, cast=int)
+# Archivos de exportaciones: fuera de MEDIA_ROOT para que nginx no los sirva
+REPORT_JOB_ROOT = config('REPORT_JOB_ROOT', default=str(BASE_DIR / 'private' / 'report_jobs'))
+
 # Cache Configuration
 CACHES = {
     'default': {
@@ -236,6 +270,34 @@ CACHES = {
     }
 }
 
+# Caché de reportes (segundos): días pasados, rangos que incluyen hoy y candado de recálculo
+REPORT_CACHE_TIMEOUT = config('REPORT_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+REPORT_CACHE_TODAY_TIMEOUT = config('REPORT_CACHE_TODAY_TIMEOUT', default=60, cast=int)
+REPORT_CACHE_LOCK_TIMEOUT = config('REPORT_CACHE_LOCK_TIMEOUT', default=30, cast=int)
+
+# PDFs de reportes: filas por bloque al generar documentos grandes
+REPORT_PDF_CHUNK_SIZE = config('REPORT_PDF_CHUNK_SIZE', default=500, cast=int)
+
+# Máximo de días de los reportes por día con start_date/end_date
+REPORT_RANGE_MAX_DAYS = config('REPORT_RANGE_MAX_DAYS', default=92, cast=int)
+# Reporte genérico: máximo de periodos de su agrupación temporal (días, semanas o meses)
+REPORT_QUERY_MAX_BUCKETS = config('REPORT_QUERY_MAX_BUCKETS', default=92, cast=int)
+
+# Agenda: duración de cada cita, paso de los horarios libres (minutos) y jornada de atención
+APPOINTMENT_DURATION_MINUTES = config('APPOINTMENT_DURATION_MINUTES', default=60, cast=int)
+APPOINTMENT_SLOT_MINUTES = config('APPOINTMENT_SLOT_MINUTES', default=30, cast=int)
+APPOINTMENT_DAY_START = config('APPOINTMENT_DAY_START', default='08:00')
+APPOINTMENT_DAY_END = config('APPOINTMENT_DAY_END', default='20:00')
+
+# Numeración de tickets: números reservados por proceso en cada ida a la base de datos
+TICKET_NUMBER_BLOCK_SIZE = config('TICKET_NUMBER_BLOCK_SIZE', default=1, cast=int)
+
+# Árbol geográfico en memoria: cada cuántos segundos se compara su versión con la de Redis
+GEO_TREE_CHECK_SECONDS = config('GEO_TREE_CHECK_SECONDS', default=5, cast=int)
+
+# Árbol de ubicaciones (/api/locations/tree/): segundos que el navegador lo reutiliza sin revalidar
+LOCATION_TREE_MAX_AGE = config('LOCATION_TREE_MAX_AGE', default=86400, cast=int)
+
 # Session Configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
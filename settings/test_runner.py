@@ -0,0 +1,26 @@
+from django.apps import apps
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+class UnmanagedTablesTestRunner(DiscoverRunner):
+    """
+    Crea en las bases de prueba las tablas de los modelos con managed = False
+    (payment_status, users_verification_code). En producción ya existen en MySQL,
+    pero las migraciones no las generan y las FK hacia ellas romperían los tests.
+    """
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        unmanaged = [
+            model for model in apps.get_models()
+            if not model._meta.managed and not model._meta.proxy
+        ]
+        for alias in connections:
+            connection = connections[alias]
+            existing = set(connection.introspection.table_names())
+            with connection.schema_editor() as editor:
+                for model in unmanaged:
+                    if model._meta.db_table not in existing:
+                        editor.create_model(model)
+        return old_config
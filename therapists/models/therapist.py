@@ -1,8 +1,9 @@
 from django.db import models
 from ubi_geo.models import Region, Province, District
 from histories_configurations.models import DocumentType
+from architect.models.tracking import DirtyFieldsMixin
 
-class Therapist(models.Model):
+class Therapist(DirtyFieldsMixin, models.Model):
     """
     Modelo para gestionar los terapeutas.
     Basado en la estructura de la tabla therapists de la BD.
@@ -2,31 +2,31 @@ import re
 from datetime import date
 from rest_framework import serializers
 from therapists.models import Therapist 
-from ubi_geo.models import Region, Province, District
-from ubi_geo.serializers import RegionSerializer, ProvinceSerializer, DistrictSerializer
+from ubi_geo.serializers.fields import GeoNestedField, GeoPrimaryKeyField
+from ubi_geo.services.geo_tree import geo_tree
 from histories_configurations.models import DocumentType
 from histories_configurations.serializers import DocumentTypeSerializer
 
 class TherapistSerializer(serializers.ModelSerializer):
-    # Serializadores anidados para mostrar datos completos
-    region = RegionSerializer(read_only=True)
-    province = ProvinceSerializer(read_only=True)
-    district = DistrictSerializer(read_only=True)
+    # Ubicación anidada desde el árbol geográfico en memoria (sin consultas por fila)
+    region = GeoNestedField("region")
+    province = GeoNestedField("province")
+    district = GeoNestedField("district")
     document_type = DocumentTypeSerializer(read_only=True)  # Para lectura
     
     # Campos para escritura (crear/actualizar)
-    region_id = serializers.PrimaryKeyRelatedField(
-        queryset=Region.objects.all(), 
+    region_id = GeoPrimaryKeyField(
+        "region",
         source='region', 
         write_only=True
     )
-    province_id = serializers.PrimaryKeyRelatedField(
-        queryset=Province.objects.all(), 
+    province_id = GeoPrimaryKeyField(
+        "province",
         source='province', 
         write_only=True
     )
-    district_id = serializers.PrimaryKeyRelatedField(
-        queryset=District.objects.all(), 
+    district_id = GeoPrimaryKeyField(
+        "district",
         source='district', 
         write_only=True
     )
@@ -69,26 +69,40 @@ class TherapistSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'deleted_at']
         
+    def update(self, instance, validated_data):
+        # Solo escribe los campos que cambian; un PATCH sin cambios no hace UPDATE
+        instance.apply_changes(validated_data)
+        instance.save_changes()
+        return instance
+
     def validate(self, attrs):
         """
         Asegura coherencia jerárquica:
         province debe pertenecer a region
         district debe pertenecer a province
+        (por ids, con el árbol geográfico; no carga las relaciones de la instancia)
         """
-        region = attrs.get("region") or getattr(self.instance, "region", None)
-        province = attrs.get("province") or getattr(self.instance, "province", None)
-        district = attrs.get("district") or getattr(self.instance, "district", None)
+        region_id = self._geo_id(attrs, "region")
+        province_id = self._geo_id(attrs, "province")
+        district_id = self._geo_id(attrs, "district")
 
-        if province and region and province.region_id != region.id:
+        province = geo_tree.node("province", province_id) if province_id else None
+        district = geo_tree.node("district", district_id) if district_id else None
+        if province and region_id and province.parent_id != region_id:
             raise serializers.ValidationError(
                 "La provincia seleccionada no pertenece a la región."
             )
-        if district and province and district.province_id != province.id:
+        if district and province_id and district.parent_id != province_id:
             raise serializers.ValidationError(
                 "El distrito seleccionado no pertenece a la provincia."
             )
         return attrs
 
+    def _geo_id(self, attrs, field):
+        if attrs.get(field) is not None:
+            return attrs[field].pk
+        return getattr(self.instance, f"{field}_id", None)
+
     def validate_document_number(self, value):
         # Obtener el tipo de documento desde los datos iniciales o la instancia
         doc_type_id = self.initial_data.get("document_type_id")
@@ -40,14 +40,11 @@ class TherapistViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """
-        - Usa select_related para evitar N+1 en las FKs de ubicación.
+        - La ubicación se serializa desde el árbol geográfico en memoria (sin JOIN).
         - Filtra por activo/inactivo (param 'active').
         - Filtra opcionalmente por IDs de region/province/district.
         """
-        qs = (
-            Therapist.objects.select_related("region", "province", "district")
-            .all()
-        )
+        qs = Therapist.objects.all()
 
         # filtro por estado (activo por defecto)
         active = self.request.query_params.get("active", "true").lower()
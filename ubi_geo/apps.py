@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UbiGeoConfig(AppConfig):   # <-- SIN guion bajo
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ubi_geo'
+
+    def ready(self):
+        """
+        Importar signals cuando la app esté lista.
+        """
+        import ubi_geo.signals
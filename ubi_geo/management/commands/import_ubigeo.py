@@ -1,9 +1,13 @@
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
+from contextlib import contextmanager
 from pathlib import Path
 import csv
+import time
 
 from ubi_geo.models import Country, Region, Province, District
+from ubi_geo.services.geo_tree import geo_tree
 
 def getv(row, *cands):
     for k in cands:
@@ -13,8 +17,23 @@ def getv(row, *cands):
                 return v
     return ""
 
+
+class Pending:
+    """Fila que se insertará en esta importación (aún sin id): sus hijos serán altas."""
+
+    def __init__(self, label):
+        self.label = label
+
+    def __repr__(self):
+        return self.label
+
+
 class Command(BaseCommand):
-    help = "Importa countries, regions, provinces y districts desde CSV (';'). Usa códigos solo para vincular."
+    help = (
+        "Importa countries, regions, provinces y districts desde CSV (';'). Usa códigos solo para vincular. "
+        "Carga en memoria lo que ya existe, calcula altas, cambios y filas sin cambios, y lo aplica con "
+        "bulk_create/bulk_update por lotes en una sola transacción."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("--path", type=str, default="db",
@@ -22,7 +41,14 @@ class Command(BaseCommand):
         parser.add_argument("--country-iso2", type=str, required=True,
                             help="ISO2 del país a usar para todas las regiones (ej: PE)")
         parser.add_argument("--truncate", action="store_true",
-                            help="Borra Region/Province/District antes de importar")
+                            help="Borra Region/Province/District antes de importar (solo si ningún "
+                                 "paciente ni terapeuta las usa)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Informa las diferencias sin escribir nada")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Filas por INSERT/UPDATE")
+        parser.add_argument("--show", type=int, default=10,
+                            help="Altas y cambios listados por nivel con --dry-run")
 
     def handle(self, *args, **opt):
         base = Path(opt["path"]).resolve()
@@ -36,98 +62,226 @@ class Command(BaseCommand):
             if not p.exists():
                 raise CommandError(f"No se encontró {name}: {p}")
 
-        iso2 = (opt["country_iso2"] or "").upper().strip()
+        self.iso2 = (opt["country_iso2"] or "").upper().strip()
+        self.batch_size = max(1, opt["batch_size"])
+        self.apply = not opt["dry_run"]
+        self.timings = []
+
+        with self._timed("lectura de CSV"):
+            rows = {name: self._read(p) for name, p in files.items()}
 
         if opt["truncate"]:
-            self.stdout.write(self.style.WARNING("Truncando Region/Province/District…"))
-            District.objects.all().delete()
-            Province.objects.all().delete()
-            Region.objects.all().delete()
+            self._check_truncate()
 
         with transaction.atomic():
-            # COUNTRIES
-            self.stdout.write("Importando countries…")
-            iso2_map = {}
-            with files["countries"].open(encoding="utf-8", newline="") as f:
-                r = csv.DictReader(f, delimiter=";")
-                c_new = c_upd = c_skip = 0
-                for row in r:
-                    name = getv(row, "name", "Name")
-                    phone_code = getv(row, "phone_code", "PhoneCode") or None
-                    ISO2 = getv(row, "ISO2", "iso2").upper()
-                    if not name:
-                        c_skip += 1
-                        continue
-                    obj, created = Country.objects.update_or_create(
-                        **({"ISO2": ISO2} if ISO2 else {"name": name}),
-                        defaults={"name": name, "phone_code": phone_code, "ISO2": ISO2 or None},
-                    )
-                    if ISO2:
-                        iso2_map[ISO2] = obj
-                    c_new += int(created)
-                    c_upd += int(not created)
-                self.stdout.write(f"Countries: +{c_new} upd:{c_upd} skip:{c_skip}")
-
-            try:
-                country = iso2_map.get(iso2) or Country.objects.get(ISO2=iso2)
-            except Country.DoesNotExist:
-                raise CommandError(f"No existe Country ISO2={iso2}")
-
-            # REGIONS
-            self.stdout.write("Importando regiones…")
-            code_to_region = {}
-            with files["regions"].open(encoding="utf-8", newline="") as f:
-                r = csv.DictReader(f, delimiter=";")
-                n = u = s = 0
-                for row in r:
-                    code = getv(row, "code", "ubigeo_code")
-                    name = getv(row, "name", "Nombre")
-                    if not name:
-                        s += 1; continue
-                    obj, created = Region.objects.update_or_create(
-                        name=name, country=country, defaults={}
-                    )
-                    if code:
-                        code_to_region[code] = obj
-                    n += int(created); u += int(not created)
-                self.stdout.write(f"Regions: +{n} upd:{u} skip:{s}")
-
-            # PROVINCES
-            self.stdout.write("Importando provincias…")
-            code_to_province = {}
-            with files["provinces"].open(encoding="utf-8", newline="") as f:
-                r = csv.DictReader(f, delimiter=";")
-                n = u = s = 0
-                for row in r:
-                    code = getv(row, "code", "ubigeo_code")
-                    name = getv(row, "name", "Nombre")
-                    region_ref = getv(row, "region_code", "region_id")
-                    region = code_to_region.get(region_ref)
-                    if not (name and region):
-                        s += 1; continue
-                    obj, created = Province.objects.update_or_create(
-                        name=name, region=region, defaults={}
-                    )
-                    if code:
-                        code_to_province[code] = obj
-                    n += int(created); u += int(not created)
-                self.stdout.write(f"Provinces: +{n} upd:{u} skip:{s}")
-
-            # DISTRICTS
-            self.stdout.write("Importando distritos…")
-            n = u = s = 0
-            with files["districts"].open(encoding="utf-8", newline="") as f:
-                r = csv.DictReader(f, delimiter=";")
-                for row in r:
-                    name = getv(row, "name", "Nombre")
-                    prov_ref = getv(row, "province_code", "province_id")
-                    province = code_to_province.get(prov_ref)
-                    if not (name and province):
-                        s += 1; continue
-                    _, created = District.objects.update_or_create(
-                        name=name, province=province, defaults={}
-                    )
-                    n += int(created); u += int(not created)
-            self.stdout.write(f"Districts: +{n} upd:{u} skip:{s}")
-
-        self.stdout.write(self.style.SUCCESS("Importación completada ✔"))
+            if opt["truncate"] and self.apply:
+                with self._timed("truncado"):
+                    self._truncate()
+            diff = self._import(rows, fresh=opt["truncate"])
+            if not self.apply:
+                transaction.set_rollback(True)
+
+        self._report(diff, opt["show"] if not self.apply else 0)
+        changed = opt["truncate"] or any(level["insert"] or level["update"] for level in diff.values())
+        if self.apply and changed:
+            # bulk_create/bulk_update no disparan señales: el árbol en memoria se invalida aquí
+            geo_tree.invalidate()
+        self._report_timings()
+        if not self.apply:
+            self.stdout.write(self.style.WARNING("Simulación (--dry-run): no se escribió nada"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Importación completada ✔"))
+
+    @staticmethod
+    def _read(path):
+        with path.open(encoding="utf-8", newline="") as f:
+            return list(csv.DictReader(f, delimiter=";"))
+
+    # --- Truncado ---
+
+    def _check_truncate(self):
+        """
+        Borrar por el ORM eliminaba en cascada a los pacientes y terapeutas de esas
+        ubicaciones; ahora el truncado se niega si alguno las usa.
+        """
+        in_use = []
+        for model in (Region, Province, District):
+            for rel in model._meta.related_objects:
+                related = rel.related_model
+                if related._meta.app_label == "ubi_geo":
+                    continue
+                if related._base_manager.filter(**{f"{rel.field.name}__isnull": False}).exists():
+                    in_use.append(f"{related._meta.verbose_name_plural} ({rel.field.name})")
+        if in_use:
+            raise CommandError(
+                "No se puede usar --truncate: hay registros que usan las ubicaciones: "
+                f"{', '.join(in_use)}. Importe sin --truncate para actualizar en su lugar."
+            )
+
+    def _truncate(self):
+        self.stdout.write(self.style.WARNING("Truncando Region/Province/District…"))
+        with connection.cursor() as cursor:
+            for model in (District, Province, Region):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+    # --- Diferencias ---
+
+    def _import(self, rows, fresh):
+        """
+        Calcula y aplica las diferencias nivel por nivel. Los hijos se vinculan con su
+        padre por el código del CSV; en la simulación un padre nuevo no tiene id (Pending)
+        y todos sus hijos cuentan como altas.
+        """
+        diff = {"countries": self._countries(rows["countries"])}
+
+        country = Country.objects.filter(ISO2=self.iso2).values_list("id", flat=True).first()
+        if country is None:
+            country = next((Pending(self.iso2) for c in diff["countries"]["insert"] if c.ISO2 == self.iso2), None)
+        if country is None:
+            raise CommandError(f"No existe Country ISO2={self.iso2}")
+
+        diff["regions"], regions = self._level(
+            "regions", Region, "country_id", rows["regions"], lambda row: country, fresh,
+        )
+        diff["provinces"], provinces = self._level(
+            "provinces", Province, "region_id", rows["provinces"],
+            lambda row: regions.get(getv(row, "region_code", "region_id")), fresh,
+        )
+        diff["districts"], _ = self._level(
+            "districts", District, "province_id", rows["districts"],
+            lambda row: provinces.get(getv(row, "province_code", "province_id")), fresh,
+        )
+        return diff
+
+    def _countries(self, rows):
+        with self._timed("countries: diferencias"):
+            by_iso2, by_name = {}, {}
+            for country in Country.objects.order_by("id"):
+                if country.ISO2:
+                    by_iso2.setdefault(country.ISO2, country)
+                else:
+                    by_name.setdefault(country.name, country)
+
+            # Con ISO2 repetido gana la última fila, como con update_or_create fila a fila
+            latest = {}
+            unchanged = skip = 0
+            for row in rows:
+                name = getv(row, "name", "Name")
+                phone_code = getv(row, "phone_code", "PhoneCode") or None
+                ISO2 = getv(row, "ISO2", "iso2").upper()
+                if not name:
+                    skip += 1
+                    continue
+                key = ISO2 or name
+                if key in latest:
+                    unchanged += 1
+                latest[key] = (name, phone_code, ISO2)
+
+            insert, update = [], []
+            now = timezone.now()
+            for name, phone_code, ISO2 in latest.values():
+                existing = by_iso2.get(ISO2) if ISO2 else by_name.get(name)
+                if existing is None:
+                    insert.append(Country(name=name, phone_code=phone_code, ISO2=ISO2 or None))
+                elif (existing.name, existing.phone_code) != (name, phone_code):
+                    existing.name, existing.phone_code, existing.updated_at = name, phone_code, now
+                    update.append(existing)
+                else:
+                    unchanged += 1
+
+        if self.apply:
+            with self._timed("countries: escritura"):
+                Country.objects.bulk_create(insert, batch_size=self.batch_size)
+                Country.objects.bulk_update(update, ["name", "phone_code", "updated_at"], batch_size=self.batch_size)
+        return {"insert": insert, "update": update, "unchanged": unchanged, "skip": skip}
+
+    def _level(self, label, model, parent_field, rows, parent_of, fresh):
+        """
+        Región, provincia o distrito. La clave natural es (padre, nombre), como en el
+        update_or_create de antes; no hay más columnas que actualizar, así que cada fila
+        del CSV es un alta o queda igual. Devuelve el diff y {código del CSV: id del padre
+        para el siguiente nivel} (Pending para las altas de una simulación).
+        """
+        with self._timed(f"{label}: diferencias"):
+            existing = {}
+            if not fresh:
+                for pk, parent_id, name in model.objects.order_by("id").values_list("id", parent_field, "name"):
+                    existing.setdefault((parent_id, name), pk)
+
+            insert = []
+            planned = {}
+            codes = {}
+            unchanged = skip = 0
+            for row in rows:
+                code = getv(row, "code", "ubigeo_code")
+                name = getv(row, "name", "Nombre")
+                parent = parent_of(row)
+                if not (name and parent is not None):
+                    skip += 1
+                    continue
+                key = (parent, name)
+                if key in existing:
+                    unchanged += 1
+                elif key in planned:
+                    unchanged += 1
+                else:
+                    instance = model(name=name)
+                    instance.parent = parent
+                    planned[key] = instance
+                    insert.append(instance)
+                if code:
+                    codes[code] = key
+
+        if not self.apply:
+            pending = {key: Pending(f"{key[1]} (nuevo)") for key in planned}
+            ids = {**existing, **pending}
+            return {"insert": insert, "update": [], "unchanged": unchanged, "skip": skip}, {
+                code: ids[key] for code, key in codes.items()
+            }
+
+        with self._timed(f"{label}: escritura"):
+            for instance in insert:
+                setattr(instance, parent_field, instance.parent)
+            model.objects.bulk_create(insert, batch_size=self.batch_size)
+            # MySQL no devuelve los ids de un INSERT múltiple: se releen por (padre, nombre)
+            if insert:
+                parents = {key[0] for key in planned}
+                existing.update(
+                    ((parent_id, name), pk)
+                    for pk, parent_id, name in model.objects.filter(**{f"{parent_field}__in": parents})
+                    .order_by("id").values_list("id", parent_field, "name")
+                    if (parent_id, name) in planned and (parent_id, name) not in existing
+                )
+        return {"insert": insert, "update": [], "unchanged": unchanged, "skip": skip}, {
+            code: existing[key] for code, key in codes.items()
+        }
+
+    # --- Informe ---
+
+    def _report(self, diff, show):
+        for label, level in diff.items():
+            self.stdout.write(
+                f"{label.capitalize()}: +{len(level['insert'])} upd:{len(level['update'])} "
+                f"igual:{level['unchanged']} skip:{level['skip']}"
+            )
+            for kind, items in (("+", level["insert"]), ("~", level["update"])):
+                for item in items[:show]:
+                    parent = getattr(item, "parent", None)
+                    if isinstance(parent, int):
+                        parent = f"#{parent}"
+                    self.stdout.write(f"   {kind} {item.name}" + (f" ← {parent}" if parent is not None else ""))
+                if len(items) > show > 0:
+                    self.stdout.write(f"   … y {len(items) - show} más")
+
+    @contextmanager
+    def _timed(self, label):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((label, time.perf_counter() - started))
+
+    def _report_timings(self):
+        total = sum(seconds for _label, seconds in self.timings)
+        self.stdout.write("Tiempos: " + ", ".join(f"{label} {seconds:.2f}s" for label, seconds in self.timings))
+        self.stdout.write(f"Total: {total:.2f}s")
@@ -0,0 +1,47 @@
+from rest_framework import serializers
+
+from ubi_geo.services.geo_tree import LEVELS, geo_tree
+
+
+class GeoPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField de región, provincia o distrito resuelto con el árbol
+    geográfico en memoria: no consulta la base y devuelve una instancia lista para
+    asignar a la clave foránea.
+    """
+
+    def __init__(self, level, **kwargs):
+        self.level = level
+        kwargs.setdefault("queryset", LEVELS[level][0].objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        node = geo_tree.node(self.level, data)
+        if node is None:
+            # Mismos errores que PrimaryKeyRelatedField (inexistente o tipo incorrecto)
+            return super().to_internal_value(data)
+        return node.instance()
+
+
+class GeoNestedField(serializers.Field):
+    """
+    Región, provincia o distrito anidado (solo lectura) tal como lo serializa su
+    serializer, tomado del árbol en memoria por el id de la clave foránea
+    (source="<nivel>_id"): no carga el objeto relacionado.
+    """
+
+    def __init__(self, level, **kwargs):
+        self.level = level
+        kwargs["read_only"] = True
+        kwargs.setdefault("source", f"{level}_id")
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        node = geo_tree.get().get(self.level, value)
+        if node is not None:
+            return dict(node.data)
+        model, serializer, related, _parent = LEVELS[self.level]
+        instance = model.objects.select_related(*related).filter(pk=value).first()
+        return serializer(instance).data if instance is not None else None
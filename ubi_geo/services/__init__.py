@@ -0,0 +1,13 @@
+# Services package
+from .geo_tree import GeoNode, GeoTree, GeoTreeCache, geo_tree
+from .location_tree_service import LocationTreePayload, LocationTreeService, location_tree
+
+__all__ = [
+    'GeoNode',
+    'GeoTree',
+    'GeoTreeCache',
+    'geo_tree',
+    'LocationTreePayload',
+    'LocationTreeService',
+    'location_tree',
+]
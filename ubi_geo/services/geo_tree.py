@@ -0,0 +1,183 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from ubi_geo.models import Country, District, Province, Region
+from ubi_geo.serializers.district import DistrictSerializer
+from ubi_geo.serializers.province import ProvinceSerializer
+from ubi_geo.serializers.region import RegionSerializer
+
+
+REGION = "region"
+PROVINCE = "province"
+DISTRICT = "district"
+
+# Modelo, serializer, select_related y campo padre de cada nivel
+LEVELS = {
+    REGION: (Region, RegionSerializer, (), "country_id"),
+    PROVINCE: (Province, ProvinceSerializer, ("region",), "region_id"),
+    DISTRICT: (District, DistrictSerializer, ("province__region",), "province_id"),
+}
+
+
+class GeoNode:
+    """Región, provincia o distrito del árbol: id, nombre, id del padre y su serialización."""
+
+    __slots__ = ("level", "id", "name", "parent_id", "data", "deleted")
+
+    def __init__(self, level, id, name, parent_id, data, deleted=False):
+        self.level = level
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+        self.data = data
+        self.deleted = deleted
+
+    def instance(self):
+        """
+        Instancia del modelo sin ir a la base (id, nombre y padre cargados; el resto
+        diferido). Sirve para asignarla a una clave foránea.
+        """
+        model, _serializer, _related, parent_field = LEVELS[self.level]
+        return model.from_db(connection.alias, ["id", "name", parent_field], [self.id, self.name, self.parent_id])
+
+
+class GeoTree:
+    """
+    Foto inmutable de regiones, provincias y distritos (~2k filas de db/*.csv), con el
+    enlace a su padre y el dict que produce su serializer ya armado. children indexa
+    los hijos vigentes (sin deleted_at) de cada padre, ordenados por nombre; derived
+    guarda lo que se calcula a partir de esta versión (p. ej. las respuestas de
+    LocationTreeService), así que se descarta junto con el árbol.
+    """
+
+    def __init__(self, version, countries, nodes):
+        self.version = version
+        self.countries = countries
+        self.nodes = nodes
+        self.children = {}
+        for level, level_nodes in nodes.items():
+            by_parent = self.children[level] = {}
+            for node in sorted(level_nodes.values(), key=lambda node: (node.name, node.id)):
+                if not node.deleted:
+                    by_parent.setdefault(node.parent_id, []).append(node)
+        self.derived = {}
+
+    @classmethod
+    def load(cls, version):
+        countries = {
+            pk: (name, iso2)
+            for pk, name, iso2 in Country.objects.filter(deleted_at__isnull=True).values_list("id", "name", "ISO2")
+        }
+        nodes = {}
+        for level, (model, serializer, related, parent_field) in LEVELS.items():
+            queryset = model.objects.select_related(*related).order_by("id")
+            nodes[level] = {
+                row["id"]: GeoNode(
+                    level, row["id"], row["name"], row[parent_field.removesuffix("_id")], dict(row),
+                    deleted=row["deleted_at"] is not None,
+                )
+                for row in serializer(queryset, many=True).data
+            }
+        return cls(version, countries, nodes)
+
+    def get(self, level, pk):
+        try:
+            return self.nodes[level].get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def region(self, pk):
+        return self.get(REGION, pk)
+
+    def province(self, pk):
+        return self.get(PROVINCE, pk)
+
+    def district(self, pk):
+        return self.get(DISTRICT, pk)
+
+    def __len__(self):
+        return sum(len(nodes) for nodes in self.nodes.values())
+
+
+class GeoTreeCache:
+    """
+    Árbol geográfico en memoria del proceso, versionado con una clave en Redis
+    (ubi_geo:tree:version). Cada proceso lo carga una vez y, como mucho cada
+    GEO_TREE_CHECK_SECONDS, compara su versión con la de Redis; invalidate()
+    incrementa esa versión (import_ubigeo, admin o cualquier guardado de Region,
+    Province o District) y todos los procesos lo recargan en su siguiente revisión.
+    """
+
+    VERSION_KEY = "ubi_geo:tree:version"
+
+    def __init__(self):
+        self._tree = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(self):
+        """Árbol vigente; lo (re)carga si no hay uno o si cambió la versión en Redis."""
+        tree = self._tree
+        now = time.monotonic()
+        if tree is not None and now - self._checked_at < self._check_interval():
+            return tree
+
+        version = cache.get(self.VERSION_KEY)
+        if tree is not None and tree.version == version:
+            self._checked_at = now
+            return tree
+
+        with self._lock:
+            if self._tree is None or self._tree.version != version:
+                # La versión se lee antes que los datos: un cambio posterior fuerza otra recarga
+                self._tree = GeoTree.load(version)
+            self._checked_at = now
+            return self._tree
+
+    def node(self, level, pk):
+        """
+        Nodo del árbol vigente. Un id que aún no está (alta reciente vista por otro
+        proceso antes de su próxima revisión) se lee de la base, sin serialización.
+        """
+        node = self.get().get(level, pk)
+        if node is not None or pk in (None, ""):
+            return node
+        model, _serializer, _related, parent_field = LEVELS[level]
+        try:
+            row = model.objects.filter(pk=pk).values_list("id", "name", parent_field).first()
+        except (TypeError, ValueError):
+            return None
+        return GeoNode(level, *row, None) if row is not None else None
+
+    def invalidate(self):
+        """Nueva versión en Redis; este proceso descarta su árbol en el acto."""
+        try:
+            cache.incr(self.VERSION_KEY)
+        except ValueError:
+            if not cache.add(self.VERSION_KEY, 1, None):
+                cache.incr(self.VERSION_KEY)
+        self._tree = None
+
+    def invalidate_on_commit(self):
+        """Invalida una sola vez por transacción, al confirmarla (fuera de una, en el acto)."""
+        # Cada llamada registra su callback (Django descarta los de un savepoint revertido);
+        # el primero que corre invalida y los demás encuentran la marca ya limpia
+        self._local.invalidate_pending = True
+        transaction.on_commit(self._invalidate_pending, robust=True)
+
+    def _invalidate_pending(self):
+        if getattr(self._local, "invalidate_pending", False):
+            self._local.invalidate_pending = False
+            self.invalidate()
+
+    @staticmethod
+    def _check_interval():
+        return getattr(settings, "GEO_TREE_CHECK_SECONDS", 5)
+
+
+geo_tree = GeoTreeCache()
@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+
+from .geo_tree import DISTRICT, PROVINCE, REGION, geo_tree
+
+
+COUNTRY = "country"
+
+# Nivel de cada subárbol y la clave con la que se listan sus hijos
+CHILDREN = {
+    COUNTRY: (REGION, "regions"),
+    REGION: (PROVINCE, "provinces"),
+    PROVINCE: (DISTRICT, "districts"),
+    DISTRICT: (None, None),
+}
+
+
+class LocationTreePayload:
+    """Respuesta ya lista: JSON compacto, su versión gzip y el ETag fuerte de ambos."""
+
+    __slots__ = ("body", "gzip_body", "etag")
+
+    def __init__(self, body):
+        self.body = body
+        # mtime=0: los mismos datos dan los mismos bytes en todos los procesos
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+    def etag_for(self, encoding=None):
+        """ETag de la representación: la comprimida lleva su propio sufijo (RFC 9110 §8.8.3)."""
+        return f'"{self.etag}-gzip"' if encoding == "gzip" else f'"{self.etag}"'
+
+    def matches(self, if_none_match):
+        """True si If-None-Match nombra esta respuesta (en cualquiera de sus codificaciones)."""
+        for tag in (if_none_match or "").split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            tag = tag.removeprefix("W/").strip('"')
+            if tag.removesuffix("-gzip") == self.etag:
+                return True
+        return False
+
+
+class LocationTreeService:
+    """
+    Árbol país → región → provincia → distrito (o el subárbol de un nodo) para los
+    selectores en cascada, armado desde el árbol geográfico en memoria. Cada subárbol
+    se serializa y comprime una sola vez por versión del árbol: se guarda en
+    GeoTree.derived y se descarta cuando geo_tree recarga una versión nueva.
+    """
+
+    def __init__(self, cache=geo_tree):
+        self.cache = cache
+
+    def payload(self, level=None, pk=None):
+        """
+        Respuesta del árbol completo (level=None) o del subárbol de un país (id o
+        ISO2), región o provincia. None si el nodo no existe o está eliminado.
+        """
+        tree = self.cache.get()
+        if level is None:
+            key = (None, None)
+        else:
+            pk = self._resolve(tree, level, pk)
+            if pk is None:
+                return None
+            key = (level, pk)
+
+        payload = tree.derived.get(key)
+        if payload is None:
+            if level is None:
+                data = {"countries": [
+                    self._country(tree, country_id)
+                    for country_id in sorted(tree.countries, key=lambda pk: (tree.countries[pk][0], pk))
+                    if tree.children[REGION].get(country_id)
+                ]}
+            elif level == COUNTRY:
+                data = self._country(tree, pk)
+            else:
+                data = self._node(tree, tree.get(level, pk))
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+            payload = tree.derived[key] = LocationTreePayload(body)
+        return payload
+
+    @staticmethod
+    def max_age():
+        return getattr(settings, "LOCATION_TREE_MAX_AGE", 86400)
+
+    # --- Armado ---
+
+    @staticmethod
+    def _resolve(tree, level, pk):
+        if level == COUNTRY:
+            if isinstance(pk, str) and not pk.isdigit():
+                iso2 = pk.strip().upper()
+                return next((cid for cid, (_name, code) in tree.countries.items() if code == iso2), None)
+            try:
+                pk = int(pk)
+            except (TypeError, ValueError):
+                return None
+            return pk if pk in tree.countries else None
+        node = tree.get(level, pk)
+        return node.id if node is not None and not node.deleted else None
+
+    def _country(self, tree, pk):
+        name, iso2 = tree.countries[pk]
+        return {
+            "id": pk,
+            "name": name,
+            "iso2": iso2,
+            "regions": [self._node(tree, region) for region in tree.children[REGION].get(pk, ())],
+        }
+
+    def _node(self, tree, node):
+        data = {"id": node.id, "name": node.name}
+        child_level, key = CHILDREN[node.level]
+        if child_level is not None:
+            data[key] = [self._node(tree, child) for child in tree.children[child_level].get(node.id, ())]
+        return data
+
+
+location_tree = LocationTreeService()
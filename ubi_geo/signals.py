@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Country, District, Province, Region
+from .services.geo_tree import geo_tree
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=Province)
+@receiver(post_delete, sender=Province)
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=District)
+def invalidate_geo_tree(sender, **kwargs):
+    """
+    Cualquier cambio de la ubicación (admin, import_ubigeo, shell) publica una nueva
+    versión del árbol geográfico al confirmarse la transacción, una vez por transacción.
+    """
+    geo_tree.invalidate_on_commit()
@@ -2,9 +2,11 @@
 from .region import RegionViewSet
 from .province import ProvinceViewSet
 from .district import DistrictViewSet
+from .location_tree import LocationTreeView
 
 __all__ = [
     'RegionViewSet',
     'ProvinceViewSet',
-    'DistrictViewSet'
+    'DistrictViewSet',
+    'LocationTreeView',
 ]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ubi_geo.services.geo_tree import PROVINCE, REGION
+from ubi_geo.services.location_tree_service import COUNTRY, location_tree
+
+
+class LocationTreeView(APIView):
+    """
+    GET /api/locations/tree/                 -> árbol completo país → región → provincia → distrito
+    GET /api/locations/tree/?country=PE      -> regiones de un país (id o ISO2), con sus hijos
+    GET /api/locations/tree/?region={id}     -> provincias y distritos de una región
+    GET /api/locations/tree/?province={id}   -> distritos de una provincia
+
+    La respuesta se arma una vez por versión del árbol y se sirve ya serializada (y
+    comprimida si el cliente acepta gzip), con ETag fuerte: una revalidación con
+    If-None-Match responde 304 sin cuerpo.
+    """
+
+    LEVEL_PARAMS = (COUNTRY, REGION, PROVINCE)
+
+    def get(self, request):
+        params = [level for level in self.LEVEL_PARAMS if request.query_params.get(level)]
+        if len(params) > 1:
+            return Response(
+                {"error": f"Indique solo uno de: {', '.join(self.LEVEL_PARAMS)}"},
+                status=400,
+            )
+        level = params[0] if params else None
+        payload = location_tree.payload(level, request.query_params.get(level) if level else None)
+        if payload is None:
+            return Response({"error": "Ubicación no encontrada"}, status=404)
+
+        encoding = "gzip" if self._accepts_gzip(request) else None
+        if payload.matches(request.headers.get("If-None-Match")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                payload.gzip_body if encoding else payload.body,
+                content_type="application/json; charset=utf-8",
+            )
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = payload.etag_for(encoding)
+        # Solo para usuarios autenticados: ningún caché compartido debe guardarla
+        response["Cache-Control"] = f"private, max-age={location_tree.max_age()}"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    @staticmethod
+    def _accepts_gzip(request):
+        for coding in request.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = coding.strip().partition(";")
+            if name.strip().lower() == "gzip":
+                return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+        return False